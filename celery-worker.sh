@@ -1,2 +1,61 @@
 #!/bin/sh
-celery -A project.celeryapp:app worker -l info
+# One worker per queue (see TASK_QUEUE_ROUTES in project/celeryapp.py), picked by
+# CELERY_WORKER_PROFILE. The default "all" profile consumes every queue, which is
+# what a single worker service needs. To isolate workloads, run one service per
+# profile instead, e.g. CELERY_WORKER_PROFILE=webhooks and CELERY_WORKER_PROFILE=email,
+# and make sure every queue has a worker.
+#
+# CELERY_WORKER_CONCURRENCY and CELERY_WORKER_PREFETCH override the profile.
+PROFILE="${CELERY_WORKER_PROFILE:-all}"
+
+case "$PROFILE" in
+  all)
+    # Concurrency defaults to the number of CPUs.
+    QUEUES="default,webhooks,email,billing,housekeeping,jobs"
+    CONCURRENCY=""
+    PREFETCH=1
+    ;;
+  webhooks)
+    # Short, network-bound deliveries: many slots, a small prefetch buffer.
+    QUEUES="webhooks"
+    CONCURRENCY=8
+    PREFETCH=4
+    ;;
+  email)
+    # Latency-sensitive (password resets, invitations) and quick to send.
+    QUEUES="email"
+    CONCURRENCY=2
+    PREFETCH=4
+    ;;
+  billing)
+    # Billing state changes for one billable must not race each other.
+    QUEUES="billing"
+    CONCURRENCY=1
+    PREFETCH=1
+    ;;
+  housekeeping)
+    # Beat-scheduled sweeps; throughput does not matter, DB load does.
+    QUEUES="housekeeping,default"
+    CONCURRENCY=1
+    PREFETCH=1
+    ;;
+  jobs)
+    # Long-running user jobs and their chunks: never hoard work.
+    QUEUES="jobs"
+    CONCURRENCY=2
+    PREFETCH=1
+    ;;
+  *)
+    echo "Unknown CELERY_WORKER_PROFILE: $PROFILE" >&2
+    exit 1
+    ;;
+esac
+
+CONCURRENCY="${CELERY_WORKER_CONCURRENCY:-$CONCURRENCY}"
+PREFETCH="${CELERY_WORKER_PREFETCH:-$PREFETCH}"
+
+exec celery -A project.celeryapp:app worker -l info \
+  -Q "$QUEUES" \
+  -n "$PROFILE@%h" \
+  --prefetch-multiplier "$PREFETCH" \
+  ${CONCURRENCY:+--concurrency "$CONCURRENCY"}
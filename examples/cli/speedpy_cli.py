@@ -3,7 +3,7 @@
 SpeedPy CLI — minimal example for machine clients.
 
 Authenticates via OAuth2 device flow or a personal access token (PAT),
-then calls /api/v1/me/ and /api/v1/teams/.
+then calls /api/v1/me/ and /api/v1/teams/, or streams an export to a file.
 
 Usage:
     # First-time setup (interactive, opens browser):
@@ -16,6 +16,10 @@ Usage:
     # Personal access token (good for CI):
     python speedpy_cli.py --base-url http://localhost:8000 --token spd_<HEX> me
 
+    # Stream a full export; --resume continues an interrupted one:
+    python speedpy_cli.py export members --team <TEAM_ID> --output members.ndjson
+    python speedpy_cli.py export webhook-deliveries --team <TEAM_ID> --format csv --output d.csv --resume
+
     # JSON output for scripting:
     python speedpy_cli.py --json me
 
@@ -36,6 +40,8 @@ Setup:
 from __future__ import annotations
 
 import argparse
+import csv
+import io
 import json
 import os
 import sys
@@ -261,24 +267,8 @@ def get_token(args: argparse.Namespace) -> str:
 # API helpers
 # ---------------------------------------------------------------------------
 
-def api_get(base_url: str, path: str, token: str, *, json_mode: bool = False) -> dict:
-    """GET an API endpoint and return parsed JSON."""
-    url = f"{base_url}{path}"
-    try:
-        resp = httpx.get(url, headers={"Authorization": f"Bearer {token}"})
-    except httpx.RequestError:
-        _output_error(
-            f"Network error: cannot reach {base_url}",
-            json_mode=json_mode,
-            code=EXIT_NETWORK_ERROR,
-        )
-    except httpx.HTTPError as exc:
-        _output_error(
-            f"HTTP error: {exc}",
-            json_mode=json_mode,
-            code=EXIT_GENERAL_ERROR,
-        )
-
+def _check_status(resp: httpx.Response, path: str, *, json_mode: bool) -> None:
+    """Exit with the matching exit code if the response is an error."""
     if resp.status_code == 401:
         _output_error(
             "Authentication failed. Check your token or run 'login'.",
@@ -304,6 +294,26 @@ def api_get(base_url: str, path: str, token: str, *, json_mode: bool = False) ->
             code=EXIT_VALIDATION_ERROR,
         )
 
+
+def api_get(base_url: str, path: str, token: str, *, json_mode: bool = False) -> dict:
+    """GET an API endpoint and return parsed JSON."""
+    url = f"{base_url}{path}"
+    try:
+        resp = httpx.get(url, headers={"Authorization": f"Bearer {token}"})
+    except httpx.RequestError:
+        _output_error(
+            f"Network error: cannot reach {base_url}",
+            json_mode=json_mode,
+            code=EXIT_NETWORK_ERROR,
+        )
+    except httpx.HTTPError as exc:
+        _output_error(
+            f"HTTP error: {exc}",
+            json_mode=json_mode,
+            code=EXIT_GENERAL_ERROR,
+        )
+
+    _check_status(resp, path, json_mode=json_mode)
     return resp.json()
 
 
@@ -365,6 +375,125 @@ def cmd_teams(args: argparse.Namespace) -> None:
         print(json.dumps(data, indent=2))
 
 
+EXPORT_PATHS = {
+    "members": "/api/v1/teams/{team}/members/export/",
+    "webhook-deliveries": "/api/v1/teams/{team}/webhooks/deliveries/export/",
+    "access-logs": "/api/v1/me/access-logs/export/",
+}
+
+
+def _last_csv_record(data: bytes) -> tuple[int, str | None]:
+    """Byte offset just past the last complete CSV record, and its cursor.
+
+    Parsed as CSV from the start, not split on newlines: a quoted cell may
+    contain a newline, so the last newline in the file is not necessarily the
+    end of a row. A record counts once its line ending has arrived; ``strict``
+    turns one cut off inside a quoted cell into an error, not a short row.
+    """
+    text = data.decode("utf-8", "replace")
+    consumed = 0
+
+    def lines():
+        nonlocal consumed
+        for line in io.StringIO(text, newline=""):
+            consumed += len(line)
+            yield line
+
+    end, records, last = 0, 0, None
+    try:
+        for row in csv.reader(lines(), strict=True):
+            if text[consumed - 1] not in "\r\n":
+                break  # cut off before its line ending
+            end, records, last = consumed, records + 1, row
+    except csv.Error:
+        pass  # cut off inside a quoted cell
+    cursor = last[-1] if records > 1 and last else None  # the first record is the header
+    return len(text[:end].encode()), cursor
+
+
+def _last_cursor(path: str, fmt: str) -> str | None:
+    """Cursor of the last complete row in an earlier export file.
+
+    Drops a trailing partial row (the connection died mid-row) so that the
+    resumed rows are appended right after the last complete one.
+    """
+    with open(path, "rb+") as f:
+        data = f.read()
+        if fmt == "csv":
+            end, cursor = _last_csv_record(data)
+        else:
+            end = data.rfind(b"\n") + 1
+            lines = data[:end].decode().splitlines()
+            cursor = json.loads(lines[-1])["_cursor"] if lines else None
+        f.truncate(end)
+    return cursor
+
+
+def cmd_export(args: argparse.Namespace) -> None:
+    """Stream an export (NDJSON or CSV) to a file or stdout."""
+    json_mode = getattr(args, "json", False)
+    if "{team}" in EXPORT_PATHS[args.dataset] and not args.team:
+        _output_error(f"'{args.dataset}' needs --team.", json_mode=json_mode, code=EXIT_CONFIG_ERROR)
+    if args.resume and not args.output:
+        _output_error("--resume needs --output.", json_mode=json_mode, code=EXIT_CONFIG_ERROR)
+
+    path = EXPORT_PATHS[args.dataset].format(team=args.team)
+    params = {"format": args.format}
+    if args.webhook:
+        params["webhook"] = args.webhook
+    if args.status:
+        params["status"] = args.status
+    cursor = args.cursor
+    resuming = bool(args.resume and os.path.isfile(args.output))
+    if resuming:
+        cursor = _last_cursor(args.output, args.format) or cursor
+    if cursor:
+        params["cursor"] = cursor
+
+    token = get_token(args)
+    out = open(args.output, "ab" if resuming else "wb") if args.output else sys.stdout.buffer
+    rows = 0
+    try:
+        with httpx.stream(
+            "GET",
+            f"{args.base_url}{path}",
+            params=params,
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=httpx.Timeout(30.0, read=None),
+        ) as resp:
+            if resp.status_code >= 400:
+                resp.read()
+                _check_status(resp, path, json_mode=json_mode)
+            # A resumed CSV export repeats the header; the file already has it.
+            skip_header = resuming and args.format == "csv" and os.path.getsize(args.output) > 0
+            for chunk in resp.iter_bytes():
+                if skip_header:
+                    newline = chunk.find(b"\n")
+                    if newline == -1:
+                        continue
+                    chunk = chunk[newline + 1:]
+                    skip_header = False
+                out.write(chunk)
+                rows += chunk.count(b"\n")
+    except httpx.RequestError:
+        _output_error(
+            f"Export interrupted after {rows} rows; run again with --resume to continue.",
+            json_mode=json_mode,
+            code=EXIT_NETWORK_ERROR,
+        )
+    finally:
+        if args.output:
+            out.close()
+        else:
+            out.flush()
+
+    if args.output:
+        if json_mode:
+            _output({"status": "ok", "rows": rows, "output": args.output, "resumed": resuming}, json_mode=True)
+        else:
+            print(f"  Wrote {rows} lines to {args.output}", file=sys.stderr)
+
+
 # ---------------------------------------------------------------------------
 # CLI entry point
 # ---------------------------------------------------------------------------
@@ -412,13 +541,26 @@ def main() -> None:
     sub.add_parser("login", help="Authenticate via device flow and save credentials")
     sub.add_parser("me", help="Show current user profile")
     sub.add_parser("teams", help="List your teams")
+    export = sub.add_parser("export", help="Stream an export as NDJSON or CSV")
+    export.add_argument("dataset", choices=list(EXPORT_PATHS))
+    export.add_argument("--team", default="", help="Team ID (members, webhook-deliveries)")
+    export.add_argument("--webhook", default="", help="Only this webhook endpoint (webhook-deliveries)")
+    export.add_argument("--status", default="", help="Only deliveries with this status (webhook-deliveries)")
+    export.add_argument("--format", choices=("ndjson", "csv"), default="ndjson")
+    export.add_argument("--output", default="", help="Write to this file instead of stdout")
+    export.add_argument("--cursor", default="", help="Start after the row with this _cursor")
+    export.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted export from the last complete row in --output",
+    )
 
     args = parser.parse_args()
 
     # Apply flags > env > config > default precedence for base_url
     args.base_url = _resolve_base_url(args.base_url)
 
-    commands = {"login": cmd_login, "me": cmd_me, "teams": cmd_teams}
+    commands = {"login": cmd_login, "me": cmd_me, "teams": cmd_teams, "export": cmd_export}
     commands[args.command](args)
 
 
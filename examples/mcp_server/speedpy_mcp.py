@@ -8,6 +8,8 @@ Tools provided:
   - get_current_user: Read the authenticated user's profile (/api/v1/me/)
   - list_teams:       List the user's teams (/api/v1/teams/)
   - list_team_members: List members of a specific team (/api/v1/teams/{id}/members/)
+  - get_workspace_overview: Profile, teams and every team's members, fetched
+                            in two round trips through /api/v1/batch/
 
 Auth:
   Supports PAT (personal access token) or OAuth2 device flow.
@@ -59,7 +61,7 @@ mcp = FastMCP(
     instructions=(
         "SpeedPy API server. Use get_current_user to read the current user, "
         "list_teams to see available teams, and list_team_members for team "
-        "member details."
+        "member details. get_workspace_overview returns all three at once."
     ),
 )
 
@@ -140,8 +142,39 @@ def _get_token() -> str:
     return ""
 
 
-def _api_get(path: str) -> dict:
-    """Authenticated GET against the SpeedPy API.
+def _status_error(status: int, path: str) -> dict | None:
+    """Structured error for a non-2xx/304 status, or None on success."""
+    if status == 401:
+        global _cached_token
+        _cached_token = ""
+        return {
+            "error": "authentication_failed",
+            "message": "Token may be expired or revoked.",
+            "status": 401,
+        }
+    if status == 403:
+        return {
+            "error": "forbidden",
+            "message": "Token may lack required scopes.",
+            "status": 403,
+        }
+    if status == 404:
+        return {
+            "error": "not_found",
+            "message": f"Not found: {path}",
+            "status": 404,
+        }
+    if status >= 400:
+        return {
+            "error": "api_error",
+            "message": f"HTTP {status}",
+            "status": status,
+        }
+    return None
+
+
+def _api_request(method: str, path: str, json: dict | None = None) -> dict:
+    """Authenticated request against the SpeedPy API.
 
     Returns the JSON response on success, or a structured error dict on
     failure (missing config, auth errors, network issues, non-JSON bodies).
@@ -158,8 +191,10 @@ def _api_get(path: str) -> dict:
 
     url = f"{BASE_URL}{path}"
     try:
-        resp = httpx.get(
+        resp = httpx.request(
+            method,
             url,
+            json=json,
             headers={"Authorization": f"Bearer {token}"},
         )
     except httpx.ConnectError:
@@ -173,33 +208,9 @@ def _api_get(path: str) -> dict:
             "message": str(exc),
         }
 
-    if resp.status_code == 401:
-        global _cached_token
-        _cached_token = ""
-        return {
-            "error": "authentication_failed",
-            "message": "Token may be expired or revoked.",
-            "status": 401,
-        }
-    if resp.status_code == 403:
-        return {
-            "error": "forbidden",
-            "message": "Token may lack required scopes.",
-            "status": 403,
-        }
-    if resp.status_code == 404:
-        return {
-            "error": "not_found",
-            "message": f"Not found: {path}",
-            "status": 404,
-        }
-
-    if resp.status_code >= 400:
-        return {
-            "error": "api_error",
-            "message": f"HTTP {resp.status_code}",
-            "status": resp.status_code,
-        }
+    error = _status_error(resp.status_code, path)
+    if error:
+        return error
 
     content_type = resp.headers.get("content-type", "")
     if "json" not in content_type:
@@ -211,6 +222,37 @@ def _api_get(path: str) -> dict:
     return resp.json()
 
 
+def _api_get(path: str) -> dict:
+    """Authenticated GET against the SpeedPy API."""
+    return _api_request("GET", path)
+
+
+def _api_batch(paths: dict[str, str]) -> dict:
+    """Run several GETs in one round trip via ``POST /api/v1/batch/``.
+
+    ``paths`` maps a caller-chosen key to an API path.  Returns the same keys
+    mapped to each response body, or to the structured error ``_api_get``
+    would have returned for that path.  If the batch call itself fails, every
+    key maps to that error.
+    """
+    result = _api_request(
+        "POST",
+        "/api/v1/batch/",
+        json={
+            "requests": [
+                {"id": key, "method": "GET", "path": path}
+                for key, path in paths.items()
+            ]
+        },
+    )
+    if "error" in result:
+        return {key: result for key in paths}
+    return {
+        item["id"]: _status_error(item["status"], paths[item["id"]]) or item["body"]
+        for item in result["responses"]
+    }
+
+
 # ---------------------------------------------------------------------------
 # MCP Tools
 # ---------------------------------------------------------------------------
@@ -267,6 +309,36 @@ def list_team_members(team_id: str, page: int | None = None) -> dict:
     return _api_get(path)
 
 
+@mcp.tool()
+def get_workspace_overview() -> dict:
+    """Get the user's profile, teams, and the members of each team.
+
+    Uses the batch endpoint: one request for the profile and team list, one
+    for the members of every team (first page of each), instead of 2 + N
+    separate calls.
+
+    Requires scopes: read:profile, read:teams
+    Endpoint: POST /api/v1/batch/
+    """
+    first = _api_batch({"me": "/api/v1/me/", "teams": "/api/v1/teams/"})
+    teams = first["teams"]
+    if "error" in teams:
+        return {"me": first["me"], "teams": teams}
+
+    team_list = teams.get("results", teams) if isinstance(teams, dict) else teams
+    members = {}
+    if team_list:
+        members = _api_batch({
+            team["id"]: f"/api/v1/teams/{team['id']}/members/" for team in team_list
+        })
+    return {
+        "me": first["me"],
+        "teams": [
+            {**team, "members": members.get(team["id"])} for team in team_list
+        ],
+    }
+
+
 # ---------------------------------------------------------------------------
 # Entry point
 # ---------------------------------------------------------------------------
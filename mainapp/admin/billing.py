@@ -42,7 +42,7 @@ class BillingSubscriptionAdmin(admin.ModelAdmin):
 
 @admin.register(BillingEventLog)
 class BillingEventLogAdmin(admin.ModelAdmin):
-    list_display = ("provider", "event_id", "event_type", "processed_at", "created_at")
-    list_filter = ("provider", "event_type")
-    search_fields = ("event_id", "event_type")
-    readonly_fields = ("payload", "processed_at", "created_at", "updated_at")
+    list_display = ("provider", "event_id", "event_type", "processed_at", "attempts", "failed_at", "created_at")
+    list_filter = ("provider", "event_type", ("failed_at", admin.EmptyFieldListFilter))
+    search_fields = ("event_id", "event_type", "billable_key")
+    readonly_fields = ("payload", "processed_at", "attempts", "failed_at", "last_error", "created_at", "updated_at")
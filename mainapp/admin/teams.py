@@ -12,25 +12,54 @@ class TeamAdmin(admin.ModelAdmin):
     collector performs without ever calling ``Model.delete()`` — so it bypassed
     the subscription rule as well, and staff could delete a team the provider
     was still charging.
+
+    Both now schedule the team for deletion right away and start its
+    teardown; the purge task deletes the rows.
     """
 
     prepopulated_fields = {'slug': ('name',)}
 
     def _delete(self, request, team):
-        """Delete one team, reporting a refusal instead of raising a 500."""
+        """Start deleting one team, reporting a refusal instead of raising a 500.
+
+        The team is marked due now, its hooks run and it is deactivated; the
+        purge task then deletes its rows in batches once the admin's
+        transaction commits, instead of inside it.
+        """
+        from django.db import transaction
+        from django.utils import timezone
+
         from mainapp.models.teams import (
             TeamCleanupFailed,
             TeamDeletionBlocked,
-            finalize_team_deletion,
+            queue_team_purge,
+            start_team_teardown,
         )
 
         try:
-            finalize_team_deletion(team, require_due=False)
+            with transaction.atomic():
+                team = Team.objects.select_for_update().get(pk=team.pk)
+                if not team.teardown_started_at:
+                    now = timezone.now()
+                    if not team.deletion_requested_at:
+                        team.deletion_requested_at = now
+                        team.deletion_requested_by = request.user
+                    team.deletion_scheduled_at = now
+                    team.save(
+                        update_fields=[
+                            "deletion_scheduled_at",
+                            "deletion_requested_at",
+                            "deletion_requested_by",
+                            "updated_at",
+                        ]
+                    )
+                    start_team_teardown(team)
         except (TeamDeletionBlocked, TeamCleanupFailed) as exc:
             self.message_user(
                 request, f"{team.name}: {exc}", level=messages.ERROR
             )
             return False
+        queue_team_purge()
         return True
 
     def delete_model(self, request, obj):
@@ -2,20 +2,41 @@
 Async job API — start a demo job (202 Accepted) and poll for status.
 
 Endpoints:
-    POST /api/v1/jobs/demo/   — SPEEDPY_DEMO: enqueue a demo job, return 202 + status URL
-    GET  /api/v1/jobs/{id}/   — reusable job status polling (keep for production use)
+    POST /api/v1/jobs/demo/         — SPEEDPY_DEMO: enqueue a demo job, return 202 + status URL
+    GET  /api/v1/jobs/{id}/         — reusable job status polling (keep for production use)
+    GET  /api/v1/jobs/{id}/events/  — Server-Sent Events stream of the same representation
+    GET  /api/v1/jobs/{id}/result/  — download a result stored as a file (mainapp/jobs/results.py)
+    POST /api/v1/jobs/{id}/cancel/  — stop a chunked job (mainapp/jobs/chunked.py)
+    POST /api/v1/jobs/{id}/resume/  — continue a cancelled or failed chunked job
+
+The events stream is an async view: under ASGI (uvicorn, daphne) a watcher
+holds a coroutine rather than a worker thread. Under WSGI (the stock
+``web.sh`` gunicorn) a stream would pin a sync worker for minutes, so the view
+answers with the current state only and a ``retry`` hint, and ``EventSource``
+falls back to polling.
 """
 
+import asyncio
+import time
+
 import structlog
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
 from django.db import transaction
-from drf_spectacular.utils import OpenApiExample, OpenApiResponse, extend_schema
+from django.http import FileResponse, HttpResponse, HttpResponseRedirect, StreamingHttpResponse
+from drf_spectacular.utils import OpenApiExample, OpenApiResponse, extend_schema, extend_schema_field
 from rest_framework import serializers, status
 from rest_framework.exceptions import NotFound
 from rest_framework.response import Response
 from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 
+from mainapp.jobs import apply_progress, cancel_job, events, get_job_type, read_progress, resume_job
+from mainapp.jobs.results import result_file_metadata
 from mainapp.models.jobs import AsyncJob
+from speedpycom.api import codec
+from speedpycom.api.conditional import ConditionalGetMixin
 from speedpycom.api.permissions import HasScope
 
 logger = structlog.get_logger(__name__)
@@ -25,6 +46,13 @@ logger = structlog.get_logger(__name__)
 # Serializers
 # ---------------------------------------------------------------------------
 
+class JobResultFileSerializer(serializers.Serializer):
+    filename = serializers.CharField(read_only=True)
+    content_type = serializers.CharField(read_only=True)
+    size = serializers.IntegerField(read_only=True, allow_null=True)
+    download_url = serializers.CharField(read_only=True)
+
+
 class AsyncJobSerializer(serializers.Serializer):
     id = serializers.UUIDField(read_only=True)
     job_type = serializers.CharField(read_only=True)
@@ -33,11 +61,22 @@ class AsyncJobSerializer(serializers.Serializer):
     progress_total = serializers.IntegerField(read_only=True)
     message = serializers.CharField(read_only=True)
     result = serializers.JSONField(read_only=True)
+    result_file = serializers.SerializerMethodField()
     error = serializers.CharField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     started_at = serializers.DateTimeField(read_only=True, allow_null=True)
     finished_at = serializers.DateTimeField(read_only=True, allow_null=True)
 
+    @extend_schema_field(JobResultFileSerializer(allow_null=True))
+    def get_result_file(self, job):
+        metadata = result_file_metadata(job)
+        if metadata is None:
+            return None
+        url = reverse("api:job_result", kwargs={"job_id": job.pk})
+        request = self.context.get("request")
+        metadata["download_url"] = request.build_absolute_uri(url) if request else url
+        return metadata
+
 
 class AsyncJobCreateResponseSerializer(AsyncJobSerializer):
     status_url = serializers.URLField(read_only=True)
@@ -66,11 +105,12 @@ class DemoJobCreateView(APIView):
             "1. POST to this endpoint to start a job.\n"
             "2. Poll `status_url` every 2-5 seconds.\n"
             "3. Check `status` — continue polling while `queued` or `running`.\n"
-            "4. On `succeeded`, read `result`. On `failed`, read `error`.\n"
+            "4. On `succeeded`, read `result` (or download `result_file.download_url` "
+            "when the result was stored as a file). On `failed`, read `error`.\n"
             "5. Use exponential backoff for production use.\n\n"
-            "**Future evolution:** This polling pattern may be complemented or "
-            "replaced by Server-Sent Events (SSE) for real-time push updates, "
-            "eliminating the need for client-side polling."
+            "**Push instead of polling:** open `status_url` + `events/` "
+            "(`text/event-stream`). It sends the job as a `job` event on connect "
+            "and on every change, and closes after the terminal state."
         ),
         request=None,
         responses={
@@ -88,6 +128,7 @@ class DemoJobCreateView(APIView):
                     "progress_total": 0,
                     "message": "",
                     "result": None,
+                    "result_file": None,
                     "error": "",
                     "created_at": "2026-06-26T12:00:00Z",
                     "started_at": None,
@@ -123,22 +164,42 @@ class DemoJobCreateView(APIView):
         return Response(data, status=status.HTTP_202_ACCEPTED)
 
 
-class JobStatusView(APIView):
+class JobStatusView(ConditionalGetMixin, APIView):
     """Poll job status. Only the job owner can view their job."""
 
     permission_classes = [HasScope]
     required_scopes = ["read:jobs"]
 
+    def get_validator(self, request, job_id):
+        # Every row write includes updated_at in update_fields, so the
+        # timestamp tracks the row; live progress between flushes lives in
+        # Redis (mainapp/jobs/progress.py). Skip loading `result` on a 304.
+        row = (
+            AsyncJob.objects.filter(pk=job_id, owner=request.user)
+            .values_list("updated_at", "status")
+            .first()
+        )
+        if row is None:
+            raise NotFound()
+        updated_at, job_status = row
+        self.live_progress = None
+        if job_status not in AsyncJob.TERMINAL_STATUSES:
+            self.live_progress = read_progress(job_id)
+        return (updated_at, sorted((self.live_progress or {}).items()))
+
     @extend_schema(
         tags=["jobs"],
         operation_id="getJobStatus",
         summary="Get job status",
         description=(
             "Return the current state of a background job. Only the job owner can "
-            "access this endpoint. Poll until `status` is `succeeded` or `failed`."
+            "access this endpoint. Poll until `status` is `succeeded` or `failed`. "
+            "Send the previous `ETag` as `If-None-Match` to get a bodyless 304 "
+            "while nothing has changed."
         ),
         responses={
             200: AsyncJobSerializer,
+            304: OpenApiResponse(description="Job unchanged since the `If-None-Match` ETag."),
             401: OpenApiResponse(description="Authentication required."),
             404: OpenApiResponse(description="Job not found or not owned by you."),
         },
@@ -153,6 +214,7 @@ class JobStatusView(APIView):
                     "progress_total": 5,
                     "message": "Processing step 3/5",
                     "result": None,
+                    "result_file": None,
                     "error": "",
                     "created_at": "2026-06-26T12:00:00Z",
                     "started_at": "2026-06-26T12:00:01Z",
@@ -174,6 +236,7 @@ class JobStatusView(APIView):
                         "steps_completed": 5,
                         "message": "All steps processed.",
                     },
+                    "result_file": None,
                     "error": "",
                     "created_at": "2026-06-26T12:00:00Z",
                     "started_at": "2026-06-26T12:00:01Z",
@@ -190,4 +253,278 @@ class JobStatusView(APIView):
         except AsyncJob.DoesNotExist:
             raise NotFound()
 
-        return Response(AsyncJobSerializer(job).data)
+        if getattr(self, "live_progress", None):
+            apply_progress(job, self.live_progress)
+        return Response(AsyncJobSerializer(job, context={"request": request}).data)
+
+
+class JobResultView(APIView):
+    """Download a job result stored as a file."""
+
+    permission_classes = [HasScope]
+    required_scopes = ["read:jobs"]
+
+    @extend_schema(
+        tags=["jobs"],
+        operation_id="downloadJobResult",
+        summary="Download job result file",
+        description=(
+            "Download the result of a job that stored it as a file (`result_file` "
+            "is set on the job). With object storage this redirects to a "
+            "short-lived signed URL; otherwise the file is streamed."
+        ),
+        responses={
+            (200, "application/octet-stream"): OpenApiResponse(description="The result file."),
+            302: OpenApiResponse(description="Redirect to a signed download URL."),
+            401: OpenApiResponse(description="Authentication required."),
+            404: OpenApiResponse(description="Job not found, not owned by you, or has no result file."),
+        },
+    )
+    def get(self, request, job_id):
+        job = (
+            AsyncJob.objects.filter(pk=job_id, owner=request.user)
+            .only("id", "result_file", "result_content_type", "result_size")
+            .first()
+        )
+        if job is None or not job.result_file:
+            raise NotFound()
+        metadata = result_file_metadata(job)
+        storage = job.result_file.storage
+        if getattr(storage, "querystring_auth", False):
+            # Signed object-storage URL: the bytes never pass through the app.
+            url = storage.url(job.result_file.name, parameters={
+                "ResponseContentDisposition": f'attachment; filename="{metadata["filename"]}"',
+                "ResponseContentType": metadata["content_type"],
+            })
+            return HttpResponseRedirect(url)
+        return FileResponse(
+            job.result_file.open("rb"),
+            as_attachment=True,
+            filename=metadata["filename"],
+            content_type=metadata["content_type"],
+        )
+
+
+class _ChunkedJobActionView(APIView):
+    """Shared lookup and response for the chunked-job control endpoints."""
+
+    permission_classes = [HasScope]
+    required_scopes = ["write:jobs"]
+    conflict_detail = ""
+
+    def perform(self, job):
+        raise NotImplementedError
+
+    def post(self, request, job_id):
+        try:
+            job = AsyncJob.objects.get(pk=job_id, owner=request.user)
+        except AsyncJob.DoesNotExist:
+            raise NotFound()
+        if get_job_type(job.job_type) is None or not self.perform(job):
+            return Response(
+                {"detail": self.conflict_detail, "status": job.status},
+                status=status.HTTP_409_CONFLICT,
+            )
+        logger.info(
+            "api_job_action",
+            action=self.action_name,
+            user_id=str(request.user.id),
+            job_id=str(job.id),
+        )
+        return Response(AsyncJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
+
+
+class JobCancelView(_ChunkedJobActionView):
+    """Request cancellation of a chunked job."""
+
+    action_name = "cancel"
+    conflict_detail = "Only queued or running chunked jobs can be cancelled."
+
+    @extend_schema(
+        tags=["jobs"],
+        operation_id="cancelJob",
+        summary="Cancel a job",
+        description=(
+            "Ask a chunked job to stop. Running chunks save their checkpoint and "
+            "stop at their next cancellation check; the job then ends `cancelled`. "
+            "Returns 409 for jobs that are finished or cannot be cancelled."
+        ),
+        request=None,
+        responses={
+            202: AsyncJobSerializer,
+            401: OpenApiResponse(description="Authentication required."),
+            404: OpenApiResponse(description="Job not found or not owned by you."),
+            409: OpenApiResponse(description="Job cannot be cancelled."),
+        },
+    )
+    def post(self, request, job_id):
+        return super().post(request, job_id)
+
+    def perform(self, job):
+        return cancel_job(job)
+
+
+class JobResumeView(_ChunkedJobActionView):
+    """Resume a cancelled or failed chunked job."""
+
+    action_name = "resume"
+    conflict_detail = "Only cancelled or failed chunked jobs can be resumed."
+
+    @extend_schema(
+        tags=["jobs"],
+        operation_id="resumeJob",
+        summary="Resume a job",
+        description=(
+            "Re-run the unfinished chunks of a `cancelled` or `failed` chunked "
+            "job. Finished chunks are kept and the others continue from their "
+            "last checkpoint. Returns 409 for any other job."
+        ),
+        request=None,
+        responses={
+            202: AsyncJobSerializer,
+            401: OpenApiResponse(description="Authentication required."),
+            404: OpenApiResponse(description="Job not found or not owned by you."),
+            409: OpenApiResponse(description="Job cannot be resumed."),
+        },
+    )
+    def post(self, request, job_id):
+        return super().post(request, job_id)
+
+    def perform(self, job):
+        return resume_job(job)
+
+
+# ---------------------------------------------------------------------------
+# Server-Sent Events
+# ---------------------------------------------------------------------------
+
+class JobEventsGateView(APIView):
+    """Authentication, scope and throttle checks for the event stream.
+
+    Runs the regular DRF pipeline once per connection and returns the job's
+    current state, which becomes the stream's first event.
+    """
+
+    permission_classes = [HasScope]
+    required_scopes = ["read:jobs"]
+
+    def get(self, request, job_id):
+        try:
+            job = AsyncJob.objects.get(pk=job_id, owner=request.user)
+        except AsyncJob.DoesNotExist:
+            raise NotFound()
+        return Response(AsyncJobSerializer(apply_progress(job)).data)
+
+
+_job_events_gate = JobEventsGateView.as_view()
+
+
+def _open_job_events(request, job_id):
+    response = _job_events_gate(request, job_id=job_id)
+    response.render()
+    return response
+
+
+def _sse(payload):
+    return f"event: job\ndata: {codec.dumps(payload).decode()}\n\n"
+
+
+def _load_job(job_id):
+    job = AsyncJob.objects.filter(pk=job_id).first()
+    if job is None:
+        return None
+    apply_progress(job)
+    # Round-trip so it compares equal to what arrives over Redis.
+    return codec.loads(codec.dumps(AsyncJobSerializer(job).data))
+
+
+def _stream_settings():
+    """``(heartbeat, poll, deadline)`` for a stream opened now."""
+    heartbeat = getattr(settings, "SPEEDPY_JOB_EVENTS_HEARTBEAT_SECONDS", 15)
+    poll = getattr(settings, "SPEEDPY_JOB_EVENTS_POLL_SECONDS", 2)
+    deadline = time.monotonic() + getattr(settings, "SPEEDPY_JOB_EVENTS_MAX_SECONDS", 300)
+    return heartbeat, poll, deadline
+
+
+async def job_event_stream(job_id, snapshot):
+    """Yield SSE frames for ``job_id`` until it reaches a terminal state.
+
+    ``snapshot`` (the job as loaded on connect) is sent first.  Updates then
+    come from Redis pub/sub; whenever nothing arrives for a heartbeat the job
+    is re-read, which both keeps proxies from closing the connection and
+    catches anything published before the subscription was in place.  Without
+    Redis the database is polled every ``SPEEDPY_JOB_EVENTS_POLL_SECONDS``.
+    Streams end after ``SPEEDPY_JOB_EVENTS_MAX_SECONDS``; ``EventSource``
+    reconnects on its own.
+    """
+    heartbeat, poll, deadline = _stream_settings()
+
+    yield f"retry: {poll * 1000}\n\n"
+    yield _sse(snapshot)
+    if snapshot["status"] in AsyncJob.TERMINAL_STATUSES:
+        return
+
+    last = snapshot
+    client = events.get_async_client()
+    pubsub = None
+    try:
+        if client is not None:
+            pubsub = client.pubsub()
+            await pubsub.subscribe(events.channel_name(job_id))
+        while time.monotonic() < deadline:
+            if pubsub is not None:
+                message = await pubsub.get_message(
+                    ignore_subscribe_messages=True, timeout=heartbeat
+                )
+                payload = codec.loads(message["data"]) if message else await sync_to_async(_load_job)(job_id)
+            else:
+                await asyncio.sleep(poll)
+                payload = await sync_to_async(_load_job)(job_id)
+            if payload is None:
+                return
+            if payload == last:
+                yield ": keepalive\n\n"
+                continue
+            last = payload
+            yield _sse(payload)
+            if payload["status"] in AsyncJob.TERMINAL_STATUSES:
+                return
+    finally:
+        if pubsub is not None:
+            await pubsub.aclose()
+        if client is not None:
+            await client.aclose()
+
+
+def _snapshot_response(snapshot):
+    """The job's current state as a single SSE event, for WSGI servers.
+
+    A WSGI worker holds an open stream for as long as it lasts, so a handful
+    of watchers would take the site down. Instead the response ends at once
+    and its ``retry`` field makes ``EventSource`` reconnect after
+    ``SPEEDPY_JOB_EVENTS_POLL_SECONDS``: polling, at the same cost as
+    ``GET /api/v1/jobs/{id}/``.
+    """
+    poll = getattr(settings, "SPEEDPY_JOB_EVENTS_POLL_SECONDS", 2)
+    response = HttpResponse(
+        f"retry: {poll * 1000}\n\n{_sse(snapshot)}", content_type="text/event-stream"
+    )
+    response["Cache-Control"] = "no-cache"
+    return response
+
+
+async def job_events(request, job_id):
+    """``GET /api/v1/jobs/{id}/events/`` — stream job updates as Server-Sent Events."""
+    response = await sync_to_async(_open_job_events)(request, job_id)
+    if response.status_code != status.HTTP_200_OK:
+        return response
+
+    snapshot = codec.loads(response.content)
+    if not isinstance(request, ASGIRequest):
+        return _snapshot_response(snapshot)
+
+    logger.info("job_events_stream_opened", job_id=str(job_id))
+    stream = StreamingHttpResponse(job_event_stream(job_id, snapshot), content_type="text/event-stream")
+    stream["Cache-Control"] = "no-cache"
+    stream["X-Accel-Buffering"] = "no"
+    return stream
@@ -11,6 +11,8 @@ from celery import current_app
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from drf_spectacular.utils import OpenApiExample, OpenApiParameter, OpenApiResponse, extend_schema
@@ -20,7 +22,12 @@ from rest_framework.generics import ListAPIView, RetrieveAPIView
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from mainapp.invitations import SKIP_MESSAGES, invite_many, max_bulk_invitations
 from mainapp.models import Team, TeamInvitation, TeamMembership
+from mainapp.team_context import team_context
+from speedpycom.api.conditional import ConditionalGetMixin, aggregate_validator, get_version
+from speedpycom.api.exports import StreamingExportView, export_parameters, export_responses
+from speedpycom.api.fieldsets import SparseFieldsetMixin, fieldset_parameters, plan_queryset
 from speedpycom.api.idempotency import idempotent
 from speedpycom.api.permissions import HasScope
 
@@ -35,15 +42,13 @@ def _check_teams_enabled():
         raise NotFound()
 
 
-def _get_membership(user, team_id):
-    """Get the user's active membership for a team, or raise 404."""
-    try:
-        membership = TeamMembership.objects.select_related("team").get(
-            team_id=team_id,
-            user=user,
-            team__is_active=True,
-        )
-    except TeamMembership.DoesNotExist:
+def _get_membership(request, team_id):
+    """Get the user's active membership for a team, or raise 404.
+
+    Memoized for the request (``mainapp.team_context``).
+    """
+    membership = team_context(request).membership(team_id)
+    if membership is None:
         raise NotFound()
     if membership.access_expires_at and membership.access_expires_at <= timezone.now():
         raise NotFound()
@@ -53,7 +58,7 @@ def _get_membership(user, team_id):
 # --- Serializers ---
 
 
-class TeamSerializer(serializers.Serializer):
+class TeamSerializer(SparseFieldsetMixin, serializers.Serializer):
     id = serializers.UUIDField(read_only=True)
     name = serializers.CharField(read_only=True)
     slug = serializers.SlugField(read_only=True)
@@ -61,17 +66,26 @@ class TeamSerializer(serializers.Serializer):
     is_active = serializers.BooleanField(read_only=True)
     created_at = serializers.DateTimeField(read_only=True)
     updated_at = serializers.DateTimeField(read_only=True)
+    member_count = serializers.IntegerField(read_only=True, required=False)
+
+    expandable_fields = ("member_count",)
 
 
 class TeamDetailSerializer(TeamSerializer):
     member_count = serializers.SerializerMethodField()
 
+    expandable_fields = ()
+
     def get_member_count(self, team) -> int:
+        # TeamDetailAPIView sets it from the aggregate it already ran for the ETag.
+        if hasattr(team, "member_count"):
+            return team.member_count
         return team.teammembership_set.count()
 
 
-class TeamMemberSerializer(serializers.Serializer):
-    id = serializers.UUIDField(source="user.id", read_only=True)
+class TeamMemberSerializer(SparseFieldsetMixin, serializers.Serializer):
+    # user_id, not user.id: reading the FK column needs no join.
+    id = serializers.UUIDField(source="user_id", read_only=True)
     email = serializers.EmailField(source="user.email", read_only=True)
     first_name = serializers.CharField(source="user.first_name", read_only=True)
     last_name = serializers.CharField(source="user.last_name", read_only=True)
@@ -87,6 +101,26 @@ class CreateInvitationSerializer(serializers.Serializer):
     message = serializers.CharField(required=False, allow_blank=True, default="")
 
 
+class BulkInvitationSerializer(serializers.Serializer):
+    emails = serializers.ListField(child=serializers.CharField(max_length=254), allow_empty=False)
+    role = serializers.ChoiceField(
+        choices=[("admin", "Admin"), ("member", "Member"), ("viewer", "Viewer")]
+    )
+    message = serializers.CharField(required=False, allow_blank=True, default="")
+
+    def validate_emails(self, value):
+        limit = max_bulk_invitations()
+        if len(value) > limit:
+            raise serializers.ValidationError(f"At most {limit} addresses per request.")
+        return value
+
+
+class SkippedInvitationSerializer(serializers.Serializer):
+    email = serializers.CharField()
+    reason = serializers.ChoiceField(choices=list(SKIP_MESSAGES))
+    detail = serializers.CharField()
+
+
 class InvitationResponseSerializer(serializers.Serializer):
     id = serializers.UUIDField(read_only=True)
     email = serializers.EmailField(read_only=True)
@@ -96,17 +130,38 @@ class InvitationResponseSerializer(serializers.Serializer):
     expires_at = serializers.DateTimeField(read_only=True)
 
 
+class BulkInvitationResponseSerializer(serializers.Serializer):
+    created = InvitationResponseSerializer(many=True)
+    skipped = SkippedInvitationSerializer(many=True)
+
+
 # --- Views ---
 
 
-class TeamListAPIView(ListAPIView):
+class TeamListAPIView(ConditionalGetMixin, ListAPIView):
     """List teams the authenticated user belongs to."""
 
     serializer_class = TeamSerializer
     permission_classes = [HasScope]
     required_scopes = ["read:teams"]
 
-    def get_queryset(self):
+    def member_count_selected(self):
+        return "member_count" in self.get_serializer_class().selected_fields(self.request)
+
+    def get_validator(self, request, *args, **kwargs):
+        teams = self.get_teams()
+        validator = aggregate_validator(teams, "updated_at")
+        # Which teams are listed depends on the caller's memberships, and
+        # swapping one team for another need not move the count or
+        # Max(Team.updated_at).
+        own = TeamMembership.objects.filter(user=request.user)
+        validator += aggregate_validator(own, "updated_at", "access_expires_at")
+        if self.member_count_selected():
+            members = TeamMembership.objects.filter(team__in=teams.values("pk"))
+            validator += aggregate_validator(members, "updated_at")
+        return validator
+
+    def get_teams(self):
         _check_teams_enabled()
         now = timezone.now()
         return Team.objects.filter(
@@ -116,15 +171,33 @@ class TeamListAPIView(ListAPIView):
             teammembership__access_expires_at__lte=now,
         ).distinct().order_by("name")
 
+    def get_queryset(self):
+        queryset = self.get_teams()
+        if self.member_count_selected():
+            # A subquery, not Count(): the membership join above is filtered
+            # down to the caller's own row.
+            member_counts = (
+                TeamMembership.objects.filter(team=OuterRef("pk"))
+                .order_by()
+                .values("team")
+                .annotate(n=Count("pk"))
+                .values("n")
+            )
+            queryset = queryset.annotate(member_count=Coalesce(Subquery(member_counts), 0))
+        return plan_queryset(queryset, self.get_serializer_class(), self.request)
+
     @extend_schema(
         tags=["teams"],
         operation_id="listTeams",
         summary="List teams for the authenticated user",
         description=(
             "Return all active teams the authenticated user is a member of. "
-            "Expired memberships are excluded. Requires the `read:teams` scope. "
+            "Expired memberships are excluded. Supports `If-None-Match` (304). "
+            "Use `fields` to pick fields and `expand=member_count` to add member counts. "
+            "Requires the `read:teams` scope. "
             "Returns 404 if the teams feature is disabled."
         ),
+        parameters=fieldset_parameters(TeamSerializer),
         responses={
             200: TeamSerializer(many=True),
             401: OpenApiResponse(description="Authentication required."),
@@ -153,17 +226,31 @@ class TeamListAPIView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class TeamDetailAPIView(RetrieveAPIView):
+class TeamDetailAPIView(ConditionalGetMixin, RetrieveAPIView):
     """Get a team by ID (membership required)."""
 
     serializer_class = TeamDetailSerializer
     permission_classes = [HasScope]
     required_scopes = ["read:teams"]
 
+    def get_membership(self):
+        if not hasattr(self, "_membership"):
+            _check_teams_enabled()
+            self._membership = _get_membership(self.request, self.kwargs["team_id"])
+        return self._membership
+
+    def get_validator(self, request, *args, **kwargs):
+        team = self.get_membership().team
+        if "member_count" not in self.get_serializer_class().selected_fields(request):
+            return team.updated_at
+        members = aggregate_validator(team.teammembership_set.all())
+        # The aggregate is (count,): hand it to the serializer instead of
+        # running the same COUNT again.
+        team.member_count = members[0]
+        return (team.updated_at, members)
+
     def get_object(self):
-        _check_teams_enabled()
-        membership = _get_membership(self.request.user, self.kwargs["team_id"])
-        return membership.team
+        return self.get_membership().team
 
     @extend_schema(
         tags=["teams"],
@@ -171,8 +258,11 @@ class TeamDetailAPIView(RetrieveAPIView):
         summary="Get a team",
         description=(
             "Return details of a single team including its member count. "
-            "The caller must be an active member of the team. Requires the `read:teams` scope."
+            "The caller must be an active member of the team. Supports `If-None-Match` (304). "
+            "Leave `member_count` out of `fields` to skip counting members. "
+            "Requires the `read:teams` scope."
         ),
+        parameters=fieldset_parameters(TeamDetailSerializer),
         responses={
             200: TeamDetailSerializer,
             401: OpenApiResponse(description="Authentication required."),
@@ -200,19 +290,34 @@ class TeamDetailAPIView(RetrieveAPIView):
         return super().get(request, *args, **kwargs)
 
 
-class TeamMembersAPIView(ListAPIView):
+class TeamMembersAPIView(ConditionalGetMixin, ListAPIView):
     """List members of a team (membership required)."""
 
     serializer_class = TeamMemberSerializer
     permission_classes = [HasScope]
     required_scopes = ["read:teams"]
 
+    def get_membership(self):
+        if not hasattr(self, "_membership"):
+            _check_teams_enabled()
+            self._membership = _get_membership(self.request, self.kwargs["team_id"])
+        return self._membership
+
+    def get_validator(self, request, *args, **kwargs):
+        # Member rows carry user fields that no membership timestamp reflects;
+        # the "team-members" version is bumped when a member edits their profile.
+        team = self.get_membership().team
+        return (
+            aggregate_validator(self.get_queryset(), "updated_at"),
+            get_version("team-members", team.pk),
+        )
+
     def get_queryset(self):
-        _check_teams_enabled()
-        membership = _get_membership(self.request.user, self.kwargs["team_id"])
-        return TeamMembership.objects.filter(
-            team=membership.team,
-        ).select_related("user").order_by("role", "created_at")
+        # plan_queryset joins users only when a user field is selected.
+        queryset = TeamMembership.objects.filter(
+            team=self.get_membership().team,
+        ).order_by("role", "created_at")
+        return plan_queryset(queryset, self.get_serializer_class(), self.request)
 
     @extend_schema(
         tags=["teams"],
@@ -220,8 +325,11 @@ class TeamMembersAPIView(ListAPIView):
         summary="List team members",
         description=(
             "Return all members of the specified team, ordered by role then join date. "
-            "The caller must be an active member. Requires the `read:teams` scope."
+            "The caller must be an active member. Supports `If-None-Match` (304). "
+            "Use `fields` to pick fields; `fields=id,role` skips the user join. "
+            "Requires the `read:teams` scope."
         ),
+        parameters=fieldset_parameters(TeamMemberSerializer),
         responses={
             200: TeamMemberSerializer(many=True),
             401: OpenApiResponse(description="Authentication required."),
@@ -249,6 +357,43 @@ class TeamMembersAPIView(ListAPIView):
         return super().get(request, *args, **kwargs)
 
 
+class TeamMembersExportView(StreamingExportView):
+    """Stream all members of a team as NDJSON or CSV (membership required)."""
+
+    serializer_class = TeamMemberSerializer
+    permission_classes = [HasScope]
+    required_scopes = ["read:teams"]
+    keyset = ("created_at", "id")
+    export_name = "team-members"
+
+    def get_queryset(self):
+        _check_teams_enabled()
+        membership = _get_membership(self.request, self.kwargs["team_id"])
+        queryset = TeamMembership.objects.filter(team=membership.team)
+        return plan_queryset(queryset, self.serializer_class, self.request)
+
+    @extend_schema(
+        tags=["teams"],
+        operation_id="exportTeamMembers",
+        summary="Export team members",
+        description=(
+            "Stream every member of the team in join order, as NDJSON (default) or CSV. "
+            "Each row ends with a `_cursor`; pass the last one received as `cursor` to resume. "
+            "Use `fields` to pick fields. "
+            "Requires the `read:teams` scope."
+        ),
+        parameters=[*fieldset_parameters(TeamMemberSerializer), *export_parameters()],
+        responses={
+            **export_responses(),
+            400: OpenApiResponse(description="Invalid cursor or fields."),
+            401: OpenApiResponse(description="Authentication required."),
+            404: OpenApiResponse(description="Team not found or no access."),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 class TeamInvitationCreateAPIView(APIView):
     """Create an invitation to a team (owner/admin only)."""
 
@@ -307,7 +452,7 @@ class TeamInvitationCreateAPIView(APIView):
     @idempotent
     def post(self, request, team_id):
         _check_teams_enabled()
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
 
         if membership.role not in ("owner", "admin"):
             raise PermissionDenied("Only owners and admins can invite members.")
@@ -353,3 +498,116 @@ class TeamInvitationCreateAPIView(APIView):
             InvitationResponseSerializer(invitation).data,
             status=status.HTTP_201_CREATED,
         )
+
+
+class TeamInvitationBulkCreateAPIView(APIView):
+    """Invite many addresses to a team in one request (owner/admin only)."""
+
+    permission_classes = [HasScope]
+    required_scopes = ["write:teams"]
+
+    @extend_schema(
+        tags=["teams"],
+        request=BulkInvitationSerializer,
+        parameters=[
+            OpenApiParameter(
+                name="Idempotency-Key",
+                type=str,
+                location=OpenApiParameter.HEADER,
+                required=False,
+                description="Optional idempotency key (1-128 chars). Same key + same body replays the stored response.",
+            ),
+        ],
+        responses={
+            201: BulkInvitationResponseSerializer,
+            400: OpenApiResponse(description="Validation error."),
+            401: OpenApiResponse(description="Authentication required."),
+            403: OpenApiResponse(description="Insufficient role (owner/admin required)."),
+            404: OpenApiResponse(description="Team not found or no access."),
+            409: OpenApiResponse(description="Idempotency-Key reused with a different request body."),
+        },
+        operation_id="bulkCreateTeamInvitations",
+        summary="Invite many users to a team",
+        description=(
+            "Invite up to `SPEEDPY_TEAM_BULK_INVITATION_MAX` (default 500) addresses with one role. "
+            "Addresses that are invalid, duplicated, not accepted, undeliverable, already members "
+            "or already invited are returned in `skipped` with a reason; the rest are created "
+            "and emailed. Supports the `Idempotency-Key` header. "
+            "Requires the `write:teams` scope."
+        ),
+        examples=[
+            OpenApiExample(
+                "Invite several members",
+                value={"emails": ["bob@example.com", "carol@example.com"], "role": "member"},
+                request_only=True,
+            ),
+            OpenApiExample(
+                "Invitations created",
+                value={
+                    "created": [
+                        {
+                            "id": "d4e5f6a7-b8c9-0123-def4-567890abcdef",
+                            "email": "bob@example.com",
+                            "role": "member",
+                            "status": "pending",
+                            "created_at": "2025-06-20T12:00:00Z",
+                            "expires_at": "2025-06-27T12:00:00Z",
+                        }
+                    ],
+                    "skipped": [
+                        {
+                            "email": "carol@example.com",
+                            "reason": "already_member",
+                            "detail": "Already a member of the team.",
+                        }
+                    ],
+                },
+                response_only=True,
+                status_codes=["201"],
+            ),
+        ],
+    )
+    @idempotent
+    def post(self, request, team_id):
+        _check_teams_enabled()
+        membership = _get_membership(request, team_id)
+
+        if membership.role not in ("owner", "admin"):
+            raise PermissionDenied("Only owners and admins can invite members.")
+
+        serializer = BulkInvitationSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        target_role = serializer.validated_data["role"]
+        if not membership.can_invite_role(target_role):
+            raise PermissionDenied(
+                f"Your role ({membership.role}) cannot invite {target_role}s."
+            )
+
+        result = invite_many(
+            membership.team,
+            request.user,
+            serializer.validated_data["emails"],
+            role=target_role,
+            message=serializer.validated_data["message"],
+        )
+
+        logger.info(
+            "api_team_invitations_bulk_created",
+            user_id=str(request.user.id),
+            team_id=str(team_id),
+            role=target_role,
+            created=len(result.invitations),
+            skipped=len(result.skipped),
+        )
+
+        return Response(
+            {
+                "created": InvitationResponseSerializer(result.invitations, many=True).data,
+                "skipped": [
+                    {"email": email, "reason": reason, "detail": SKIP_MESSAGES[reason]}
+                    for email, reason in result.skipped
+                ],
+            },
+            status=status.HTTP_201_CREATED,
+        )
@@ -11,7 +11,7 @@ import uuid
 import structlog
 from django.db import transaction
 from django.utils import timezone
-from drf_spectacular.utils import OpenApiExample, OpenApiResponse, extend_schema
+from drf_spectacular.utils import OpenApiExample, OpenApiParameter, OpenApiResponse, extend_schema
 from rest_framework import serializers, status
 from rest_framework.exceptions import NotFound, PermissionDenied
 from rest_framework.generics import ListAPIView
@@ -21,7 +21,10 @@ from rest_framework.views import APIView
 
 from mainapp.models import Team, TeamMembership
 from mainapp.models.webhooks import WebhookDelivery, WebhookEndpoint
+from mainapp.team_context import team_context
 from mainapp.webhooks.events import WebhookEvent
+from speedpycom.api.exports import StreamingExportView, export_parameters, export_responses
+from speedpycom.api.fieldsets import SparseFieldsetMixin, fieldset_parameters, plan_queryset
 from speedpycom.api.permissions import HasScope
 
 logger = structlog.get_logger(__name__)
@@ -31,15 +34,13 @@ logger = structlog.get_logger(__name__)
 # Helpers
 # ---------------------------------------------------------------------------
 
-def _get_membership(user, team_id):
-    """Get the user's active membership for a team, or raise 404."""
-    try:
-        membership = TeamMembership.objects.select_related("team").get(
-            team_id=team_id,
-            user=user,
-            team__is_active=True,
-        )
-    except TeamMembership.DoesNotExist:
+def _get_membership(request, team_id):
+    """Get the user's active membership for a team, or raise 404.
+
+    Memoized for the request (``mainapp.team_context``).
+    """
+    membership = team_context(request).membership(team_id)
+    if membership is None:
         raise NotFound()
     if membership.access_expires_at and membership.access_expires_at <= timezone.now():
         raise NotFound()
@@ -52,10 +53,12 @@ def _require_write_role(membership):
         raise PermissionDenied("Your role does not allow managing webhooks.")
 
 
-def _get_endpoint(team, webhook_id):
+def _get_endpoint(team, webhook_id, queryset=None):
     """Retrieve a webhook endpoint belonging to a team, or 404."""
+    if queryset is None:
+        queryset = WebhookEndpoint.objects.all()
     try:
-        return WebhookEndpoint.objects.get(id=webhook_id, team=team)
+        return queryset.get(id=webhook_id, team=team)
     except WebhookEndpoint.DoesNotExist:
         raise NotFound()
 
@@ -64,7 +67,7 @@ def _get_endpoint(team, webhook_id):
 # Serializers
 # ---------------------------------------------------------------------------
 
-class WebhookEndpointListSerializer(serializers.Serializer):
+class WebhookEndpointListSerializer(SparseFieldsetMixin, serializers.Serializer):
     id = serializers.UUIDField(read_only=True)
     name = serializers.CharField(read_only=True)
     url = serializers.URLField(read_only=True)
@@ -124,7 +127,7 @@ class WebhookEndpointRotateResponseSerializer(WebhookEndpointListSerializer):
     rotation_overlap_seconds = serializers.IntegerField(read_only=True)
 
 
-class WebhookDeliveryListSerializer(serializers.Serializer):
+class WebhookDeliveryListSerializer(SparseFieldsetMixin, serializers.Serializer):
     id = serializers.IntegerField(read_only=True)
     event_id = serializers.CharField(read_only=True)
     event_type = serializers.CharField(read_only=True)
@@ -141,6 +144,15 @@ class WebhookDeliveryDetailSerializer(WebhookDeliveryListSerializer):
     response_body = serializers.CharField(read_only=True)
 
 
+class WebhookDeliveryExportSerializer(WebhookDeliveryListSerializer):
+    endpoint_id = serializers.UUIDField(read_only=True)
+
+
+class WebhookDeliveryExportFilterSerializer(serializers.Serializer):
+    webhook = serializers.UUIDField(required=False)
+    status = serializers.ChoiceField(choices=WebhookDelivery.Status.choices, required=False)
+
+
 class WebhookTestDeliverySerializer(serializers.Serializer):
     event_type = serializers.CharField(required=False)
 
@@ -163,6 +175,7 @@ class TeamWebhookEndpointListCreateView(APIView):
             "Return a paginated list of webhook endpoints belonging to the team. "
             "Requires team membership and the `read:webhooks` scope."
         ),
+        parameters=fieldset_parameters(WebhookEndpointListSerializer),
         responses={
             200: WebhookEndpointListSerializer(many=True),
             401: OpenApiResponse(description="Authentication required."),
@@ -193,11 +206,15 @@ class TeamWebhookEndpointListCreateView(APIView):
         ],
     )
     def get(self, request, team_id):
-        membership = _get_membership(request.user, team_id)
-        endpoints = WebhookEndpoint.objects.filter(team=membership.team).order_by("-created_at")
+        membership = _get_membership(request, team_id)
+        endpoints = plan_queryset(
+            WebhookEndpoint.objects.filter(team=membership.team).order_by("-created_at"),
+            WebhookEndpointListSerializer,
+            request,
+        )
         paginator = PageNumberPagination()
         page = paginator.paginate_queryset(endpoints, request)
-        data = WebhookEndpointListSerializer(page, many=True).data
+        data = WebhookEndpointListSerializer(page, many=True, context={"request": request}).data
         return paginator.get_paginated_response(data)
 
     @extend_schema(
@@ -248,7 +265,7 @@ class TeamWebhookEndpointListCreateView(APIView):
     )
     def post(self, request, team_id):
         self.required_scopes = ["write:webhooks"]
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
         _require_write_role(membership)
 
         serializer = WebhookEndpointCreateSerializer(data=request.data)
@@ -300,15 +317,20 @@ class TeamWebhookEndpointDetailView(APIView):
         operation_id="getTeamWebhookEndpoint",
         summary="Get a webhook endpoint",
         description="Return a single webhook endpoint by ID. Requires team membership and the `read:webhooks` scope.",
+        parameters=fieldset_parameters(WebhookEndpointListSerializer),
         responses={
             200: WebhookEndpointListSerializer,
             404: OpenApiResponse(description="Not found."),
         },
     )
     def get(self, request, team_id, webhook_id):
-        membership = _get_membership(request.user, team_id)
-        endpoint = _get_endpoint(membership.team, webhook_id)
-        return Response(WebhookEndpointListSerializer(endpoint).data)
+        membership = _get_membership(request, team_id)
+        endpoint = _get_endpoint(
+            membership.team,
+            webhook_id,
+            plan_queryset(WebhookEndpoint.objects.all(), WebhookEndpointListSerializer, request),
+        )
+        return Response(WebhookEndpointListSerializer(endpoint, context={"request": request}).data)
 
     @extend_schema(
         tags=["webhooks"],
@@ -343,7 +365,7 @@ class TeamWebhookEndpointDetailView(APIView):
         return self._update(request, team_id, webhook_id)
 
     def _update(self, request, team_id, webhook_id):
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
         _require_write_role(membership)
         endpoint = _get_endpoint(membership.team, webhook_id)
 
@@ -378,7 +400,7 @@ class TeamWebhookEndpointDetailView(APIView):
         },
     )
     def delete(self, request, team_id, webhook_id):
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
         _require_write_role(membership)
         endpoint = _get_endpoint(membership.team, webhook_id)
 
@@ -420,7 +442,7 @@ class TeamWebhookEndpointRotateSecretView(APIView):
         },
     )
     def post(self, request, team_id, webhook_id):
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
         _require_write_role(membership)
         endpoint = _get_endpoint(membership.team, webhook_id)
 
@@ -474,7 +496,7 @@ class TeamWebhookEndpointTestView(APIView):
         ],
     )
     def post(self, request, team_id, webhook_id):
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
         _require_write_role(membership)
         endpoint = _get_endpoint(membership.team, webhook_id)
 
@@ -553,9 +575,10 @@ class TeamWebhookDeliveryListView(ListAPIView):
     required_scopes = ["read:webhooks"]
 
     def get_queryset(self):
-        membership = _get_membership(self.request.user, self.kwargs["team_id"])
+        membership = _get_membership(self.request, self.kwargs["team_id"])
         endpoint = _get_endpoint(membership.team, self.kwargs["webhook_id"])
-        return WebhookDelivery.objects.filter(endpoint=endpoint).order_by("-created_at")
+        queryset = WebhookDelivery.objects.filter(endpoint=endpoint).order_by("-created_at")
+        return plan_queryset(queryset, self.get_serializer_class(), self.request)
 
     @extend_schema(
         tags=["webhooks"],
@@ -565,6 +588,7 @@ class TeamWebhookDeliveryListView(ListAPIView):
             "Return a paginated list of delivery attempts for the specified webhook endpoint, "
             "ordered by most recent first. Requires the `read:webhooks` scope."
         ),
+        parameters=fieldset_parameters(WebhookDeliveryListSerializer),
         responses={
             200: WebhookDeliveryListSerializer(many=True),
             404: OpenApiResponse(description="Not found."),
@@ -588,19 +612,25 @@ class TeamWebhookDeliveryDetailView(APIView):
             "Return full details of a delivery attempt, including the request payload "
             "and response body. Requires the `read:webhooks` scope."
         ),
+        parameters=fieldset_parameters(WebhookDeliveryDetailSerializer),
         responses={
             200: WebhookDeliveryDetailSerializer,
             404: OpenApiResponse(description="Not found."),
         },
     )
     def get(self, request, team_id, webhook_id, delivery_id):
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
         endpoint = _get_endpoint(membership.team, webhook_id)
+        queryset = plan_queryset(
+            WebhookDelivery.objects.all(), WebhookDeliveryDetailSerializer, request
+        )
         try:
-            delivery = WebhookDelivery.objects.get(pk=delivery_id, endpoint=endpoint)
+            delivery = queryset.get(pk=delivery_id, endpoint=endpoint)
         except WebhookDelivery.DoesNotExist:
             raise NotFound()
-        return Response(WebhookDeliveryDetailSerializer(delivery).data)
+        return Response(
+            WebhookDeliveryDetailSerializer(delivery, context={"request": request}).data
+        )
 
 
 class TeamWebhookDeliveryRetryView(APIView):
@@ -627,7 +657,7 @@ class TeamWebhookDeliveryRetryView(APIView):
         },
     )
     def post(self, request, team_id, webhook_id, delivery_id):
-        membership = _get_membership(request.user, team_id)
+        membership = _get_membership(request, team_id)
         _require_write_role(membership)
         endpoint = _get_endpoint(membership.team, webhook_id)
 
@@ -662,6 +692,56 @@ class TeamWebhookDeliveryRetryView(APIView):
         return Response(WebhookDeliveryDetailSerializer(delivery).data)
 
 
+class TeamWebhookDeliveryExportView(StreamingExportView):
+    """Stream the deliveries of all of a team's webhook endpoints."""
+
+    serializer_class = WebhookDeliveryExportSerializer
+    permission_classes = [HasScope]
+    required_scopes = ["read:webhooks"]
+    keyset = ("id",)
+    export_name = "webhook-deliveries"
+
+    def get_queryset(self):
+        membership = _get_membership(self.request, self.kwargs["team_id"])
+        filters = WebhookDeliveryExportFilterSerializer(data=self.request.query_params)
+        filters.is_valid(raise_exception=True)
+        queryset = WebhookDelivery.objects.filter(endpoint__team=membership.team)
+        if "webhook" in filters.validated_data:
+            endpoint = _get_endpoint(membership.team, filters.validated_data["webhook"])
+            queryset = WebhookDelivery.objects.filter(endpoint=endpoint)
+        if "status" in filters.validated_data:
+            queryset = queryset.filter(status=filters.validated_data["status"])
+        return plan_queryset(queryset, self.serializer_class, self.request)
+
+    @extend_schema(
+        tags=["webhooks"],
+        operation_id="exportTeamWebhookDeliveries",
+        summary="Export webhook deliveries",
+        description=(
+            "Stream the delivery attempts of every webhook endpoint of the team, oldest first, "
+            "as NDJSON (default) or CSV. Narrow it with `webhook` and `status`. "
+            "Each row ends with a `_cursor`; pass the last one received as `cursor` to resume. "
+            "Requires the `read:webhooks` scope."
+        ),
+        parameters=[
+            OpenApiParameter("webhook", str, description="Only deliveries of this endpoint (UUID)."),
+            OpenApiParameter(
+                "status", str, enum=[value for value, _ in WebhookDelivery.Status.choices],
+                description="Only deliveries with this status.",
+            ),
+            *fieldset_parameters(WebhookDeliveryExportSerializer),
+            *export_parameters(),
+        ],
+        responses={
+            **export_responses(),
+            400: OpenApiResponse(description="Invalid cursor, filter or fields."),
+            404: OpenApiResponse(description="Not found."),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 # ---------------------------------------------------------------------------
 # Views — User-scoped
 # ---------------------------------------------------------------------------
@@ -681,7 +761,8 @@ class UserWebhookEndpointListView(ListAPIView):
         ).exclude(
             access_expires_at__lte=now,
         ).values_list("team_id", flat=True)
-        return WebhookEndpoint.objects.filter(team_id__in=team_ids).order_by("-created_at")
+        queryset = WebhookEndpoint.objects.filter(team_id__in=team_ids).order_by("-created_at")
+        return plan_queryset(queryset, self.get_serializer_class(), self.request)
 
     @extend_schema(
         tags=["webhooks"],
@@ -691,6 +772,7 @@ class UserWebhookEndpointListView(ListAPIView):
             "Return a combined list of webhook endpoints from every active team the "
             "authenticated user belongs to. Read-only. Requires the `read:webhooks` scope."
         ),
+        parameters=fieldset_parameters(WebhookEndpointListSerializer),
         responses={
             200: WebhookEndpointListSerializer(many=True),
             401: OpenApiResponse(description="Authentication required."),
@@ -27,6 +27,9 @@ from mainapp.billing.state import (
     has_active_ish_subscription,
     effective_plan_key,
     get_plan_config_for,
+    BillingSnapshot,
+    get_billing_snapshot,
+    invalidate_billing_snapshot,
     get_billing_state,
     can_create_records,
     account_has_feature,
@@ -47,6 +50,9 @@ __all__ = [
     "has_active_ish_subscription",
     "effective_plan_key",
     "get_plan_config_for",
+    "BillingSnapshot",
+    "get_billing_snapshot",
+    "invalidate_billing_snapshot",
     "get_billing_state",
     "can_create_records",
     "account_has_feature",
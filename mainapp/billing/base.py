@@ -83,9 +83,26 @@ class BillingAdapter(ABC):
     def get_event_type(self, event):
         """Return the provider event type string (for logging/audit)."""
 
+    def get_event_account(self, event):
+        """Return ``(billable_type, billable_id)`` the event is about.
+
+        Read from the payload alone (no API calls), since the view calls it
+        before returning. Used only to decide which events must be applied one
+        at a time, never to grant anything. ``(None, None)`` when unknown.
+        """
+        return None, None
+
+    def get_event_occurred_at(self, event):
+        """When the provider says the event happened (aware datetime), or None."""
+        return None
+
     @abstractmethod
     def process_event(self, event):
-        """Apply a verified webhook event to local billing state (idempotent)."""
+        """Apply a verified webhook event to local billing state (idempotent).
+
+        Runs in a worker, from the payload stored on the event log, so it must
+        work on a plain dict.
+        """
 
     def fetch_subscription_state(self, transaction_id):
         """Read live subscription state for a completed checkout transaction.
@@ -168,6 +168,14 @@ class PaddleAdapter(BillingAdapter):
     def get_event_type(self, event):
         return event.get("event_type") or ""
 
+    def get_event_account(self, event):
+        custom_data = (event.get("data") or {}).get("custom_data") or {}
+        return unsign_account(custom_data.get("account_token"))
+
+    def get_event_occurred_at(self, event):
+        occurred_at = event.get("occurred_at")
+        return parse_datetime(occurred_at) if occurred_at else None
+
     def process_event(self, event):
         event_type = event.get("event_type", "")
         if not event_type.startswith("subscription."):
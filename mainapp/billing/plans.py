@@ -8,7 +8,10 @@ application is a no-op on the account itself.
 """
 
 import structlog
+from django.utils import timezone
 
+from mainapp.billing.state import billable_token, invalidate_billing_snapshot
+from mainapp.models.billing import BILLABLE_TEAM
 from mainapp.subscription_plans import DEFAULT_PLAN_KEY, get_plan_limit
 
 logger = structlog.get_logger(__name__)
@@ -39,8 +42,35 @@ def apply_plan_to_billable(billable, plan_key):
         )
     # User mode: nothing to persist on the account; the subscription row carries
     # the plan and state helpers derive the effective plan from it.
+    invalidate_billing_snapshot(*billable_token(billable))
 
 
 def downgrade_to_free(billable):
     """Downgrade an account to the free plan."""
     apply_plan_to_billable(billable, DEFAULT_PLAN_KEY)
+
+
+def downgrade_teams_to_free(team_ids):
+    """Downgrade several teams at once: one ``UPDATE`` instead of a save each.
+
+    ``Team`` has no receivers that care about the plan, so this is the same as
+    :func:`downgrade_to_free` per team. Returns the number of teams updated.
+    """
+    from mainapp.models import Team
+
+    team_ids = [str(pk) for pk in team_ids]
+    if not team_ids:
+        return 0
+    updated = Team.objects.filter(pk__in=team_ids).update(
+        plan=DEFAULT_PLAN_KEY,
+        limits_max_team_members=get_plan_limit(DEFAULT_PLAN_KEY, "max_team_members"),
+        updated_at=timezone.now(),
+    )
+    logger.info(
+        "billing_plan_applied",
+        billable_type="team",
+        billable_ids=team_ids,
+        plan_key=DEFAULT_PLAN_KEY,
+    )
+    invalidate_billing_snapshot(BILLABLE_TEAM, *team_ids)
+    return updated
@@ -11,9 +11,20 @@ Three runtime states (mirrors the proven pattern from the sibling project):
 - ``ENABLED``  — everything works (subject to plan quotas).
 - ``GRACE``    — paid features still work, but creating new records is blocked.
 - ``DISABLED`` — paid runtime features are off (fail closed).
+
+Every helper below reads one :class:`BillingSnapshot` per billable — plan key,
+state, limits and features — built from at most one subscription query and
+cached under a version that ``apply_subscription_update`` and
+``apply_plan_to_billable`` (and so ``downgrade_to_free``) bump. Gating code can
+call ``account_has_feature`` and ``account_limit`` as often as it likes; with
+a real cache (``CACHE_URL``) a page costs two cache reads instead of a
+subscription query per call. The dummy cache just rebuilds the snapshot on
+every call, which is as correct as before.
 """
 
 from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
 from django.utils import timezone
 
 from mainapp.models import BillingSubscription
@@ -21,9 +32,8 @@ from mainapp.models.billing import BILLABLE_TEAM, BILLABLE_USER
 from mainapp.subscription_plans import (
     DEFAULT_PLAN_KEY,
     get_plan_config,
-    get_plan_limit,
-    plan_has_feature,
 )
+from speedpycom.api.conditional import bump_version, get_version
 
 # Runtime billing states.
 ENABLED = "enabled"
@@ -63,7 +73,10 @@ def get_billable_for_user(user):
 
 
 def get_billable_for_request(request):
-    return get_billable_for_user(getattr(request, "user", None))
+    from mainapp.team_context import team_context
+
+    resolved = team_context(request)
+    return resolved.billable if resolved is not None else None
 
 
 def _subscriptions_for(billable):
@@ -119,32 +132,22 @@ def effective_plan_key(billable):
     Team mode reads ``Team.plan`` (kept in sync by plan application). User mode
     derives the plan from the current subscription while it still confers access
     (active-ish, or canceled within the paid-through period), falling back to free
-    — consistent with ``get_billing_state``.
+    — consistent with ``get_billing_state``. Both come from the billable's
+    snapshot.
     """
-    if billable is None:
-        return DEFAULT_PLAN_KEY
-    if _is_team(billable):
-        return billable.plan or DEFAULT_PLAN_KEY
-    sub = get_current_subscription(billable)
-    if _subscription_confers_access(sub):
-        return sub.plan_key
-    return DEFAULT_PLAN_KEY
+    return get_billing_snapshot(billable).plan_key
 
 
 def get_plan_config_for(billable):
-    return get_plan_config(effective_plan_key(billable))
+    return get_billing_snapshot(billable).plan_config
 
 
-def get_billing_state(billable, now=None):
-    """Compute the runtime billing state for a billable account."""
-    now = now or timezone.now()
-
-    cfg = get_plan_config_for(billable)
+def _compute_billing_state(cfg, sub, now):
+    """The runtime state for plan config ``cfg`` and current subscription ``sub``."""
     # Free plan is always enabled — nothing to bill.
     if not cfg.get("is_paid"):
         return ENABLED
 
-    sub = get_current_subscription(billable)
     if sub is None:
         # Paid plan with no subscription row is abnormal — fail closed.
         return DISABLED
@@ -167,6 +170,135 @@ def get_billing_state(billable, now=None):
     return DISABLED
 
 
+def _state_changes_at(sub, now):
+    """The next moment the same rows give a different answer, or None."""
+    if sub is None:
+        return None
+    if sub.status == BillingSubscription.STATUS_PAST_DUE:
+        moment = sub.grace_period_ends_at
+    elif sub.status == BillingSubscription.STATUS_CANCELED:
+        moment = sub.current_period_ends_at
+    else:
+        return None
+    return moment if moment and moment > now else None
+
+
+class BillingSnapshot:
+    """Everything the gating helpers need to know about one billable.
+
+    Built from at most one subscription query, cached per billable (see
+    :func:`get_billing_snapshot`) and never mutated. ``valid_until`` is when
+    the passage of time alone changes the answer — the end of a grace or of a
+    canceled subscription's paid period.
+    """
+
+    def __init__(self, billable_type, billable_id, plan_key, state, limits, features, valid_until):
+        self.billable_type = billable_type
+        self.billable_id = billable_id
+        self.plan_key = plan_key
+        self.state = state
+        self.limits = limits
+        self.features = features
+        self.valid_until = valid_until
+
+    def has_feature(self, feature):
+        # Fails closed: when the runtime state is disabled, paid features are
+        # denied regardless of the (stale) plan key.
+        return self.state != DISABLED and feature in self.features
+
+    def limit(self, name):
+        return self.limits.get(name)
+
+    @property
+    def plan_config(self):
+        return get_plan_config(self.plan_key)
+
+    @classmethod
+    def build(cls, billable, now=None):
+        now = now or timezone.now()
+        billable_type, billable_id = (
+            billable_token(billable) if billable is not None else (None, None)
+        )
+        sub = None
+        if billable is None:
+            plan_key = DEFAULT_PLAN_KEY
+        elif _is_team(billable):
+            # Team mode reads Team.plan; the subscription is only needed to
+            # decide the state of a paid plan.
+            plan_key = billable.plan or DEFAULT_PLAN_KEY
+            if get_plan_config(plan_key).get("is_paid"):
+                sub = get_current_subscription(billable)
+        else:
+            sub = get_current_subscription(billable)
+            plan_key = sub.plan_key if _subscription_confers_access(sub, now) else DEFAULT_PLAN_KEY
+        cfg = get_plan_config(plan_key)
+        return cls(
+            billable_type=billable_type,
+            billable_id=billable_id,
+            plan_key=plan_key,
+            state=_compute_billing_state(cfg, sub, now),
+            limits=dict(cfg.get("limits", {})),
+            features=frozenset(cfg.get("features", [])),
+            valid_until=_state_changes_at(sub, now),
+        )
+
+
+def _snapshot_version_key(billable_type, billable_id):
+    return f"{billable_type}:{billable_id}"
+
+
+def invalidate_billing_snapshot(billable_type, *billable_ids):
+    """Make every cached snapshot of these billables stale.
+
+    Bumped now and again once the transaction commits, so a request that read
+    the old rows in between cannot leave its snapshot behind under the new
+    version. Anything that writes a subscription or an account's plan outside
+    ``apply_subscription_update`` / ``apply_plan_to_billable`` must call this.
+    """
+    keys = [_snapshot_version_key(billable_type, billable_id) for billable_id in billable_ids]
+    bump_version("billing-snapshot", *keys)
+    transaction.on_commit(lambda: bump_version("billing-snapshot", *keys))
+
+
+def get_billing_snapshot(billable):
+    """The cached :class:`BillingSnapshot` for ``billable``, building it on a miss.
+
+    Keyed by the billable, its version (bumped on every plan or subscription
+    write) and, for teams, ``Team.plan`` itself, so a plan changed on the row
+    by any route is never served from an older entry. Kept for
+    ``SPEEDPY_BILLING_SNAPSHOT_SECONDS`` at most, and never past
+    ``valid_until``.
+    """
+    if billable is None:
+        return BillingSnapshot.build(None)
+    billable_type, billable_id = billable_token(billable)
+    version = get_version("billing-snapshot", _snapshot_version_key(billable_type, billable_id))
+    plan = billable.plan if _is_team(billable) else ""
+    cache_key = f"billing:snapshot:{billable_type}:{billable_id}:{plan}:{version}"
+    snapshot = cache.get(cache_key)
+    if snapshot is not None:
+        return snapshot
+
+    now = timezone.now()
+    snapshot = BillingSnapshot.build(billable, now=now)
+    timeout = getattr(settings, "SPEEDPY_BILLING_SNAPSHOT_SECONDS", 300)
+    if snapshot.valid_until is not None:
+        timeout = min(timeout, int((snapshot.valid_until - now).total_seconds()))
+    if timeout > 0:
+        cache.set(cache_key, snapshot, timeout)
+    return snapshot
+
+
+def get_billing_state(billable, now=None):
+    """Compute the runtime billing state for a billable account.
+
+    Passing ``now`` asks about a specific moment, which bypasses the cache.
+    """
+    if now is not None:
+        return BillingSnapshot.build(billable, now=now).state
+    return get_billing_snapshot(billable).state
+
+
 def can_create_records(billable):
     """Whether the account may create new billable records right now.
 
@@ -181,9 +313,7 @@ def account_has_feature(billable, feature):
     Fails closed: when billing is enabled but the runtime state is disabled,
     paid features are denied regardless of the (stale) plan key.
     """
-    if get_billing_state(billable) == DISABLED:
-        return False
-    return plan_has_feature(effective_plan_key(billable), feature)
+    return get_billing_snapshot(billable).has_feature(feature)
 
 
 def account_limit(billable, limit):
@@ -191,7 +321,7 @@ def account_limit(billable, limit):
 
     ``None`` means unlimited.
     """
-    return get_plan_limit(effective_plan_key(billable), limit)
+    return get_billing_snapshot(billable).limit(limit)
 
 
 def over_limit_report(billable):
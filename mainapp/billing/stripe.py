@@ -116,7 +116,8 @@ class StripeAdapter(BillingAdapter):
             )
         except (ValueError, stripe.SignatureVerificationError):
             return None
-        return event
+        # A plain dict, so it can be stored on the event log and applied later.
+        return event.to_dict()
 
     def get_event_id(self, event):
         return event.get("id") or ""
@@ -124,6 +125,13 @@ class StripeAdapter(BillingAdapter):
     def get_event_type(self, event):
         return event.get("type") or ""
 
+    def get_event_account(self, event):
+        obj = event.get("data", {}).get("object", {}) or {}
+        return unsign_account((obj.get("metadata") or {}).get("account_token"))
+
+    def get_event_occurred_at(self, event):
+        return _ts(event.get("created"))
+
     def process_event(self, event):
         event_type = event.get("type", "")
         obj = event.get("data", {}).get("object", {}) or {}
@@ -1,19 +1,37 @@
-"""Shared inbound-webhook helpers: idempotency and subscription state sync.
+"""Shared inbound-webhook helpers: idempotency, queueing and subscription state sync.
 
 Provider adapters parse their own payloads, then hand a normalized dict to
 :func:`apply_subscription_update` so the local subscription row, grace period,
 and account plan are updated the same way regardless of provider. All updates are
 idempotent and safe to receive repeatedly / out of order.
+
+The webhook view does not apply events itself. It verifies the signature,
+records the event (:func:`already_processed`), stores the payload with
+:func:`queue_event` and answers 200, so a slow apply step can never make the
+provider time out and retry. Events are queued in lanes, one per account
+(``BillingEventLog.billable_key``): the ``process_billing_webhook_events``
+task drains a lane in the provider's ``occurred_at`` order under a Postgres
+advisory lock (:func:`process_queued_events`), so two events for the same
+account are never applied at once, or in arrival order when that differs
+from the order they happened in. Other databases get no lock; run a single
+billing worker there. An event that keeps failing is eventually set aside
+(``BillingEventLog.failed_at``) rather than holding its lane, and
+``requeue_billing_webhook_events`` picks up lanes whose task never arrived.
 """
 
+import hashlib
+from contextlib import contextmanager
 from datetime import timedelta
+from functools import partial
 
 import structlog
+from celery import current_app
 from django.conf import settings
-from django.db import IntegrityError, transaction
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
 from django.utils import timezone
 
-from mainapp.billing import plans
+from mainapp.billing import plans, state
 from mainapp.models import BillingEventLog, BillingSubscription, resolve_billable
 
 logger = structlog.get_logger(__name__)
@@ -36,15 +54,140 @@ def already_processed(provider, event_id):
         return True
 
 
-def record_event_meta(provider, event_id, event_type, payload):
-    """Attach type/payload metadata and a processed timestamp to the event log."""
-    if not event_id:
+def queue_event(adapter, event, event_id):
+    """Store a verified event on its log row and queue its lane for a worker.
+
+    The row must already exist (:func:`already_processed` returned ``False``).
+    The task is sent once the surrounding transaction commits.
+    """
+    billable_type, billable_id = adapter.get_event_account(event)
+    billable_key = f"{billable_type}:{billable_id}" if billable_type and billable_id else ""
+    BillingEventLog.objects.filter(provider=adapter.provider, event_id=event_id).update(
+        event_type=adapter.get_event_type(event) or "",
+        payload=event if isinstance(event, dict) else {},
+        billable_key=billable_key,
+        occurred_at=adapter.get_event_occurred_at(event),
+        updated_at=timezone.now(),
+    )
+    transaction.on_commit(
+        partial(
+            current_app.send_task,
+            "process_billing_webhook_events",
+            kwargs={"provider": adapter.provider, "billable_key": billable_key},
+        )
+    )
+
+
+@contextmanager
+def _lane_lock(provider, billable_key):
+    """Hold a session-level advisory lock on one lane (Postgres only).
+
+    Session level rather than transaction level, so each event is still applied
+    and committed on its own while the lane stays locked.
+    """
+    if connection.vendor != "postgresql":
+        yield
         return
-    BillingEventLog.objects.filter(provider=provider, event_id=event_id).update(
-        event_type=event_type or "",
-        payload=payload or {},
-        processed_at=timezone.now(),
+    digest = hashlib.blake2b(
+        f"billing-webhooks:{provider}:{billable_key}".encode(), digest_size=8
+    ).digest()
+    lock_id = int.from_bytes(digest, "big", signed=True)
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT pg_advisory_lock(%s)", [lock_id])
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_unlock(%s)", [lock_id])
+
+
+def _max_attempts():
+    return getattr(settings, "SPEEDPY_BILLING_WEBHOOK_MAX_ATTEMPTS", 8)
+
+
+def _pending_events():
+    return BillingEventLog.objects.filter(processed_at__isnull=True, failed_at__isnull=True)
+
+
+def process_queued_events(provider, billable_key):
+    """Apply every pending event in one lane, oldest first.
+
+    Whoever takes the lock first applies everything pending, including events
+    that were queued for the lane by other tasks; those then find nothing left.
+    An event that raises stops the lane (applying later events first would
+    break the order) and stays pending for the retry, until it has failed
+    ``SPEEDPY_BILLING_WEBHOOK_MAX_ATTEMPTS`` times: then it is marked failed,
+    logged for the operator, and the rest of the lane is applied without it.
+    Returns the number of events applied.
+    """
+    from mainapp.billing import registry
+
+    adapter = registry.get_adapter_for_provider(provider)
+    processed = 0
+    with _lane_lock(provider, billable_key):
+        pending = list(
+            _pending_events()
+            .filter(provider=provider, billable_key=billable_key)
+            .order_by(F("occurred_at").asc(nulls_last=True), "created_at")
+        )
+        for entry in pending:
+            try:
+                adapter.process_event(entry.payload)
+            except Exception as exc:
+                entry.attempts += 1
+                entry.last_error = f"{type(exc).__name__}: {exc}"
+                update_fields = ["attempts", "last_error", "updated_at"]
+                if entry.attempts < _max_attempts():
+                    entry.save(update_fields=update_fields)
+                    raise
+                entry.failed_at = timezone.now()
+                entry.save(update_fields=[*update_fields, "failed_at"])
+                logger.error(
+                    "billing_webhook_event_failed",
+                    provider=provider,
+                    event_id=entry.event_id,
+                    event_type=entry.event_type,
+                    billable_key=billable_key,
+                    attempts=entry.attempts,
+                    error=entry.last_error,
+                    exc_info=True,
+                )
+                continue
+            entry.mark_processed()
+            processed += 1
+    if processed:
+        logger.info(
+            "billing_webhook_events_applied",
+            provider=provider,
+            billable_key=billable_key,
+            count=processed,
+        )
+    return processed
+
+
+def stale_lanes(pending_since, retried_since):
+    """``(provider, billable_key)`` of lanes nobody is working on.
+
+    A lane is stale when it has had an event pending since before
+    ``pending_since`` (its task was lost, e.g. the broker was down when it was
+    sent) and no failed attempt after ``retried_since`` (so it is not just
+    waiting for a retry that is still scheduled).
+    """
+    stale = set(
+        _pending_events()
+        .filter(created_at__lt=pending_since)
+        .order_by()
+        .values_list("provider", "billable_key")
+        .distinct()
+    )
+    retrying = set(
+        _pending_events()
+        .filter(attempts__gt=0, updated_at__gte=retried_since)
+        .order_by()
+        .values_list("provider", "billable_key")
+        .distinct()
     )
+    return sorted(stale - retrying)
 
 
 def _grace_days():
@@ -139,6 +282,9 @@ def apply_subscription_update(provider, data):
         sub.cancellation_effective_at = data.get("cancellation_effective_at")
         if event_at:
             sub.last_event_at = event_at
+        # The provider moved the row on: if it lapses again, the periodic task
+        # has to look at it again.
+        sub.downgraded_at = None
         sub.raw_payload = data.get("raw_payload", {}) or {}
 
         # Grace-period bookkeeping on entering past_due.
@@ -161,6 +307,7 @@ def apply_subscription_update(provider, data):
             sub.billing_disabled_email_sent = False
 
         sub.save()
+        state.invalidate_billing_snapshot(sub.billable_type, sub.billable_id)
 
     # Apply plan to the account (outside the row lock).
     if status in (BillingSubscription.STATUS_ACTIVE, BillingSubscription.STATUS_PAUSED):
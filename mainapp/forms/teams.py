@@ -1,3 +1,5 @@
+import re
+
 from django import forms
 from crispy_forms.helper import FormHelper
 from crispy_forms.layout import Layout, Field, Div
@@ -102,6 +104,72 @@ class InviteMemberForm(forms.Form):
         return email
 
 
+class BulkInviteMemberForm(forms.Form):
+    """Form for inviting many people with the same role"""
+
+    emails = forms.CharField(
+        label='Email Addresses',
+        help_text='One per line, or separated by commas',
+        widget=forms.Textarea(attrs={
+            'rows': 8,
+            'placeholder': 'alice@example.com\nbob@example.com'
+        })
+    )
+
+    role = forms.ChoiceField(
+        label='Role',
+        choices=[
+            ('viewer', 'Viewer - Read-only access'),
+            ('member', 'Member - Create and edit'),
+            ('admin', 'Admin - Manage team and members'),
+        ],
+        initial='member'
+    )
+
+    message = forms.CharField(
+        label='Personal Message (Optional)',
+        required=False,
+        widget=forms.Textarea(attrs={
+            'rows': 3,
+            'placeholder': 'Add a personal message...'
+        })
+    )
+
+    def __init__(self, *args, team=None, inviter_membership=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.team = team
+        self.inviter_membership = inviter_membership
+
+        self.helper = FormHelper()
+        self.helper.form_tag = False
+        self.helper.layout = Layout(
+            Div(
+                Field('emails', css_class='mb-4 font-mono'),
+                Field('role', css_class='mb-4'),
+                Field('message', css_class='mb-4'),
+                css_class='space-y-4'
+            )
+        )
+
+        if inviter_membership and inviter_membership.role == 'admin':
+            self.fields['role'].choices = [
+                ('viewer', 'Viewer - Read-only access'),
+                ('member', 'Member - Create and edit'),
+            ]
+
+    def clean_emails(self):
+        """Split the list; screening happens in mainapp.invitations.invite_many"""
+        from mainapp.invitations import max_bulk_invitations
+
+        emails = [e.strip() for e in re.split(r'[\s,;]+', self.cleaned_data['emails']) if e.strip()]
+        if not emails:
+            raise forms.ValidationError("Enter at least one email address")
+        limit = max_bulk_invitations()
+        if len(emails) > limit:
+            raise forms.ValidationError(f"You can invite at most {limit} people at once")
+        return emails
+
+
 class UpdateMemberRoleForm(forms.Form):
     """Form for updating a team member's role"""
 
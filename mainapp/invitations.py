@@ -0,0 +1,182 @@
+"""
+Inviting many people to a team at once.
+
+``TeamInvitation.objects.create()`` per address fires ``post_save`` (one
+webhook fan-out each) and the caller queues one email task each, so
+onboarding a 500-person organisation used to mean 500 of everything.
+``invite_many`` does the same work in a fixed number of steps::
+
+    result = invite_many(team, request.user, emails, role="member")
+    result.invitations   # the TeamInvitation rows created
+    result.skipped       # [(email, reason)] for everything else
+
+* Every address is screened in one pass: syntax, the domain blocklists
+  (in memory), the suppression list, existing members and pending
+  invitations (one query each, however many addresses).
+* The invitations are inserted with one ``bulk_create``.
+* One webhook fan-out covers all of them (``on_team_invitations_created``).
+* Emails are queued after commit in chunks of
+  ``SPEEDPY_TEAM_INVITATION_EMAIL_CHUNK_SIZE``; each chunk is one
+  ``send_team_invitation_emails`` task that renders against a shared context.
+
+Permission checks (who may invite which role) stay with the caller.
+"""
+
+import secrets
+from datetime import timedelta
+from functools import partial
+
+import structlog
+from celery import current_app
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from mainapp.models import TeamInvitation, TeamMembership
+from mainapp.webhooks.business_events import on_team_invitations_created
+from speedpycom.services.email_domains import is_blocked
+from speedpycom.services.email_events import suppressed_among
+
+logger = structlog.get_logger(__name__)
+
+INVITATION_LIFETIME = timedelta(days=7)
+
+# Reasons an address is skipped. The domain blocklists and the suppression
+# list stay distinguishable only as far as the inviter can act on them.
+SKIP_INVALID = "invalid"
+SKIP_DUPLICATE = "duplicate"
+SKIP_NOT_ACCEPTED = "not_accepted"
+SKIP_UNDELIVERABLE = "undeliverable"
+SKIP_ALREADY_MEMBER = "already_member"
+SKIP_ALREADY_INVITED = "already_invited"
+
+SKIP_MESSAGES = {
+    SKIP_INVALID: "Not a valid email address.",
+    SKIP_DUPLICATE: "Listed more than once.",
+    SKIP_NOT_ACCEPTED: "We cannot accept this email address.",
+    SKIP_UNDELIVERABLE: "Email to this address has bounced or been reported as spam.",
+    SKIP_ALREADY_MEMBER: "Already a member of the team.",
+    SKIP_ALREADY_INVITED: "An invitation has already been sent to this email.",
+}
+
+
+def max_bulk_invitations():
+    return getattr(settings, "SPEEDPY_TEAM_BULK_INVITATION_MAX", 500)
+
+
+class BulkInvitationResult:
+    def __init__(self, invitations, skipped):
+        self.invitations = invitations
+        self.skipped = skipped
+
+
+def screen_emails(team, emails):
+    """Split ``emails`` into ``(accepted, skipped)``.
+
+    ``accepted`` is normalised (stripped, lowercased) and in input order;
+    ``skipped`` is ``[(email, reason)]``.
+    """
+    candidates = []
+    skipped = []
+    seen = set()
+    for raw in emails:
+        email = (raw or "").strip().lower()
+        try:
+            validate_email(email)
+        except ValidationError:
+            skipped.append((raw, SKIP_INVALID))
+            continue
+        if email in seen:
+            skipped.append((email, SKIP_DUPLICATE))
+            continue
+        seen.add(email)
+        if is_blocked(email):
+            skipped.append((email, SKIP_NOT_ACCEPTED))
+            continue
+        candidates.append(email)
+
+    if not candidates:
+        return [], skipped
+
+    suppressed = suppressed_among(candidates)
+    members = set(
+        TeamMembership.objects.filter(team=team, user__email__in=candidates)
+        .values_list("user__email", flat=True)
+    )
+    # Same test as TeamInvitation.is_valid(): no expiry means still valid.
+    invited = set(
+        TeamInvitation.objects.filter(
+            Q(expires_at__isnull=True) | Q(expires_at__gt=timezone.now()),
+            team=team,
+            email__in=candidates,
+            status="pending",
+        ).values_list("email", flat=True)
+    )
+    members = {email.lower() for email in members}
+    accepted = []
+    for email in candidates:
+        if email in suppressed:
+            skipped.append((email, SKIP_UNDELIVERABLE))
+        elif email in members:
+            skipped.append((email, SKIP_ALREADY_MEMBER))
+        elif email in invited:
+            skipped.append((email, SKIP_ALREADY_INVITED))
+        else:
+            accepted.append(email)
+    return accepted, skipped
+
+
+def invite_many(team, invited_by, emails, role, message=""):
+    """Invite every acceptable address in ``emails``; see the module docstring."""
+    accepted, skipped = screen_emails(team, emails)
+    if not accepted:
+        return BulkInvitationResult([], skipped)
+
+    User = get_user_model()
+    users = {
+        user.email.lower(): user
+        for user in User.objects.filter(email__in=accepted).only("pk", "email")
+    }
+    expires_at = timezone.now() + INVITATION_LIFETIME
+    chunk_size = getattr(settings, "SPEEDPY_TEAM_INVITATION_EMAIL_CHUNK_SIZE", 50)
+    with transaction.atomic():
+        # bulk_create skips TeamInvitation.save(), so the token and expiry it
+        # would fill in are set here ...
+        invitations = TeamInvitation.objects.bulk_create([
+            TeamInvitation(
+                team=team,
+                invited_by=invited_by,
+                email=email,
+                user=users.get(email),
+                role=role,
+                message=message,
+                token=secrets.token_urlsafe(48),
+                expires_at=expires_at,
+            )
+            for email in accepted
+        ])
+        # ... and post_save, so the webhook event is dispatched here, once.
+        on_team_invitations_created(team, invitations)
+
+        for start in range(0, len(invitations), chunk_size):
+            transaction.on_commit(
+                partial(
+                    current_app.send_task,
+                    "send_team_invitation_emails",
+                    kwargs={"invitation_ids": [inv.pk for inv in invitations[start:start + chunk_size]]},
+                )
+            )
+
+    logger.info(
+        "team_invitations_bulk_created",
+        team_id=str(team.pk),
+        invited_by_id=str(invited_by.pk),
+        role=role,
+        created=len(invitations),
+        skipped=len(skipped),
+    )
+    return BulkInvitationResult(invitations, skipped)
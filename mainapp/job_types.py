@@ -0,0 +1,39 @@
+"""
+Chunked job types for ``mainapp`` (see ``mainapp/jobs/chunked.py``).
+"""
+
+from mainapp.jobs import ChunkedJobType, register_job_type
+
+# SPEEDPY_DEMO: demo chunked job — remove before production (see demo-content.json)
+DEMO_CHUNK_SIZE = 1000
+
+
+@register_job_type
+class DemoChunkedJob(ChunkedJobType):
+    """Sum ``range(params["count"])`` in chunks of ``DEMO_CHUNK_SIZE``."""
+
+    job_type = "demo_chunked"
+
+    def plan(self, job):
+        count = int(job.params.get("count", 10000))
+        return [
+            {"start": start, "stop": min(start + DEMO_CHUNK_SIZE, count)}
+            for start in range(0, count, DEMO_CHUNK_SIZE)
+        ]
+
+    def units(self, spec):
+        return spec["stop"] - spec["start"]
+
+    def run_chunk(self, job, spec, ctx):
+        cursor = ctx.cursor or {"next": spec["start"], "sum": 0}
+        total = cursor["sum"]
+        for number in range(cursor["next"], spec["stop"]):
+            ctx.raise_if_cancelled()
+            total += number
+            ctx.advance()
+            if (number + 1) % 100 == 0:
+                ctx.checkpoint({"next": number + 1, "sum": total})
+        return {"sum": total}
+
+    def finalize(self, job, results):
+        return {"sum": sum(result["sum"] for result in results)}
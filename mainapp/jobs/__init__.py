@@ -0,0 +1,28 @@
+from .chunked import (
+    ChunkedJobType,
+    JobCancelled,
+    cancel_job,
+    get_job_type,
+    register_job_type,
+    resume_job,
+    start_job,
+)
+from .events import publish_job
+from .progress import ProgressReporter, apply_progress, read_progress
+from .results import attach_result_file, clear_result_file
+
+__all__ = [
+    "ChunkedJobType",
+    "JobCancelled",
+    "ProgressReporter",
+    "apply_progress",
+    "attach_result_file",
+    "cancel_job",
+    "clear_result_file",
+    "get_job_type",
+    "publish_job",
+    "read_progress",
+    "register_job_type",
+    "resume_job",
+    "start_job",
+]
@@ -0,0 +1,394 @@
+"""
+Chunked jobs: one ``AsyncJob`` fanned out over every Celery worker.
+
+A job type describes how to split its work and how to process one slice::
+
+    @register_job_type
+    class ReplayDeliveries(ChunkedJobType):
+        job_type = "replay_deliveries"
+
+        def plan(self, job):
+            ids = list(WebhookDelivery.objects.filter(...).values_list("pk", flat=True))
+            return [{"ids": ids[i:i + 500]} for i in range(0, len(ids), 500)]
+
+        def units(self, spec):
+            return len(spec["ids"])
+
+        def run_chunk(self, job, spec, ctx):
+            start = ctx.cursor or 0
+            for position in range(start, len(spec["ids"])):
+                ctx.raise_if_cancelled()
+                replay(spec["ids"][position])
+                ctx.advance()
+                ctx.checkpoint(position + 1)
+            return {"replayed": len(spec["ids"])}
+
+        def finalize(self, job, results):
+            return {"replayed": sum(r["replayed"] for r in results)}
+
+    job = start_job(user, "replay_deliveries", params={...})
+
+Job types live in an app's ``job_types.py`` and are discovered on first use.
+
+``start_job`` enqueues ``start_chunked_job``, which calls ``plan()`` once and
+stores one ``AsyncJobChunk`` per spec, then dispatches the unfinished chunks
+as a Celery ``group``.  Each ``run_job_chunk`` task reports progress through
+its ``ChunkContext``; the job's progress is the sum over all chunks (a Redis
+counter, flushed to the row at most every
+``SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS``).  The chunk that finishes last
+finalizes the job.  A ``group`` rather than a ``chord``: completion is tracked
+in the chunk rows, so it needs no result backend and survives a resume.
+
+Cancellation is cooperative: ``cancel_job`` stamps ``cancel_requested_at``,
+chunks see it at their next ``raise_if_cancelled()`` (checked at most every
+``SPEEDPY_JOB_CANCEL_CHECK_SECONDS``), keep their checkpoint and stop, and
+the job ends ``cancelled``.  ``resume_job`` re-dispatches a cancelled or failed
+job; finished chunks are skipped and the others continue from their cursor.
+
+A chunk only runs once it has been claimed (``pending`` -> ``running`` in one
+``UPDATE``), so a redelivered or stale task never runs it twice at the same
+time. A chunk left ``running`` by a dead worker goes back to ``pending`` on
+the next dispatch once it has been quiet for ``SPEEDPY_JOB_CHUNK_STALE_SECONDS``.
+"""
+
+import time
+from datetime import timedelta
+
+import structlog
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.module_loading import autodiscover_modules
+
+from mainapp.jobs.events import publish_job
+from mainapp.jobs.progress import ProgressReporter, add_progress
+from mainapp.models.jobs import AsyncJob, AsyncJobChunk
+
+logger = structlog.get_logger(__name__)
+
+_registry = {}
+_discovered = False
+
+
+class JobCancelled(Exception):
+    """Raised inside ``run_chunk`` when the job has been cancelled."""
+
+
+class ChunkedJobType:
+    """Base class for chunked job types; see the module docstring."""
+
+    #: Registry key, stored in ``AsyncJob.job_type``.
+    job_type = None
+
+    def plan(self, job):
+        """Return a list of JSON-serializable chunk specs for ``job``."""
+        raise NotImplementedError
+
+    def units(self, spec):
+        """Work units in one chunk, summed into ``progress_total``."""
+        return 0
+
+    def run_chunk(self, job, spec, ctx):
+        """Process one chunk and return its JSON-serializable result."""
+        raise NotImplementedError
+
+    def finalize(self, job, results):
+        """Combine chunk results (in chunk order) into the job's result."""
+        return {"chunks": len(results)}
+
+
+def register_job_type(cls):
+    """Class decorator adding a ``ChunkedJobType`` to the registry."""
+    if not cls.job_type:
+        raise ValueError(f"{cls.__name__} must set job_type")
+    _registry[cls.job_type] = cls()
+    return cls
+
+
+def job_types():
+    global _discovered
+    if not _discovered:
+        autodiscover_modules("job_types")
+        _discovered = True
+    return dict(_registry)
+
+
+def get_job_type(job_type):
+    """The registered handler for ``job_type``, or None."""
+    return job_types().get(job_type)
+
+
+def start_job(owner, job_type, params=None):
+    """Create a chunked job and enqueue its planning once the transaction commits."""
+    if get_job_type(job_type) is None:
+        raise ValueError(f"Unknown job type: {job_type}")
+    job = AsyncJob.objects.create(owner=owner, job_type=job_type, params=params or {})
+    _enqueue_start(job)
+    logger.info("chunked_job_created", job_id=str(job.pk), job_type=job_type)
+    return job
+
+
+def cancel_job(job):
+    """Ask a running job to stop. Returns False if it had already finished."""
+    updated = AsyncJob.objects.filter(
+        pk=job.pk, cancel_requested_at__isnull=True,
+    ).exclude(status__in=AsyncJob.TERMINAL_STATUSES).update(
+        cancel_requested_at=timezone.now(), updated_at=timezone.now(),
+    )
+    job.refresh_from_db()
+    if updated and job.status == AsyncJob.Status.QUEUED:
+        # Nothing is running yet; chunks that start later skip themselves.
+        finalize(job.pk)
+        job.refresh_from_db()
+    logger.info("chunked_job_cancel_requested", job_id=str(job.pk), accepted=bool(updated))
+    return bool(updated)
+
+
+def resume_job(job):
+    """Re-dispatch a cancelled or failed job. Returns False if it cannot resume."""
+    if job.status not in (AsyncJob.Status.CANCELLED, AsyncJob.Status.FAILED):
+        return False
+    with transaction.atomic():
+        job.chunks.filter(status=AsyncJobChunk.Status.FAILED).update(
+            status=AsyncJobChunk.Status.PENDING, error="", updated_at=timezone.now(),
+        )
+        job.status = AsyncJob.Status.QUEUED
+        job.cancel_requested_at = None
+        job.finished_at = None
+        job.error = ""
+        job.message = "Resuming"
+        job.save(update_fields=[
+            "status", "cancel_requested_at", "finished_at", "error", "message", "updated_at",
+        ])
+        _enqueue_start(job)
+    logger.info("chunked_job_resumed", job_id=str(job.pk))
+    return True
+
+
+def _enqueue_start(job):
+    from mainapp.tasks.jobs import start_chunked_job
+
+    transaction.on_commit(lambda pk=str(job.pk): start_chunked_job.delay(pk))
+
+
+class ChunkContext:
+    """Progress, checkpoint and cancellation hooks for one running chunk."""
+
+    def __init__(self, job, chunk):
+        self.job = job
+        self.chunk = chunk
+        self.flush_interval = getattr(settings, "SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS", 5)
+        self.cancel_check_interval = getattr(settings, "SPEEDPY_JOB_CANCEL_CHECK_SECONDS", 1)
+        self._unflushed = 0
+        self._live_total = None
+        self._flushed_at = time.monotonic()
+        self._checked_at = time.monotonic()
+        self._cancelled = False
+        # ``processed`` as of the last checkpoint: all a stopped chunk may keep.
+        self.checkpointed = chunk.processed
+
+    @property
+    def cursor(self):
+        """Where the chunk's last ``checkpoint()`` left off, or None."""
+        return self.chunk.cursor
+
+    def advance(self, amount=1):
+        """Count ``amount`` more units done, towards the job's progress."""
+        self.chunk.processed += amount
+        self._unflushed += amount
+        live_total = add_progress(self.job.pk, amount)
+        if live_total is not None:
+            self._live_total = live_total
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self._flush()
+
+    def checkpoint(self, cursor):
+        """Persist ``cursor``; a resumed chunk starts from here."""
+        self.chunk.cursor = cursor
+        self.chunk.save(update_fields=["cursor", "processed", "updated_at"])
+        self.checkpointed = self.chunk.processed
+        self._flush()
+
+    def cancelled(self):
+        if self._cancelled:
+            return True
+        if time.monotonic() - self._checked_at < self.cancel_check_interval:
+            return False
+        self._checked_at = time.monotonic()
+        self._cancelled = AsyncJob.objects.filter(
+            pk=self.job.pk, cancel_requested_at__isnull=False,
+        ).exists()
+        return self._cancelled
+
+    def raise_if_cancelled(self):
+        if self.cancelled():
+            raise JobCancelled()
+
+    def _flush(self):
+        if not self._unflushed:
+            return
+        now = timezone.now()
+        jobs = AsyncJob.objects.filter(pk=self.job.pk)
+        if self._live_total is not None:
+            # Redis holds the sum over all chunks; never move the row backwards.
+            jobs.update(
+                progress_current=Greatest(F("progress_current"), self._live_total),
+                updated_at=now,
+            )
+            self.job.progress_current = self._live_total
+            publish_job(self.job)
+        else:
+            jobs.update(
+                progress_current=F("progress_current") + self._unflushed,
+                updated_at=now,
+            )
+        # Doubles as the chunk's heartbeat; see _requeue_stale_chunks().
+        AsyncJobChunk.objects.filter(pk=self.chunk.pk).update(updated_at=now)
+        self._unflushed = 0
+        self._flushed_at = time.monotonic()
+
+
+def plan_and_dispatch(job_id):
+    """Plan ``job_id`` (once) and dispatch its unfinished chunks."""
+    from celery import group
+
+    from mainapp.tasks.jobs import run_job_chunk
+
+    job = AsyncJob.objects.filter(pk=job_id).first()
+    if job is None or job.is_terminal:
+        return
+    handler = get_job_type(job.job_type)
+    if handler is None:
+        ProgressReporter(job).fail(f"Unknown job type: {job.job_type}", message="Job failed")
+        return
+    if job.cancel_requested_at:
+        finalize(job.pk)
+        return
+
+    if not job.chunks.exists():
+        specs = handler.plan(job)
+        AsyncJobChunk.objects.bulk_create([
+            AsyncJobChunk(job=job, index=index, spec=spec) for index, spec in enumerate(specs)
+        ])
+        job.progress_total = sum(handler.units(spec) for spec in specs)
+
+    _requeue_stale_chunks(job.pk)
+    # On resume, progress restarts from the chunks' last checkpoints.
+    job.progress_current = job.chunks.aggregate(done=Sum("processed"))["done"] or 0
+    reporter = ProgressReporter(job)
+    started_at = job.started_at
+    reporter.start(total=job.progress_total, message="Running")
+    if started_at:
+        job.started_at = started_at
+        job.save(update_fields=["started_at", "updated_at"])
+
+    pending = list(
+        job.chunks.exclude(status=AsyncJobChunk.Status.SUCCEEDED)
+        .order_by("index").values_list("index", flat=True)
+    )
+    logger.info("chunked_job_dispatched", job_id=str(job.pk), chunks=len(pending))
+    if not pending:
+        finalize(job.pk)
+        return
+    group(run_job_chunk.s(str(job.pk), index) for index in pending).apply_async()
+
+
+def _requeue_stale_chunks(job_id):
+    """Hand chunks whose worker is gone back to the next dispatch.
+
+    A running chunk touches its row at least every
+    ``SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS`` while it makes progress. One that
+    has been quiet for ``SPEEDPY_JOB_CHUNK_STALE_SECONDS`` lost its worker
+    (killed, or its task was lost), so it goes back to pending and runs again
+    from its last checkpoint. Runs on every dispatch (a resume, or a
+    redelivered ``start_chunked_job``) and whenever a chunk finishes, so a
+    cancelled job is not kept waiting on a chunk nobody is running.
+    """
+    stale_after = getattr(settings, "SPEEDPY_JOB_CHUNK_STALE_SECONDS", 600)
+    requeued = AsyncJobChunk.objects.filter(
+        job_id=job_id,
+        status=AsyncJobChunk.Status.RUNNING,
+        updated_at__lt=timezone.now() - timedelta(seconds=stale_after),
+    ).update(status=AsyncJobChunk.Status.PENDING, updated_at=timezone.now())
+    if requeued:
+        logger.warning("job_chunks_requeued", job_id=str(job_id), chunks=requeued)
+
+
+def execute_chunk(job_id, index):
+    """Run one chunk, then finalize the job if it was the last one out."""
+    chunk = AsyncJobChunk.objects.select_related("job").filter(job_id=job_id, index=index).first()
+    if chunk is None or chunk.status == AsyncJobChunk.Status.SUCCEEDED:
+        return
+    job = chunk.job
+    if job.is_terminal or job.cancel_requested_at:
+        _finalize_if_done(job_id)
+        return
+
+    # Claim the chunk: a redelivered task, or one queued before a resume, finds
+    # it already running (or done) and leaves it to whoever claimed it.
+    claimed = AsyncJobChunk.objects.filter(
+        pk=chunk.pk, status=AsyncJobChunk.Status.PENDING,
+    ).update(status=AsyncJobChunk.Status.RUNNING, updated_at=timezone.now())
+    if not claimed:
+        logger.info("job_chunk_already_claimed", job_id=str(job_id), index=index)
+        return
+    chunk.status = AsyncJobChunk.Status.RUNNING
+
+    handler = get_job_type(job.job_type)
+    ctx = ChunkContext(job, chunk)
+    try:
+        chunk.result = handler.run_chunk(job, chunk.spec, ctx)
+        chunk.status = AsyncJobChunk.Status.SUCCEEDED
+    except JobCancelled:
+        chunk.status = AsyncJobChunk.Status.PENDING
+        logger.info("job_chunk_cancelled", job_id=str(job_id), index=index)
+    except Exception as exc:
+        chunk.status = AsyncJobChunk.Status.FAILED
+        chunk.error = str(exc)
+        logger.error("job_chunk_failed", job_id=str(job_id), index=index, error=str(exc))
+    if chunk.status != AsyncJobChunk.Status.SUCCEEDED:
+        # Keep only what the last checkpoint covers; the units after it run
+        # again from that cursor and must not be counted twice.
+        chunk.processed = ctx.checkpointed
+    chunk.save(update_fields=["status", "result", "error", "cursor", "processed", "updated_at"])
+    ctx._flush()
+    _finalize_if_done(job_id)
+
+
+def _finalize_if_done(job_id):
+    chunks = AsyncJobChunk.objects.filter(job_id=job_id)
+    _requeue_stale_chunks(job_id)
+    if chunks.filter(status=AsyncJobChunk.Status.RUNNING).exists():
+        return
+    cancelled = AsyncJob.objects.filter(pk=job_id, cancel_requested_at__isnull=False).exists()
+    if not cancelled and chunks.filter(status=AsyncJobChunk.Status.PENDING).exists():
+        return
+    finalize(job_id)
+
+
+def finalize(job_id):
+    """Give ``job_id`` its terminal state. Safe to call more than once."""
+    with transaction.atomic():
+        job = AsyncJob.objects.select_for_update().filter(pk=job_id).first()
+        if job is None or job.is_terminal:
+            return
+        chunks = list(job.chunks.order_by("index"))
+        job.progress_current = sum(chunk.processed for chunk in chunks)
+        reporter = ProgressReporter(job)
+        if job.cancel_requested_at:
+            reporter.cancel()
+        elif any(chunk.status == AsyncJobChunk.Status.FAILED for chunk in chunks):
+            failed = [chunk for chunk in chunks if chunk.status == AsyncJobChunk.Status.FAILED]
+            reporter.fail(
+                "; ".join(f"chunk {chunk.index}: {chunk.error}" for chunk in failed),
+                message=f"{len(failed)} of {len(chunks)} chunk(s) failed",
+            )
+        else:
+            handler = get_job_type(job.job_type)
+            reporter.succeed(
+                handler.finalize(job, [chunk.result for chunk in chunks]),
+                message="Completed",
+            )
+    logger.info("chunked_job_finished", job_id=str(job_id), status=job.status)
@@ -0,0 +1,74 @@
+"""
+Live job updates over Redis pub/sub.
+
+Tasks call ``publish_job(job)`` after each state change; the job's current
+representation (the same JSON ``GET /api/v1/jobs/{id}/`` returns) goes to the
+``speedpy:job:<id>:events`` channel.  ``GET /api/v1/jobs/{id}/events/``
+(``mainapp.api.job_events``) subscribes to that channel and relays each message
+to the client as a Server-Sent Event, so a watcher costs one open connection
+instead of a DB read every few seconds.
+
+Publishing is best-effort: without ``SPEEDPY_JOBS_REDIS_URL`` (defaults to
+``REDIS_URL``) it is a no-op, and Redis errors are logged, never raised into the
+task.  The stream reconciles with the database whenever it has been idle for a
+heartbeat, so a missed message delays an update, it never loses one.
+"""
+
+import structlog
+from django.conf import settings
+
+from speedpycom.api import codec
+
+logger = structlog.get_logger(__name__)
+
+_clients = {}
+
+
+def redis_url():
+    return getattr(settings, "SPEEDPY_JOBS_REDIS_URL", None)
+
+
+def channel_name(job_id):
+    return f"speedpy:job:{job_id}:events"
+
+
+def job_payload(job):
+    """The job as the status endpoint renders it."""
+    from mainapp.api.jobs import AsyncJobSerializer
+
+    return AsyncJobSerializer(job).data
+
+
+def get_client():
+    """A process-wide synchronous Redis client, or None when not configured."""
+    url = redis_url()
+    if not url:
+        return None
+    if url not in _clients:
+        import redis
+
+        _clients[url] = redis.Redis.from_url(url)
+    return _clients[url]
+
+
+def get_async_client():
+    """A new ``redis.asyncio`` client for one stream, or None when not configured."""
+    url = redis_url()
+    if not url:
+        return None
+    import redis.asyncio
+
+    return redis.asyncio.Redis.from_url(url)
+
+
+def publish_job(job):
+    """Publish ``job``'s current state to its channel. Returns True if sent."""
+    client = get_client()
+    if client is None:
+        return False
+    try:
+        client.publish(channel_name(job.pk), codec.dumps(job_payload(job)))
+    except Exception:
+        logger.warning("job_event_publish_failed", job_id=str(job.pk), exc_info=True)
+        return False
+    return True
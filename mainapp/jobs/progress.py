@@ -0,0 +1,178 @@
+"""
+Job progress reporting without an UPDATE per step.
+
+A task that wrote ``progress_current`` / ``message`` to its ``AsyncJob`` row on
+every step turned thousands of steps into thousands of UPDATEs, each bumping
+``updated_at`` and contending with pollers.  ``ProgressReporter`` keeps live
+progress in a Redis hash (``speedpy:job:<id>:progress``) instead and publishes
+each update to SSE watchers.  The row is written on start, at explicit
+checkpoints, at most every ``SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS`` while
+progress keeps arriving, and on the terminal state::
+
+    reporter = ProgressReporter(job)
+    reporter.start(total=len(rows), message="Importing")
+    for index, row in enumerate(rows, start=1):
+        import_row(row)
+        reporter.update(index, message=f"Imported {index}/{len(rows)}")
+    reporter.succeed({"imported": len(rows)})
+
+Readers call ``apply_progress(job)`` to overlay the live values on a loaded
+row; the status endpoint and the event stream do.  Without Redis
+(``SPEEDPY_JOBS_REDIS_URL`` unset) only the flushes reach readers, so the
+status endpoint lags by at most one flush interval.
+"""
+
+import time
+
+import structlog
+from django.conf import settings
+from django.utils import timezone
+
+from mainapp.jobs.events import get_client, publish_job
+from mainapp.jobs.results import RESULT_FILE_FIELDS, offload_result
+from mainapp.models.jobs import AsyncJob
+
+logger = structlog.get_logger(__name__)
+
+PROGRESS_FIELDS = ("progress_current", "progress_total", "message")
+
+
+def progress_key(job_id):
+    return f"speedpy:job:{job_id}:progress"
+
+
+def read_progress(job_id):
+    """Live progress for ``job_id`` from Redis, or None."""
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        raw = client.hgetall(progress_key(job_id))
+    except Exception:
+        logger.warning("job_progress_read_failed", job_id=str(job_id), exc_info=True)
+        return None
+    if not raw:
+        return None
+    values = {key.decode(): value.decode() for key, value in raw.items()}
+    return {
+        "progress_current": int(values.get("progress_current", 0)),
+        "progress_total": int(values.get("progress_total", 0)),
+        "message": values.get("message", ""),
+    }
+
+
+def add_progress(job_id, amount):
+    """Atomically add ``amount`` to the live ``progress_current``.
+
+    For chunked jobs, where several workers advance one job. Returns the new
+    total, or None without Redis.
+    """
+    client = get_client()
+    if client is None:
+        return None
+    try:
+        return client.hincrby(progress_key(job_id), "progress_current", amount)
+    except Exception:
+        logger.warning("job_progress_store_failed", job_id=str(job_id), exc_info=True)
+        return None
+
+
+def apply_progress(job, progress=None):
+    """Overlay live progress on ``job`` (in memory) unless it is terminal."""
+    if job.is_terminal:
+        return job
+    if progress is None:
+        progress = read_progress(job.pk)
+    if progress:
+        for field in PROGRESS_FIELDS:
+            setattr(job, field, progress[field])
+    return job
+
+
+class ProgressReporter:
+    """Report a running job's progress; see the module docstring."""
+
+    def __init__(self, job, flush_interval=None):
+        self.job = job
+        if flush_interval is None:
+            flush_interval = getattr(settings, "SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS", 5)
+        self.flush_interval = flush_interval
+        self._flushed_at = time.monotonic()
+        self._dirty = False
+
+    def start(self, total=0, message=""):
+        job = self.job
+        job.status = AsyncJob.Status.RUNNING
+        job.started_at = timezone.now()
+        job.progress_total = total
+        job.message = message
+        job.save(update_fields=[
+            "status", "started_at", *PROGRESS_FIELDS, "updated_at",
+        ])
+        self._flushed_at = time.monotonic()
+        self._store()
+        publish_job(job)
+
+    def update(self, current, *, total=None, message=None):
+        job = self.job
+        job.progress_current = current
+        if total is not None:
+            job.progress_total = total
+        if message is not None:
+            job.message = message[:255]
+        self._dirty = True
+        self._store()
+        publish_job(job)
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.checkpoint()
+
+    def checkpoint(self):
+        """Write the current progress to the database now."""
+        if not self._dirty:
+            return
+        self.job.save(update_fields=[*PROGRESS_FIELDS, "updated_at"])
+        self._flushed_at = time.monotonic()
+        self._dirty = False
+
+    def succeed(self, result=None, message=""):
+        """Finish successfully; an oversized ``result`` is stored as a file."""
+        self.job.result = offload_result(self.job, result)
+        self._finish(AsyncJob.Status.SUCCEEDED, message, ["result", *RESULT_FILE_FIELDS])
+
+    def fail(self, error, message=""):
+        self.job.error = str(error)
+        self._finish(AsyncJob.Status.FAILED, message, ["error"])
+
+    def cancel(self, message="Cancelled"):
+        self._finish(AsyncJob.Status.CANCELLED, message, [])
+
+    def _finish(self, status, message, fields):
+        job = self.job
+        job.status = status
+        job.finished_at = timezone.now()
+        job.message = message
+        job.save(update_fields=[
+            "status", "finished_at", *PROGRESS_FIELDS, *fields, "updated_at",
+        ])
+        self._dirty = False
+        client = get_client()
+        if client is not None:
+            try:
+                client.delete(progress_key(job.pk))
+            except Exception:
+                logger.warning("job_progress_clear_failed", job_id=str(job.pk), exc_info=True)
+        publish_job(job)
+
+    def _store(self):
+        client = get_client()
+        if client is None:
+            return
+        job = self.job
+        key = progress_key(job.pk)
+        try:
+            pipe = client.pipeline()
+            pipe.hset(key, mapping={field: getattr(job, field) for field in PROGRESS_FIELDS})
+            pipe.expire(key, getattr(settings, "SPEEDPY_JOB_PROGRESS_TTL_SECONDS", 86400))
+            pipe.execute()
+        except Exception:
+            logger.warning("job_progress_store_failed", job_id=str(job.pk), exc_info=True)
@@ -0,0 +1,87 @@
+"""
+Job results stored as private files instead of in the ``AsyncJob`` row.
+
+``AsyncJob.result`` is returned by every status poll and every SSE event, so a
+report or export kept there is re-read and re-serialized each time.  Large
+results go to ``AsyncJob.result_file`` instead, on ``private_storage`` (the
+``private/`` prefix of the bucket with ``USE_S3``, ``PRIVATE_MEDIA_ROOT``
+otherwise).  The job representation then carries only metadata and a link to
+``GET /api/v1/jobs/{id}/result/``, which redirects to a short-lived signed URL
+on object storage and streams the file from local disk.
+
+Tasks producing a file attach it before succeeding::
+
+    attach_result_file(job, csv_file, "export.csv", content_type="text/csv")
+    reporter.succeed({"rows": count})
+
+``ProgressReporter.succeed`` also offloads any JSON result larger than
+``SPEEDPY_JOB_RESULT_INLINE_MAX_BYTES`` on its own, so poll responses stay
+small whatever a task returns.
+"""
+
+import posixpath
+
+import structlog
+from django.conf import settings
+from django.core.files.base import ContentFile, File
+
+from speedpycom.api import codec
+
+logger = structlog.get_logger(__name__)
+
+RESULT_FILE_FIELDS = ("result_file", "result_content_type", "result_size")
+
+
+def attach_result_file(job, content, filename, content_type="application/octet-stream"):
+    """Store ``content`` (bytes or a file object) as ``job``'s result file.
+
+    Sets the file fields on ``job`` without saving the row; the reporter's
+    terminal save persists them.  A previous result file is removed.
+    """
+    if isinstance(content, bytes):
+        content = ContentFile(content)
+    elif not isinstance(content, File):
+        content = File(content)
+    clear_result_file(job)
+    size = content.size
+    job.result_file.save(f"{job.pk}/{filename}", content, save=False)
+    job.result_content_type = content_type
+    job.result_size = size
+    logger.info(
+        "job_result_file_stored",
+        job_id=str(job.pk),
+        name=job.result_file.name,
+        size=job.result_size,
+    )
+    return job.result_file
+
+
+def clear_result_file(job):
+    """Delete ``job``'s result file, if any (the row is not saved)."""
+    if job.result_file:
+        job.result_file.delete(save=False)
+    job.result_content_type = ""
+    job.result_size = None
+
+
+def offload_result(job, result):
+    """Return the value to keep inline, storing an oversized ``result`` as JSON."""
+    if result is None:
+        return None
+    limit = getattr(settings, "SPEEDPY_JOB_RESULT_INLINE_MAX_BYTES", 65536)
+    encoded = codec.dumps(result)
+    if len(encoded) <= limit:
+        return result
+    attach_result_file(job, encoded, "result.json", content_type="application/json")
+    return None
+
+
+def result_file_metadata(job):
+    """``{"filename", "content_type", "size"}`` for ``job``'s result file, or None."""
+    if not job.result_file:
+        return None
+    return {
+        "filename": posixpath.basename(job.result_file.name),
+        "content_type": job.result_content_type or "application/octet-stream",
+        "size": job.result_size,
+    }
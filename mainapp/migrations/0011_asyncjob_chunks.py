@@ -0,0 +1,52 @@
+# Generated by Django 6.0.3 on 2026-10-19 09:00
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0010_team_deletion_requested_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asyncjob',
+            name='cancel_requested_at',
+            field=models.DateTimeField(blank=True, help_text='Set to ask running chunks to stop at their next check.', null=True),
+        ),
+        migrations.AddField(
+            model_name='asyncjob',
+            name='params',
+            field=models.JSONField(blank=True, default=dict, help_text='Input for the job type (chunked jobs).'),
+        ),
+        migrations.AlterField(
+            model_name='asyncjob',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], db_index=True, default='queued', max_length=20),
+        ),
+        migrations.CreateModel(
+            name='AsyncJobChunk',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('index', models.PositiveIntegerField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('succeeded', 'Succeeded'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('spec', models.JSONField(blank=True, default=dict, help_text="What this chunk covers, as returned by the job type's plan().")),
+                ('cursor', models.JSONField(blank=True, help_text='Last checkpoint inside the chunk; None until the first one.', null=True)),
+                ('processed', models.PositiveIntegerField(default=0, help_text='Units done as of the last checkpoint.')),
+                ('result', models.JSONField(blank=True, null=True)),
+                ('error', models.TextField(blank=True, default='')),
+                ('job', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='chunks', to='mainapp.asyncjob')),
+            ],
+            options={
+                'verbose_name': 'Async Job Chunk',
+                'verbose_name_plural': 'Async Job Chunks',
+                'ordering': ['job', 'index'],
+                'constraints': [models.UniqueConstraint(fields=('job', 'index'), name='unique_job_chunk_index')],
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 6.0.3 on 2026-10-19 01:03
+
+import project.media
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0011_asyncjob_chunks'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='asyncjob',
+            name='result_content_type',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='asyncjob',
+            name='result_file',
+            field=models.FileField(blank=True, help_text='Large result stored as a private file instead of in `result`.', max_length=255, storage=project.media.private_storage, upload_to='job-results/'),
+        ),
+        migrations.AddField(
+            model_name='asyncjob',
+            name='result_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
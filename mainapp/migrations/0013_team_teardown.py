@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0012_asyncjob_result_file'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='team',
+            name='teardown_progress',
+            field=models.JSONField(blank=True, default=dict, help_text='Rows removed so far per related table, while a teardown is running.'),
+        ),
+        migrations.AddField(
+            model_name='team',
+            name='teardown_started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0013_team_teardown'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billingsubscription',
+            name='downgraded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0014_billingsubscription_downgraded_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billingeventlog',
+            name='billable_key',
+            field=models.CharField(blank=True, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='billingeventlog',
+            name='occurred_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='billingeventlog',
+            index=models.Index(fields=['provider', 'billable_key', 'processed_at'], name='mainapp_bil_provide_9e3b87_idx'),
+        ),
+    ]
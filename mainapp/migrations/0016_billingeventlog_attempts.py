@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:28
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mainapp', '0015_billingeventlog_queue'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='billingeventlog',
+            name='attempts',
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='billingeventlog',
+            name='failed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='billingeventlog',
+            name='last_error',
+            field=models.TextField(blank=True),
+        ),
+    ]
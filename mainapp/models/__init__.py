@@ -1,5 +1,5 @@
 from .contact import ContactSubmission
-from .jobs import AsyncJob
+from .jobs import AsyncJob, AsyncJobChunk
 from .otp_profile import UserOTPProfile
 from .teams import (
     Team,
@@ -9,6 +9,10 @@ from .teams import (
     get_default_team_for_user,
     teams_due_for_deletion,
     finalize_team_deletion,
+    queue_team_purge,
+    start_team_teardown,
+    continue_team_teardown,
+    team_teardown_stages,
     run_team_cleanup_hooks,
     delete_sole_member_teams,
 )
@@ -23,6 +27,7 @@ from .billing import (
 
 __all__ = [
     'AsyncJob',
+    'AsyncJobChunk',
     'ContactSubmission',
     'UserOTPProfile',
     'Team',
@@ -32,6 +37,10 @@ __all__ = [
     'get_default_team_for_user',
     'teams_due_for_deletion',
     'finalize_team_deletion',
+    'queue_team_purge',
+    'start_team_teardown',
+    'continue_team_teardown',
+    'team_teardown_stages',
     'run_team_cleanup_hooks',
     'delete_sole_member_teams',
     'UserTourCompletion',
@@ -184,6 +184,10 @@ class BillingSubscription(_BillableMixin, BaseModel):
     grace_started_email_sent = models.BooleanField(default=False)
     billing_disabled_email_sent = models.BooleanField(default=False)
 
+    # Set by the periodic task once it has downgraded the account for this
+    # lapsed row, so it is not looked at again; cleared by every webhook update.
+    downgraded_at = models.DateTimeField(null=True, blank=True)
+
     class Meta:
         verbose_name = "Billing Subscription"
         verbose_name_plural = "Billing Subscriptions"
@@ -230,7 +234,8 @@ class BillingEventLog(BaseModel):
     """Idempotency / audit log of inbound provider webhook events.
 
     A row is created per (provider, event_id) so retried or duplicate webhooks
-    are processed exactly once. The raw payload is retained for debugging.
+    are processed exactly once. The webhook view stores the payload here and a
+    worker applies it later; ``processed_at`` is set once it has been applied.
     """
 
     provider = models.CharField(max_length=20, choices=PROVIDER_CHOICES, db_index=True)
@@ -238,6 +243,17 @@ class BillingEventLog(BaseModel):
     event_type = models.CharField(max_length=100, blank=True)
     payload = models.JSONField(default=dict, blank=True)
     processed_at = models.DateTimeField(null=True, blank=True)
+    # "<billable_type>:<billable_id>" of the account the event is about, or
+    # empty when the payload does not say. Events with the same key are applied
+    # one at a time, in ``occurred_at`` order.
+    billable_key = models.CharField(max_length=64, blank=True)
+    # When the provider says the event happened.
+    occurred_at = models.DateTimeField(null=True, blank=True)
+    # Failed attempts to apply the event. After SPEEDPY_BILLING_WEBHOOK_MAX_ATTEMPTS
+    # it is set aside (``failed_at``) so the rest of its lane can go ahead.
+    attempts = models.PositiveSmallIntegerField(default=0)
+    failed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
 
     class Meta:
         verbose_name = "Billing Event Log"
@@ -249,6 +265,9 @@ class BillingEventLog(BaseModel):
                 name="uniq_billing_event_provider_event",
             ),
         ]
+        indexes = [
+            models.Index(fields=["provider", "billable_key", "processed_at"]),
+        ]
 
     def __str__(self):
         return f"{self.provider}:{self.event_id} ({self.event_type})"
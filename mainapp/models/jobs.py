@@ -2,6 +2,7 @@ from django.conf import settings
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from project.media import private_storage
 from speedpycom.models import BaseModel
 
 
@@ -9,8 +10,10 @@ class AsyncJob(BaseModel):
     """
     Tracks the lifecycle of an async background job.
 
-    Each job maps 1:1 to a Celery task invocation. The API returns 202 with
-    a status URL; clients poll GET /api/v1/jobs/{id}/ until a terminal state.
+    Simple jobs map 1:1 to a Celery task invocation. Chunked jobs
+    (``mainapp.jobs.chunked``) fan out over ``AsyncJobChunk`` rows. The API
+    returns 202 with a status URL; clients poll GET /api/v1/jobs/{id}/ until a
+    terminal state.
     """
 
     class Status(models.TextChoices):
@@ -18,8 +21,9 @@ class AsyncJob(BaseModel):
         RUNNING = "running", _("Running")
         SUCCEEDED = "succeeded", _("Succeeded")
         FAILED = "failed", _("Failed")
+        CANCELLED = "cancelled", _("Cancelled")
 
-    TERMINAL_STATUSES = frozenset({Status.SUCCEEDED, Status.FAILED})
+    TERMINAL_STATUSES = frozenset({Status.SUCCEEDED, Status.FAILED, Status.CANCELLED})
 
     owner = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -56,11 +60,30 @@ class AsyncJob(BaseModel):
         blank=True,
         help_text=_("Arbitrary result payload on success."),
     )
+    result_file = models.FileField(
+        storage=private_storage,
+        upload_to="job-results/",
+        max_length=255,
+        blank=True,
+        help_text=_("Large result stored as a private file instead of in `result`."),
+    )
+    result_content_type = models.CharField(max_length=100, blank=True, default="")
+    result_size = models.PositiveBigIntegerField(null=True, blank=True)
     error = models.TextField(
         blank=True,
         default="",
         help_text=_("Error details on failure."),
     )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=_("Input for the job type (chunked jobs)."),
+    )
+    cancel_requested_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        help_text=_("Set to ask running chunks to stop at their next check."),
+    )
     started_at = models.DateTimeField(
         null=True,
         blank=True,
@@ -85,3 +108,58 @@ class AsyncJob(BaseModel):
     @property
     def is_terminal(self):
         return self.status in self.TERMINAL_STATUSES
+
+
+class AsyncJobChunk(BaseModel):
+    """
+    One slice of a chunked ``AsyncJob``.
+
+    Chunks run as independent Celery tasks. ``cursor`` and ``processed`` are
+    the chunk's own checkpoint, so a cancelled or failed job resumes where each
+    chunk left off instead of starting over.
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", _("Pending")
+        RUNNING = "running", _("Running")
+        SUCCEEDED = "succeeded", _("Succeeded")
+        FAILED = "failed", _("Failed")
+
+    job = models.ForeignKey(
+        AsyncJob,
+        on_delete=models.CASCADE,
+        related_name="chunks",
+    )
+    index = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=20,
+        choices=Status.choices,
+        default=Status.PENDING,
+    )
+    spec = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text=_("What this chunk covers, as returned by the job type's plan()."),
+    )
+    cursor = models.JSONField(
+        null=True,
+        blank=True,
+        help_text=_("Last checkpoint inside the chunk; None until the first one."),
+    )
+    processed = models.PositiveIntegerField(
+        default=0,
+        help_text=_("Units done as of the last checkpoint."),
+    )
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+
+    class Meta:
+        verbose_name = _("Async Job Chunk")
+        verbose_name_plural = _("Async Job Chunks")
+        ordering = ["job", "index"]
+        constraints = [
+            models.UniqueConstraint(fields=["job", "index"], name="unique_job_chunk_index"),
+        ]
+
+    def __str__(self):
+        return f"{self.job_id} #{self.index} [{self.status}]"
@@ -3,6 +3,7 @@ import secrets
 import structlog
 from django.db import models
 from django.conf import settings
+from django.core.cache import cache
 from django.db.models import Q
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
@@ -62,6 +63,15 @@ class Team(BaseModel):
         related_name="+",
         help_text="The owner who asked for the deletion. Kept for the audit trail only.",
     )
+    # Set once the purge has run the cleanup hooks and started deleting the
+    # team's rows in batches (see continue_team_teardown()). From then on the
+    # deletion can no longer be undone, only finished.
+    teardown_started_at = models.DateTimeField(null=True, blank=True)
+    teardown_progress = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Rows removed so far per related table, while a teardown is running.",
+    )
 
     class Meta:
         verbose_name = "Team"
@@ -179,7 +189,8 @@ class Team(BaseModel):
         """Delete the team, or schedule it, depending on the configured delay.
 
         Returns "deleted" or "scheduled" so the caller can report what
-        happened. Raises TeamDeletionBlocked when a live subscription stands in
+        happened. "deleted" means the team is deactivated and its teardown
+        started; the purge task removes its rows once the caller commits. Raises TeamDeletionBlocked when a live subscription stands in
         the way; callers must show that message rather than swallow it.
         """
         if self.is_deletion_scheduled:
@@ -233,21 +244,30 @@ class Team(BaseModel):
         if hours:
             return "scheduled"
 
-        # No delay: finish it now. Through the finalizer, never self.delete() —
-        # the cleanup hooks are what remove the objects the cascade cannot see.
+        # No delay: start the teardown now — billing re-check, cleanup hooks,
+        # deactivation — and leave the rows to the purge task. Deleting them
+        # here would hold the request's transaction (all of it, under
+        # ATOMIC_REQUESTS) open for as long as the team takes to empty.
+        from django.db import transaction
+
         try:
-            finalize_team_deletion(self)
-            return "deleted"
+            with transaction.atomic():
+                start_team_teardown(self)
         except (TeamCleanupFailed, TeamDeletionBlocked):
             # Both are already logged with their reason. The team stays marked,
             # so its billing is shut and the hourly task retries until it goes.
             # Reported as "deleting" rather than as an error: from the owner's
             # side the decision is made and acted on, just not finished yet.
             return "deleting"
+        queue_team_purge()
+        return "deleted"
 
     def cancel_scheduled_deletion(self, by_user=None):
-        """Undo a scheduled deletion. Idempotent; returns True if one was undone."""
-        if not self.is_deletion_scheduled:
+        """Undo a scheduled deletion. Idempotent; returns True if one was undone.
+
+        Too late once the teardown has started: rows are already gone.
+        """
+        if not self.is_deletion_scheduled or self.teardown_started_at:
             return False
         logger.info(
             "team_deletion_cancelled",
@@ -331,6 +351,24 @@ def finalize_team_deletion(team, require_due=True):
     team that hangs off it) is stopped rather than left to carry on and orphan
     the team. Never returns False: "it did not happen" and "it happened" must
     not look the same to a caller that has more work queued behind it.
+
+    This is the two steps below run back to back, with no time budget. The
+    purge task runs them separately, so a large team is torn down across
+    several transactions (and runs) instead of one.
+    """
+    if not team.teardown_started_at:
+        start_team_teardown(team, require_due=require_due)
+    continue_team_teardown(team)
+    return True
+
+
+def start_team_teardown(team, require_due=True):
+    """Re-check the invariant, run the cleanup hooks and mark the teardown started.
+
+    Raises like ``finalize_team_deletion``. Call inside a transaction holding
+    the team row, so a failing hook rolls back together with the mark. The
+    team is deactivated here: from now on nobody can reach it to add rows
+    behind the teardown, and TeamViewMixin stops resolving it.
     """
     if require_due:
         if not team.is_deletion_scheduled:
@@ -368,9 +406,119 @@ def finalize_team_deletion(team, require_due=True):
         )
         raise TeamCleanupFailed(str(exc)) from exc
 
+    team.teardown_started_at = timezone.now()
+    team.teardown_progress = {}
+    team.is_active = False
+    team.save(update_fields=["teardown_started_at", "teardown_progress", "is_active", "updated_at"])
+    logger.warning("team_teardown_started", team_id=str(team.pk), team_slug=team.slug)
+
+
+def queue_team_purge():
+    """Run the purge task once the caller's transaction commits.
+
+    For teardowns started from a request or the admin: the rows go in the
+    task's short batches instead of inside the caller's transaction.
+    """
+    from django.db import transaction
+
+    from mainapp.tasks.teams import purge_scheduled_team_deletions
+
+    transaction.on_commit(purge_scheduled_team_deletions.delay)
+
+
+def team_teardown_stages():
+    """``(model, lookup, action)`` for every table that hangs off a team.
+
+    Derived from the relations, so a project's own ``TeamModel`` subclasses
+    (and whatever cascades from them) are covered without registering
+    anything. Ordered leaves first — deliveries before their endpoint — so
+    each batch delete finds nothing left below it to collect. ``action`` is
+    "delete" for cascading relations and "detach" for a nullable foreign key
+    on the team itself; anything else (PROTECT, DO_NOTHING, SET_NULL further
+    down) is left to the final ``Team.delete()``, as before.
+    """
+    stages = []
+
+    def walk(model, prefix, seen):
+        for rel in model._meta.related_objects:
+            if rel.many_to_many:
+                continue
+            related = rel.related_model
+            lookup = f"{rel.field.name}__{prefix}" if prefix else rel.field.name
+            if rel.on_delete is models.CASCADE and related not in seen:
+                walk(related, lookup, seen | {related})
+                stages.append((related, lookup, "delete"))
+            elif rel.on_delete is models.SET_NULL and not prefix:
+                stages.append((related, lookup, "detach"))
+
+    walk(Team, "", {Team})
+    return stages
+
+
+def continue_team_teardown(team, time_budget=None):
+    """Delete the team's rows in batches, then the team. Resumable.
+
+    Each batch is one short transaction (a savepoint when the caller already
+    holds one): select up to ``SPEEDPY_SWEEPER_BATCH_SIZE`` primary keys,
+    delete or detach them in one statement, and record the count in
+    ``team.teardown_progress``. Nothing is loaded into memory beyond one
+    batch of keys, and no lock is held for longer than one batch.
+
+    Returns True once the team row is gone, or False when ``time_budget``
+    seconds ran out first; call again to carry on. The billing invariant is
+    checked again on the locked row before the last statement — by
+    ``Team.delete()`` itself — and ``TeamDeletionBlocked`` is raised if a
+    subscription came back while the rows were going.
+    """
+    import time
+
+    from django.db import transaction
+
+    started = time.monotonic()
+    size = getattr(settings, "SPEEDPY_SWEEPER_BATCH_SIZE", 1000)
+    progress = dict(team.teardown_progress or {})
+    for model, lookup, action in team_teardown_stages():
+        label = model._meta.label_lower
+        manager = model._base_manager
+        while True:
+            pks = list(
+                manager.filter(**{lookup: team.pk})
+                .order_by("pk")
+                .values_list("pk", flat=True)[:size]
+            )
+            if not pks:
+                break
+            with transaction.atomic():
+                batch = manager.filter(pk__in=pks)
+                if action == "delete":
+                    batch.delete()
+                else:
+                    batch.update(**{lookup: None})
+                progress[label] = progress.get(label, 0) + len(pks)
+                Team.objects.filter(pk=team.pk).update(
+                    teardown_progress=progress, updated_at=timezone.now()
+                )
+            logger.info(
+                "team_teardown_batch",
+                team_id=str(team.pk),
+                table=label,
+                action=action,
+                rows=len(pks),
+            )
+            if len(pks) < size:
+                break
+            if time_budget is not None and time.monotonic() - started >= time_budget:
+                team.teardown_progress = progress
+                logger.info("team_teardown_paused", team_id=str(team.pk), progress=progress)
+                return False
+
     team_id, team_slug = str(team.pk), team.slug
-    team.delete()
-    logger.warning("team_deleted", team_id=team_id, team_slug=team_slug)
+    with transaction.atomic():
+        team = Team.objects.select_for_update().get(pk=team.pk)
+        # Team.delete() re-checks the billing invariant on the locked row, and
+        # the collector cascades whatever arrived since the last batch.
+        team.delete()
+    logger.warning("team_deleted", team_id=team_id, team_slug=team_slug, progress=progress)
     return True
 
 
@@ -415,17 +563,51 @@ def delete_sole_member_teams(user):
         finalize_team_deletion(team, require_due=False)
 
 
-def get_default_team_for_user(user):
+# The resolved default team id per user, in the cache. Only ever a hint for
+# *which* team to show: TeamViewMixin and the API check the membership on every
+# request, so a stale entry can point at the wrong team but never let anybody
+# into one. Invalidated (forget_default_team) when a membership is created,
+# saved or deleted, when a team is deactivated, and by the expiry sweeper.
+_DEFAULT_TEAM_CACHE_KEY = "speedpy:default-team:{}"
+_NO_TEAM = "-"
+
+
+def forget_default_team(*user_ids):
+    """Drop the cached default team of these users.
+
+    Now and again once the transaction commits: until then another request
+    still reads the old rows and could put the old answer straight back.
     """
-    Return the first team a user has valid access to, or None.
+    if not user_ids:
+        return
+    from django.db import transaction
 
-    "Valid" mirrors the checks in TeamViewMixin: the team must be active and
-    the membership must not have expired. Ordering follows TeamMembership.Meta
-    (role, then created_at), so the choice is stable — "the first one we find".
-    Used to redirect the personal dashboard and to build the sidebar link.
+    keys = [_DEFAULT_TEAM_CACHE_KEY.format(pk) for pk in user_ids]
+    cache.delete_many(keys)
+    transaction.on_commit(lambda: cache.delete_many(keys))
+
+
+def resolve_default_team(user, memberships=None):
+    """``(team, membership)`` for ``get_default_team_for_user``.
+
+    ``membership`` is the row that decided it when the database was asked,
+    None when the cache answered. ``memberships`` maps team id strings to
+    memberships the caller has already loaded (RequestTeamContext passes its
+    own), so a cached id for one of those costs no query at all.
     """
-    if not user.is_authenticated:
-        return None
+    key = _DEFAULT_TEAM_CACHE_KEY.format(user.pk)
+    cached = cache.get(key)
+    if cached == _NO_TEAM:
+        return None, None
+    if cached:
+        known = (memberships or {}).get(cached)
+        if known is not None and known.team.is_active:
+            return known.team, None
+        # A primary-key lookup instead of the ordered join below.
+        team = Team.objects.filter(pk=cached, is_active=True).first()
+        if team is not None:
+            return team, None
+
     membership = (
         TeamMembership.objects.filter(user=user, team__is_active=True)
         .filter(
@@ -435,7 +617,30 @@ def get_default_team_for_user(user):
         .select_related("team")
         .first()
     )
-    return membership.team if membership else None
+    timeout = getattr(settings, "SPEEDPY_DEFAULT_TEAM_CACHE_SECONDS", 600)
+    if membership is not None and membership.access_expires_at:
+        # Temporary access: never outlive the membership.
+        remaining = (membership.access_expires_at - timezone.now()).total_seconds()
+        timeout = max(1, min(timeout, int(remaining)))
+    cache.set(key, str(membership.team_id) if membership else _NO_TEAM, timeout)
+    if membership is None:
+        return None, None
+    return membership.team, membership
+
+
+def get_default_team_for_user(user):
+    """
+    Return the first team a user has valid access to, or None.
+
+    "Valid" mirrors the checks in TeamViewMixin: the team must be active and
+    the membership must not have expired. Ordering follows TeamMembership.Meta
+    (role, then created_at), so the choice is stable — "the first one we find".
+    Used to redirect the personal dashboard and to build the sidebar link.
+    The answer is cached per user; see forget_default_team().
+    """
+    if not user.is_authenticated:
+        return None
+    return resolve_default_team(user)[0]
 
 
 class TeamModel(BaseModel):
@@ -491,6 +696,12 @@ class TeamMembership(TeamModel):
         unique_together = [["team", "user"]]
         ordering = ["role", "created_at"]
 
+    def delete(self, *args, **kwargs):
+        # Not a post_delete receiver: that would stop the expiry sweeper's
+        # batches from being fast-deleted. The sweeper invalidates for itself.
+        forget_default_team(self.user_id)
+        return super().delete(*args, **kwargs)
+
     def can_manage_member(self, target_membership):
         """
         Check if this user can manage another team member.
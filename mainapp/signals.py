@@ -4,11 +4,18 @@
 # django_structlog signals.  This is now handled by
 # speedpycom.api.middleware.RequestIDMiddleware for ALL responses.
 
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
-from mainapp.models.teams import TeamInvitation, TeamMembership
+from mainapp.models.jobs import AsyncJob
+from mainapp.models.teams import Team, TeamInvitation, TeamMembership, forget_default_team
 from mainapp.webhooks.business_events import on_team_invitation_created, on_team_member_added
+from speedpycom.api.conditional import bump_version
+
+# User fields shown in team member lists (mainapp.api.teams.TeamMemberSerializer).
+_MEMBER_LIST_USER_FIELDS = frozenset({"email", "first_name", "last_name"})
 
 
 @receiver(post_save, sender=TeamMembership)
@@ -17,7 +24,44 @@ def dispatch_team_member_added(sender, instance, created, **kwargs):
         on_team_member_added(instance)
 
 
+@receiver(post_save, sender=TeamMembership)
+def forget_member_default_team(sender, instance, **kwargs):
+    """A new membership or a role change can change the user's default team."""
+    forget_default_team(instance.user_id)
+
+
+@receiver(post_save, sender=Team)
+def forget_deactivated_team_defaults(sender, instance, update_fields=None, **kwargs):
+    if instance.is_active or (update_fields is not None and "is_active" not in update_fields):
+        return
+    forget_default_team(
+        *TeamMembership.objects.filter(team=instance).values_list("user_id", flat=True)
+    )
+
+
 @receiver(post_save, sender=TeamInvitation)
 def dispatch_team_invitation_created(sender, instance, created, **kwargs):
     if created:
         on_team_invitation_created(instance)
+
+
+@receiver(post_delete, sender=AsyncJob)
+def delete_job_result_file(sender, instance, **kwargs):
+    """Remove a deleted job's result file once the delete has committed."""
+    if instance.result_file:
+        name, storage = instance.result_file.name, instance.result_file.storage
+        transaction.on_commit(lambda: storage.delete(name))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def bump_team_member_list_versions(sender, instance, created, update_fields=None, **kwargs):
+    """Invalidate member-list ETags of every team when a member's profile changes.
+
+    Skips the last_login-only saves that happen on every sign-in.
+    """
+    if created:
+        return
+    if update_fields is not None and not _MEMBER_LIST_USER_FIELDS & set(update_fields):
+        return
+    team_ids = TeamMembership.objects.filter(user=instance).values_list("team_id", flat=True)
+    bump_version("team-members", *team_ids)
@@ -5,12 +5,17 @@ from .billing import *
 
 __all__ = [
     "run_demo_job",  # SPEEDPY_DEMO: remove before production
+    "start_chunked_job",
+    "run_job_chunk",
     "send_team_invitation_email",
+    "send_team_invitation_emails",
     "send_role_change_email",
     "expire_team_memberships",
     "expire_team_memberships_invitations",
     "deliver_webhook",
     "process_billing_subscriptions",
+    "process_billing_webhook_events",
+    "requeue_billing_webhook_events",
     "send_billing_grace_started_email",
     "send_billing_disabled_email",
 ]
@@ -1,30 +1,57 @@
-"""Periodic billing processing and owner notifications.
+"""Periodic billing processing, queued webhook events and owner notifications.
+
+``process_billing_webhook_events`` applies the webhook events the billing
+webhook views queued, one account at a time (see
+:mod:`mainapp.billing.webhooks`); ``requeue_billing_webhook_events`` queues
+lanes again whose task was lost.
 
 ``process_billing_subscriptions`` acts on subscriptions whose grace period or
 billing period has elapsed:
 
-- past_due beyond grace -> send the billing-disabled email (runtime gating
-  already disables paid features; we never mutate user-controlled resource
-  fields).
+- past_due beyond grace -> mark expired, send the billing-disabled email once
+  and downgrade the account to free.
 - canceled past the current period end -> downgrade the account to free.
 - expired -> downgrade the account to free.
 
+It works in batches of ``SPEEDPY_SWEEPER_BATCH_SIZE`` subscriptions, each in
+one transaction: one ``UPDATE`` for the rows' status, one query for which of
+their accounts still have a live subscription, one for which teams are on a
+paid plan, one ``UPDATE`` to downgrade them. A row it has handled gets
+``downgraded_at`` and is not selected again until a webhook changes it, so
+the daily run no longer rescans every subscription that ever expired (the
+first run after the upgrade still goes through the old ones, once).
+
+An account that has another active, past-due or paused subscription is left
+on its plan: the lapsed row is history, not the account's state.
+
 All steps are idempotent and safe to run repeatedly.
 """
 
+import time
+from datetime import timedelta
+
 import structlog
 from celery import shared_task
 from django.conf import settings
+from django.db import transaction
 from django.template.loader import render_to_string
 from django.utils import timezone
 from post_office import mail
 
-from mainapp.billing import plans, state
-from mainapp.models import BillingSubscription
-from mainapp.subscription_plans import get_plan_config
+from mainapp.billing import plans, state, webhooks
+from mainapp.models import BillingSubscription, Team
+from mainapp.models.billing import BILLABLE_TEAM, BILLABLE_USER
+from mainapp.subscription_plans import get_paid_plans
 
 logger = structlog.get_logger(__name__)
 
+# Retry schedule for a lane whose next event fails: 60s * 2^attempt, capped
+# at an hour. The event stays pending meanwhile and the lane waits behind it,
+# until SPEEDPY_BILLING_WEBHOOK_MAX_ATTEMPTS sets it aside.
+WEBHOOK_EVENT_MAX_RETRIES = 8
+WEBHOOK_EVENT_BACKOFF_BASE = 60
+WEBHOOK_EVENT_BACKOFF_CAP = 3600
+
 
 def _notify_emails(billable):
     """Email addresses to notify about billing for a billable account."""
@@ -99,63 +126,157 @@ def send_billing_disabled_email(subscription_id):
     sub.save(update_fields=["billing_disabled_email_sent", "updated_at"])
 
 
+@shared_task(bind=True, name="process_billing_webhook_events", max_retries=WEBHOOK_EVENT_MAX_RETRIES, acks_late=True)
+def process_billing_webhook_events(self, provider, billable_key=""):
+    """Apply the queued webhook events of one account, in the order they happened."""
+    try:
+        processed = webhooks.process_queued_events(provider, billable_key)
+    except Exception as exc:
+        logger.error(
+            "billing_webhook_processing_error",
+            provider=provider,
+            billable_key=billable_key,
+            error=str(exc),
+            exc_info=True,
+        )
+        countdown = min(WEBHOOK_EVENT_BACKOFF_BASE * 2 ** self.request.retries, WEBHOOK_EVENT_BACKOFF_CAP)
+        raise self.retry(exc=exc, countdown=countdown)
+    return f"Applied {processed} billing event(s)"
+
+
+@shared_task(name="requeue_billing_webhook_events")
+def requeue_billing_webhook_events():
+    """Queue again every lane with events left pending and no retry scheduled."""
+    now = timezone.now()
+    pending_for = timedelta(
+        seconds=getattr(settings, "SPEEDPY_BILLING_WEBHOOK_REQUEUE_AFTER_SECONDS", 300)
+    )
+    lanes = webhooks.stale_lanes(
+        pending_since=now - pending_for,
+        retried_since=now - timedelta(seconds=WEBHOOK_EVENT_BACKOFF_CAP),
+    )
+    for provider, billable_key in lanes:
+        process_billing_webhook_events.delay(provider, billable_key)
+    if lanes:
+        logger.warning("billing_webhook_lanes_requeued", lanes=[":".join(lane) for lane in lanes])
+    return f"Requeued {len(lanes)} billing event lane(s)"
+
+
+def _downgrade_lapsed(rows):
+    """Downgrade the accounts behind ``rows`` (``(pk, billable_type, billable_id)``).
+
+    Returns the number of teams moved to free. User accounts have no plan of
+    their own, so for them only the cached billing snapshot is dropped.
+    """
+    team_ids = {billable_id for _, billable_type, billable_id in rows if billable_type == BILLABLE_TEAM}
+    user_ids = {billable_id for _, billable_type, billable_id in rows if billable_type == BILLABLE_USER}
+    live = set(
+        BillingSubscription.objects.filter(
+            status__in=BillingSubscription.ACTIVE_ISH_STATUSES,
+            billable_id__in=team_ids | user_ids,
+        ).order_by().values_list("billable_type", "billable_id")
+    )
+    team_ids -= {billable_id for billable_type, billable_id in live if billable_type == BILLABLE_TEAM}
+    paid_teams = list(
+        Team.objects.filter(
+            pk__in=team_ids, plan__in=[cfg["key"] for cfg in get_paid_plans()]
+        ).values_list("pk", flat=True)
+    )
+    downgraded = plans.downgrade_teams_to_free(paid_teams)
+    if user_ids:
+        state.invalidate_billing_snapshot(BILLABLE_USER, *user_ids)
+    return downgraded
+
+
+def _process_in_batches(queryset, now, stage, **changes):
+    """Apply ``changes`` to every row of ``queryset`` and downgrade their accounts.
+
+    Each batch drops out of ``queryset`` once ``downgraded_at`` is set, so the
+    next batch is simply the first ``batch_size`` rows again.
+    """
+    size = getattr(settings, "SPEEDPY_SWEEPER_BATCH_SIZE", 1000)
+    started = time.monotonic()
+    report = {"subscriptions": 0, "downgraded": 0, "email_ids": []}
+    while True:
+        with transaction.atomic():
+            batch = list(
+                queryset.select_for_update(skip_locked=True)
+                .order_by("pk")
+                .values_list("pk", "billable_type", "billable_id", "billing_disabled_email_sent")[:size]
+            )
+            if not batch:
+                break
+            rows = [row[:3] for row in batch]
+            BillingSubscription.objects.filter(pk__in=[pk for pk, _, _ in rows]).update(
+                downgraded_at=now, updated_at=now, **changes
+            )
+            downgraded = _downgrade_lapsed(rows)
+        report["subscriptions"] += len(batch)
+        report["downgraded"] += downgraded
+        report["email_ids"] += [str(row[0]) for row in batch if not row[3]]
+        logger.info(
+            "billing_subscriptions_batch",
+            stage=stage,
+            subscriptions=len(batch),
+            downgraded=downgraded,
+            subscription_ids=[str(pk) for pk, _, _ in rows],
+        )
+        if len(batch) < size:
+            break
+    report["seconds"] = round(time.monotonic() - started, 4)
+    return report
+
+
 @shared_task(name="process_billing_subscriptions")
 def process_billing_subscriptions():
     """Periodically downgrade lapsed subscriptions and notify owners."""
     now = timezone.now()
-    processed = 0
-
-    # 1) Past-due subscriptions whose grace period has expired -> notify owners
-    #    once, mark the subscription expired, and downgrade the account so paid
-    #    limits/plan no longer apply (runtime gating already fails closed, but
-    #    effective plan/limits must drop too).
-    past_due = BillingSubscription.objects.filter(
-        status=BillingSubscription.STATUS_PAST_DUE,
-        grace_period_ends_at__isnull=False,
-        grace_period_ends_at__lte=now,
+    lapsed = BillingSubscription.objects.filter(downgraded_at__isnull=True)
+    started = time.monotonic()
+
+    # 1) Past-due subscriptions whose grace period has expired -> mark them
+    #    expired, downgrade the account so paid limits/plan no longer apply
+    #    (runtime gating already fails closed, but effective plan/limits must
+    #    drop too), and notify owners once.
+    grace = _process_in_batches(
+        lapsed.filter(
+            status=BillingSubscription.STATUS_PAST_DUE,
+            grace_period_ends_at__isnull=False,
+            grace_period_ends_at__lte=now,
+        ),
+        now,
+        "grace_expired",
+        status=BillingSubscription.STATUS_EXPIRED,
     )
-    for sub in past_due:
-        if not sub.billing_disabled_email_sent:
-            send_billing_disabled_email.delay(str(sub.pk))
-        sub.status = BillingSubscription.STATUS_EXPIRED
-        sub.save(update_fields=["status", "updated_at"])
-        billable = sub.billable
-        if billable is not None and get_plan_config(
-            state.effective_plan_key(billable)
-        ).get("is_paid"):
-            plans.downgrade_to_free(billable)
-        logger.info("billing_grace_expired_downgraded", subscription_id=str(sub.pk))
-        processed += 1
+    # Queued after the batches commit, so the task sees the expired row.
+    for subscription_id in grace.pop("email_ids"):
+        send_billing_disabled_email.delay(subscription_id)
 
     # 2) Canceled subscriptions past their current period end -> downgrade.
-    canceled = BillingSubscription.objects.filter(
-        status=BillingSubscription.STATUS_CANCELED,
-        current_period_ends_at__isnull=False,
-        current_period_ends_at__lte=now,
+    canceled = _process_in_batches(
+        lapsed.filter(
+            status=BillingSubscription.STATUS_CANCELED,
+            current_period_ends_at__isnull=False,
+            current_period_ends_at__lte=now,
+        ),
+        now,
+        "canceled",
     )
-    for sub in canceled:
-        billable = sub.billable
-        if billable is not None and get_plan_config(
-            state.effective_plan_key(billable)
-        ).get("is_paid"):
-            plans.downgrade_to_free(billable)
-            logger.info(
-                "billing_downgraded_after_cancellation",
-                subscription_id=str(sub.pk),
-            )
-            processed += 1
+    canceled.pop("email_ids")
 
-    # 3) Expired subscriptions whose account is still on a paid plan -> downgrade.
-    expired = BillingSubscription.objects.filter(
-        status=BillingSubscription.STATUS_EXPIRED,
+    # 3) Expired subscriptions not handled yet (expired by a webhook) -> downgrade.
+    expired = _process_in_batches(
+        lapsed.filter(status=BillingSubscription.STATUS_EXPIRED), now, "expired"
+    )
+    expired.pop("email_ids")
+
+    processed = grace["subscriptions"] + canceled["subscriptions"] + expired["subscriptions"]
+    logger.info(
+        "process_billing_subscriptions_completed",
+        processed=processed,
+        seconds=round(time.monotonic() - started, 4),
+        grace_expired=grace,
+        canceled=canceled,
+        expired=expired,
     )
-    for sub in expired:
-        billable = sub.billable
-        if billable is not None and get_plan_config(
-            state.effective_plan_key(billable)
-        ).get("is_paid"):
-            plans.downgrade_to_free(billable)
-            processed += 1
-
-    logger.info("process_billing_subscriptions_completed", processed=processed)
     return f"Processed {processed} billing subscription(s)"
@@ -2,8 +2,8 @@ import time
 
 import structlog
 from celery import shared_task
-from django.utils import timezone
 
+from mainapp.jobs import ProgressReporter
 from mainapp.models.jobs import AsyncJob
 
 logger = structlog.get_logger(__name__)
@@ -18,7 +18,9 @@ def run_demo_job(self, job_id: str):
     """
     Demo long-running task that progresses through several steps.
 
-    Updates the AsyncJob record at each step so clients can poll for progress.
+    Reports each step through ``ProgressReporter``: live progress goes to Redis
+    and ``/api/v1/jobs/{id}/events/`` watchers, the AsyncJob row is written on
+    start, periodically, and on the terminal state.
     """
     try:
         job = AsyncJob.objects.get(pk=job_id)
@@ -30,13 +32,8 @@ def run_demo_job(self, job_id: str):
         logger.info("demo_job_already_terminal", job_id=job_id, status=job.status)
         return
 
-    job.status = AsyncJob.Status.RUNNING
-    job.started_at = timezone.now()
-    job.progress_total = DEMO_STEPS
-    job.message = "Starting demo job"
-    job.save(update_fields=[
-        "status", "started_at", "progress_total", "message", "updated_at",
-    ])
+    reporter = ProgressReporter(job)
+    reporter.start(total=DEMO_STEPS, message="Starting demo job")
 
     logger.info("demo_job_started", job_id=job_id)
 
@@ -44,9 +41,7 @@ def run_demo_job(self, job_id: str):
         for step in range(1, DEMO_STEPS + 1):
             time.sleep(DEMO_STEP_DELAY)
 
-            job.progress_current = step
-            job.message = f"Processing step {step}/{DEMO_STEPS}"
-            job.save(update_fields=["progress_current", "message", "updated_at"])
+            reporter.update(step, message=f"Processing step {step}/{DEMO_STEPS}")
 
             logger.info(
                 "demo_job_progress",
@@ -55,26 +50,33 @@ def run_demo_job(self, job_id: str):
                 total=DEMO_STEPS,
             )
 
-        job.status = AsyncJob.Status.SUCCEEDED
-        job.finished_at = timezone.now()
-        job.message = "Demo job completed successfully"
-        job.result = {
-            "steps_completed": DEMO_STEPS,
-            "message": "All steps processed.",
-        }
-        job.save(update_fields=[
-            "status", "finished_at", "message", "result", "updated_at",
-        ])
+        reporter.succeed(
+            {
+                "steps_completed": DEMO_STEPS,
+                "message": "All steps processed.",
+            },
+            message="Demo job completed successfully",
+        )
 
         logger.info("demo_job_succeeded", job_id=job_id)
 
     except Exception as exc:
-        job.status = AsyncJob.Status.FAILED
-        job.finished_at = timezone.now()
-        job.message = "Demo job failed"
-        job.error = str(exc)
-        job.save(update_fields=[
-            "status", "finished_at", "message", "error", "updated_at",
-        ])
+        reporter.fail(exc, message="Demo job failed")
 
         logger.error("demo_job_failed", job_id=job_id, error=str(exc))
+
+
+@shared_task(name="start_chunked_job", acks_late=True)
+def start_chunked_job(job_id: str):
+    """Plan a chunked job and dispatch its chunks (mainapp/jobs/chunked.py)."""
+    from mainapp.jobs.chunked import plan_and_dispatch
+
+    plan_and_dispatch(job_id)
+
+
+@shared_task(name="run_job_chunk", acks_late=True)
+def run_job_chunk(job_id: str, index: int):
+    """Run one chunk of a chunked job; the last chunk to finish finalizes it."""
+    from mainapp.jobs.chunked import execute_chunk
+
+    execute_chunk(job_id, index)
@@ -1,40 +1,52 @@
 from celery import shared_task
 from django.conf import settings
-from django.template.loader import render_to_string
+from django.template.loader import get_template, render_to_string
 from django.utils import timezone
 from post_office import mail
 import structlog
+from mainapp.expiry import InvitationExpirySweeper, MembershipExpirySweeper
 from mainapp.models import TeamMembership, TeamInvitation, Team
 from mainapp.models.teams import (
     TeamCleanupFailed,
     TeamDeletionBlocked,
-    finalize_team_deletion,
+    continue_team_teardown,
+    start_team_teardown,
     teams_due_for_deletion,
 )
+from speedpycom.services.sweeper import run_sweep
 
 logger = structlog.get_logger(__name__)
 
 
-@shared_task(name="send_team_invitation_email")
-def send_team_invitation_email(invitation_id):
-    """Send team invitation email via post_office"""
-    invitation = TeamInvitation.objects.select_related(
-        'team', 'invited_by', 'user'
-    ).get(pk=invitation_id)
+def _invitation_email_context(invitation, shared):
+    return {
+        **shared,
+        'accept_url': f"{settings.SITE_URL}/teams/invitations/{invitation.token}/accept/",
+        'decline_url': f"{settings.SITE_URL}/teams/invitations/{invitation.token}/decline/",
+        'is_existing_user': invitation.user_id is not None,
+        'expires_at': invitation.expires_at,
+    }
 
-    is_existing_user = invitation.user is not None
 
-    context = {
+def _invitation_shared_context(invitation):
+    """The part of the email context that is the same for one batch of invitations."""
+    return {
         'team_name': invitation.team.name,
         'inviter_name': invitation.invited_by.get_full_name() or invitation.invited_by.email,
         'role': invitation.get_role_display(),
-        'accept_url': f"{settings.SITE_URL}/teams/invitations/{invitation.token}/accept/",
-        'decline_url': f"{settings.SITE_URL}/teams/invitations/{invitation.token}/decline/",
-        'is_existing_user': is_existing_user,
         'message': invitation.message,
-        'expires_at': invitation.expires_at,
     }
 
+
+@shared_task(name="send_team_invitation_email")
+def send_team_invitation_email(invitation_id):
+    """Send team invitation email via post_office"""
+    invitation = TeamInvitation.objects.select_related(
+        'team', 'invited_by'
+    ).get(pk=invitation_id)
+
+    context = _invitation_email_context(invitation, _invitation_shared_context(invitation))
+
     subject = f"You've been invited to join {invitation.team.name}"
     html_message = render_to_string("emails/team_invitation.html", context)
 
@@ -48,6 +60,38 @@ def send_team_invitation_email(invitation_id):
     )
 
 
+@shared_task(name="send_team_invitation_emails")
+def send_team_invitation_emails(invitation_ids):
+    """Queue invitation emails for a chunk of bulk-created invitations.
+
+    One query loads the chunk, the template is compiled once and the
+    team/inviter part of the context is built once per (inviter, role,
+    message); post_office then inserts every email in one ``bulk_create``
+    and sends them from its own queue rather than one SMTP round trip here.
+    """
+    invitations = TeamInvitation.objects.select_related(
+        'team', 'invited_by'
+    ).filter(pk__in=invitation_ids, status="pending")
+    template = get_template("emails/team_invitation.html")
+
+    shared = {}
+    emails = []
+    for invitation in invitations:
+        key = (invitation.team_id, invitation.invited_by_id, invitation.role, invitation.message)
+        if key not in shared:
+            shared[key] = _invitation_shared_context(invitation)
+        context = _invitation_email_context(invitation, shared[key])
+        emails.append({
+            'recipients': [invitation.email],
+            'sender': settings.DEFAULT_FROM_EMAIL,
+            'subject': f"You've been invited to join {invitation.team.name}",
+            'html_message': template.render(context),
+            'priority': 'medium',
+        })
+    mail.send_many(emails)
+    logger.info("team_invitation_emails_queued", count=len(emails), requested=len(invitation_ids))
+
+
 @shared_task(name="send_role_change_email")
 def send_role_change_email(membership_id, old_role, new_role):
     """Send email when role changes"""
@@ -68,83 +112,51 @@ def send_role_change_email(membership_id, old_role, new_role):
         priority='now',
     )
 
-@shared_task(name="expire_team_memberships")
-def expire_team_memberships():
-    """Delete team memberships that have expired (access_expires_at in the past)"""
-    now = timezone.now()
-
-    # Find all memberships with access_expires_at in the past
-    expired_memberships = TeamMembership.objects.filter(
-        access_expires_at__isnull=False,
-        access_expires_at__lt=now
-    ).select_related('team', 'user')
-
-    count = 0
-    for membership in expired_memberships:
-        logger.info(
-            "expiring_team_membership",
-            membership_id=membership.id,
-            user_id=membership.user_id,
-            user_email=membership.user.email,
-            team_id=membership.team_id,
-            team_name=membership.team.name,
-            role=membership.role,
-            access_expired_at=membership.access_expires_at.isoformat(),
-        )
-        membership.delete()
-        count += 1
-
-    logger.info("expire_team_memberships_completed", expired_count=count)
-    return f"Expired {count} team membership(s)"
-
-@shared_task(name="expire_team_memberships_invitations")
-def expire_team_memberships_invitations():
-    """Delete team invitations that have expired (expires_at in the past)"""
-    now = timezone.now()
-
-    # Find all pending invitations with expires_at in the past
-    expired_invitations = TeamInvitation.objects.filter(
-        expires_at__isnull=False,
-        expires_at__lt=now,
-        status="pending"
-    ).select_related('team', 'invited_by')
-
-    count = 0
-    for invitation in expired_invitations:
-        logger.info(
-            "expiring_team_invitation",
-            invitation_id=invitation.id,
-            email=invitation.email,
-            team_id=invitation.team_id,
-            team_name=invitation.team.name,
-            invited_by_id=invitation.invited_by_id,
-            invited_by_email=invitation.invited_by.email,
-            role=invitation.role,
-            status=invitation.status,
-            expires_at=invitation.expires_at.isoformat(),
-        )
-        invitation.delete()
-        count += 1
-
-    logger.info("expire_team_invitations_completed", expired_count=count)
-    return f"Expired {count} team invitation(s)"
-
-@shared_task(name="purge_scheduled_team_deletions")
-def purge_scheduled_team_deletions():
+@shared_task(name="expire_team_memberships", bind=True)
+def expire_team_memberships(self):
+    """Delete team memberships that have expired (access_expires_at in the past).
+
+    Batched and time-limited; a run that stops early queues the next one
+    (see speedpycom/services/sweeper.py).
+    """
+    report = run_sweep(self, MembershipExpirySweeper())
+    logger.info("expire_team_memberships_completed", expired_count=report["processed"])
+    return f"Expired {report['processed']} team membership(s)"
+
+@shared_task(name="expire_team_memberships_invitations", bind=True)
+def expire_team_memberships_invitations(self):
+    """Delete pending team invitations that have expired (expires_at in the past)."""
+    report = run_sweep(self, InvitationExpirySweeper())
+    logger.info("expire_team_invitations_completed", expired_count=report["processed"])
+    return f"Expired {report['processed']} team invitation(s)"
+
+@shared_task(name="purge_scheduled_team_deletions", bind=True)
+def purge_scheduled_team_deletions(self):
     """Delete the teams whose undo window has run out.
 
-    One team per transaction, each locked with select_for_update, so an undo
-    that lands while the task is running either wins the row (and the team is
-    skipped) or waits for it. A bulk queryset delete is deliberately not used:
-    Django's collector would bypass Team.delete(), and with it the billing
-    invariant.
+    Each team is started in its own transaction, locked with
+    select_for_update, so an undo that lands while the task is running either
+    wins the row (and the team is skipped) or waits for it. Its rows are then
+    deleted in batches, one short transaction each, with the progress kept on
+    the team (continue_team_teardown). A bulk queryset delete of the team is
+    deliberately not used: Django's collector would bypass Team.delete(), and
+    with it the billing invariant.
+
+    The run stops after SPEEDPY_SWEEPER_TIME_BUDGET_SECONDS and queues the
+    next one; a team whose teardown was cut short is picked up where it
+    stopped, without running its hooks again.
     """
     if not getattr(settings, "SPEEDPY_TEAMS_ENABLED", True):
         return "Teams are disabled"
 
+    import time
+
     from django.db import transaction
 
+    started = time.monotonic()
+    budget = getattr(settings, "SPEEDPY_SWEEPER_TIME_BUDGET_SECONDS", 120)
     deleted = skipped = 0
+    finished = True
     for team_id in list(teams_due_for_deletion().values_list("pk", flat=True)):
         try:
             # The try wraps the atomic block, not the other way round: a hook
@@ -165,16 +177,28 @@ def purge_scheduled_team_deletions():
                     # Undone and re-scheduled further out.
                     skipped += 1
                     continue
-                if finalize_team_deletion(team):
-                    deleted += 1
-                else:
-                    skipped += 1
+                if not team.teardown_started_at:
+                    start_team_teardown(team)
+            remaining = max(0, budget - (time.monotonic() - started))
+            if continue_team_teardown(team, time_budget=remaining):
+                deleted += 1
+            else:
+                finished = False
+                break
         except (TeamCleanupFailed, TeamDeletionBlocked):
-            # Both leave the team whole and still scheduled, so the next run
-            # retries. Already logged with the reason at the point of failure.
+            # Before the teardown started, both leave the team whole and still
+            # scheduled; after it, the team stays marked with its rows partly
+            # gone. Either way the next run retries. Already logged with the
+            # reason at the point of failure.
             skipped += 1
 
     logger.info(
-        "purge_scheduled_team_deletions_completed", deleted=deleted, skipped=skipped
+        "purge_scheduled_team_deletions_completed",
+        deleted=deleted,
+        skipped=skipped,
+        finished=finished,
     )
+    request = self.request
+    if not finished and not (request.called_directly or request.is_eager):
+        self.apply_async()
     return f"Deleted {deleted} team(s), skipped {skipped}"
@@ -1,4 +1,3 @@
-import json
 import time
 
 import httpx
@@ -9,6 +8,7 @@ from django.utils import timezone
 
 from mainapp.models.webhooks import WebhookDelivery
 from mainapp.webhooks.signing import sign
+from speedpycom.api import codec
 
 logger = structlog.get_logger(__name__)
 
@@ -71,7 +71,8 @@ def deliver_webhook(self, delivery_id: int):
 
     delivery.refresh_from_db()
 
-    body = json.dumps(delivery.payload, separators=(",", ":")).encode()
+    # ASCII-escaped, as receivers have always been sent.
+    body = codec.dumps(delivery.payload, ensure_ascii=True)
     timestamp = str(int(time.time()))
     signature = sign(endpoint.secret, timestamp, body)
 
@@ -0,0 +1,127 @@
+"""
+Request-scoped team resolution.
+
+One HTML page used to ask "which teams is this user in?" several times:
+``TeamViewMixin`` looked up the team and then the membership, the
+``sidebar_team`` context processor resolved the default team, and the
+``billing`` context processor resolved it again to find the billable.
+``team_context(request)`` builds a ``RequestTeamContext`` on first use and
+keeps it on the request, so each of those answers costs at most one query
+per request no matter how many mixins, context processors or API helpers
+ask::
+
+    ctx = team_context(request)
+    ctx.membership(team_id)   # TeamMembership (team preloaded) or None
+    ctx.default_team          # Team or None
+    ctx.memberships           # every membership, teams preloaded (team selector)
+    ctx.billable              # Team, User or None
+    ctx.billing_snapshot      # BillingSnapshot of the billable
+
+Memberships are cached as loaded, for the length of one request. The
+default team id is also cached across requests (``resolve_default_team``);
+when it names a team whose membership this request already loaded, it costs
+nothing.  A view
+that changes the user's memberships and then renders a page in the same
+request (rather than redirecting) should call ``clear_team_context(request)``.
+"""
+
+from functools import cached_property
+
+from django.conf import settings
+
+from mainapp.models import TeamMembership
+from mainapp.models.teams import resolve_default_team
+
+_ATTR = "_speedpy_team_context"
+
+
+class RequestTeamContext:
+    """Memoized team lookups for one user during one request."""
+
+    def __init__(self, user):
+        self.user = user
+        self.user_pk = user.pk
+        self._memberships = {}
+
+    def membership(self, team_id):
+        """The user's membership in an active team, or None.
+
+        Access expiry is left to the caller: the HTML mixin and the API
+        disagree on whether the expiry instant itself still counts.
+        """
+        key = str(team_id)
+        if key not in self._memberships:
+            self._memberships[key] = (
+                TeamMembership.objects.select_related("team")
+                .filter(team_id=team_id, user=self.user, team__is_active=True)
+                .first()
+            )
+        return self._memberships[key]
+
+    @cached_property
+    def memberships(self):
+        """All of the user's memberships with their teams, in ``Meta.ordering``.
+
+        Same rows as ``user.team_membership.all()``, which the team selector
+        used to evaluate twice and then follow to each team.
+        """
+        memberships = list(
+            TeamMembership.objects.filter(user=self.user).select_related("team")
+        )
+        for membership in memberships:
+            if membership.team.is_active:
+                self._memberships.setdefault(str(membership.team_id), membership)
+        return memberships
+
+    @cached_property
+    def default_team(self):
+        """Same answer as ``get_default_team_for_user`` (and the same cache)."""
+        team, membership = resolve_default_team(self.user, self._memberships)
+        if membership is not None:
+            self._memberships.setdefault(str(membership.team_id), membership)
+        return team
+
+    @cached_property
+    def billable(self):
+        """Same answer as ``billing.state.get_billable_for_user``."""
+        if getattr(settings, "SPEEDPY_TEAMS_ENABLED", True):
+            return self.default_team
+        return self.user
+
+    @cached_property
+    def billing_snapshot(self):
+        from mainapp.billing import state
+
+        return state.get_billing_snapshot(self.billable)
+
+    @cached_property
+    def billing_state(self):
+        return self.billing_snapshot.state
+
+    @cached_property
+    def over_limit_report(self):
+        from mainapp.billing import state
+
+        return state.over_limit_report(self.billable)
+
+
+def team_context(request):
+    """Return the ``RequestTeamContext`` for ``request``'s user, or None if anonymous.
+
+    Accepts a Django ``HttpRequest`` or a DRF ``Request``. Both share one context.
+    """
+    request = getattr(request, "_request", request)
+    user = getattr(request, "user", None)
+    if user is None or not user.is_authenticated:
+        return None
+    ctx = getattr(request, _ATTR, None)
+    if ctx is None or ctx.user_pk != user.pk:
+        ctx = RequestTeamContext(user)
+        setattr(request, _ATTR, ctx)
+    return ctx
+
+
+def clear_team_context(request):
+    request = getattr(request, "_request", request)
+    if hasattr(request, _ATTR):
+        delattr(request, _ATTR)
@@ -0,0 +1,201 @@
+"""
+Tests for ``POST /api/v1/batch/``.
+"""
+
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework.throttling import SimpleRateThrottle
+
+from mainapp.models import AsyncJob, Team, TeamMembership
+from speedpycom.api import batch, timing
+from speedpycom.api.authentication import PersonalAccessTokenAuthentication
+from usermodel.models import ApiAccessLog, PersonalAccessToken, User
+
+BATCH_URL = "/api/v1/batch/"
+LOCMEM_CACHE = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _get(path, id=None, **extra):
+    item = {"method": "GET", "path": path, **extra}
+    if id is not None:
+        item["id"] = id
+    return item
+
+
+# Worker threads use their own database connections, which cannot see the
+# test transaction; run sub-requests in order unless a test opts in.
+@override_settings(SPEEDPY_API_BATCH_MAX_WORKERS=1)
+class BatchTestBase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="owner@example.com", password="pass123", first_name="Olive"
+        )
+        self.team = Team.objects.create(name="Team A", slug="team-a")
+        TeamMembership.objects.create(team=self.team, user=self.user, role="owner")
+        self.client.force_authenticate(user=self.user)
+
+    def batch(self, *items, **extra):
+        return self.client.post(BATCH_URL, {"requests": list(items)}, format="json", **extra)
+
+
+class BatchEndpointTests(BatchTestBase):
+
+    def test_runs_sub_requests_in_order(self):
+        response = self.batch(
+            _get("/api/v1/me/", id="me"),
+            _get("/api/v1/teams/?fields=id,name", id="teams"),
+            _get(f"/api/v1/teams/{self.team.id}/members/"),
+        )
+        self.assertEqual(response.status_code, 200)
+        me, teams, members = response.data["responses"]
+        self.assertEqual((me["id"], me["status"]), ("me", 200))
+        self.assertEqual(me["body"]["email"], "owner@example.com")
+        self.assertEqual(teams["body"]["results"], [{"id": str(self.team.id), "name": "Team A"}])
+        self.assertEqual(members["id"], "2")
+        self.assertEqual(members["body"]["count"], 1)
+
+    def test_sub_request_errors_are_per_item(self):
+        response = self.batch(
+            _get("/api/v1/teams/00000000-0000-0000-0000-000000000000/"),
+            _get("/api/v1/nope/"),
+            _get("/dashboard/"),
+            {"method": "POST", "path": BATCH_URL, "body": {"requests": []}},
+            _get("/api/v1/me/?fields=password"),
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item["status"] for item in response.data["responses"]],
+            [404, 404, 400, 400, 400],
+        )
+
+    def test_async_and_streaming_endpoints_are_rejected_per_item(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="demo")
+        response = self.batch(
+            _get(f"/api/v1/jobs/{job.id}/events/", id="events"),
+            _get("/api/v1/me/access-logs/export/", id="export"),
+            _get("/api/v1/me/", id="me"),
+        )
+        self.assertEqual(response.status_code, 200)
+        events, export, me = response.data["responses"]
+        self.assertEqual(events["status"], 400)
+        self.assertEqual(events["body"]["detail"], "Async endpoints cannot be batched.")
+        self.assertEqual(export["status"], 400)
+        self.assertEqual(export["body"]["detail"], "Streaming endpoints cannot be batched.")
+        self.assertEqual(me["status"], 200)
+
+    def test_write_is_visible_to_later_reads(self):
+        response = self.batch(
+            {"method": "PATCH", "path": "/api/v1/me/", "body": {"first_name": "Pat"}},
+            _get("/api/v1/me/?fields=first_name"),
+        )
+        patched, read = response.data["responses"]
+        self.assertEqual(patched["status"], 200)
+        self.assertEqual(read["body"], {"first_name": "Pat"})
+
+    def test_sub_request_headers(self):
+        etag = self.client.get("/api/v1/me/")["ETag"]
+        response = self.batch(_get("/api/v1/me/", headers={"If-None-Match": etag}))
+        item = response.data["responses"][0]
+        self.assertEqual(item["status"], 304)
+        self.assertEqual(item["headers"]["ETag"], etag)
+        self.assertIsNone(item["body"])
+
+    def test_validation(self):
+        cases = [
+            [],
+            [_get("/api/v1/me/", id="a"), _get("/api/v1/me/", id="a")],
+            [_get("/api/v1/me/", headers={"Authorization": "Bearer x"})],
+            [{"method": "TRACE", "path": "/api/v1/me/"}],
+        ]
+        for items in cases:
+            with self.subTest(items=items):
+                self.assertEqual(self.batch(*items).status_code, 400)
+
+    @override_settings(SPEEDPY_API_BATCH_MAX_REQUESTS=2)
+    def test_max_requests(self):
+        response = self.batch(*[_get("/api/v1/me/")] * 3)
+        self.assertEqual(response.status_code, 400)
+
+    def test_requires_authentication(self):
+        self.client.force_authenticate(user=None)
+        self.assertIn(self.batch(_get("/api/v1/me/")).status_code, (401, 403))
+
+
+class BatchAuthTests(BatchTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(user=None)
+        _, raw = PersonalAccessToken.create_token(self.user, "cli", scopes=["read:profile"])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {raw}")
+
+    def test_authenticates_once_and_checks_scopes_per_sub_request(self):
+        original = PersonalAccessTokenAuthentication.authenticate
+        with patch.object(
+            PersonalAccessTokenAuthentication, "authenticate",
+            autospec=True, side_effect=original,
+        ) as authenticate:
+            response = self.batch(_get("/api/v1/me/"), _get("/api/v1/teams/"))
+        self.assertEqual(authenticate.call_count, 1)
+        self.assertEqual(
+            [item["status"] for item in response.data["responses"]], [200, 403]
+        )
+
+    @override_settings(SPEEDPY_API_ACCESS_LOG_ENABLED=True)
+    def test_each_sub_request_is_access_logged(self):
+        response = self.batch(
+            _get("/api/v1/me/", id="me"), _get("/api/v1/teams/", id="teams"),
+            HTTP_X_REQUEST_ID="batch-1",
+        )
+        items = response.data["responses"]
+        self.assertEqual(
+            [item["headers"]["X-Request-ID"] for item in items],
+            ["batch-1:me", "batch-1:teams"],
+        )
+        logs = ApiAccessLog.objects.order_by("id")
+        self.assertEqual(
+            [(log.path, log.status_code, log.request_id) for log in logs],
+            [
+                ("/api/v1/me/", 200, "batch-1:me"),
+                ("/api/v1/teams/", 403, "batch-1:teams"),
+                (BATCH_URL, 200, "batch-1"),
+            ],
+        )
+        self.assertEqual({log.token_type for log in logs}, {"pat"})
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class BatchThrottleTests(BatchTestBase):
+
+    def test_each_sub_request_is_charged(self):
+        with patch.dict(SimpleRateThrottle.THROTTLE_RATES, {"user": "3/hour"}):
+            response = self.batch(*[_get("/api/v1/me/")] * 4)
+        self.assertEqual(
+            [item["status"] for item in response.data["responses"]], [200, 200, 200, 429]
+        )
+        self.assertEqual(response["X-RateLimit-Remaining"], "0")
+
+
+@override_settings(SPEEDPY_API_BATCH_MAX_WORKERS=4)
+class BatchConcurrencyTests(BatchTestBase):
+
+    def test_concurrent_reads_keep_order(self):
+        paths = ["/api/v1/health/", "/api/v1/health/manifest/"] * 3
+        response = self.batch(*[_get(path, id=str(i)) for i, path in enumerate(paths)])
+        items = response.data["responses"]
+        self.assertEqual([item["id"] for item in items], [str(i) for i in range(6)])
+        self.assertEqual(items[0]["body"]["status"], "ok")
+        self.assertIn("endpoints", items[1]["body"])
+
+    def test_workers_do_not_share_the_request_timer(self):
+        context = contextvars.copy_context()
+        context.run(timing._current.set, timing.RequestTimer())
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            seen = pool.submit(batch._in_worker, context, "en", timing.current_timer).result()
+        self.assertIsNone(seen)
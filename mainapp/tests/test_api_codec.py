@@ -0,0 +1,145 @@
+"""
+Tests for the fast JSON codec, renderer and parser.
+
+The endpoint tests render each response's data with DRF's stock
+``JSONRenderer`` and compare it to the bytes actually served, so a codec
+change that alters output on any of our endpoints fails here.
+"""
+
+import datetime
+import io
+import json
+from decimal import Decimal
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from mainapp.models import Team, TeamMembership
+from mainapp.models.webhooks import WebhookEndpoint
+from speedpycom.api import codec
+from speedpycom.api.renderers import FastJSONParser, FastJSONRenderer
+from usermodel.models import User
+
+SAMPLE = {
+    "id": "0b0e3f0c-8a1e-4a43-9c53-6d2d8d3b1c11",
+    "name": "Zoë\u2028Ångström\u2029 🚀",
+    "count": 3,
+    "ratio": 0.25,
+    "flag": True,
+    "missing": None,
+    "nested": [{"a": 1}, [], {}],
+    "when": datetime.datetime(2026, 1, 2, 3, 4, 5, 678000, tzinfo=datetime.timezone.utc),
+    "day": datetime.date(2026, 1, 2),
+    "amount": Decimal("19.90"),
+    "label": gettext_lazy("Owner"),
+    "tags": ("a", "b"),
+    1: "int key",
+}
+
+
+class CodecTests(SimpleTestCase):
+
+    def test_matches_stock_renderer(self):
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    @override_settings(SPEEDPY_FAST_JSON=False)
+    def test_stdlib_backend_matches_stock_renderer(self):
+        self.assertEqual(codec.backend(), "json")
+        self.assertEqual(FastJSONRenderer().render(SAMPLE), JSONRenderer().render(SAMPLE))
+
+    def test_integers_beyond_64_bits_fall_back(self):
+        self.assertEqual(codec.dumps({"big": 2**70}), b'{"big":%d}' % 2**70)
+
+    def test_indent_falls_back_to_stock_renderer(self):
+        media_type = "application/json; indent=2"
+        self.assertEqual(
+            FastJSONRenderer().render({"a": 1}, media_type),
+            JSONRenderer().render({"a": 1}, media_type),
+        )
+
+    def test_ensure_ascii_matches_stdlib(self):
+        payload = {"event_type": "team.member.added", "data": {"name": "Zoë"}}
+        expected = json.dumps(payload, separators=(",", ":")).encode()
+        self.assertEqual(codec.dumps(payload, ensure_ascii=True), expected)
+        self.assertEqual(codec.dumps({"a": 1}, ensure_ascii=True), b'{"a":1}')
+
+    def test_loads_round_trip(self):
+        self.assertEqual(codec.loads(b'{"a":[1,2.5,"\\u00e9"]}'), {"a": [1, 2.5, "é"]})
+        self.assertEqual(codec.loads(str(2**70)), 2**70)
+
+    def test_loads_rejects_nan(self):
+        with self.assertRaises(ValueError):
+            codec.loads(b"[NaN]")
+
+    @skipUnless(codec.orjson, "orjson is not installed")
+    def test_orjson_backend_active(self):
+        self.assertEqual(codec.backend(), "orjson")
+
+
+class FastJSONParserTests(SimpleTestCase):
+
+    def test_parses_utf8(self):
+        data = FastJSONParser().parse(io.BytesIO('{"name":"Zoë"}'.encode()))
+        self.assertEqual(data, {"name": "Zoë"})
+
+    def test_invalid_json_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name":'))
+
+    def test_invalid_utf8_raises_parse_error(self):
+        with self.assertRaises(ParseError):
+            FastJSONParser().parse(io.BytesIO(b'{"name":"\xff"}'))
+
+    def test_other_charsets_use_stock_parser(self):
+        body = '{"name":"Zoë"}'.encode("latin-1")
+        data = FastJSONParser().parse(io.BytesIO(body), parser_context={"encoding": "latin-1"})
+        self.assertEqual(data, {"name": "Zoë"})
+
+
+class EndpointOutputCompatibilityTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(
+            email="owner@example.com", password="pass123", first_name="Zoë"
+        )
+        self.team = Team.objects.create(name="Équipe\u2028", slug="equipe")
+        TeamMembership.objects.create(team=self.team, user=self.user, role="owner")
+        WebhookEndpoint.objects.create(
+            team=self.team, url="https://example.com/hook", events=["*"]
+        )
+        self.client.force_authenticate(user=self.user)
+
+    def test_endpoints_byte_identical(self):
+        for path in (
+            "/api/v1/me/",
+            "/api/v1/teams/",
+            f"/api/v1/teams/{self.team.id}/",
+            f"/api/v1/teams/{self.team.id}/members/",
+            f"/api/v1/teams/{self.team.id}/webhooks/",
+            "/api/v1/webhooks/",
+            "/api/v1/teams/00000000-0000-0000-0000-000000000000/",
+        ):
+            with self.subTest(path=path):
+                response = self.client.get(path)
+                self.assertEqual(response.content, JSONRenderer().render(response.data))
+
+    def test_malformed_body_is_400(self):
+        response = self.client.patch(
+            "/api/v1/me/", data=b'{"first_name":', content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("JSON parse error", response.json()["detail"])
+
+    def test_benchmark_command(self):
+        out = StringIO()
+        call_command(
+            "benchmark_json", user=self.user.email, iterations=2, stdout=out
+        )
+        self.assertIn("6 endpoint(s) byte-identical", out.getvalue())
@@ -0,0 +1,165 @@
+"""
+Tests for ETag / If-None-Match support on read-heavy API endpoints.
+"""
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mainapp.models import AsyncJob, Team, TeamMembership
+from usermodel.models import User
+
+LOCMEM_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class ConditionalGetTestBase(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            email="owner@example.com", password="pass123"
+        )
+        self.member = User.objects.create_user(
+            email="member@example.com", password="pass123"
+        )
+        self.outsider = User.objects.create_user(
+            email="outsider@example.com", password="pass123"
+        )
+        self.team = Team.objects.create(name="Team A", slug="team-a")
+        TeamMembership.objects.create(team=self.team, user=self.owner, role="owner")
+        TeamMembership.objects.create(team=self.team, user=self.member, role="member")
+        self.client.force_authenticate(user=self.owner)
+
+    def assertRevalidates(self, url):
+        """First GET returns an ETag; replaying it gets an empty 304."""
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        etag = first["ETag"]
+        self.assertTrue(etag.startswith('W/"'))
+        self.assertIn("no-cache", first["Cache-Control"])
+        self.assertIn("private", first["Cache-Control"])
+
+        second = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(second["ETag"], etag)
+        return etag
+
+
+class CurrentUserConditionalTests(ConditionalGetTestBase):
+
+    def test_if_none_match_returns_304(self):
+        self.assertRevalidates("/api/v1/me/")
+
+    def test_profile_change_invalidates_etag(self):
+        etag = self.assertRevalidates("/api/v1/me/")
+        self.client.patch("/api/v1/me/", {"first_name": "Renamed"}, format="json")
+        response = self.client.get("/api/v1/me/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["first_name"], "Renamed")
+
+    def test_etag_is_per_user(self):
+        etag = self.client.get("/api/v1/me/")["ETag"]
+        self.client.force_authenticate(user=self.member)
+        response = self.client.get("/api/v1/me/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_304_runs_no_queries(self):
+        etag = self.client.get("/api/v1/me/")["ETag"]
+        with self.assertNumQueries(0):
+            response = self.client.get("/api/v1/me/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_patch_has_no_etag(self):
+        response = self.client.patch("/api/v1/me/", {"first_name": "X"}, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn("ETag", response)
+
+
+class TeamConditionalTests(ConditionalGetTestBase):
+
+    def test_team_list_revalidates_and_sees_new_team(self):
+        etag = self.assertRevalidates("/api/v1/teams/")
+        other = Team.objects.create(name="Team B", slug="team-b")
+        TeamMembership.objects.create(team=other, user=self.owner, role="owner")
+        response = self.client.get("/api/v1/teams/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["count"], 2)
+
+    def test_team_list_changes_when_a_membership_is_swapped(self):
+        other = Team.objects.create(name="Team B", slug="team-b")
+        # Same count and same Max(Team.updated_at) before and after the swap.
+        Team.objects.filter(pk=other.pk).update(updated_at=self.team.updated_at)
+        etag = self.assertRevalidates("/api/v1/teams/")
+        TeamMembership.objects.filter(user=self.owner).delete()
+        TeamMembership.objects.create(team=other, user=self.owner, role="owner")
+        response = self.client.get("/api/v1/teams/", HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([team["name"] for team in response.data["results"]], ["Team B"])
+
+    def test_team_detail_changes_with_member_count(self):
+        url = f"/api/v1/teams/{self.team.id}/"
+        etag = self.assertRevalidates(url)
+        TeamMembership.objects.filter(user=self.member).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["member_count"], 1)
+
+    def test_members_list_changes_when_member_renames(self):
+        url = f"/api/v1/teams/{self.team.id}/members/"
+        etag = self.assertRevalidates(url)
+        self.member.first_name = "Renamed"
+        self.member.save(update_fields=["first_name"])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_last_login_does_not_invalidate_members_list(self):
+        url = f"/api/v1/teams/{self.team.id}/members/"
+        etag = self.client.get(url)["ETag"]
+        self.member.save(update_fields=["last_login"])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_outsider_gets_404_not_304(self):
+        url = f"/api/v1/teams/{self.team.id}/members/"
+        etag = self.client.get(url)["ETag"]
+        self.client.force_authenticate(user=self.outsider)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 404)
+
+
+class JobStatusConditionalTests(ConditionalGetTestBase):
+
+    def test_job_status_revalidates_until_progress(self):
+        job = AsyncJob.objects.create(owner=self.owner, job_type="demo")
+        url = f"/api/v1/jobs/{job.id}/"
+        etag = self.assertRevalidates(url)
+
+        job.progress_current = 1
+        job.save(update_fields=["progress_current", "updated_at"])
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["progress_current"], 1)
+
+    def test_other_users_job_is_404(self):
+        job = AsyncJob.objects.create(owner=self.member, job_type="demo")
+        response = self.client.get(f"/api/v1/jobs/{job.id}/", HTTP_IF_NONE_MATCH="*")
+        self.assertEqual(response.status_code, 404)
+
+
+class DummyCacheConditionalTests(TestCase):
+    """Without a real cache, version-counted tags never match (always 200)."""
+
+    def test_members_list_never_304_with_dummy_cache(self):
+        owner = User.objects.create_user(email="owner@example.com", password="pass123")
+        team = Team.objects.create(name="Team", slug="team")
+        TeamMembership.objects.create(team=team, user=owner, role="owner")
+        client = APIClient()
+        client.force_authenticate(user=owner)
+        url = f"/api/v1/teams/{team.id}/members/"
+        etag = client.get(url)["ETag"]
+        self.assertEqual(client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -0,0 +1,110 @@
+"""
+Tests for the precomputed OpenAPI schema and integration manifest.
+"""
+
+import gzip
+import json
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from drf_spectacular.generators import SchemaGenerator
+from rest_framework.test import APIClient
+
+from speedpycom.api import documents
+from speedpycom.api.documents import clear_documents, warm_documents
+
+
+@override_settings(API_DOCS_PUBLIC=True, SITE_URL="https://example.test")
+class PrecomputedDocumentTestBase(TestCase):
+
+    def setUp(self):
+        clear_documents()
+        self.client = APIClient()
+
+
+class PrecomputedSchemaTests(PrecomputedDocumentTestBase):
+
+    URL = "/api/schema/"
+
+    def test_schema_generated_once(self):
+        with patch.object(
+            SchemaGenerator, "get_schema", autospec=True,
+            side_effect=SchemaGenerator.get_schema,
+        ) as get_schema:
+            first = self.client.get(self.URL)
+            second = self.client.get(self.URL)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(get_schema.call_count, 1)
+
+    def test_strong_etag_and_304(self):
+        first = self.client.get(self.URL)
+        etag = first["ETag"]
+        self.assertFalse(etag.startswith("W/"))
+        second = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+
+    def test_gzip_when_accepted(self):
+        plain = self.client.get(self.URL)
+        compressed = self.client.get(self.URL, HTTP_ACCEPT_ENCODING="gzip, br")
+        self.assertEqual(compressed["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(compressed.content), plain.content)
+        self.assertEqual(compressed["ETag"], plain["ETag"])
+        self.assertIn("Accept-Encoding", compressed["Vary"])
+
+    def test_json_format(self):
+        response = self.client.get(self.URL, {"format": "json"})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("openapi", json.loads(response.content))
+
+    def test_setting_change_invalidates(self):
+        self.client.get(self.URL)
+        with override_settings(API_DOCS_PUBLIC=True), patch.object(
+            SchemaGenerator, "get_schema", autospec=True,
+            side_effect=SchemaGenerator.get_schema,
+        ) as get_schema:
+            self.client.get(self.URL)
+        self.assertEqual(get_schema.call_count, 1)
+
+class PrecomputedManifestTests(PrecomputedDocumentTestBase):
+
+    URL = "/.well-known/speedpy.json"
+
+    def test_manifest_revalidates(self):
+        first = self.client.get(self.URL)
+        self.assertEqual(first["Content-Type"], "application/json")
+        self.assertIn("public", first["Cache-Control"])
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(response.status_code, 304)
+
+    def test_both_manifest_urls_share_document(self):
+        well_known = self.client.get(self.URL)
+        api = self.client.get("/api/v1/health/manifest/")
+        self.assertEqual(well_known["ETag"], api["ETag"])
+
+    @override_settings(SITE_URL="")
+    def test_manifest_per_host_without_site_url(self):
+        first = self.client.get(self.URL, HTTP_HOST="a.example.com")
+        second = self.client.get(self.URL, HTTP_HOST="b.example.com")
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertIn("a.example.com", first.json()["links"]["openapi_schema"])
+
+    @override_settings(SITE_URL="")
+    def test_manifests_kept_for_recent_hosts_only(self):
+        with patch.object(documents, "MAX_HOST_MANIFESTS", 2):
+            for host in ("a.example.com", "b.example.com", "a.example.com", "c.example.com"):
+                self.client.get(self.URL, HTTP_HOST=host)
+        manifests = sorted(key[1] for key in documents._documents if key[0] == "manifest")
+        self.assertEqual(manifests, ["http://a.example.com", "http://c.example.com"])
+
+
+class WarmDocumentsTests(PrecomputedDocumentTestBase):
+
+    def test_warm_builds_every_document(self):
+        documents = warm_documents("https://example.test/")
+        self.assertIn("manifest", documents)
+        self.assertIn("schema application/vnd.oai.openapi", documents)
+        with patch.object(SchemaGenerator, "get_schema") as get_schema:
+            self.client.get("/api/schema/")
+        get_schema.assert_not_called()
@@ -0,0 +1,138 @@
+import csv
+import io
+import json
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mainapp.models import Team, TeamMembership
+from mainapp.models.webhooks import WebhookDelivery, WebhookEndpoint
+from speedpycom.api.exports import CSVRenderer, encode_cursor
+from usermodel.models import ApiAccessLog, PersonalAccessToken, User
+
+
+def ndjson(response):
+    body = b"".join(response.streaming_content).decode()
+    return [json.loads(line) for line in body.splitlines()]
+
+
+@override_settings(SPEEDPY_API_EXPORT_CHUNK_SIZE=3)
+class ExportAPITests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="pass123")
+        cls.outsider = User.objects.create_user(email="outsider@example.com", password="pass123")
+        cls.team = Team.objects.create(name="Acme", slug="acme")
+        TeamMembership.objects.create(team=cls.team, user=cls.owner, role="owner")
+        for i in range(7):
+            user = User.objects.create_user(email=f"m{i}@example.com", first_name=f"=cmd{i}")
+            TeamMembership.objects.create(team=cls.team, user=user, role="member")
+
+        cls.endpoint = WebhookEndpoint.objects.create(
+            team=cls.team, name="Hook", url="https://hooks.example.com/a", events=[]
+        )
+        other = WebhookEndpoint.objects.create(
+            team=cls.team, name="Other", url="https://hooks.example.com/b", events=[]
+        )
+        for i in range(5):
+            for endpoint in (cls.endpoint, other):
+                WebhookDelivery.objects.create(
+                    endpoint=endpoint,
+                    event_id=f"evt_{endpoint.name}_{i}",
+                    event_type="team.member_added",
+                    payload={},
+                    status=WebhookDelivery.Status.FAILED if i % 2 else WebhookDelivery.Status.SUCCESS,
+                )
+        outside_team = Team.objects.create(name="Other", slug="other")
+        WebhookDelivery.objects.create(
+            endpoint=WebhookEndpoint.objects.create(
+                team=outside_team, name="X", url="https://hooks.example.com/x", events=[]
+            ),
+            event_id="evt_outside",
+            event_type="team.member_added",
+            payload={},
+        )
+        for i in range(4):
+            ApiAccessLog.objects.create(user=cls.owner, method="GET", path=f"/api/v1/{i}/", status_code=200)
+        ApiAccessLog.objects.create(user=cls.outsider, method="GET", path="/api/v1/me/", status_code=200)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.owner)
+        self.members_url = f"/api/v1/teams/{self.team.pk}/members/export/"
+        self.deliveries_url = f"/api/v1/teams/{self.team.pk}/webhooks/deliveries/export/"
+
+    def test_members_ndjson_streams_every_member_in_join_order(self):
+        response = self.client.get(self.members_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson; charset=utf-8")
+        self.assertIn('filename="team-members.ndjson"', response["Content-Disposition"])
+        rows = ndjson(response)
+        self.assertEqual(len(rows), 8)
+        self.assertEqual(rows[0]["email"], "owner@example.com")
+        self.assertEqual(list(rows[0])[-1], "_cursor")
+
+    def test_members_csv_has_header_and_neutralises_formulas(self):
+        response = self.client.get(self.members_url, {"format": "csv", "fields": "email,first_name"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        rows = list(csv.reader(io.StringIO(b"".join(response.streaming_content).decode())))
+        self.assertEqual(rows[0], ["email", "first_name", "_cursor"])
+        self.assertEqual(len(rows), 9)
+        self.assertEqual(rows[2][1], "'=cmd0")
+
+    def test_accept_header_selects_csv(self):
+        response = self.client.get(self.members_url, HTTP_ACCEPT="text/csv")
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+
+    def test_cursor_resumes_after_the_last_row(self):
+        rows = ndjson(self.client.get(self.members_url))
+        resumed = ndjson(self.client.get(self.members_url, {"cursor": rows[2]["_cursor"]}))
+        self.assertEqual(resumed, rows[3:])
+
+    def test_invalid_cursor_is_a_json_400(self):
+        for cursor in ("not-a-cursor", encode_cursor(["2025-01-01T00:00:00Z"]), encode_cursor(["x", "y"])):
+            with self.subTest(cursor):
+                response = self.client.get(self.members_url, {"cursor": cursor})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response["Content-Type"], "application/json")
+                self.assertIn("cursor", response.json())
+
+    def test_non_member_gets_404(self):
+        self.client.force_authenticate(user=self.outsider)
+        self.assertEqual(self.client.get(self.members_url).status_code, 404)
+        self.assertEqual(self.client.get(self.deliveries_url).status_code, 404)
+
+    def test_deliveries_cover_the_team_and_filter(self):
+        rows = ndjson(self.client.get(self.deliveries_url))
+        self.assertEqual(len(rows), 10)
+        self.assertEqual([row["id"] for row in rows], sorted(row["id"] for row in rows))
+
+        rows = ndjson(self.client.get(self.deliveries_url, {"webhook": str(self.endpoint.pk), "status": "failed"}))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual({row["endpoint_id"] for row in rows}, {str(self.endpoint.pk)})
+
+        self.assertEqual(self.client.get(self.deliveries_url, {"status": "nope"}).status_code, 400)
+
+    def test_access_logs_export_only_own_entries(self):
+        rows = ndjson(self.client.get("/api/v1/me/access-logs/export/"))
+        self.assertEqual([row["path"] for row in rows], [f"/api/v1/{i}/" for i in range(4)])
+
+    def test_export_requires_scope(self):
+        _, token = PersonalAccessToken.create_token(self.owner, "Teams only", scopes=["read:teams"])
+        client = APIClient(HTTP_AUTHORIZATION=f"Bearer {token}")
+        self.assertEqual(client.get(self.members_url).status_code, 200)
+        self.assertEqual(client.get(self.deliveries_url).status_code, 403)
+        self.assertEqual(client.get("/api/v1/me/access-logs/export/").status_code, 403)
+
+
+class CSVRendererTests(TestCase):
+    def test_renders_a_non_streaming_response(self):
+        data = [{"email": "a@example.com", "note": "=1+1"}, {"email": "b@example.com", "tags": ["x"]}]
+        rows = list(csv.reader(io.StringIO(CSVRenderer().render(data).decode())))
+        self.assertEqual(
+            rows,
+            [["email", "note", "tags"], ["a@example.com", "'=1+1", ""], ["b@example.com", "", '["x"]']],
+        )
+        self.assertEqual(CSVRenderer().render({"detail": "Not found."}), b"detail\r\nNot found.\r\n")
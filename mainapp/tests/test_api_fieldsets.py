@@ -0,0 +1,147 @@
+"""
+Tests for ``?fields=`` / ``?expand=`` sparse fieldsets on API endpoints.
+"""
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from mainapp.models import Team, TeamMembership
+from mainapp.models.webhooks import WebhookDelivery, WebhookEndpoint
+from usermodel.models import User
+
+
+class FieldsetTestBase(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            email="owner@example.com", password="pass123", first_name="Olive"
+        )
+        self.member = User.objects.create_user(
+            email="member@example.com", password="pass123"
+        )
+        self.team = Team.objects.create(name="Team A", slug="team-a")
+        TeamMembership.objects.create(team=self.team, user=self.owner, role="owner")
+        TeamMembership.objects.create(team=self.team, user=self.member, role="member")
+        self.client.force_authenticate(user=self.owner)
+
+
+class CurrentUserFieldsetTests(FieldsetTestBase):
+
+    def test_fields_limits_response(self):
+        response = self.client.get("/api/v1/me/", {"fields": "id,email"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(response.data), {"id", "email"})
+
+    def test_repeated_fields_param(self):
+        response = self.client.get("/api/v1/me/?fields=id&fields=first_name")
+        self.assertEqual(set(response.data), {"id", "first_name"})
+
+    def test_unknown_field_is_400(self):
+        response = self.client.get("/api/v1/me/", {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("fields", response.data)
+
+    def test_unknown_expand_is_400(self):
+        response = self.client.get("/api/v1/me/", {"expand": "teams"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("expand", response.data)
+
+    def test_patch_ignores_fields(self):
+        response = self.client.patch(
+            "/api/v1/me/?fields=id", {"first_name": "New"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("email", response.data)
+
+    def test_fieldsets_get_distinct_etags(self):
+        full = self.client.get("/api/v1/me/")
+        sparse = self.client.get("/api/v1/me/", {"fields": "id"})
+        self.assertNotEqual(full["ETag"], sparse["ETag"])
+
+
+class TeamFieldsetTests(FieldsetTestBase):
+
+    def test_team_list_default_has_no_member_count(self):
+        response = self.client.get("/api/v1/teams/")
+        self.assertNotIn("member_count", response.data["results"][0])
+
+    def test_team_list_expand_member_count(self):
+        other = Team.objects.create(name="Team B", slug="team-b")
+        TeamMembership.objects.create(team=other, user=self.owner, role="owner")
+        response = self.client.get("/api/v1/teams/", {"expand": "member_count"})
+        self.assertEqual(response.status_code, 200)
+        counts = {team["slug"]: team["member_count"] for team in response.data["results"]}
+        self.assertEqual(counts, {"team-a": 2, "team-b": 1})
+
+    def test_team_list_expand_etag_tracks_membership(self):
+        url = "/api/v1/teams/?expand=member_count"
+        etag = self.client.get(url)["ETag"]
+        TeamMembership.objects.filter(user=self.member).delete()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["results"][0]["member_count"], 1)
+
+    def test_team_detail_counts_members_once(self):
+        url = f"/api/v1/teams/{self.team.id}/"
+        # Membership lookup plus the ETag aggregate; the serializer reuses it.
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data["member_count"], 2)
+
+    def test_team_detail_without_member_count_skips_count(self):
+        url = f"/api/v1/teams/{self.team.id}/"
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"fields": "id,name"})
+        self.assertEqual(response.data, {"id": str(self.team.id), "name": "Team A"})
+
+    def test_members_without_user_fields_skip_join(self):
+        url = f"/api/v1/teams/{self.team.id}/members/"
+        response = self.client.get(url, {"fields": "id,role"})
+        self.assertEqual(
+            {(row["id"], row["role"]) for row in response.data["results"]},
+            {(str(self.owner.id), "owner"), (str(self.member.id), "member")},
+        )
+        self.assertEqual(set(response.data["results"][0]), {"id", "role"})
+
+    def test_members_user_fields_still_joined(self):
+        url = f"/api/v1/teams/{self.team.id}/members/"
+        response = self.client.get(url, {"fields": "email,first_name"})
+        emails = {row["email"] for row in response.data["results"]}
+        self.assertEqual(emails, {"owner@example.com", "member@example.com"})
+
+
+class WebhookFieldsetTests(FieldsetTestBase):
+
+    def setUp(self):
+        super().setUp()
+        self.endpoint = WebhookEndpoint.objects.create(
+            team=self.team, url="https://example.com/hook", events=["*"]
+        )
+        self.delivery = WebhookDelivery.objects.create(
+            endpoint=self.endpoint,
+            event_id="evt_1",
+            event_type="team.member.added",
+            payload={"data": {}},
+        )
+
+    def test_endpoint_list_fields(self):
+        response = self.client.get(
+            f"/api/v1/teams/{self.team.id}/webhooks/", {"fields": "id,url"}
+        )
+        self.assertEqual(response.data["results"], [
+            {"id": str(self.endpoint.id), "url": "https://example.com/hook"},
+        ])
+
+    def test_user_endpoint_list_fields(self):
+        response = self.client.get("/api/v1/webhooks/", {"fields": "id,is_active"})
+        self.assertEqual(set(response.data["results"][0]), {"id", "is_active"})
+
+    def test_delivery_detail_without_payload(self):
+        url = (
+            f"/api/v1/teams/{self.team.id}/webhooks/{self.endpoint.id}"
+            f"/deliveries/{self.delivery.id}/"
+        )
+        response = self.client.get(url, {"fields": "id,status"})
+        self.assertEqual(response.data, {"id": self.delivery.id, "status": "pending"})
+        self.assertIn("payload", self.client.get(url).data)
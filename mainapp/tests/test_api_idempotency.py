@@ -3,15 +3,24 @@ Tests for the Idempotency-Key contract on team invitation creation.
 """
 
 import uuid
+from datetime import timedelta
 from unittest.mock import patch
 
-from django.test import TestCase
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from rest_framework.test import APIClient
 
 from mainapp.models import Team, TeamInvitation, TeamMembership
+from speedpycom.api.idempotency import idempotency_cache_keys
 from speedpycom.models.idempotency import IdempotencyRecord
+from speedpycom.services.idempotency import purge_expired_records
 from usermodel.models import User
 
+LOCMEM_CACHE = {
+    "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
+}
+
 
 class IdempotencyKeyTests(TestCase):
     """Idempotency-Key on POST /api/v1/teams/{team_id}/invitations/."""
@@ -121,3 +130,110 @@ class IdempotencyKeyTests(TestCase):
     def test_invalid_key_does_not_queue_email(self, mock_send_task):
         self._post(key="invalid key with spaces!")
         mock_send_task.assert_not_called()
+
+
+@override_settings(CACHES=LOCMEM_CACHE)
+class IdempotencyCacheTests(TestCase):
+    """In-flight lock and cache-first replay (needs a real cache backend)."""
+
+    def setUp(self):
+        cache.clear()
+        patcher = patch("mainapp.api.teams.current_app.send_task")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.owner = User.objects.create_user(
+            email="owner@example.com", password="pass123"
+        )
+        self.team = Team.objects.create(name="Team", slug="team")
+        TeamMembership.objects.create(team=self.team, user=self.owner, role="owner")
+        self.client.force_authenticate(user=self.owner)
+        self.url = f"/api/v1/teams/{self.team.id}/invitations/"
+
+    def _post(self, key, email="invite@example.com"):
+        return self.client.post(
+            self.url,
+            {"email": email, "role": "member"},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def _keys(self, key):
+        return idempotency_cache_keys(self.owner.pk, "POST", self.url, key)
+
+    @patch("speedpycom.api.idempotency.LOCK_WAIT", 0)
+    def test_in_flight_duplicate_gets_409_without_running_view(self):
+        key = str(uuid.uuid4())
+        _, lock_key = self._keys(key)
+        cache.add(lock_key, "someone-else")
+        response = self._post(key)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response["Retry-After"], "1")
+        self.assertFalse(TeamInvitation.objects.filter(team=self.team).exists())
+
+    def test_lock_released_and_response_cached_on_commit(self):
+        key = str(uuid.uuid4())
+        done_key, lock_key = self._keys(key)
+        with self.captureOnCommitCallbacks(execute=True):
+            r1 = self._post(key)
+        self.assertEqual(r1.status_code, 201)
+        self.assertIsNone(cache.get(lock_key))
+        self.assertEqual(cache.get(done_key)["response_status"], 201)
+
+    def test_replay_served_from_cache_without_db_record(self):
+        key = str(uuid.uuid4())
+        with self.captureOnCommitCallbacks(execute=True):
+            r1 = self._post(key)
+        IdempotencyRecord.objects.all().delete()
+        r2 = self._post(key)
+        self.assertEqual(r2.status_code, 201)
+        self.assertEqual(r2["Idempotency-Replay"], "true")
+        self.assertEqual(r1.data["id"], r2.data["id"])
+
+    def test_cached_replay_still_rejects_different_body(self):
+        key = str(uuid.uuid4())
+        with self.captureOnCommitCallbacks(execute=True):
+            self._post(key)
+        response = self._post(key, email="other@example.com")
+        self.assertEqual(response.status_code, 409)
+
+    def test_db_record_refills_cache(self):
+        key = str(uuid.uuid4())
+        done_key, _ = self._keys(key)
+        self._post(key)  # on_commit never runs inside the test transaction
+        self.assertIsNone(cache.get(done_key))
+        r2 = self._post(key)
+        self.assertEqual(r2["Idempotency-Replay"], "true")
+        self.assertIsNotNone(cache.get(done_key))
+
+
+class PurgeExpiredIdempotencyRecordsTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="u@example.com", password="pass123")
+
+    def _record(self, key, expires_at):
+        return IdempotencyRecord.objects.create(
+            key=key,
+            user=self.user,
+            method="POST",
+            path="/api/v1/x/",
+            request_body_hash="0" * 64,
+            response_status=201,
+            response_body={},
+            expires_at=expires_at,
+        )
+
+    def test_deletes_only_expired_records_in_batches(self):
+        past = timezone.now() - timedelta(hours=1)
+        for i in range(5):
+            self._record(f"old-{i}", past)
+        fresh = self._record("fresh", timezone.now() + timedelta(hours=1))
+
+        self.assertEqual(purge_expired_records(batch_size=2), 5)
+        self.assertEqual(list(IdempotencyRecord.objects.all()), [fresh])
+
+    def test_nothing_expired_is_a_no_op(self):
+        self._record("fresh", timezone.now() + timedelta(hours=1))
+        self.assertEqual(purge_expired_records(), 0)
+        self.assertEqual(IdempotencyRecord.objects.count(), 1)
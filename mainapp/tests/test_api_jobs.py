@@ -49,7 +49,7 @@ class DemoJobCreateTests(JobAPITestBase):
         expected_fields = {
             "id", "job_type", "status", "progress_current", "progress_total",
             "message", "result", "error", "created_at", "started_at",
-            "finished_at", "status_url",
+            "finished_at", "result_file", "status_url",
         }
         self.assertEqual(set(response.data.keys()), expected_fields)
 
@@ -89,7 +89,7 @@ class JobStatusTests(JobAPITestBase):
         expected_fields = {
             "id", "job_type", "status", "progress_current", "progress_total",
             "message", "result", "error", "created_at", "started_at",
-            "finished_at",
+            "finished_at", "result_file",
         }
         self.assertEqual(set(response.data.keys()), expected_fields)
 
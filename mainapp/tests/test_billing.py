@@ -3,6 +3,7 @@
 from datetime import timedelta
 from unittest.mock import patch
 
+from django.core.cache import cache
 from django.test import TestCase, override_settings
 from django.utils import timezone
 
@@ -201,6 +202,72 @@ class BillingStateUserTests(TestCase):
         self.assertEqual(state.get_billing_state(user), state.ENABLED)
 
 
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class BillingSnapshotTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = Team.objects.create(name="Acme", slug="acme", plan="pro")
+        self.sub = make_sub("team", self.team.id, status=BillingSubscription.STATUS_ACTIVE)
+
+    def test_gating_helpers_share_one_cached_snapshot(self):
+        self.assertEqual(state.get_billing_state(self.team), state.ENABLED)
+        with self.assertNumQueries(0):
+            self.assertTrue(state.account_has_feature(self.team, "Priority email support"))
+            self.assertFalse(state.account_has_feature(self.team, "Dedicated support"))
+            self.assertEqual(state.account_limit(self.team, "max_team_members"), 10)
+            self.assertEqual(state.effective_plan_key(self.team), "pro")
+            self.assertTrue(state.can_create_records(self.team))
+
+    def test_a_write_is_seen_once_the_version_is_bumped(self):
+        state.get_billing_state(self.team)
+        self.sub.status = BillingSubscription.STATUS_PAST_DUE
+        self.sub.grace_period_ends_at = timezone.now() - timedelta(days=1)
+        self.sub.save()
+        # A write that bypasses the billing services is not seen ...
+        self.assertEqual(state.get_billing_state(self.team), state.ENABLED)
+        # ... until it invalidates, as apply_subscription_update does.
+        state.invalidate_billing_snapshot("team", str(self.team.id))
+        self.assertEqual(state.get_billing_state(self.team), state.DISABLED)
+        self.assertFalse(state.account_has_feature(self.team, "Priority email support"))
+
+    def test_plan_application_and_downgrade_invalidate(self):
+        self.assertEqual(state.account_limit(self.team, "max_team_members"), 10)
+        plans.apply_plan_to_billable(self.team, "business")
+        self.assertEqual(state.effective_plan_key(self.team), "business")
+        plans.downgrade_to_free(self.team)
+        self.assertEqual(state.account_limit(self.team, "max_team_members"), 3)
+
+    def test_user_mode_downgrade_invalidates(self):
+        user = User.objects.create_user(email="solo@example.com", password="pass123")
+        sub = make_sub("user", user.id, status=BillingSubscription.STATUS_ACTIVE)
+        self.assertEqual(state.effective_plan_key(user), "pro")
+        BillingSubscription.objects.filter(pk=sub.pk).update(status=BillingSubscription.STATUS_EXPIRED)
+        plans.downgrade_to_free(user)
+        self.assertEqual(state.effective_plan_key(user), DEFAULT_PLAN_KEY)
+
+    def test_snapshot_never_outlives_the_paid_period(self):
+        self.sub.status = BillingSubscription.STATUS_CANCELED
+        self.sub.current_period_ends_at = timezone.now() + timedelta(seconds=30)
+        self.sub.save()
+        state.invalidate_billing_snapshot("team", str(self.team.id))
+        snapshot = state.get_billing_snapshot(self.team)
+        self.assertEqual(snapshot.state, state.ENABLED)
+        self.assertEqual(snapshot.valid_until, self.sub.current_period_ends_at)
+        state.invalidate_billing_snapshot("team", str(self.team.id))
+        with patch("mainapp.billing.state.cache", wraps=cache) as wrapped:
+            state.get_billing_snapshot(self.team)
+        self.assertLessEqual(wrapped.set.call_args.args[2], 30)
+
+    def test_explicit_now_bypasses_the_cache(self):
+        self.sub.status = BillingSubscription.STATUS_CANCELED
+        self.sub.current_period_ends_at = timezone.now() + timedelta(days=1)
+        self.sub.save()
+        state.invalidate_billing_snapshot("team", str(self.team.id))
+        self.assertEqual(state.get_billing_state(self.team), state.ENABLED)
+        later = timezone.now() + timedelta(days=2)
+        self.assertEqual(state.get_billing_state(self.team, now=later), state.DISABLED)
+
+
 class PlanApplicationTests(TestCase):
     def test_apply_plan_syncs_team_limits(self):
         team = Team.objects.create(name="T", slug="t", plan="free")
@@ -251,6 +318,74 @@ class PeriodicTaskTests(TestCase):
         self.team.refresh_from_db()
         self.assertEqual(self.team.plan, "free")
 
+    def test_expired_rows_are_handled_once(self):
+        from mainapp.tasks.billing import process_billing_subscriptions
+
+        sub = make_sub("team", self.team.id, status=BillingSubscription.STATUS_EXPIRED)
+        self.assertEqual(process_billing_subscriptions(), "Processed 1 billing subscription(s)")
+        sub.refresh_from_db()
+        self.assertIsNotNone(sub.downgraded_at)
+
+        # Back on a paid plan some other way: the old row is not looked at again.
+        Team.objects.filter(pk=self.team.pk).update(plan="pro")
+        self.assertEqual(process_billing_subscriptions(), "Processed 0 billing subscription(s)")
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.plan, "pro")
+
+    def test_account_with_another_live_subscription_keeps_its_plan(self):
+        from mainapp.tasks.billing import process_billing_subscriptions
+
+        make_sub(
+            "team",
+            self.team.id,
+            provider_subscription_id="sub_old",
+            status=BillingSubscription.STATUS_CANCELED,
+            current_period_ends_at=timezone.now() - timedelta(days=1),
+        )
+        make_sub("team", self.team.id, provider_subscription_id="sub_new")
+        process_billing_subscriptions()
+        self.team.refresh_from_db()
+        self.assertEqual(self.team.plan, "pro")
+
+    @patch("mainapp.tasks.billing.send_billing_disabled_email.delay")
+    def test_queries_do_not_grow_with_the_number_of_subscriptions(self, mock_delay):
+        from mainapp.tasks.billing import process_billing_subscriptions
+
+        def lapse(count, offset):
+            for i in range(count):
+                team = Team.objects.create(name=f"T{offset + i}", slug=f"t{offset + i}", plan="pro")
+                make_sub(
+                    "team",
+                    team.id,
+                    status=BillingSubscription.STATUS_PAST_DUE,
+                    grace_period_ends_at=timezone.now() - timedelta(days=1),
+                )
+
+        lapse(1, 0)
+        with self.assertNumQueries(13) as single:
+            process_billing_subscriptions()
+        lapse(6, 1)
+        with self.assertNumQueries(len(single)):
+            process_billing_subscriptions()
+        self.assertEqual(Team.objects.filter(plan="free").count(), 7)
+        self.assertEqual(mock_delay.call_count, 7)
+
+    def test_webhook_update_clears_downgraded_at(self):
+        from mainapp.billing.webhooks import apply_subscription_update
+
+        sub = make_sub(
+            "team", self.team.id, status=BillingSubscription.STATUS_EXPIRED, downgraded_at=timezone.now()
+        )
+        apply_subscription_update("stripe", {
+            "provider_subscription_id": sub.provider_subscription_id,
+            "billable_type": "team",
+            "billable_id": str(self.team.id),
+            "plan_key": "pro",
+            "status": BillingSubscription.STATUS_ACTIVE,
+        })
+        sub.refresh_from_db()
+        self.assertIsNone(sub.downgraded_at)
+
 
 class OverLimitTests(TestCase):
     def test_over_limit_report_for_team(self):
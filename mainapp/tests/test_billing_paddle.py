@@ -4,14 +4,18 @@ status mapping, idempotency, and account resolution from custom data."""
 import hashlib
 import hmac
 import json
+from datetime import timedelta
 from unittest.mock import patch
 
 from django.test import RequestFactory, TestCase, override_settings
+from django.utils import timezone
 
+from mainapp.billing import webhooks
 from mainapp.billing.paddle import PaddleAdapter, verify_webhook_signature
 from mainapp.billing.signing import sign_account
 from mainapp.models import BillingEventLog, BillingSubscription, Team
 from mainapp.subscription_plans import SUBSCRIPTION_PLANS
+from mainapp.tasks.billing import process_billing_webhook_events
 from mainapp.views.billing import PaddleWebhookView
 
 WEBHOOK_SECRET = "pdl_ntfset_test"
@@ -244,3 +248,111 @@ class WebhookViewTests(TestCase):
         body = json.dumps(evt).encode()
         resp = self._post(body, "ts=1;h1=deadbeef")
         self.assertEqual(resp.status_code, 403)
+
+    def _receive(self, evt):
+        body = json.dumps(evt).encode()
+        with patch("mainapp.billing.webhooks.current_app.send_task") as send_task:
+            with self.captureOnCommitCallbacks(execute=True):
+                resp = self._post(body, sign(body))
+        self.assertEqual(resp.status_code, 200)
+        return send_task
+
+    def test_event_is_queued_not_applied(self):
+        send_task = self._receive(subscription_event(self.team, status="active"))
+        self.assertFalse(BillingSubscription.objects.exists())
+        lane = f"team:{self.team.id}"
+        send_task.assert_called_once_with(
+            "process_billing_webhook_events",
+            kwargs={"provider": "paddle", "billable_key": lane},
+        )
+        entry = BillingEventLog.objects.get(provider="paddle", event_id="evt_1")
+        self.assertEqual(entry.billable_key, lane)
+        self.assertEqual(entry.event_type, "subscription.updated")
+        self.assertIsNone(entry.processed_at)
+
+        self.assertEqual(process_billing_webhook_events("paddle", lane), "Applied 1 billing event(s)")
+        entry.refresh_from_db()
+        self.assertIsNotNone(entry.processed_at)
+        sub = BillingSubscription.objects.get(provider_subscription_id="sub_1")
+        self.assertEqual(sub.status, BillingSubscription.STATUS_ACTIVE)
+        # Nothing left in the lane for the tasks queued by later arrivals.
+        self.assertEqual(process_billing_webhook_events("paddle", lane), "Applied 0 billing event(s)")
+
+    def test_lane_is_applied_in_the_order_events_happened(self):
+        self._receive(subscription_event(
+            self.team, status="canceled", event_id="evt_2", occurred_at="2026-01-20T00:00:00Z"
+        ))
+        self._receive(subscription_event(
+            self.team, status="active", event_id="evt_1", occurred_at="2026-01-15T00:00:00Z"
+        ))
+        with patch(
+            "mainapp.billing.paddle.webhooks.apply_subscription_update",
+            wraps=webhooks.apply_subscription_update,
+        ) as apply:
+            process_billing_webhook_events("paddle", f"team:{self.team.id}")
+        self.assertEqual(
+            [call.args[1]["status"] for call in apply.call_args_list],
+            [BillingSubscription.STATUS_ACTIVE, BillingSubscription.STATUS_CANCELED],
+        )
+        sub = BillingSubscription.objects.get(provider_subscription_id="sub_1")
+        self.assertEqual(sub.status, BillingSubscription.STATUS_CANCELED)
+
+    def test_failing_event_holds_the_lane(self):
+        self._receive(subscription_event(self.team, event_id="evt_1"))
+        self._receive(subscription_event(
+            self.team, status="canceled", event_id="evt_2", occurred_at="2026-01-20T00:00:00Z"
+        ))
+        with patch.object(PaddleAdapter, "process_event", side_effect=RuntimeError("boom")):
+            with self.assertRaises(RuntimeError):
+                webhooks.process_queued_events("paddle", f"team:{self.team.id}")
+        self.assertEqual(
+            BillingEventLog.objects.filter(processed_at__isnull=True).count(), 2
+        )
+        self.assertEqual(BillingEventLog.objects.get(event_id="evt_1").attempts, 1)
+
+    @override_settings(SPEEDPY_BILLING_WEBHOOK_MAX_ATTEMPTS=2)
+    def test_event_that_keeps_failing_is_set_aside(self):
+        self._receive(subscription_event(self.team, event_id="evt_1"))
+        self._receive(subscription_event(
+            self.team, status="canceled", event_id="evt_2", occurred_at="2026-01-20T00:00:00Z"
+        ))
+        lane = f"team:{self.team.id}"
+        apply = webhooks.apply_subscription_update
+        calls = []
+
+        def fail_first(provider, data):
+            calls.append(data["status"])
+            if data["status"] == BillingSubscription.STATUS_ACTIVE:
+                raise RuntimeError("boom")
+            return apply(provider, data)
+
+        with patch("mainapp.billing.paddle.webhooks.apply_subscription_update", side_effect=fail_first):
+            with self.assertRaises(RuntimeError):
+                webhooks.process_queued_events("paddle", lane)
+            self.assertEqual(webhooks.process_queued_events("paddle", lane), 1)
+
+        failed = BillingEventLog.objects.get(event_id="evt_1")
+        self.assertIsNotNone(failed.failed_at)
+        self.assertIsNone(failed.processed_at)
+        self.assertEqual(failed.attempts, 2)
+        self.assertIn("boom", failed.last_error)
+        self.assertIsNotNone(BillingEventLog.objects.get(event_id="evt_2").processed_at)
+        sub = BillingSubscription.objects.get(provider_subscription_id="sub_1")
+        self.assertEqual(sub.status, BillingSubscription.STATUS_CANCELED)
+
+    @patch("mainapp.tasks.billing.process_billing_webhook_events.delay")
+    def test_lanes_whose_task_was_lost_are_requeued(self, delay):
+        from mainapp.tasks.billing import requeue_billing_webhook_events
+
+        self._receive(subscription_event(self.team, event_id="evt_1"))
+        other = Team.objects.create(name="Other", slug="other")
+        self._receive(subscription_event(other, event_id="evt_2", sub_id="sub_2"))
+        # Fresh events are left to the task that was queued with them.
+        self.assertEqual(requeue_billing_webhook_events(), "Requeued 0 billing event lane(s)")
+
+        past = timezone.now() - timedelta(minutes=10)
+        BillingEventLog.objects.update(created_at=past, updated_at=past)
+        # A lane with a retry still scheduled is left alone.
+        BillingEventLog.objects.filter(event_id="evt_2").update(attempts=1)
+        self.assertEqual(requeue_billing_webhook_events(), "Requeued 1 billing event lane(s)")
+        delay.assert_called_once_with("paddle", f"team:{self.team.id}")
@@ -3,6 +3,7 @@ webhook signature handling, and account resolution from metadata."""
 
 from unittest.mock import patch
 
+import stripe
 from django.test import TestCase, override_settings
 
 from mainapp.billing.signing import sign_account
@@ -106,10 +107,14 @@ class StripeWebhookProcessingTests(TestCase):
     def test_webhook_verify_parses_valid(self, mock_construct):
         from django.test import RequestFactory
 
-        mock_construct.return_value = {"id": "evt_1", "type": "ping"}
+        mock_construct.return_value = stripe.Event.construct_from(
+            {"id": "evt_1", "type": "ping", "data": {"object": {"metadata": {}}}}, "sk_test"
+        )
         request = RequestFactory().post(
             "/x", data=b"{}", content_type="application/json",
             HTTP_STRIPE_SIGNATURE="t=1,v1=abc",
         )
         event = self.adapter.verify_and_parse_webhook(request)
         self.assertEqual(event["id"], "evt_1")
+        # Plain dicts all the way down, so the view can store it for the worker.
+        self.assertIs(type(event["data"]["object"]), dict)
@@ -0,0 +1,173 @@
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from post_office.models import Email
+from rest_framework.test import APIClient
+
+from mainapp.invitations import invite_many
+from mainapp.models import Team, TeamInvitation, TeamMembership
+from mainapp.models.webhooks import WebhookDelivery, WebhookEndpoint
+from mainapp.tasks.teams import send_team_invitation_emails
+from mainapp.webhooks.events import WebhookEvent
+from speedpycom.services.email_events import suppress
+from usermodel.models import User
+
+
+class BulkInvitationTestBase(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass123", first_name="Olive")
+        self.member = User.objects.create_user(email="member@example.com", password="pass123")
+        self.team = Team.objects.create(name="Acme", slug="acme")
+        TeamMembership.objects.create(team=self.team, user=self.owner, role="owner")
+        TeamMembership.objects.create(team=self.team, user=self.member, role="member")
+        TeamInvitation.objects.create(
+            team=self.team, invited_by=self.owner, email="pending@example.com", role="member"
+        )
+        for i in range(2):
+            WebhookEndpoint.objects.create(
+                team=self.team,
+                name=f"Hook {i}",
+                url=f"https://hooks.example.com/{i}",
+                events=[WebhookEvent.TEAM_INVITATION_CREATED],
+            )
+
+
+@patch("mainapp.tasks.webhooks.deliver_webhook.delay")
+class InviteManyTests(BulkInvitationTestBase):
+    def test_screens_every_address_in_one_pass(self, _deliver):
+        suppress("bounced@example.com", "hard_bounce")
+        result = invite_many(
+            self.team,
+            self.owner,
+            [
+                "New@Example.com",
+                "new@example.com",
+                "not-an-email",
+                "someone@mailinator.com",
+                "bounced@example.com",
+                "member@example.com",
+                "pending@example.com",
+                "other@example.com",
+            ],
+            role="viewer",
+        )
+        self.assertEqual([inv.email for inv in result.invitations], ["new@example.com", "other@example.com"])
+        self.assertEqual(
+            result.skipped,
+            [
+                ("new@example.com", "duplicate"),
+                ("not-an-email", "invalid"),
+                ("someone@mailinator.com", "not_accepted"),
+                ("bounced@example.com", "undeliverable"),
+                ("member@example.com", "already_member"),
+                ("pending@example.com", "already_invited"),
+            ],
+        )
+
+    def test_bulk_rows_match_single_invitations(self, _deliver):
+        existing = User.objects.create_user(email="existing@example.com")
+        result = invite_many(self.team, self.owner, ["existing@example.com", "fresh@example.com"], role="member")
+        for invitation in TeamInvitation.objects.filter(pk__in=[inv.pk for inv in result.invitations]):
+            self.assertEqual(invitation.status, "pending")
+            self.assertTrue(invitation.token)
+            self.assertTrue(invitation.is_valid())
+        self.assertEqual(TeamInvitation.objects.get(email="existing@example.com").user, existing)
+        self.assertIsNone(TeamInvitation.objects.get(email="fresh@example.com").user)
+
+    def test_one_webhook_fan_out_for_the_batch(self, _deliver):
+        emails = [f"hire{i}@example.com" for i in range(10)]
+        with self.assertNumQueries(9):
+            result = invite_many(self.team, self.owner, emails, role="member")
+        deliveries = WebhookDelivery.objects.filter(event_type=WebhookEvent.TEAM_INVITATION_CREATED)
+        self.assertEqual(deliveries.count(), 10 * 2)
+        invitation_ids = {d.payload["data"]["invitation_id"] for d in deliveries}
+        self.assertEqual(invitation_ids, {str(inv.pk) for inv in result.invitations})
+
+    @override_settings(SPEEDPY_TEAM_INVITATION_EMAIL_CHUNK_SIZE=4)
+    @patch("mainapp.invitations.current_app.send_task")
+    def test_emails_are_queued_in_chunks_after_commit(self, send_task, _deliver):
+        with self.captureOnCommitCallbacks(execute=True):
+            result = invite_many(self.team, self.owner, [f"hire{i}@example.com" for i in range(10)], role="member")
+        self.assertEqual(send_task.call_count, 3)
+        queued = [pk for call in send_task.call_args_list for pk in call.kwargs["kwargs"]["invitation_ids"]]
+        self.assertEqual(queued, [inv.pk for inv in result.invitations])
+        self.assertEqual({call.args[0] for call in send_task.call_args_list}, {"send_team_invitation_emails"})
+
+    def test_email_task_queues_one_email_per_invitation(self, _deliver):
+        result = invite_many(self.team, self.owner, ["a@example.com", "b@example.com"], role="member")
+        with self.assertNumQueries(2):
+            send_team_invitation_emails([inv.pk for inv in result.invitations])
+        emails = Email.objects.order_by("to")
+        self.assertEqual([email.to for email in emails], [["a@example.com"], ["b@example.com"]])
+        for email, invitation in zip(emails, sorted(result.invitations, key=lambda inv: inv.email)):
+            self.assertIn(invitation.token, email.html_message)
+            self.assertIn("Acme", email.subject)
+            # Already rendered; storing the context too would only bloat the row.
+            self.assertFalse(email.context)
+
+
+@patch("mainapp.tasks.webhooks.deliver_webhook.delay")
+@patch("mainapp.invitations.current_app.send_task")
+class BulkInvitationAPITests(BulkInvitationTestBase):
+    def setUp(self):
+        super().setUp()
+        self.client = APIClient()
+        self.url = f"/api/v1/teams/{self.team.pk}/invitations/bulk/"
+
+    def test_creates_and_reports_skipped(self, _send_task, _deliver):
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(
+            self.url,
+            {"emails": ["a@example.com", "member@example.com"], "role": "admin"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([row["email"] for row in response.data["created"]], ["a@example.com"])
+        self.assertEqual(response.data["skipped"][0]["reason"], "already_member")
+        self.assertEqual(response.data["skipped"][0]["detail"], "Already a member of the team.")
+
+    def test_members_cannot_bulk_invite(self, _send_task, _deliver):
+        self.client.force_authenticate(user=self.member)
+        response = self.client.post(self.url, {"emails": ["a@example.com"], "role": "member"}, format="json")
+        self.assertEqual(response.status_code, 403)
+        self.assertFalse(TeamInvitation.objects.filter(email="a@example.com").exists())
+
+    @override_settings(SPEEDPY_TEAM_BULK_INVITATION_MAX=2)
+    def test_rejects_oversized_batches(self, _send_task, _deliver):
+        self.client.force_authenticate(user=self.owner)
+        response = self.client.post(
+            self.url, {"emails": ["a@example.com", "b@example.com", "c@example.com"], "role": "member"}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("emails", response.data)
+
+
+@patch("mainapp.tasks.webhooks.deliver_webhook.delay")
+@patch("mainapp.invitations.current_app.send_task")
+class BulkInviteMemberViewTests(BulkInvitationTestBase):
+    def test_form_invites_the_list_and_reports_skipped(self, _send_task, _deliver):
+        self.client.force_login(self.owner)
+        response = self.client.post(
+            f"/teams/{self.team.pk}/members/invite/bulk/",
+            {"emails": "a@example.com, b@example.com\nmember@example.com", "role": "member"},
+            follow=True,
+        )
+        self.assertRedirects(response, f"/teams/{self.team.pk}/members/")
+        self.assertEqual(
+            set(TeamInvitation.objects.filter(email__in=["a@example.com", "b@example.com"]).values_list("email", flat=True)),
+            {"a@example.com", "b@example.com"},
+        )
+        messages = [str(m) for m in response.context["messages"]]
+        self.assertIn("Invitations sent to 2 people", messages)
+        self.assertIn("member@example.com: Already a member of the team.", messages)
+
+    def test_admin_cannot_pick_admin_role(self, _send_task, _deliver):
+        admin = User.objects.create_user(email="admin@example.com", password="pass123")
+        TeamMembership.objects.create(team=self.team, user=admin, role="admin")
+        self.client.force_login(admin)
+        response = self.client.post(
+            f"/teams/{self.team.pk}/members/invite/bulk/",
+            {"emails": "a@example.com", "role": "admin"},
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(TeamInvitation.objects.filter(email="a@example.com").exists())
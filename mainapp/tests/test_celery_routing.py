@@ -0,0 +1,36 @@
+"""
+Tests for the Celery queue topology in ``project/celeryapp.py``.
+"""
+
+from django.test import SimpleTestCase
+
+from project.celeryapp import TASK_QUEUE_ROUTES, app
+
+
+def _queue(task_name):
+    return app.amqp.router.route({}, task_name)["queue"].name
+
+
+class TaskRoutingTests(SimpleTestCase):
+
+    def test_project_tasks_have_dedicated_queues(self):
+        app.loader.import_default_modules()
+        project_tasks = [name for name in app.tasks if not name.startswith("celery.")]
+        unrouted = [name for name in project_tasks if _queue(name) == "default"]
+        self.assertEqual(unrouted, [])
+
+    def test_routes(self):
+        self.assertEqual(_queue("deliver_webhook"), "webhooks")
+        self.assertEqual(_queue("send_team_invitation_email"), "email")
+        self.assertEqual(_queue("post_office.tasks.send_queued_mail"), "email")
+        self.assertEqual(_queue("run_job_chunk"), "jobs")
+        self.assertEqual(_queue("unknown_task"), "default")
+
+    def test_beat_entries_match_task_routes(self):
+        for name, entry in app.conf.beat_schedule.items():
+            with self.subTest(name):
+                self.assertEqual(entry["options"]["queue"], _queue(entry["task"]))
+
+    def test_every_queue_is_declared(self):
+        declared = {queue.name for queue in app.conf.task_queues}
+        self.assertEqual(declared, {"default", *TASK_QUEUE_ROUTES})
@@ -0,0 +1,272 @@
+"""
+Tests for chunked jobs: fan-out, aggregated progress, cancellation and resume.
+"""
+
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from mainapp.jobs import (
+    ChunkedJobType,
+    cancel_job,
+    chunked,
+    events,
+    get_job_type,
+    progress,
+    register_job_type,
+    resume_job,
+    start_job,
+)
+from mainapp.models import AsyncJob, AsyncJobChunk
+from mainapp.tests.test_job_progress import FakeRedis
+from project.celeryapp import app
+from usermodel.models import User
+
+
+@register_job_type
+class CountingJob(ChunkedJobType):
+    """Counts through ``params["sizes"]``; ``params`` can ask it to cancel or fail."""
+
+    job_type = "test_counting"
+    fail_once = set()
+
+    def plan(self, job):
+        return [{"size": size} for size in job.params["sizes"]]
+
+    def units(self, spec):
+        return spec["size"]
+
+    def run_chunk(self, job, spec, ctx):
+        start = ctx.cursor or 0
+        for position in range(start, spec["size"]):
+            if job.params.get("cancel_at") == position:
+                cancel_job(job)
+            ctx.raise_if_cancelled()
+            if (str(job.pk), spec["size"], position) in self.fail_once:
+                self.fail_once.discard((str(job.pk), spec["size"], position))
+                raise RuntimeError("flaky")
+            ctx.advance()
+            ctx.checkpoint(position + 1)
+        return {"counted": spec["size"] - start}
+
+    def finalize(self, job, results):
+        return {"counted": sum(result["counted"] for result in results)}
+
+
+@register_job_type
+class CheckpointEveryTwoJob(ChunkedJobType):
+    """One chunk of five units, checkpointed every second unit; crashes at the fourth until resumed."""
+
+    job_type = "test_checkpoint_every_two"
+
+    def plan(self, job):
+        return [{"size": 5}]
+
+    def units(self, spec):
+        return spec["size"]
+
+    def run_chunk(self, job, spec, ctx):
+        start = ctx.cursor or 0
+        for position in range(start, spec["size"]):
+            if position == 3 and not job.params.get("resumed"):
+                raise RuntimeError("crashed")
+            ctx.advance()
+            if (position + 1) % 2 == 0:
+                ctx.checkpoint(position + 1)
+        return {"counted": spec["size"] - start}
+
+
+@override_settings(SPEEDPY_JOB_CANCEL_CHECK_SECONDS=0)
+class ChunkedJobTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="alice@example.com", password="pass123")
+        eager = app.conf.task_always_eager
+        app.conf.task_always_eager = True
+        self.addCleanup(setattr, app.conf, "task_always_eager", eager)
+        self.redis = FakeRedis()
+        for module in (events, progress):
+            patcher = patch.object(module, "get_client", return_value=self.redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _start(self, **params):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = start_job(self.user, "test_counting", params=params)
+        job.refresh_from_db()
+        return job
+
+    def test_runs_every_chunk_and_combines_results(self):
+        job = self._start(sizes=[3, 4, 5])
+        self.assertEqual(job.status, AsyncJob.Status.SUCCEEDED)
+        self.assertEqual(job.result, {"counted": 12})
+        self.assertEqual((job.progress_current, job.progress_total), (12, 12))
+        self.assertEqual(
+            list(job.chunks.values_list("status", flat=True)),
+            [AsyncJobChunk.Status.SUCCEEDED] * 3,
+        )
+        self.assertIsNone(progress.read_progress(job.pk))
+
+    def test_progress_is_summed_across_chunks(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="test_counting", params={"sizes": [2, 2]})
+        with patch.object(chunked, "finalize"), patch.object(chunked, "_finalize_if_done"):
+            chunked.plan_and_dispatch(job.pk)
+        self.assertEqual(progress.read_progress(job.pk)["progress_current"], 4)
+        job.refresh_from_db()
+        self.assertEqual(job.progress_current, 4)
+
+    @override_settings(SPEEDPY_JOBS_REDIS_URL=None)
+    def test_progress_without_redis(self):
+        with patch.object(progress, "get_client", return_value=None), \
+                patch.object(events, "get_client", return_value=None):
+            job = self._start(sizes=[2, 3])
+        self.assertEqual((job.status, job.progress_current), (AsyncJob.Status.SUCCEEDED, 5))
+
+    def test_cancel_stops_chunks_and_resume_continues_from_checkpoint(self):
+        job = self._start(sizes=[5, 5], cancel_at=2)
+        self.assertEqual(job.status, AsyncJob.Status.CANCELLED)
+        first = job.chunks.get(index=0)
+        self.assertEqual((first.status, first.cursor, first.processed), ("pending", 2, 2))
+        self.assertEqual(job.chunks.get(index=1).processed, 0)
+        self.assertEqual(job.progress_current, 2)
+
+        job.params = {"sizes": [5, 5]}
+        job.save(update_fields=["params", "updated_at"])
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(resume_job(job))
+        job.refresh_from_db()
+        self.assertEqual(job.status, AsyncJob.Status.SUCCEEDED)
+        self.assertEqual(job.result, {"counted": 8})  # chunk 0 resumed at 2
+        self.assertEqual(job.progress_current, 10)
+        self.assertIsNone(job.cancel_requested_at)
+
+    def test_cancel_before_start(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="test_counting", params={"sizes": [1]})
+        self.assertTrue(cancel_job(job))
+        self.assertEqual(job.status, AsyncJob.Status.CANCELLED)
+        self.assertFalse(cancel_job(job))
+
+    def test_failed_chunk_fails_job_and_resume_retries_it(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="test_counting", params={"sizes": [2, 3]})
+        CountingJob.fail_once.add((str(job.pk), 3, 1))
+        with self.captureOnCommitCallbacks(execute=True):
+            chunked._enqueue_start(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, AsyncJob.Status.FAILED)
+        self.assertIn("chunk 1: flaky", job.error)
+        self.assertEqual(job.chunks.get(index=0).status, AsyncJobChunk.Status.SUCCEEDED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            resume_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.error), (AsyncJob.Status.SUCCEEDED, {"counted": 4}, ""))
+
+    def test_chunk_that_is_already_claimed_is_not_run_again(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="test_counting", params={"sizes": [3]})
+        chunk = AsyncJobChunk.objects.create(job=job, index=0, spec={"size": 3}, status=AsyncJobChunk.Status.RUNNING)
+        with patch.object(CountingJob, "run_chunk") as run_chunk:
+            chunked.execute_chunk(job.pk, 0)
+        run_chunk.assert_not_called()
+        chunk.refresh_from_db()
+        self.assertEqual(chunk.status, AsyncJobChunk.Status.RUNNING)
+
+    @override_settings(SPEEDPY_JOB_CHUNK_STALE_SECONDS=60)
+    def test_stale_running_chunk_is_run_again_on_dispatch(self):
+        job = AsyncJob.objects.create(
+            owner=self.user, job_type="test_counting", params={"sizes": [3, 2]}, progress_total=5,
+        )
+        AsyncJobChunk.objects.create(job=job, index=0, spec={"size": 3}, status=AsyncJobChunk.Status.RUNNING,
+                                     cursor=1, processed=1)
+        AsyncJobChunk.objects.create(job=job, index=1, spec={"size": 2}, status=AsyncJobChunk.Status.SUCCEEDED,
+                                     processed=2, result={"counted": 2})
+        AsyncJobChunk.objects.filter(index=0).update(updated_at=timezone.now() - timedelta(minutes=5))
+        chunked.plan_and_dispatch(job.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.result, job.progress_current), (AsyncJob.Status.SUCCEEDED, {"counted": 4}, 5))
+
+    def test_stopped_chunk_keeps_only_checkpointed_progress(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="test_checkpoint_every_two")
+        with self.captureOnCommitCallbacks(execute=True):
+            chunked._enqueue_start(job)
+        chunk = job.chunks.get()
+        # Three units ran, but the cursor only covers two.
+        self.assertEqual((chunk.status, chunk.cursor, chunk.processed), ("failed", 2, 2))
+
+        job.refresh_from_db()
+        job.params = {"resumed": True}
+        job.save(update_fields=["params", "updated_at"])
+        with self.captureOnCommitCallbacks(execute=True):
+            resume_job(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.progress_current), (AsyncJob.Status.SUCCEEDED, 5))
+
+    @override_settings(SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS=3600)
+    def test_progress_is_published_at_most_once_per_flush(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="test_counting", params={"sizes": [50]})
+        AsyncJobChunk.objects.create(job=job, index=0, spec={"size": 50})
+        chunk = job.chunks.get()
+        ctx = chunked.ChunkContext(job, chunk)
+        with patch.object(chunked, "publish_job") as publish:
+            for _ in range(50):
+                ctx.advance()
+            publish.assert_not_called()
+            ctx._flush()
+        publish.assert_called_once()
+
+    def test_resume_rejects_running_job(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="test_counting", status=AsyncJob.Status.RUNNING)
+        self.assertFalse(resume_job(job))
+
+    def test_registry(self):
+        self.assertIsInstance(get_job_type("demo_chunked"), ChunkedJobType)
+        self.assertIsNone(get_job_type("missing"))
+        with self.assertRaises(ValueError):
+            start_job(self.user, "missing")
+        with self.assertRaises(ValueError):
+            register_job_type(type("Nameless", (ChunkedJobType,), {}))
+
+    def test_demo_job_type(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            job = start_job(self.user, "demo_chunked", params={"count": 2500})
+        job.refresh_from_db()
+        self.assertEqual(job.result, {"sum": sum(range(2500))})
+        self.assertEqual(job.chunks.count(), 3)
+
+
+class ChunkedJobAPITests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="alice@example.com", password="pass123")
+        self.client.force_authenticate(user=self.user)
+        self.job = AsyncJob.objects.create(
+            owner=self.user, job_type="test_counting", status=AsyncJob.Status.RUNNING,
+        )
+
+    def test_cancel(self):
+        response = self.client.post(f"/api/v1/jobs/{self.job.pk}/cancel/")
+        self.assertEqual(response.status_code, 202)
+        self.job.refresh_from_db()
+        self.assertIsNotNone(self.job.cancel_requested_at)
+        self.assertEqual(self.client.post(f"/api/v1/jobs/{self.job.pk}/cancel/").status_code, 409)
+
+    def test_resume(self):
+        self.assertEqual(self.client.post(f"/api/v1/jobs/{self.job.pk}/resume/").status_code, 409)
+        AsyncJob.objects.filter(pk=self.job.pk).update(status=AsyncJob.Status.CANCELLED)
+        with patch("mainapp.tasks.jobs.start_chunked_job.delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(f"/api/v1/jobs/{self.job.pk}/resume/")
+        self.assertEqual((response.status_code, response.data["status"]), (202, "queued"))
+        delay.assert_called_once_with(str(self.job.pk))
+
+    def test_non_chunked_job_is_conflict(self):
+        job = AsyncJob.objects.create(owner=self.user, job_type="demo")
+        self.assertEqual(self.client.post(f"/api/v1/jobs/{job.pk}/cancel/").status_code, 409)
+
+    def test_other_users_job_is_404(self):
+        other = User.objects.create_user(email="bob@example.com", password="pass123")
+        job = AsyncJob.objects.create(owner=other, job_type="test_counting")
+        self.assertEqual(self.client.post(f"/api/v1/jobs/{job.pk}/cancel/").status_code, 404)
@@ -0,0 +1,104 @@
+"""
+Tests for the lazy ``sidebar_team`` / ``billing`` context processors.
+"""
+
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.template import Context, RequestContext, Template
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.functional import SimpleLazyObject
+
+from mainapp.billing import state
+from mainapp.models import Team, TeamMembership
+from project import context_processors
+from project.context_processors import (
+    billing,
+    context_value_stats,
+    flush_context_value_stats,
+    reset_context_value_stats,
+    sidebar_team,
+)
+from speedpycom.api import timing
+from usermodel.models import User
+
+
+class LazyContextProcessorTests(TestCase):
+
+    def setUp(self):
+        reset_context_value_stats()
+        self.addCleanup(reset_context_value_stats)
+        for module in (context_processors, timing):
+            patcher = mock.patch.object(module, "get_client", return_value=None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email="owner@example.com", password="pass123")
+        self.team = Team.objects.create(name="Team A", slug="team-a")
+        TeamMembership.objects.create(team=self.team, user=self.user, role="owner")
+        self.request = RequestFactory().get("/")
+        self.request.user = SimpleLazyObject(lambda: User.objects.get(pk=self.user.pk))
+
+    def render(self, source):
+        return Template(source).render(RequestContext(self.request))
+
+    def test_unused_values_cost_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.render("<p>static</p>"), "<p>static</p>")
+        stats = context_value_stats()
+        self.assertEqual(stats["SIDEBAR_TEAM"], {"provided": 1, "evaluated": 0})
+
+    def test_value_evaluated_once_on_use(self):
+        # The session user plus the default-team lookup, however often it is read.
+        with self.assertNumQueries(2):
+            output = self.render("{{ SIDEBAR_TEAM.name }}|{% if SIDEBAR_TEAM %}y{% endif %}")
+        self.assertEqual(output, "Team A|y")
+        self.assertEqual(context_value_stats()["SIDEBAR_TEAM"]["evaluated"], 1)
+
+    def test_memberships_iterable(self):
+        output = self.render(
+            "{% for m in USER_MEMBERSHIPS %}{{ m.team.slug }}{% empty %}none{% endfor %}"
+        )
+        self.assertEqual(output, "team-a")
+
+    def test_anonymous_values_are_empty(self):
+        self.request.user = AnonymousUser()
+        context = sidebar_team(self.request)
+        self.assertFalse(context["SIDEBAR_TEAM"])
+        self.assertEqual(list(context["USER_MEMBERSHIPS"]), [])
+
+    @override_settings(SPEEDPY_BILLING_ENABLED=True)
+    def test_billing_state_lazy(self):
+        context = billing(self.request)
+        self.assertTrue(context["SPEEDPY_BILLING_ENABLED"])
+        self.assertEqual(context_value_stats()["BILLING_STATE"]["evaluated"], 0)
+        output = Template(
+            "{{ BILLING_STATE }}{% if BILLING_OVER_LIMIT %} over{% endif %}"
+        ).render(Context(context))
+        self.assertEqual(output, state.get_billing_state(self.team))
+        self.assertEqual(context_value_stats()["BILLING_STATE"]["evaluated"], 1)
+
+    def test_billing_disabled_is_eager_flag_only(self):
+        self.assertEqual(billing(self.request), {"SPEEDPY_BILLING_ENABLED": False})
+
+    @override_settings(SPEEDPY_METRICS_TOKEN="s3cret")
+    def test_counts_are_served_on_the_metrics_endpoint(self):
+        self.render("{{ SIDEBAR_TEAM.name }}")
+        response = self.client.get("/metrics/http/", HTTP_AUTHORIZATION="Bearer s3cret")
+        body = response.content.decode()
+        self.assertIn('speedpy_template_context_values_provided_total{name="SIDEBAR_TEAM"} 1', body)
+        self.assertIn('speedpy_template_context_values_evaluated_total{name="SIDEBAR_TEAM"} 1', body)
+        self.assertIn('speedpy_template_context_values_evaluated_total{name="USER_MEMBERSHIPS"} 0', body)
+
+    def test_flush_adds_the_counts_to_redis_once(self):
+        self.render("{{ SIDEBAR_TEAM.name }}")
+        client = mock.Mock()
+        context_processors.get_client.return_value = client
+
+        self.assertTrue(flush_context_value_stats())
+        self.assertTrue(flush_context_value_stats())
+
+        pipe = client.pipeline.return_value
+        calls = {call.args[1:] for call in pipe.hincrby.call_args_list}
+        self.assertIn(("SIDEBAR_TEAM\tprovided", 1), calls)
+        self.assertIn(("SIDEBAR_TEAM\tevaluated", 1), calls)
+        pipe.execute.assert_called_once_with()
@@ -0,0 +1,97 @@
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from mainapp.expiry import InvitationExpirySweeper, MembershipExpirySweeper
+from mainapp.models import Team, TeamInvitation, TeamMembership
+from mainapp.tasks.teams import expire_team_memberships, expire_team_memberships_invitations
+from speedpycom.models import SweeperCheckpoint
+from usermodel.models import User
+
+
+class ExpirySweeperTests(TestCase):
+    def setUp(self):
+        self.owner = User.objects.create_user(email="owner@example.com", password="pass123")
+        self.team = Team.objects.create(name="Acme", slug="acme")
+        TeamMembership.objects.create(team=self.team, user=self.owner, role="owner")
+        past = timezone.now() - timedelta(days=1)
+        for i in range(7):
+            user = User.objects.create_user(email=f"contractor{i}@example.com")
+            TeamMembership.objects.create(team=self.team, user=user, role="member", access_expires_at=past)
+        self.current = User.objects.create_user(email="current@example.com")
+        TeamMembership.objects.create(
+            team=self.team, user=self.current, role="member",
+            access_expires_at=timezone.now() + timedelta(days=1),
+        )
+
+    def expired_memberships(self):
+        return TeamMembership.objects.filter(access_expires_at__lt=timezone.now())
+
+    def test_task_deletes_expired_memberships_in_batches(self):
+        with patch.object(MembershipExpirySweeper, "batch_size", 3):
+            result = expire_team_memberships()
+        self.assertEqual(result, "Expired 7 team membership(s)")
+        self.assertFalse(self.expired_memberships().exists())
+        self.assertTrue(TeamMembership.objects.filter(user=self.current).exists())
+        checkpoint = SweeperCheckpoint.objects.get(name="expire_team_memberships")
+        self.assertEqual(checkpoint.position, "")
+        self.assertEqual(checkpoint.last_report["batches"], 3)
+        self.assertTrue(checkpoint.last_report["complete"])
+
+    def test_each_batch_is_one_select_and_one_delete(self):
+        sweeper = MembershipExpirySweeper(batch_size=100)
+        # Checkpoint get_or_create (4 with its savepoint), the batch select,
+        # then audit select, DELETE and checkpoint UPDATE in the batch's
+        # savepoint (5), then the report save.
+        with self.assertNumQueries(11):
+            report = sweeper.run()
+        self.assertEqual(report["processed"], 7)
+
+    def test_time_budget_stops_and_checkpoint_resumes(self):
+        report = MembershipExpirySweeper(batch_size=3, time_budget=0).run()
+        self.assertEqual(report["processed"], 3)
+        self.assertFalse(report["complete"])
+        self.assertEqual(self.expired_memberships().count(), 4)
+        self.assertTrue(SweeperCheckpoint.objects.get(name="expire_team_memberships").position)
+
+        report = MembershipExpirySweeper(batch_size=100).run()
+        self.assertTrue(report["resumed"])
+        self.assertTrue(report["complete"])
+        self.assertEqual(report["processed"], 4)
+        self.assertFalse(self.expired_memberships().exists())
+
+    def test_resumed_run_wraps_round_to_rows_behind_the_checkpoint(self):
+        last = max(self.expired_memberships().values_list("pk", flat=True))
+        SweeperCheckpoint.objects.create(name="expire_team_memberships", position=str(last))
+        report = MembershipExpirySweeper(batch_size=100).run()
+        self.assertEqual(report["processed"], 7)
+        self.assertTrue(report["complete"])
+
+    def test_row_that_stops_matching_is_left_alone(self):
+        sweeper = MembershipExpirySweeper()
+        renewed = self.expired_memberships().first()
+        pks = list(self.expired_memberships().values_list("pk", flat=True))
+        TeamMembership.objects.filter(pk=renewed.pk).update(access_expires_at=None)
+        self.assertEqual(sweeper.process_batch(pks), 6)
+        self.assertTrue(TeamMembership.objects.filter(pk=renewed.pk).exists())
+
+    def test_stale_pending_invitations_are_deleted(self):
+        stale = TeamInvitation.objects.create(team=self.team, invited_by=self.owner, email="a@example.com")
+        accepted = TeamInvitation.objects.create(
+            team=self.team, invited_by=self.owner, email="b@example.com", status="accepted"
+        )
+        fresh = TeamInvitation.objects.create(team=self.team, invited_by=self.owner, email="c@example.com")
+        undated = TeamInvitation.objects.create(team=self.team, invited_by=self.owner, email="d@example.com")
+        past = timezone.now() - timedelta(days=1)
+        TeamInvitation.objects.filter(pk__in=[stale.pk, accepted.pk]).update(expires_at=past)
+        TeamInvitation.objects.filter(pk=fresh.pk).update(expires_at=timezone.now() + timedelta(days=1))
+        TeamInvitation.objects.filter(pk=undated.pk).update(expires_at=None)
+
+        self.assertEqual(expire_team_memberships_invitations(), "Expired 1 team invitation(s)")
+        self.assertEqual(
+            set(TeamInvitation.objects.values_list("email", flat=True)),
+            {"b@example.com", "c@example.com", "d@example.com"},
+        )
+        self.assertEqual(InvitationExpirySweeper().queryset().count(), 0)
@@ -0,0 +1,161 @@
+"""
+Tests for job update publishing and the ``/api/v1/jobs/{id}/events/`` stream.
+"""
+
+import json
+from unittest.mock import MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mainapp.jobs import events
+from mainapp.models import AsyncJob
+from speedpycom.api import codec
+from usermodel.models import PersonalAccessToken, User
+
+
+async def _collect(content):
+    return b"".join([chunk async for chunk in content])
+
+
+def _body(response):
+    if not response.streaming:
+        return response.content.decode()
+    return async_to_sync(_collect)(response.streaming_content).decode()
+
+
+def _payloads(body):
+    return [
+        json.loads(frame.split("data: ", 1)[1])
+        for frame in body.split("\n\n")
+        if frame.startswith("event: job")
+    ]
+
+
+def _frames(response):
+    return _payloads(_body(response))
+
+
+class FakePubSub:
+
+    def __init__(self, messages):
+        self.messages = list(messages)
+        self.channels = []
+        self.closed = False
+
+    async def subscribe(self, channel):
+        self.channels.append(channel)
+
+    async def get_message(self, ignore_subscribe_messages, timeout):
+        if not self.messages:
+            return None
+        return {"type": "message", "data": self.messages.pop(0)}
+
+    async def aclose(self):
+        self.closed = True
+
+
+class FakeAsyncRedis:
+
+    def __init__(self, pubsub):
+        self._pubsub = pubsub
+
+    def pubsub(self):
+        return self._pubsub
+
+    async def aclose(self):
+        pass
+
+
+class PublishJobTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="alice@example.com", password="pass123")
+        self.job = AsyncJob.objects.create(owner=self.user, job_type="demo")
+
+    @override_settings(SPEEDPY_JOBS_REDIS_URL=None)
+    def test_noop_without_redis(self):
+        self.assertFalse(events.publish_job(self.job))
+
+    def test_publishes_status_representation(self):
+        client = MagicMock()
+        with patch.object(events, "get_client", return_value=client):
+            self.assertTrue(events.publish_job(self.job))
+        channel, data = client.publish.call_args.args
+        self.assertEqual(channel, f"speedpy:job:{self.job.pk}:events")
+        self.assertEqual(codec.loads(data)["status"], "queued")
+
+    def test_redis_errors_are_swallowed(self):
+        client = MagicMock()
+        client.publish.side_effect = ConnectionError("down")
+        with patch.object(events, "get_client", return_value=client):
+            self.assertFalse(events.publish_job(self.job))
+
+
+@override_settings(SPEEDPY_JOB_EVENTS_HEARTBEAT_SECONDS=0, SPEEDPY_JOB_EVENTS_POLL_SECONDS=0)
+class JobEventStreamTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="alice@example.com", password="pass123")
+        self.other = User.objects.create_user(email="bob@example.com", password="pass123")
+        self.job = AsyncJob.objects.create(owner=self.user, job_type="demo")
+        self.url = f"/api/v1/jobs/{self.job.pk}/events/"
+
+    def test_anonymous_rejected(self):
+        self.assertIn(self.client.get(self.url).status_code, (401, 403))
+
+    def test_other_users_job_is_404(self):
+        self.client.force_login(self.other)
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    def test_scope_required(self):
+        _, raw = PersonalAccessToken.create_token(self.user, "cli", scopes=["read:profile"])
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {raw}")
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+    def test_terminal_job_sends_one_event(self):
+        AsyncJob.objects.filter(pk=self.job.pk).update(status=AsyncJob.Status.SUCCEEDED)
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertEqual([frame["status"] for frame in _frames(response)], ["succeeded"])
+
+    def _updates(self):
+        running = {**events.job_payload(self.job), "status": "running", "progress_current": 1}
+        done = {**running, "status": "succeeded", "progress_current": 5}
+        return [codec.dumps(running), codec.dumps(done), codec.dumps(running)]
+
+    def test_wsgi_gets_a_snapshot_and_a_retry_hint(self):
+        # The test client is WSGI: no stream, so no worker is held open.
+        self.client.force_login(self.user)
+        with patch.object(events, "get_client") as get_client:
+            response = self.client.get(self.url)
+        get_client.assert_not_called()
+        self.assertFalse(response.streaming)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        self.assertTrue(response.content.startswith(b"retry: 0\n\n"))
+        self.assertEqual([frame["status"] for frame in _frames(response)], ["queued"])
+
+    async def test_relays_published_updates_until_terminal(self):
+        pubsub = FakePubSub(self._updates())
+        await self.async_client.aforce_login(self.user)
+        with patch.object(events, "get_async_client", return_value=FakeAsyncRedis(pubsub)):
+            response = await self.async_client.get(self.url)
+            self.assertTrue(response.is_async)
+            body = (await _collect(response.streaming_content)).decode()
+        self.assertEqual(
+            [(f["status"], f["progress_current"]) for f in _payloads(body)],
+            [("queued", 0), ("running", 1), ("succeeded", 5)],
+        )
+        self.assertEqual(pubsub.channels, [f"speedpy:job:{self.job.pk}:events"])
+        self.assertTrue(pubsub.closed)
+
+    @override_settings(SPEEDPY_JOBS_REDIS_URL=None, SPEEDPY_JOB_EVENTS_MAX_SECONDS=5)
+    async def test_falls_back_to_database_without_redis(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(self.url)
+        await AsyncJob.objects.filter(pk=self.job.pk).aupdate(status=AsyncJob.Status.FAILED)
+        body = (await _collect(response.streaming_content)).decode()
+        self.assertEqual([f["status"] for f in _payloads(body)], ["queued", "failed"])
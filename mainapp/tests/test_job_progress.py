@@ -0,0 +1,131 @@
+"""
+Tests for ``ProgressReporter`` and the live-progress overlay on job status.
+"""
+
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from mainapp.jobs import ProgressReporter, events, progress
+from mainapp.models import AsyncJob
+from usermodel.models import User
+
+
+class FakeRedis:
+    """The handful of Redis commands the job modules use, backed by dicts."""
+
+    def __init__(self):
+        self.hashes = {}
+        self.published = []
+
+    def pipeline(self):
+        return self
+
+    def execute(self):
+        pass
+
+    def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(
+            {field.encode(): str(value).encode() for field, value in mapping.items()}
+        )
+
+    def hincrby(self, key, field, amount):
+        values = self.hashes.setdefault(key, {})
+        total = int(values.get(field.encode(), b"0")) + amount
+        values[field.encode()] = str(total).encode()
+        return total
+
+    def expire(self, key, seconds):
+        pass
+
+    def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def delete(self, key):
+        self.hashes.pop(key, None)
+
+    def publish(self, channel, data):
+        self.published.append((channel, data))
+
+
+class ProgressReporterTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="alice@example.com", password="pass123")
+        self.job = AsyncJob.objects.create(owner=self.user, job_type="import")
+        self.redis = FakeRedis()
+        patcher = patch.object(events, "get_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.object(progress, "get_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_updates_do_not_write_the_row_between_flushes(self):
+        reporter = ProgressReporter(self.job, flush_interval=3600)
+        reporter.start(total=1000, message="Importing")
+        with self.assertNumQueries(0):
+            for index in range(1, 1001):
+                reporter.update(index, message=f"Imported {index}")
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.progress_current, 0)
+        self.assertEqual(progress.read_progress(self.job.pk)["progress_current"], 1000)
+        self.assertEqual(len(self.redis.published), 1001)
+
+    def test_flushes_when_interval_elapsed(self):
+        reporter = ProgressReporter(self.job, flush_interval=0)
+        reporter.start(total=3)
+        with self.assertNumQueries(2):
+            reporter.update(1)
+            reporter.update(2)
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.progress_current, 2)
+
+    def test_checkpoint_and_terminal_state(self):
+        reporter = ProgressReporter(self.job, flush_interval=3600)
+        reporter.start(total=2)
+        reporter.update(1)
+        reporter.checkpoint()
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.progress_current, 1)
+
+        reporter.update(2)
+        reporter.succeed({"ok": True}, message="Done")
+        self.job.refresh_from_db()
+        self.assertEqual(
+            (self.job.status, self.job.progress_current, self.job.result),
+            (AsyncJob.Status.SUCCEEDED, 2, {"ok": True}),
+        )
+        self.assertIsNone(progress.read_progress(self.job.pk))
+
+    def test_fail_records_error(self):
+        reporter = ProgressReporter(self.job)
+        reporter.start()
+        reporter.fail(RuntimeError("boom"), message="Failed")
+        self.job.refresh_from_db()
+        self.assertEqual((self.job.status, self.job.error), (AsyncJob.Status.FAILED, "boom"))
+
+    def test_status_endpoint_shows_live_progress(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f"/api/v1/jobs/{self.job.pk}/"
+        reporter = ProgressReporter(self.job, flush_interval=3600)
+        reporter.start(total=10)
+        etag = client.get(url)["ETag"]
+
+        reporter.update(4, message="Step 4")
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            (response.data["progress_current"], response.data["message"]), (4, "Step 4")
+        )
+        self.assertEqual(AsyncJob.objects.get(pk=self.job.pk).progress_current, 0)
+
+    def test_terminal_row_ignores_stale_hash(self):
+        self.redis.hset(progress.progress_key(self.job.pk), mapping={
+            "progress_current": 9, "progress_total": 9, "message": "stale",
+        })
+        AsyncJob.objects.filter(pk=self.job.pk).update(status=AsyncJob.Status.FAILED)
+        self.job.refresh_from_db()
+        self.assertEqual(progress.apply_progress(self.job).progress_current, 0)
@@ -0,0 +1,116 @@
+"""
+Tests for job results stored as files and ``/api/v1/jobs/{id}/result/``.
+"""
+
+import json
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from mainapp.jobs import ProgressReporter, attach_result_file, events
+from mainapp.models import AsyncJob
+from project.media import PrivateFileSystemStorage
+from usermodel.models import User
+
+
+class SigningStorage(PrivateFileSystemStorage):
+    """Local disk standing in for a signed-URL object storage backend."""
+
+    querystring_auth = True
+
+    def url(self, name, parameters=None):
+        self.last_parameters = parameters
+        return f"https://bucket.example.com/private/{name}?X-Amz-Signature=abc"
+
+
+@override_settings(SPEEDPY_JOBS_REDIS_URL=None, SPEEDPY_JOB_RESULT_INLINE_MAX_BYTES=100)
+class JobResultFileTests(TestCase):
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(email="alice@example.com", password="pass123")
+        self.client.force_authenticate(user=self.user)
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.use_storage(PrivateFileSystemStorage(location=self.root))
+        self.job = AsyncJob.objects.create(owner=self.user, job_type="export")
+
+    def use_storage(self, storage):
+        patcher = patch.object(AsyncJob._meta.get_field("result_file"), "storage", storage)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        return storage
+
+    def test_small_result_stays_inline(self):
+        ProgressReporter(self.job).succeed({"rows": 3})
+        self.job.refresh_from_db()
+        self.assertEqual(self.job.result, {"rows": 3})
+        self.assertFalse(self.job.result_file)
+
+    def test_large_result_is_offloaded_and_status_stays_small(self):
+        rows = [{"id": index, "name": f"row {index}"} for index in range(500)]
+        ProgressReporter(self.job).succeed({"rows": rows})
+        self.job.refresh_from_db()
+        self.assertIsNone(self.job.result)
+        self.assertEqual(self.job.result_content_type, "application/json")
+
+        response = self.client.get(f"/api/v1/jobs/{self.job.pk}/")
+        self.assertLess(len(response.content), 1024)
+        metadata = response.data["result_file"]
+        self.assertEqual(metadata["filename"], "result.json")
+        self.assertEqual(metadata["size"], self.job.result_size)
+        self.assertTrue(metadata["download_url"].endswith(f"/api/v1/jobs/{self.job.pk}/result/"))
+
+        download = self.client.get(metadata["download_url"])
+        self.assertEqual(download.status_code, 200)
+        self.assertEqual(download["Content-Type"], "application/json")
+        self.assertIn("attachment", download["Content-Disposition"])
+        self.assertEqual(
+            json.loads(b"".join(download.streaming_content)), {"rows": rows}
+        )
+
+    def test_attached_file_is_streamed(self):
+        attach_result_file(self.job, b"id,name\n1,a\n", "export.csv", content_type="text/csv")
+        ProgressReporter(self.job).succeed({"rows": 1})
+        response = self.client.get(f"/api/v1/jobs/{self.job.pk}/result/")
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertIn('filename="export.csv"', response["Content-Disposition"])
+        self.assertEqual(b"".join(response.streaming_content), b"id,name\n1,a\n")
+
+    def test_signed_storage_redirects(self):
+        storage = self.use_storage(SigningStorage(location=self.root))
+        self.job = AsyncJob.objects.get(pk=self.job.pk)
+        attach_result_file(self.job, b"{}", "report.json", content_type="application/json")
+        self.job.save()
+        # The job row only; no deferred field loaded on the side.
+        with self.assertNumQueries(1):
+            response = self.client.get(f"/api/v1/jobs/{self.job.pk}/result/")
+        self.assertEqual(response.status_code, 302)
+        self.assertIn("X-Amz-Signature", response["Location"])
+        self.assertEqual(storage.last_parameters["ResponseContentType"], "application/json")
+
+    def test_no_file_or_other_owner_is_404(self):
+        self.assertEqual(self.client.get(f"/api/v1/jobs/{self.job.pk}/result/").status_code, 404)
+        other = User.objects.create_user(email="bob@example.com", password="pass123")
+        attach_result_file(self.job, b"x", "x.bin")
+        self.job.save()
+        self.client.force_authenticate(user=other)
+        self.assertEqual(self.client.get(f"/api/v1/jobs/{self.job.pk}/result/").status_code, 404)
+
+    def test_event_payload_carries_only_metadata(self):
+        attach_result_file(self.job, b"x" * 1000, "big.bin")
+        payload = events.job_payload(self.job)
+        self.assertEqual(payload["result_file"]["size"], 1000)
+        self.assertEqual(payload["result_file"]["download_url"], f"/api/v1/jobs/{self.job.pk}/result/")
+
+    def test_deleting_job_removes_file(self):
+        attach_result_file(self.job, b"x", "x.bin")
+        self.job.save()
+        name = self.job.result_file.name
+        storage = self.job.result_file.storage
+        with self.captureOnCommitCallbacks(execute=True):
+            self.job.delete()
+        self.assertFalse(storage.exists(name))
@@ -0,0 +1,328 @@
+"""
+Query budgets for every API route and the team HTML views.
+
+The fixtures are sized like a real tenant: a team with dozens of members and
+pending invitations, several webhook endpoints with a delivery history, a
+stack of personal access tokens, products and jobs.  Each route is requested
+once and the number of SQL queries it ran is compared with its ceiling in
+``query_budgets.json``.  The counts must not grow with the fixtures, so an
+N+1 introduced anywhere shows up here as an overrun, with the queries listed.
+
+A change that legitimately needs another query raises the route's number in
+``query_budgets.json`` in the same commit.  A new route needs an entry (and a
+case below) before this suite passes.
+"""
+
+import json
+from datetime import timedelta
+from pathlib import Path
+from unittest.mock import patch
+
+from allauth.account.models import EmailAddress
+from django.db import connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, get_resolver
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from demoapp.models import Product
+from mainapp.models import AsyncJob, Team, TeamInvitation, TeamMembership
+from mainapp.models.webhooks import WebhookDelivery, WebhookEndpoint
+from mainapp.webhooks.events import WebhookEvent
+from project import api_urls
+from usermodel.models import PersonalAccessToken, User
+
+BUDGET_FILE = Path(__file__).with_name("query_budgets.json")
+
+MEMBERS = 40
+INVITATIONS = 15
+ENDPOINTS = 8
+DELIVERIES_PER_ENDPOINT = 25
+TOKENS = 12
+PRODUCTS = 30
+JOBS = 10
+# New addresses plus ones the screening skips: a member, a pending invitee.
+BULK_INVITEES = [f"hire{i}@example.com" for i in range(30)] + ["member3@example.com", "invitee2@example.com"]
+
+
+def load_budgets():
+    with BUDGET_FILE.open() as fh:
+        return json.load(fh)
+
+
+def team_view_names():
+    """Names of the team HTML views (``mainapp.urls`` routes under ``teams/``)."""
+    return {
+        pattern.name
+        for pattern in get_resolver().url_patterns
+        if isinstance(pattern, URLPattern)
+        and pattern.name
+        and str(pattern.pattern).startswith("teams/")
+    }
+
+
+def api_route_names():
+    return {pattern.name for pattern in api_urls.urlpatterns}
+
+
+def format_queries(queries):
+    return "\n".join(
+        f"{index}. {query['sql']}" for index, query in enumerate(queries, start=1)
+    )
+
+
+@override_settings(
+    SPEEDPY_API_BATCH_MAX_WORKERS=1,
+    SPEEDPY_SERVER_TIMING_SAMPLE_RATE=0,
+)
+class QueryBudgetTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = User.objects.create_user(email="owner@example.com", password="pass123")
+        EmailAddress.objects.create(user=cls.owner, email=cls.owner.email, verified=True, primary=True)
+        cls.team = Team.objects.create(name="Acme", slug="acme")
+        TeamMembership.objects.create(team=cls.team, user=cls.owner, role="owner")
+
+        roles = ("admin", "member", "viewer")
+        members = User.objects.bulk_create(
+            User(email=f"member{i}@example.com", first_name=f"Member {i}")
+            for i in range(MEMBERS)
+        )
+        TeamMembership.objects.bulk_create(
+            TeamMembership(team=cls.team, user=user, role=roles[i % len(roles)])
+            for i, user in enumerate(members)
+        )
+        cls.member_membership = TeamMembership.objects.get(team=cls.team, user=members[1])
+
+        # The owner also belongs to other teams, as most real accounts do.
+        for i in range(3):
+            other = Team.objects.create(name=f"Side project {i}", slug=f"side-{i}")
+            TeamMembership.objects.create(team=other, user=cls.owner, role="member")
+            TeamMembership.objects.create(team=other, user=members[i], role="owner")
+
+        for i in range(INVITATIONS):
+            TeamInvitation.objects.create(
+                team=cls.team,
+                invited_by=cls.owner,
+                email=f"invitee{i}@example.com",
+                role="member",
+            )
+        cls.invitation = TeamInvitation.objects.filter(team=cls.team).first()
+
+        endpoints = []
+        for i in range(ENDPOINTS):
+            endpoints.append(WebhookEndpoint.objects.create(
+                team=cls.team,
+                name=f"Hook {i}",
+                url=f"https://hooks{i}.example.com/speedpy",
+                events=[WebhookEvent.TEAM_MEMBER_ADDED, WebhookEvent.TEAM_INVITATION_CREATED],
+            ))
+        cls.endpoint = endpoints[0]
+        statuses = (WebhookDelivery.Status.SUCCESS, WebhookDelivery.Status.FAILED)
+        now = timezone.now()
+        WebhookDelivery.objects.bulk_create(
+            WebhookDelivery(
+                endpoint=endpoint,
+                event_id=f"evt_{endpoint.pk.hex}_{i}",
+                event_type=WebhookEvent.TEAM_MEMBER_ADDED,
+                payload={"type": WebhookEvent.TEAM_MEMBER_ADDED, "data": {"n": i}},
+                status=statuses[i % len(statuses)],
+                attempts=1,
+                scheduled_at=now - timedelta(minutes=i),
+            )
+            for endpoint in endpoints
+            for i in range(DELIVERIES_PER_ENDPOINT)
+        )
+        cls.delivery = WebhookDelivery.objects.filter(
+            endpoint=cls.endpoint, status=WebhookDelivery.Status.FAILED
+        ).first()
+
+        for i in range(TOKENS - 1):
+            PersonalAccessToken.create_token(cls.owner, f"CI token {i}", scopes=["read:teams"])
+        _, cls.raw_token = PersonalAccessToken.create_token(cls.owner, "Budget harness")
+
+        Product.objects.bulk_create(
+            Product(name=f"Product {i}", sku=f"SKU-{i}", price=10 + i)
+            for i in range(PRODUCTS)
+        )
+        cls.product = Product.objects.first()
+
+        for i in range(JOBS):
+            AsyncJob.objects.create(owner=cls.owner, job_type="demo")
+        cls.job = AsyncJob.objects.create(
+            owner=cls.owner, job_type="demo", status=AsyncJob.Status.SUCCEEDED
+        )
+        cls.failed_job = AsyncJob.objects.create(
+            owner=cls.owner, job_type="demo", status=AsyncJob.Status.FAILED
+        )
+
+    def setUp(self):
+        self.budgets = load_budgets()
+        patcher = patch("mainapp.tasks.webhooks.deliver_webhook.delay")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    # -- cases ---------------------------------------------------------------
+
+    def api_cases(self):
+        team = f"/api/v1/teams/{self.team.pk}"
+        hook = f"{team}/webhooks/{self.endpoint.pk}"
+        delivery = f"{hook}/deliveries/{self.delivery.pk}"
+        job = f"/api/v1/jobs/{self.job.pk}"
+        refresh = str(RefreshToken.for_user(self.owner))
+        # (budget key, method, path, body, expected status, authenticated)
+        return [
+            ("GET api:health_check", "get", "/api/v1/health/", None, 200, False),
+            ("GET api:integration_manifest", "get", "/api/v1/health/manifest/", None, 200, False),
+            (
+                "POST api:token_obtain", "post", "/api/auth/token/",
+                {"email": "owner@example.com", "password": "pass123"}, 200, False,
+            ),
+            ("POST api:token_refresh", "post", "/api/auth/token/refresh/", {"refresh": refresh}, 200, False),
+            ("POST api:token_revoke", "post", "/api/auth/token/revoke/", {"refresh": refresh}, 205, False),
+            (
+                "POST api:batch", "post", "/api/v1/batch/",
+                {"requests": [
+                    {"method": "GET", "path": "/api/v1/me/"},
+                    {"method": "GET", "path": "/api/v1/teams/"},
+                    {"method": "GET", "path": f"{team}/members/"},
+                ]},
+                200, True,
+            ),
+            ("GET api:current_user", "get", "/api/v1/me/", None, 200, True),
+            ("GET api:access_log_export", "get", "/api/v1/me/access-logs/export/", None, 200, True),
+            ("PATCH api:current_user", "patch", "/api/v1/me/", {"first_name": "Olive"}, 200, True),
+            ("GET api:product_list", "get", "/api/v1/products/", None, 200, True),
+            ("GET api:product_detail", "get", f"/api/v1/products/{self.product.pk}/", None, 200, True),
+            ("GET api:team_list", "get", "/api/v1/teams/", None, 200, True),
+            ("GET api:team_detail", "get", f"{team}/", None, 200, True),
+            ("GET api:team_members", "get", f"{team}/members/", None, 200, True),
+            ("GET api:team_members_export", "get", f"{team}/members/export/?format=csv", None, 200, True),
+            (
+                "POST api:team_invitation_create", "post", f"{team}/invitations/",
+                {"email": "new-hire@example.com", "role": "member"}, 201, True,
+            ),
+            (
+                "POST api:team_invitation_bulk_create", "post", f"{team}/invitations/bulk/",
+                {"emails": BULK_INVITEES, "role": "member"}, 201, True,
+            ),
+            ("POST api:demo_job_create", "post", "/api/v1/jobs/demo/", {}, 202, True),
+            ("GET api:job_status", "get", f"{job}/", None, 200, True),
+            ("GET api:job_events", "get", f"{job}/events/", None, 200, True),
+            ("GET api:job_result", "get", f"{job}/result/", None, 404, True),
+            ("POST api:job_cancel", "post", f"/api/v1/jobs/{self.job.pk}/cancel/", {}, 409, True),
+            ("POST api:job_resume", "post", f"/api/v1/jobs/{self.failed_job.pk}/resume/", {}, 409, True),
+            ("GET api:webhook_list_user", "get", "/api/v1/webhooks/", None, 200, True),
+            ("GET api:webhook_list", "get", f"{team}/webhooks/", None, 200, True),
+            (
+                "POST api:webhook_list", "post", f"{team}/webhooks/",
+                {"url": "https://new.example.com/hook", "events": [WebhookEvent.TEAM_MEMBER_ADDED]},
+                201, True,
+            ),
+            ("GET api:webhook_detail", "get", f"{hook}/", None, 200, True),
+            ("PATCH api:webhook_detail", "patch", f"{hook}/", {"name": "Renamed"}, 200, True),
+            ("DELETE api:webhook_detail", "delete", f"{hook}/", None, 204, True),
+            ("POST api:webhook_rotate_secret", "post", f"{hook}/rotate-secret/", {}, 200, True),
+            ("POST api:webhook_test", "post", f"{hook}/test/", {}, 201, True),
+            ("GET api:webhook_delivery_list", "get", f"{hook}/deliveries/", None, 200, True),
+            ("GET api:webhook_delivery_export", "get", f"{team}/webhooks/deliveries/export/", None, 200, True),
+            ("GET api:webhook_delivery_detail", "get", f"{delivery}/", None, 200, True),
+            ("POST api:webhook_delivery_retry", "post", f"{delivery}/retry/", {}, 200, True),
+        ]
+
+    def html_cases(self):
+        team = f"/teams/{self.team.pk}"
+        hook = f"{team}/webhooks/{self.endpoint.pk}"
+        member = f"{team}/members/{self.member_membership.pk}"
+        token = self.invitation.token
+        # (budget key, method, path, form data, expected status)
+        return [
+            ("GET team_create", "get", "/teams/create/", None, 200),
+            ("GET team_dashboard", "get", f"{team}/dashboard/", None, 200),
+            ("GET team_settings", "get", f"{team}/settings/", None, 200),
+            ("POST team_delete", "post", f"{team}/delete/", {}, 302),
+            ("POST team_delete_cancel", "post", f"{team}/delete/cancel/", {}, 302),
+            ("GET team_members", "get", f"{team}/members/", None, 200),
+            ("GET invite_member", "get", f"{team}/members/invite/", None, 200),
+            (
+                "POST invite_member", "post", f"{team}/members/invite/",
+                {"email": "new-hire@example.com", "role": "member"}, 302,
+            ),
+            ("GET bulk_invite_member", "get", f"{team}/members/invite/bulk/", None, 200),
+            (
+                "POST bulk_invite_member", "post", f"{team}/members/invite/bulk/",
+                {"emails": "\n".join(BULK_INVITEES), "role": "member"}, 302,
+            ),
+            ("GET update_member_role", "get", f"{member}/update-role/", None, 200),
+            ("POST update_member_role", "post", f"{member}/update-role/", {"role": "viewer"}, 302),
+            ("POST remove_member", "post", f"{member}/remove/", {}, 302),
+            ("GET accept_invitation", "get", f"/teams/invitations/{token}/accept/", None, 200),
+            ("POST decline_invitation", "post", f"/teams/invitations/{token}/decline/", {}, 302),
+            (
+                "POST revoke_invitation", "post",
+                f"{team}/invitations/{self.invitation.pk}/revoke/", {}, 302,
+            ),
+            ("GET team_webhooks", "get", f"{team}/webhooks/", None, 200),
+            ("GET team_webhook_create", "get", f"{team}/webhooks/create/", None, 200),
+            ("GET team_webhook_detail", "get", f"{hook}/", None, 200),
+            ("POST team_webhook_revoke", "post", f"{hook}/revoke/", {}, 302),
+            ("POST team_webhook_test", "post", f"{hook}/test/", {}, 302),
+            ("POST team_webhook_rotate_secret", "post", f"{hook}/rotate-secret/", {}, 302),
+        ]
+
+    # -- harness -------------------------------------------------------------
+
+    def measure(self, client, method, path, data, **extra):
+        """Run one request and roll its writes back, so cases stay independent."""
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as ctx:
+                response = getattr(client, method)(path, data, **extra)
+                if response.streaming and not response.is_async:
+                    # Exports query while their body is consumed; the job
+                    # event stream (async) is budgeted up to its first byte.
+                    b"".join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response, ctx.captured_queries
+
+    def check(self, key, response, queries, expected_status):
+        self.assertEqual(
+            response.status_code,
+            expected_status,
+            f"{key}: unexpected status {response.status_code}, so its query count is meaningless",
+        )
+        budget = self.budgets.get(key)
+        self.assertIsNotNone(budget, f"{key} has no entry in {BUDGET_FILE.name}")
+        if len(queries) > budget:
+            self.fail(
+                f"{key} ran {len(queries)} queries, over its budget of {budget}:\n"
+                f"{format_queries(queries)}"
+            )
+
+    def test_api_routes(self):
+        for key, method, path, data, expected_status, authenticated in self.api_cases():
+            with self.subTest(key):
+                client = APIClient()
+                extra = {}
+                if authenticated:
+                    extra["HTTP_AUTHORIZATION"] = f"Bearer {self.raw_token}"
+                response, queries = self.measure(client, method, path, data, format="json", **extra)
+                self.check(key, response, queries, expected_status)
+
+    def test_team_views(self):
+        self.client.force_login(self.owner)
+        for key, method, path, data, expected_status in self.html_cases():
+            with self.subTest(key):
+                response, queries = self.measure(self.client, method, path, data)
+                self.check(key, response, queries, expected_status)
+
+    def test_every_route_has_a_budget_and_a_case(self):
+        budgeted = {key.split(" ", 1)[1] for key in self.budgets}
+        routes = {f"api:{name}" for name in api_route_names()} | team_view_names()
+        self.assertEqual(sorted(routes - budgeted), [], "routes without a budget")
+
+        cases = {case[0] for case in self.api_cases()} | {case[0] for case in self.html_cases()}
+        self.assertEqual(sorted(set(self.budgets) - cases), [], "budget entries without a case")
+        self.assertEqual(sorted(cases - set(self.budgets)), [], "cases without a budget entry")
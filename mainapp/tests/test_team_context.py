@@ -0,0 +1,183 @@
+"""
+Tests for request-scoped team resolution (``mainapp.team_context``).
+"""
+
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient
+
+from mainapp.expiry import MembershipExpirySweeper
+from mainapp.models import Team, TeamMembership, get_default_team_for_user
+from mainapp.team_context import clear_team_context, team_context
+from usermodel.models import User
+
+
+def _membership_queries(queries):
+    return [q for q in queries if '"mainapp_teammembership"' in q["sql"]]
+
+
+class TeamContextTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="owner@example.com", password="pass123")
+        self.team = Team.objects.create(name="Team A", slug="team-a")
+        self.membership = TeamMembership.objects.create(
+            team=self.team, user=self.user, role="owner"
+        )
+        self.request = RequestFactory().get("/")
+        self.request.user = self.user
+
+    def test_anonymous_has_no_context(self):
+        from django.contrib.auth.models import AnonymousUser
+
+        self.request.user = AnonymousUser()
+        self.assertIsNone(team_context(self.request))
+
+    def test_shared_between_django_and_drf_requests(self):
+        ctx = team_context(self.request)
+        self.assertIs(team_context(Request(self.request)), ctx)
+        clear_team_context(self.request)
+        self.assertIsNot(team_context(self.request), ctx)
+
+    def test_membership_is_memoized(self):
+        ctx = team_context(self.request)
+        with self.assertNumQueries(1):
+            self.assertEqual(ctx.membership(self.team.id), self.membership)
+            self.assertEqual(ctx.membership(str(self.team.id)).team, self.team)
+
+    def test_membership_ignores_inactive_team(self):
+        Team.objects.filter(pk=self.team.pk).update(is_active=False)
+        self.assertIsNone(team_context(self.request).membership(self.team.id))
+
+    def test_default_team_matches_helper(self):
+        expired = Team.objects.create(name="Expired", slug="expired")
+        TeamMembership.objects.create(
+            team=expired, user=self.user, role="admin",
+            access_expires_at=timezone.now() - timedelta(days=1),
+        )
+        ctx = team_context(self.request)
+        self.assertEqual(ctx.default_team, get_default_team_for_user(self.user))
+        with self.assertNumQueries(0):
+            ctx.membership(self.team.id)
+            self.assertEqual(ctx.billable, self.team)
+
+    def test_default_team_none_without_membership(self):
+        self.membership.delete()
+        self.assertIsNone(team_context(self.request).default_team)
+
+    def test_context_rebuilt_when_user_changes(self):
+        ctx = team_context(self.request)
+        self.request.user = User.objects.create_user(email="other@example.com", password="x")
+        self.assertIsNot(team_context(self.request), ctx)
+
+
+class TeamContextQueryCountTests(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(email="owner@example.com", password="pass123")
+        self.teams = [
+            Team.objects.create(name=f"Team {i}", slug=f"team-{i}") for i in range(3)
+        ]
+        for team in self.teams:
+            TeamMembership.objects.create(team=team, user=self.user, role="owner")
+
+    def test_team_dashboard_membership_queries(self):
+        self.client.force_login(self.user)
+        url = reverse("team_dashboard", kwargs={"team_id": self.teams[0].id})
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        # One lookup for the view's membership, one for the default team and
+        # one for the team selector, however many teams the user is in.
+        self.assertLessEqual(len(_membership_queries(ctx.captured_queries)), 3)
+        for team in self.teams:
+            self.assertContains(response, team.name)
+
+    def test_api_membership_lookup_is_memoized(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(f"/api/v1/teams/{self.teams[0].id}/members/")
+        self.assertEqual(response.status_code, 200)
+        lookups = [
+            q for q in _membership_queries(ctx.captured_queries)
+            if "COUNT" not in q["sql"] and '"mainapp_team"."is_active"' in q["sql"]
+        ]
+        self.assertEqual(len(lookups), 1)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class DefaultTeamCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="owner@example.com", password="pass123")
+        self.team_a = Team.objects.create(name="Team A", slug="team-a")
+        self.team_b = Team.objects.create(name="Team B", slug="team-b")
+        self.membership = TeamMembership.objects.create(team=self.team_a, user=self.user, role="member")
+
+    def test_second_lookup_skips_the_membership_query(self):
+        self.assertEqual(get_default_team_for_user(self.user), self.team_a)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(get_default_team_for_user(self.user), self.team_a)
+        self.assertEqual(len(ctx.captured_queries), 1)
+        self.assertEqual(_membership_queries(ctx.captured_queries), [])
+
+    def test_no_team_is_cached_too(self):
+        other = User.objects.create_user(email="loner@example.com")
+        self.assertIsNone(get_default_team_for_user(other))
+        with self.assertNumQueries(0):
+            self.assertIsNone(get_default_team_for_user(other))
+
+    def test_context_reuses_a_membership_it_already_loaded(self):
+        get_default_team_for_user(self.user)
+        request = RequestFactory().get("/")
+        request.user = self.user
+        ctx = team_context(request)
+        ctx.membership(self.team_a.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(ctx.default_team, self.team_a)
+
+    def test_new_membership_and_role_change_invalidate(self):
+        get_default_team_for_user(self.user)
+        admin = TeamMembership.objects.create(team=self.team_b, user=self.user, role="admin")
+        self.assertEqual(get_default_team_for_user(self.user), self.team_b)
+
+        admin.role = "viewer"
+        admin.save()
+        self.assertEqual(get_default_team_for_user(self.user), self.team_a)
+
+    def test_removed_membership_invalidates(self):
+        get_default_team_for_user(self.user)
+        self.membership.delete()
+        self.assertIsNone(get_default_team_for_user(self.user))
+
+    def test_deactivated_team_invalidates(self):
+        get_default_team_for_user(self.user)
+        self.team_a.is_active = False
+        self.team_a.save()
+        self.assertIsNone(get_default_team_for_user(self.user))
+
+    def test_expiry_sweep_invalidates(self):
+        TeamMembership.objects.create(team=self.team_b, user=self.user, role="viewer")
+        self.assertEqual(get_default_team_for_user(self.user), self.team_a)
+        TeamMembership.objects.filter(pk=self.membership.pk).update(
+            access_expires_at=timezone.now() - timedelta(minutes=1)
+        )
+        MembershipExpirySweeper().run()
+        self.assertEqual(get_default_team_for_user(self.user), self.team_b)
+
+    def test_stale_entry_does_not_grant_access(self):
+        get_default_team_for_user(self.user)
+        # A bulk delete bypasses every invalidation hook.
+        TeamMembership.objects.filter(pk=self.membership.pk).delete()
+        self.assertEqual(get_default_team_for_user(self.user), self.team_a)
+        self.client.force_login(self.user)
+        response = self.client.get(reverse("team_dashboard", kwargs={"team_id": self.team_a.pk}))
+        self.assertIn(response.status_code, (403, 404))
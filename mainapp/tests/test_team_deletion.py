@@ -17,6 +17,8 @@ Three rules are worth stating, because each was a decision:
    outcome that costs the customer real money.
 """
 
+from unittest.mock import patch
+
 from django.test import TestCase, override_settings
 from django.urls import reverse
 from django.utils import timezone
@@ -25,11 +27,18 @@ from mainapp.models import (
     BillingSubscription,
     Team,
     TeamDeletionBlocked,
+    TeamInvitation,
     TeamMembership,
+    WebhookDelivery,
+    WebhookEndpoint,
+    continue_team_teardown,
     finalize_team_deletion,
+    start_team_teardown,
+    team_teardown_stages,
     teams_due_for_deletion,
 )
 from mainapp.tasks.teams import purge_scheduled_team_deletions
+from speedpycom.models import EmailEvent
 from usermodel.models import User
 
 
@@ -43,6 +52,14 @@ def a_member(team, email, role):
     return user
 
 
+def purge_runs_inline():
+    """Run the purge queued by queue_team_purge() in-process instead of on Celery."""
+    return patch.object(
+        purge_scheduled_team_deletions, "delay",
+        side_effect=lambda: purge_scheduled_team_deletions(),
+    )
+
+
 def a_subscription(team, status):
     return BillingSubscription.objects.create(
         billable_type="team",
@@ -59,7 +76,13 @@ class DelayTests(TestCase):
         team = a_team()
         owner = a_member(team, "owner@example.com", "owner")
 
-        self.assertEqual(team.request_deletion(by_user=owner), "deleted")
+        with purge_runs_inline(), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(team.request_deletion(by_user=owner), "deleted")
+            # Only started inside the caller's transaction; the rows go in the
+            # purge task once it commits.
+            started = Team.objects.get(pk=team.pk)
+            self.assertIsNotNone(started.teardown_started_at)
+            self.assertFalse(started.is_active)
         self.assertFalse(Team.objects.filter(pk=team.pk).exists())
 
     @override_settings(
@@ -279,6 +302,99 @@ class PurgeTaskTests(TestCase):
         self.assertTrue(Team.objects.filter(pk=self.team.pk).exists())
 
 
+@override_settings(SPEEDPY_SWEEPER_BATCH_SIZE=4)
+class StagedTeardownTests(TestCase):
+    """A big team is deleted a batch at a time, not in one transaction.
+
+    The collector used to load every membership, endpoint and delivery of the
+    team into memory inside the purge's transaction, holding its locks for as
+    long as that took. Now each batch is its own short transaction, the
+    progress is kept on the team, and a run that runs out of time is resumed.
+    """
+
+    def setUp(self):
+        self.team = a_team()
+        self.owner = a_member(self.team, "owner@example.com", "owner")
+        for i in range(5):
+            a_member(self.team, f"member{i}@example.com", "member")
+            TeamInvitation.objects.create(
+                team=self.team, invited_by=self.owner, email=f"invitee{i}@example.com"
+            )
+        endpoint = WebhookEndpoint.objects.create(
+            team=self.team, name="Hook", url="https://hooks.example.com/a", events=[]
+        )
+        for i in range(9):
+            WebhookDelivery.objects.create(
+                endpoint=endpoint, event_id=f"evt_{i}", event_type="team.updated", payload={}
+            )
+        self.event = EmailEvent.objects.create(
+            provider_message_id="m-1",
+            event_type=EmailEvent.Type.BOUNCE,
+            recipient="owner@example.com",
+            team=self.team,
+            payload={},
+        )
+        self.team.request_deletion(by_user=self.owner)
+        Team.objects.filter(pk=self.team.pk).update(
+            deletion_scheduled_at=timezone.now() - timezone.timedelta(minutes=1)
+        )
+        self.team.refresh_from_db()
+
+    def test_children_come_before_their_parents(self):
+        order = [model for model, _, _ in team_teardown_stages()]
+        self.assertLess(order.index(WebhookDelivery), order.index(WebhookEndpoint))
+        self.assertIn((EmailEvent, "team", "detach"), team_teardown_stages())
+
+    def test_an_exhausted_budget_pauses_and_the_next_call_finishes(self):
+        start_team_teardown(self.team)
+        self.assertFalse(continue_team_teardown(self.team, time_budget=0))
+
+        team = Team.objects.get(pk=self.team.pk)
+        self.assertFalse(team.is_active)
+        self.assertIsNotNone(team.teardown_started_at)
+        # Stopped after the first full batch (a short table may come first).
+        self.assertIn(4, team.teardown_progress.values())
+        self.assertLessEqual(max(team.teardown_progress.values()), 4)
+        # Too late to undo once rows are going.
+        self.assertFalse(team.cancel_scheduled_deletion(by_user=self.owner))
+
+        self.assertTrue(continue_team_teardown(team))
+        self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+        self.assertFalse(WebhookDelivery.objects.exists())
+        self.assertFalse(TeamInvitation.objects.exists())
+        self.event.refresh_from_db()
+        self.assertIsNone(self.event.team_id)
+
+    def test_a_subscription_that_returns_mid_teardown_keeps_the_team_row(self):
+        start_team_teardown(self.team)
+        continue_team_teardown(self.team, time_budget=0)
+        a_subscription(self.team, BillingSubscription.STATUS_ACTIVE)
+
+        with self.assertRaises(TeamDeletionBlocked):
+            continue_team_teardown(Team.objects.get(pk=self.team.pk))
+
+        team = Team.objects.get(pk=self.team.pk)
+        self.assertTrue(team.is_deletion_scheduled)
+        self.assertFalse(TeamMembership.objects.filter(team=team).exists())
+
+    def test_the_task_resumes_without_running_the_hooks_again(self):
+        with override_settings(SPEEDPY_SWEEPER_TIME_BUDGET_SECONDS=0):
+            purge_scheduled_team_deletions()
+        self.assertTrue(Team.objects.filter(pk=self.team.pk).exists())
+
+        global _RECORD
+        _RECORD = []
+        with override_settings(
+            SPEEDPY_TEAM_DELETION_CLEANUP_HOOKS=[
+                "mainapp.tests.test_team_deletion.a_hook_that_records"
+            ]
+        ):
+            purge_scheduled_team_deletions()
+
+        self.assertEqual(_RECORD, [])
+        self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+
+
 _RECORD = []
 
 
@@ -372,7 +488,8 @@ class ViewTests(TestCase):
     def test_with_no_delay_the_button_deletes(self):
         self.client.force_login(self.owner)
 
-        self.client.post(self.url)
+        with purge_runs_inline(), self.captureOnCommitCallbacks(execute=True):
+            self.client.post(self.url)
 
         self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
 
@@ -555,5 +672,44 @@ class ImmediateDeletionIsStillDurableTests(TestCase):
         self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
 
     def test_a_happy_path_still_deletes_at_once(self):
-        self.assertEqual(self.team.request_deletion(by_user=self.owner), "deleted")
+        with purge_runs_inline(), self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(self.team.request_deletion(by_user=self.owner), "deleted")
         self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+
+
+class AdminDeletionTests(TestCase):
+    """Staff deletion starts the teardown and leaves the rows to the purge task."""
+
+    def setUp(self):
+        self.team = a_team()
+        self.owner = a_member(self.team, "owner@example.com", "owner")
+        self.staff = User.objects.create_superuser(email="staff@example.com", password="pass123")
+        self.client.force_login(self.staff)
+        self.url = reverse("admin:mainapp_team_delete", args=[self.team.pk])
+
+    def test_deletes_through_the_purge_task(self):
+        with patch.object(purge_scheduled_team_deletions, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.url, {"post": "yes"})
+
+        delay.assert_called_once_with()
+        team = Team.objects.get(pk=self.team.pk)
+        self.assertFalse(team.is_active)
+        self.assertIsNotNone(team.teardown_started_at)
+        self.assertEqual(team.deletion_requested_by, self.staff)
+        self.assertIn(team, teams_due_for_deletion())
+
+        purge_scheduled_team_deletions()
+        self.assertFalse(Team.objects.filter(pk=self.team.pk).exists())
+
+    def test_a_live_subscription_leaves_the_team_untouched(self):
+        a_subscription(self.team, BillingSubscription.STATUS_ACTIVE)
+
+        with patch.object(purge_scheduled_team_deletions, "delay") as delay:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.client.post(self.url, {"post": "yes"})
+
+        delay.assert_not_called()
+        team = Team.objects.get(pk=self.team.pk)
+        self.assertTrue(team.is_active)
+        self.assertFalse(team.is_deletion_scheduled)
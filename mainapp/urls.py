@@ -37,6 +37,7 @@ if getattr(settings, "SPEEDPY_TEAMS_ENABLED", True):
         # Team member management
         path('teams/<uuid:team_id>/members/', team_members.TeamMembersListView.as_view(), name='team_members'),
         path('teams/<uuid:team_id>/members/invite/', team_members.InviteMemberView.as_view(), name='invite_member'),
+        path('teams/<uuid:team_id>/members/invite/bulk/', team_members.BulkInviteMemberView.as_view(), name='bulk_invite_member'),
         path('teams/<uuid:team_id>/members/<uuid:membership_id>/update-role/', team_members.UpdateMemberRoleView.as_view(), name='update_member_role'),
         path('teams/<uuid:team_id>/members/<uuid:membership_id>/remove/', team_members.RemoveMemberView.as_view(), name='remove_member'),
 
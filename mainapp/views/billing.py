@@ -27,7 +27,6 @@ from django.views.generic import TemplateView
 
 from mainapp.billing import registry, state, webhooks
 from mainapp.billing.base import CheckoutResult
-from mainapp.models import BillingEventLog
 from mainapp.subscription_plans import (
     SUBSCRIPTION_PLANS,
     get_provider_price_id,
@@ -464,9 +463,17 @@ class _ProviderWebhookView(View):
             return HttpResponse(status=403)
 
         event_id = adapter.get_event_id(event)
+        if not event_id:
+            # No id to record it under, so nothing to queue: apply it here.
+            return self._process_inline(adapter, event)
         if webhooks.already_processed(self.provider, event_id):
             return HttpResponse(status=200)
+        # Applied by a worker (see mainapp.billing.webhooks); the provider only
+        # needs to know the event was received.
+        webhooks.queue_event(adapter, event, event_id)
+        return HttpResponse(status=200)
 
+    def _process_inline(self, adapter, event):
         try:
             adapter.process_event(event)
         except Exception as exc:  # pragma: no cover - defensive
@@ -477,16 +484,7 @@ class _ProviderWebhookView(View):
                 error=str(exc),
                 exc_info=True,
             )
-            # Roll back the dedupe marker so the provider's retry reprocesses.
-            if event_id:
-                BillingEventLog.objects.filter(
-                    provider=self.provider, event_id=event_id
-                ).delete()
             return HttpResponse(status=500)
-
-        webhooks.record_event_meta(
-            self.provider, event_id, adapter.get_event_type(event), event if isinstance(event, dict) else {}
-        )
         return HttpResponse(status=200)
 
 
@@ -3,7 +3,7 @@ from django.contrib.auth.mixins import LoginRequiredMixin
 from django.shortcuts import redirect
 from django.views.generic import TemplateView
 
-from mainapp.models import get_default_team_for_user
+from mainapp.team_context import team_context
 from mainapp.views.mixins import TourMixin
 
 
@@ -15,7 +15,7 @@ class DashboardView(TourMixin, LoginRequiredMixin, TemplateView):
         # to their team's dashboard (the first one we find), or to team
         # creation if they don't belong to a team yet.
         if getattr(settings, "SPEEDPY_TEAMS_ENABLED", True):
-            team = get_default_team_for_user(request.user)
+            team = team_context(request).default_team
             if team:
                 return redirect("team_dashboard", team_id=team.pk)
             return redirect("team_create")
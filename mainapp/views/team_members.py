@@ -11,7 +11,8 @@ from django.urls import reverse
 from django.views.generic import ListView, FormView, TemplateView, View
 from django.contrib.auth import get_user_model
 from django.db import transaction
-from mainapp.forms.teams import InviteMemberForm, UpdateMemberRoleForm
+from mainapp.forms.teams import BulkInviteMemberForm, InviteMemberForm, UpdateMemberRoleForm
+from mainapp.invitations import SKIP_MESSAGES, invite_many
 from mainapp.models import TeamMembership, TeamInvitation
 from mainapp.views.teams import TeamViewMixin, TeamAdminRequiredMixin
 
@@ -102,6 +103,45 @@ class InviteMemberView(TeamAdminRequiredMixin, FormView):
         return reverse('team_members', kwargs={'team_id': self.team.pk})
 
 
+class BulkInviteMemberView(TeamAdminRequiredMixin, FormView):
+    """
+    Invite a list of email addresses with one role (owner/admin only).
+
+    Addresses that cannot be invited are reported back, not treated as errors.
+    """
+    template_name = 'mainapp/teams/members/bulk_invite.html'
+    form_class = BulkInviteMemberForm
+
+    def get_form_kwargs(self):
+        kwargs = super().get_form_kwargs()
+        kwargs['team'] = self.team
+        kwargs['inviter_membership'] = self.team_membership
+        return kwargs
+
+    def form_valid(self, form):
+        role = form.cleaned_data['role']
+        if not self.team_membership.can_invite_role(role):
+            messages.error(self.request, f"You don't have permission to invite {role}s")
+            return self.form_invalid(form)
+
+        result = invite_many(
+            self.team,
+            self.request.user,
+            form.cleaned_data['emails'],
+            role=role,
+            message=form.cleaned_data['message'],
+        )
+
+        if result.invitations:
+            messages.success(self.request, f"Invitations sent to {len(result.invitations)} people")
+        for email, reason in result.skipped:
+            messages.warning(self.request, f"{email}: {SKIP_MESSAGES[reason]}")
+        return HttpResponseRedirect(self.get_success_url())
+
+    def get_success_url(self):
+        return reverse('team_members', kwargs={'team_id': self.team.pk})
+
+
 class AcceptInvitationView(LoginRequiredMixin, TemplateView):
     """
     Accept a team invitation via token.
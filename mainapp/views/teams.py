@@ -10,6 +10,7 @@ from django.views.generic import CreateView, UpdateView
 
 from mainapp.forms.teams import TeamCreateForm, TeamSettingsForm
 from mainapp.models import Team, TeamMembership
+from mainapp.team_context import team_context
 
 
 class TeamViewMixin(LoginRequiredMixin):
@@ -96,6 +97,13 @@ class TeamViewMixin(LoginRequiredMixin):
         team_id = kwargs.get('team_id')
         team_slug = kwargs.get('team_slug')
 
+        # A member's team comes with their membership in one (memoized) query;
+        # the lookups below only run for the 404 path and slug URLs.
+        if team_id:
+            membership = team_context(self.request).membership(team_id)
+            if membership is not None:
+                return membership.team
+
         try:
             if team_id:
                 team = Team.objects.get(id=team_id, is_active=True)
@@ -126,9 +134,11 @@ class TeamViewMixin(LoginRequiredMixin):
         Raises:
             Http404: If user is not a member or access has expired.
         """
-        try:
-            membership = TeamMembership.objects.get(team=team, user=user)
-        except TeamMembership.DoesNotExist:
+        if user.pk == self.request.user.pk:
+            membership = team_context(self.request).membership(team.pk)
+        else:
+            membership = TeamMembership.objects.filter(team=team, user=user).first()
+        if membership is None:
             raise Http404("User is not a member of this team")
 
         # Check if access has expired
@@ -8,7 +8,7 @@ so payload shape is defined in one place and tests can assert against a stable A
 
 from django.utils import timezone
 
-from mainapp.webhooks.dispatch import dispatch_event
+from mainapp.webhooks.dispatch import dispatch_event, dispatch_events
 from mainapp.webhooks.events import WebhookEvent
 
 
@@ -32,24 +32,40 @@ def on_team_member_added(membership):
     )
 
 
+def _invitation_data(invitation):
+    return {
+        "team_id": str(invitation.team_id),
+        "invitation_id": str(invitation.id),
+        "email": invitation.email,
+        "user_id": str(invitation.user_id) if invitation.user_id else None,
+        "role": invitation.role,
+        "invited_by_id": str(invitation.invited_by_id),
+        "expires_at": (
+            invitation.expires_at.isoformat()
+            if invitation.expires_at
+            else None
+        ),
+    }
+
+
 def on_team_invitation_created(invitation):
     """Dispatch ``team.invitation.created`` for a newly created TeamInvitation."""
     dispatch_event(
         team=invitation.team,
         event_type=WebhookEvent.TEAM_INVITATION_CREATED,
-        data={
-            "team_id": str(invitation.team_id),
-            "invitation_id": str(invitation.id),
-            "email": invitation.email,
-            "user_id": str(invitation.user_id) if invitation.user_id else None,
-            "role": invitation.role,
-            "invited_by_id": str(invitation.invited_by_id),
-            "expires_at": (
-                invitation.expires_at.isoformat()
-                if invitation.expires_at
-                else None
-            ),
-        },
+        data=_invitation_data(invitation),
+    )
+
+
+def on_team_invitations_created(team, invitations):
+    """Dispatch ``team.invitation.created`` for each of many invitations to ``team``.
+
+    For ``bulk_create``, which sends no ``post_save``: one fan-out for the lot.
+    """
+    dispatch_events(
+        team=team,
+        event_type=WebhookEvent.TEAM_INVITATION_CREATED,
+        data_list=[_invitation_data(invitation) for invitation in invitations],
     )
 
 
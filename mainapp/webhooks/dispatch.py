@@ -15,32 +15,48 @@ def dispatch_event(team, event_type: str, data: dict) -> list[int]:
 
     Returns a list of created ``WebhookDelivery`` PKs.
     """
+    return dispatch_events(team, event_type, [data])
+
+
+def dispatch_events(team, event_type: str, data_list: list[dict]) -> list[int]:
+    """``dispatch_event`` for many events of one type at once.
+
+    One query for the endpoints and one INSERT for every delivery, however
+    many events and endpoints there are; each event still gets its own
+    ``event_id`` and each delivery its own task.
+    """
     from mainapp.tasks.webhooks import deliver_webhook
 
-    endpoints = WebhookEndpoint.objects.filter(team=team, is_active=True)
-    delivery_ids: list[int] = []
-
-    for endpoint in endpoints:
-        if not endpoint.subscribes_to(event_type):
-            continue
-
-        event_id = f"evt_{uuid.uuid4().hex}"
-        payload = {
-            "event_id": event_id,
-            "event_type": event_type,
-            "timestamp": int(time.time()),
-            "api_version": "2026-06-01",
-            "data": data,
-        }
-
-        delivery = WebhookDelivery.objects.create(
-            endpoint=endpoint,
-            event_id=event_id,
-            event_type=event_type,
-            payload=payload,
-        )
+    endpoints = [
+        endpoint
+        for endpoint in WebhookEndpoint.objects.filter(team=team, is_active=True)
+        if endpoint.subscribes_to(event_type)
+    ]
+    deliveries: list[WebhookDelivery] = []
+
+    for data in data_list:
+        for endpoint in endpoints:
+            event_id = f"evt_{uuid.uuid4().hex}"
+            payload = {
+                "event_id": event_id,
+                "event_type": event_type,
+                "timestamp": int(time.time()),
+                "api_version": "2026-06-01",
+                "data": data,
+            }
+            deliveries.append(WebhookDelivery(
+                endpoint=endpoint,
+                event_id=event_id,
+                event_type=event_type,
+                payload=payload,
+            ))
+
+    if not deliveries:
+        return []
+    WebhookDelivery.objects.bulk_create(deliveries, batch_size=500)
+    delivery_ids = [delivery.pk for delivery in deliveries]
+    for pk in delivery_ids:
         # Enqueue after commit so the row is visible to the worker.
-        transaction.on_commit(lambda pk=delivery.pk: deliver_webhook.delay(pk))
-        delivery_ids.append(delivery.pk)
+        transaction.on_commit(lambda pk=pk: deliver_webhook.delay(pk))
 
     return delivery_ids
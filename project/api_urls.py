@@ -1,16 +1,26 @@
 from django.urls import path
 
 # SPEEDPY_DEMO: demo job and product API imports — remove before production
-from mainapp.api.jobs import DemoJobCreateView, JobStatusView
+from mainapp.api.jobs import (
+    DemoJobCreateView,
+    JobCancelView,
+    JobResultView,
+    JobResumeView,
+    JobStatusView,
+    job_events,
+)
 from mainapp.api.products import ProductDetailAPIView, ProductListAPIView
 from mainapp.api.teams import (
     TeamDetailAPIView,
+    TeamInvitationBulkCreateAPIView,
     TeamInvitationCreateAPIView,
     TeamListAPIView,
     TeamMembersAPIView,
+    TeamMembersExportView,
 )
 from mainapp.api.webhooks import (
     TeamWebhookDeliveryDetailView,
+    TeamWebhookDeliveryExportView,
     TeamWebhookDeliveryListView,
     TeamWebhookDeliveryRetryView,
     TeamWebhookEndpointDetailView,
@@ -19,9 +29,11 @@ from mainapp.api.webhooks import (
     TeamWebhookEndpointTestView,
     UserWebhookEndpointListView,
 )
+from speedpycom.api.batch import BatchView
 from speedpycom.api.health import HealthCheckView
 from speedpycom.api.manifest import IntegrationManifestView
 from usermodel.api import (
+    AccessLogExportView,
     CurrentUserAPIView,
     JWTLogoutView,
     TokenObtainView,
@@ -36,21 +48,30 @@ urlpatterns = [
     path("auth/token/", TokenObtainView.as_view(), name="token_obtain"),
     path("auth/token/refresh/", TokenRefreshSchemaView.as_view(), name="token_refresh"),
     path("auth/token/revoke/", JWTLogoutView.as_view(), name="token_revoke"),
+    path("v1/batch/", BatchView.as_view(), name="batch"),
     path("v1/me/", CurrentUserAPIView.as_view(), name="current_user"),
+    path("v1/me/access-logs/export/", AccessLogExportView.as_view(), name="access_log_export"),
     # SPEEDPY_DEMO: demo Product API routes — remove before production
     path("v1/products/", ProductListAPIView.as_view(), name="product_list"),
     path("v1/products/<uuid:pk>/", ProductDetailAPIView.as_view(), name="product_detail"),
     path("v1/teams/", TeamListAPIView.as_view(), name="team_list"),
     path("v1/teams/<uuid:team_id>/", TeamDetailAPIView.as_view(), name="team_detail"),
     path("v1/teams/<uuid:team_id>/members/", TeamMembersAPIView.as_view(), name="team_members"),
+    path("v1/teams/<uuid:team_id>/members/export/", TeamMembersExportView.as_view(), name="team_members_export"),
     path("v1/teams/<uuid:team_id>/invitations/", TeamInvitationCreateAPIView.as_view(), name="team_invitation_create"),
+    path("v1/teams/<uuid:team_id>/invitations/bulk/", TeamInvitationBulkCreateAPIView.as_view(), name="team_invitation_bulk_create"),
     # Jobs
     path("v1/jobs/demo/", DemoJobCreateView.as_view(), name="demo_job_create"),  # SPEEDPY_DEMO: demo job endpoint
     path("v1/jobs/<uuid:job_id>/", JobStatusView.as_view(), name="job_status"),
+    path("v1/jobs/<uuid:job_id>/events/", job_events, name="job_events"),
+    path("v1/jobs/<uuid:job_id>/result/", JobResultView.as_view(), name="job_result"),
+    path("v1/jobs/<uuid:job_id>/cancel/", JobCancelView.as_view(), name="job_cancel"),
+    path("v1/jobs/<uuid:job_id>/resume/", JobResumeView.as_view(), name="job_resume"),
     # Webhooks — user-scoped
     path("v1/webhooks/", UserWebhookEndpointListView.as_view(), name="webhook_list_user"),
     # Webhooks — team-scoped
     path("v1/teams/<uuid:team_id>/webhooks/", TeamWebhookEndpointListCreateView.as_view(), name="webhook_list"),
+    path("v1/teams/<uuid:team_id>/webhooks/deliveries/export/", TeamWebhookDeliveryExportView.as_view(), name="webhook_delivery_export"),
     path("v1/teams/<uuid:team_id>/webhooks/<uuid:webhook_id>/", TeamWebhookEndpointDetailView.as_view(), name="webhook_detail"),
     path("v1/teams/<uuid:team_id>/webhooks/<uuid:webhook_id>/rotate-secret/", TeamWebhookEndpointRotateSecretView.as_view(), name="webhook_rotate_secret"),
     path("v1/teams/<uuid:team_id>/webhooks/<uuid:webhook_id>/test/", TeamWebhookEndpointTestView.as_view(), name="webhook_test"),
@@ -9,6 +9,8 @@ import environ
 from celery.signals import setup_logging
 from django_structlog.celery.steps import DjangoStructLogInitStep
 
+import speedpycom.task_metrics  # noqa: F401  (connects the task telemetry receivers)
+
 env = environ.Env()
 environ.Env.read_env(os.path.join(BASE_DIR, ".env"))
 
@@ -33,10 +35,52 @@ app.conf.task_default_queue = "default"
 # The worker processing the task will be killed and replaced with a new one when this is exceeded.
 # app.conf.task_time_limit = 600
 app.conf.task_create_missing_queues = True
-app.conf.task_queues = (Queue("default"),)
+# Queue topology: one queue per workload, so a burst on one (a webhook fan-out,
+# a large chunked job) never sits in front of another (a password-reset or
+# invitation email). celery-worker.sh runs one worker per queue with its own
+# concurrency and prefetch (CELERY_WORKER_PROFILE), or a single worker that
+# consumes every queue (the default). Tasks not listed here go to "default".
+TASK_QUEUE_ROUTES = {
+    "webhooks": (
+        "deliver_webhook",
+    ),
+    "email": (
+        "send_team_invitation_email",
+        "send_team_invitation_emails",
+        "send_role_change_email",
+        "send_billing_grace_started_email",
+        "send_billing_disabled_email",
+        "post_office.tasks.send_queued_mail",
+    ),
+    "billing": (
+        "process_billing_subscriptions",
+        "process_billing_webhook_events",
+        "requeue_billing_webhook_events",
+    ),
+    "housekeeping": (
+        "expire_team_memberships",
+        "expire_team_memberships_invitations",
+        "purge_scheduled_team_deletions",
+        "purge_unconfirmed_accounts",
+        "purge_expired_idempotency_records",
+        "post_office.tasks.cleanup_mail",
+    ),
+    "jobs": (
+        "run_demo_job",  # SPEEDPY_DEMO: remove before production
+        "start_chunked_job",
+        "run_job_chunk",
+    ),
+}
+app.conf.task_queues = (Queue("default"), *(Queue(name) for name in TASK_QUEUE_ROUTES))
+app.conf.task_routes = {
+    task: {"queue": queue}
+    for queue, tasks in TASK_QUEUE_ROUTES.items()
+    for task in tasks
+}
 app.conf.broker_pool_limit = 1
 app.conf.broker_connection_timeout = 30
-# worker_prefetch_multiplier: appropriate for long running tasks, default is 4
+# worker_prefetch_multiplier: appropriate for long running tasks, default is 4.
+# celery-worker.sh overrides it per queue profile (--prefetch-multiplier).
 app.conf.worker_prefetch_multiplier = 1
 app.conf.redbeat_redis_url = env("REDIS_URL", default=None)
 # https://docs.celeryq.dev/en/stable/userguide/periodic-tasks.html#beat-entries
@@ -74,7 +118,7 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=2, minute=0),  # Run daily at 2:00 AM
         "options": {
             "ignore_result": True,
-            "queue": "default",
+            "queue": "housekeeping",
         },
     },
     "purge-unconfirmed-accounts": {
@@ -84,7 +128,7 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=4, minute=30),
         "options": {
             "ignore_result": True,
-            "queue": "default",
+            "queue": "housekeeping",
         },
     },
     "purge-scheduled-team-deletions": {
@@ -95,7 +139,7 @@ app.conf.beat_schedule = {
         "schedule": crontab(minute=15),
         "options": {
             "ignore_result": True,
-            "queue": "default",
+            "queue": "housekeeping",
         },
     },
     "expire-team-invitations": {
@@ -103,7 +147,26 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=2, minute=30),  # Run daily at 2:30 AM
         "options": {
             "ignore_result": True,
-            "queue": "default",
+            "queue": "housekeeping",
+        },
+    },
+    "purge-expired-idempotency-records": {
+        "task": "purge_expired_idempotency_records",
+        # Hourly keeps each run's batch count small; the TTL is 24h by default.
+        "schedule": crontab(minute=45),
+        "options": {
+            "ignore_result": True,
+            "queue": "housekeeping",
+        },
+    },
+    "requeue-billing-webhook-events": {
+        "task": "requeue_billing_webhook_events",
+        # Picks up webhook events whose processing task was lost; a lane has to
+        # have waited SPEEDPY_BILLING_WEBHOOK_REQUEUE_AFTER_SECONDS first.
+        "schedule": crontab(minute="*/5"),
+        "options": {
+            "ignore_result": True,
+            "queue": "billing",
         },
     },
     "process-billing-subscriptions": {
@@ -111,7 +174,7 @@ app.conf.beat_schedule = {
         "schedule": crontab(hour=3, minute=0),  # Run daily at 3:00 AM
         "options": {
             "ignore_result": True,
-            "queue": "default",
+            "queue": "billing",
         },
     },
 }
@@ -1,4 +1,120 @@
+import threading
+import time
+from collections import Counter
+
+import structlog
 from django.conf import settings
+from django.utils.functional import SimpleLazyObject
+
+from speedpycom.metrics import get_client, label, number
+
+logger = structlog.get_logger(__name__)
+
+#: Redis hash the processes add their counts to (``GET /metrics/http/``).
+CONTEXT_VALUES_KEY = "speedpy:http:context_values"
+
+_stats_lock = threading.Lock()
+_provided = Counter()
+_evaluated = Counter()
+# Counts not yet added to Redis, keyed by (name, "provided" / "evaluated").
+_unflushed = Counter()
+_flushed_at = time.monotonic()
+
+
+def _lazy(name, func):
+    """Defer ``func`` until a template first reads the value, then cache it.
+
+    Context processors run for every ``RequestContext`` — partials, emails
+    rendered with a request, pages without a sidebar — so anything that costs
+    a query is wrapped here and only paid for when a template touches it.
+    Each wrapper counts towards ``context_value_stats()`` and the
+    ``speedpy_template_context_values_*`` series on ``/metrics/http/``.
+    """
+    with _stats_lock:
+        _provided[name] += 1
+        _unflushed[(name, "provided")] += 1
+    if time.monotonic() - _flushed_at >= getattr(settings, "SPEEDPY_HTTP_METRICS_FLUSH_SECONDS", 10):
+        flush_context_value_stats()
+
+    def evaluate():
+        started = time.perf_counter()
+        value = func()
+        with _stats_lock:
+            _evaluated[name] += 1
+            _unflushed[(name, "evaluated")] += 1
+        logger.debug(
+            "context_value_evaluated",
+            name=name,
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        return value
+
+    return SimpleLazyObject(evaluate)
+
+
+def context_value_stats():
+    """How often each lazy context value was provided vs. actually evaluated."""
+    with _stats_lock:
+        return {
+            name: {"provided": _provided[name], "evaluated": _evaluated[name]}
+            for name in _provided
+        }
+
+
+def reset_context_value_stats():
+    with _stats_lock:
+        _provided.clear()
+        _evaluated.clear()
+        _unflushed.clear()
+
+
+def flush_context_value_stats():
+    """Add this process's counts to Redis. Returns True if sent."""
+    global _flushed_at
+    client = get_client()
+    if client is None:
+        return False
+    with _stats_lock:
+        pending = dict(_unflushed)
+        _unflushed.clear()
+        _flushed_at = time.monotonic()
+    if not pending:
+        return True
+    try:
+        pipe = client.pipeline(transaction=False)
+        for (name, kind), count in pending.items():
+            pipe.hincrby(CONTEXT_VALUES_KEY, f"{name}\t{kind}", count)
+        pipe.execute()
+    except Exception:
+        logger.warning("context_value_stats_flush_failed", exc_info=True)
+        return False
+    return True
+
+
+def render_context_value_metrics():
+    """Provided / evaluated counts per lazy value, as Prometheus text."""
+    with _stats_lock:
+        totals = Counter(_unflushed)
+    client = get_client()
+    if client is not None:
+        try:
+            for field, value in client.hgetall(CONTEXT_VALUES_KEY).items():
+                name, kind = field.decode().split("\t")
+                totals[(name, kind)] += int(value)
+        except Exception:
+            logger.warning("context_value_stats_read_failed", exc_info=True)
+
+    lines = []
+    for kind, help_text in (
+        ("provided", "Lazy template context values handed to a template."),
+        ("evaluated", "Lazy template context values a template actually read."),
+    ):
+        metric = f"speedpy_template_context_values_{kind}_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name in sorted({name for name, _ in totals}):
+            lines.append(f'{metric}{{name="{label(name)}"}} {number(totals[(name, kind)])}')
+    return "\n".join(lines) + "\n"
 
 
 def demo_mode(request):  # SPEEDPY_DEMO: remove before production
@@ -27,15 +143,34 @@ def sidebar_team(request):
     Expose the user's default team to every template so the sidebar can link
     its "Dashboard" entry to a team dashboard. Mirrors the redirect target of
     the personal dashboard, keeping the link and the redirect in agreement.
+    Also provides ``USER_MEMBERSHIPS`` for the team selector.
+
+    Both values are lazy: nothing (not even the session user) is loaded
+    unless a template reads them. Anonymous users get ``None`` / ``[]``.
     """
     if not getattr(settings, "SPEEDPY_TEAMS_ENABLED", True):
         return {}
-    user = getattr(request, "user", None)
-    if user is None or not user.is_authenticated:
-        return {}
-    from mainapp.models import get_default_team_for_user
 
-    return {"SIDEBAR_TEAM": get_default_team_for_user(user)}
+    def default_team():
+        resolved = _team_context(request)
+        return resolved.default_team if resolved else None
+
+    def memberships():
+        resolved = _team_context(request)
+        return resolved.memberships if resolved else []
+
+    return {
+        "SIDEBAR_TEAM": _lazy("SIDEBAR_TEAM", default_team),
+        "USER_MEMBERSHIPS": _lazy("USER_MEMBERSHIPS", memberships),
+    }
+
+
+def _team_context(request):
+    from mainapp.team_context import team_context
+
+    if getattr(request, "user", None) is None:
+        return None
+    return team_context(request)
 
 
 def tours_enabled(request):
@@ -55,25 +190,30 @@ def billing(request):
     """Expose billing flags and the current billable's runtime state.
 
     Always provides ``SPEEDPY_BILLING_ENABLED`` so templates can guard billing
-    nav links / {% url %} calls. When billing is enabled and the user is
-    authenticated, also provides ``BILLING_STATE`` ("enabled"/"grace"/"disabled")
-    and ``BILLING_OVER_LIMIT`` so the shared banners partial can render without a
-    per-view change. Kept cheap: returns early when billing is off or anonymous.
+    nav links / {% url %} calls. When billing is enabled, also provides
+    ``BILLING_STATE`` ("enabled"/"grace"/"disabled", or None without a
+    billable) and ``BILLING_OVER_LIMIT`` so the shared banners partial can
+    render without a per-view change. Both are lazy and share the default-team
+    lookup with ``sidebar_team``, so pages without the banners pay nothing.
     """
     enabled = getattr(settings, "SPEEDPY_BILLING_ENABLED", False)
     if not enabled:
         return {"SPEEDPY_BILLING_ENABLED": False}
 
-    ctx = {"SPEEDPY_BILLING_ENABLED": True}
-
-    user = getattr(request, "user", None)
-    if user is None or not user.is_authenticated:
-        return ctx
+    def billing_state():
+        resolved = _team_context(request)
+        if resolved is None or resolved.billable is None:
+            return None
+        return resolved.billing_state
 
-    from mainapp.billing import state as billing_state
+    def over_limit():
+        resolved = _team_context(request)
+        if resolved is None or resolved.billable is None:
+            return {}
+        return resolved.over_limit_report
 
-    billable = billing_state.get_billable_for_request(request)
-    if billable is not None:
-        ctx["BILLING_STATE"] = billing_state.get_billing_state(billable)
-        ctx["BILLING_OVER_LIMIT"] = billing_state.over_limit_report(billable)
-    return ctx
+    return {
+        "SPEEDPY_BILLING_ENABLED": True,
+        "BILLING_STATE": _lazy("BILLING_STATE", billing_state),
+        "BILLING_OVER_LIMIT": _lazy("BILLING_OVER_LIMIT", over_limit),
+    }
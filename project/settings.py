@@ -75,6 +75,7 @@ MIDDLEWARE = [
     "allauth.account.middleware.AccountMiddleware",
     "django_structlog.middlewares.RequestMiddleware",
     "speedpycom.api.middleware.RequestIDMiddleware",
+    "speedpycom.api.timing.ServerTimingMiddleware",
     "speedpycom.api.middleware.RateLimitHeadersMiddleware",
     "speedpycom.api.middleware.ApiAccessLogMiddleware",
 ]
@@ -348,10 +349,10 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_RENDERER_CLASSES": [
-        "rest_framework.renderers.JSONRenderer",
+        "speedpycom.api.renderers.FastJSONRenderer",
     ],
     "DEFAULT_PARSER_CLASSES": [
-        "rest_framework.parsers.JSONParser",
+        "speedpycom.api.renderers.FastJSONParser",
         "rest_framework.parsers.FormParser",
         "rest_framework.parsers.MultiPartParser",
     ],
@@ -372,7 +373,76 @@ if DEBUG:
         "rest_framework.renderers.BrowsableAPIRenderer"
     )
 
+# API JSON goes through speedpycom/api/codec.py: orjson when installed
+# (`uv sync --extra fast-json`), the stdlib otherwise. Output is byte-identical
+# either way; set False to rule the codec out while debugging.
+SPEEDPY_FAST_JSON = env.bool("SPEEDPY_FAST_JSON", default=True)
+
+# POST /api/v1/batch/ (speedpycom/api/batch.py): sub-requests per batch, and
+# threads used to run consecutive GETs concurrently. Each worker thread opens
+# its own database connection; set 1 to run every sub-request in order.
+SPEEDPY_API_BATCH_MAX_REQUESTS = env.int("SPEEDPY_API_BATCH_MAX_REQUESTS", default=20)
+SPEEDPY_API_BATCH_MAX_WORKERS = env.int("SPEEDPY_API_BATCH_MAX_WORKERS", default=4)
+
+# Streaming exports (speedpycom/api/exports.py): rows fetched per database
+# round trip. Memory use is bounded by this, not by the size of the export.
+SPEEDPY_API_EXPORT_CHUNK_SIZE = env.int("SPEEDPY_API_EXPORT_CHUNK_SIZE", default=2000)
+
+# GET /api/v1/jobs/{id}/events/ (mainapp/api/jobs.py) relays job updates that
+# tasks publish to Redis (mainapp/jobs/events.py). Without Redis the stream
+# polls the database instead. Streams are closed after MAX_SECONDS and clients
+# reconnect. Streaming needs ASGI; under WSGI (web.sh) the endpoint returns the
+# current state with a retry of POLL_SECONDS, so clients poll instead of
+# holding a worker.
+SPEEDPY_JOBS_REDIS_URL = env("SPEEDPY_JOBS_REDIS_URL", default=env("REDIS_URL", default=None))
+SPEEDPY_JOB_EVENTS_HEARTBEAT_SECONDS = env.int("SPEEDPY_JOB_EVENTS_HEARTBEAT_SECONDS", default=15)
+SPEEDPY_JOB_EVENTS_POLL_SECONDS = env.int("SPEEDPY_JOB_EVENTS_POLL_SECONDS", default=2)
+SPEEDPY_JOB_EVENTS_MAX_SECONDS = env.int("SPEEDPY_JOB_EVENTS_MAX_SECONDS", default=300)
+# ProgressReporter (mainapp/jobs/progress.py) keeps live progress in a Redis
+# hash and writes it to the AsyncJob row at most this often.
+SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS = env.int("SPEEDPY_JOB_PROGRESS_FLUSH_SECONDS", default=5)
+SPEEDPY_JOB_PROGRESS_TTL_SECONDS = env.int("SPEEDPY_JOB_PROGRESS_TTL_SECONDS", default=86400)
+# Chunked jobs (mainapp/jobs/chunked.py) check for a cancel request at most
+# this often while a chunk runs.
+SPEEDPY_JOB_CANCEL_CHECK_SECONDS = env.int("SPEEDPY_JOB_CANCEL_CHECK_SECONDS", default=1)
+# A running chunk that has not reported progress for this long is taken to have
+# lost its worker and is run again from its last checkpoint on the next dispatch
+# (a resume, or a redelivered start_chunked_job).
+SPEEDPY_JOB_CHUNK_STALE_SECONDS = env.int("SPEEDPY_JOB_CHUNK_STALE_SECONDS", default=600)
+# Job results whose JSON exceeds this many bytes are stored as a private file
+# (mainapp/jobs/results.py) and downloaded from /api/v1/jobs/{id}/result/, so
+# status polls and job events stay small.
+SPEEDPY_JOB_RESULT_INLINE_MAX_BYTES = env.int("SPEEDPY_JOB_RESULT_INLINE_MAX_BYTES", default=65536)
+
+# /metrics/celery/ and /metrics/http/ (speedpycom/metrics.py) serve Prometheus
+# text when SPEEDPY_METRICS_TOKEN is set; scrapers send it as a Bearer token.
+# Every web and worker process adds its numbers to a Redis hash, so one scrape
+# covers them all.
+SPEEDPY_METRICS_TOKEN = env.str("SPEEDPY_METRICS_TOKEN", default="")
+SPEEDPY_METRICS_REDIS_URL = env("SPEEDPY_METRICS_REDIS_URL", default=env("REDIS_URL", default=None))
+# Celery task telemetry (speedpycom/task_metrics.py): queue wait, runtime and
+# outcomes per task and queue, flushed at most every FLUSH_SECONDS. `manage.py
+# celery_metrics` prints them.
+SPEEDPY_TASK_METRICS_ENABLED = env.bool("SPEEDPY_TASK_METRICS_ENABLED", default=True)
+SPEEDPY_TASK_METRICS_FLUSH_SECONDS = env.int("SPEEDPY_TASK_METRICS_FLUSH_SECONDS", default=10)
+# Request timing (speedpycom/api/timing.py): this fraction of requests gets a
+# Server-Timing header (DB, cache, auth, throttling, serialization, view) and
+# feeds the per-route numbers; 0 turns it off. Sampled requests slower than
+# SLOW_REQUEST_MS are logged with their request_id. /metrics/http/ also
+# reports how often each lazy template context value was provided vs. read.
+SPEEDPY_SERVER_TIMING_SAMPLE_RATE = env.float(
+    "SPEEDPY_SERVER_TIMING_SAMPLE_RATE", default=1.0 if DEBUG else 0.05
+)
+SPEEDPY_HTTP_METRICS_FLUSH_SECONDS = env.int("SPEEDPY_HTTP_METRICS_FLUSH_SECONDS", default=10)
+SPEEDPY_SLOW_REQUEST_MS = env.int("SPEEDPY_SLOW_REQUEST_MS", default=1000)
+
 API_DOCS_PUBLIC = env.bool("API_DOCS_PUBLIC", default=DEBUG)
+# Render the OpenAPI schema and integration manifest when each worker boots
+# instead of on the first request (speedpycom/api/documents.py). Off in DEBUG so
+# the autoreloader does not pay for a schema build on every code change.
+SPEEDPY_API_DOCUMENTS_WARM_ON_STARTUP = env.bool(
+    "SPEEDPY_API_DOCUMENTS_WARM_ON_STARTUP", default=not DEBUG
+)
 
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=15),
@@ -640,6 +710,22 @@ SPEEDPY_TEAM_DELETION_DELAY_HOURS = max(
 SPEEDPY_TEAM_DELETION_CLEANUP_HOOKS = env.list(
     "SPEEDPY_TEAM_DELETION_CLEANUP_HOOKS", default=[]
 )
+# How long the resolved default team of a user (sidebar link, billing, dashboard
+# redirect) is cached. Invalidated on membership and team changes; the team views
+# check the membership themselves, so this only bounds how long a missed
+# invalidation could point the sidebar at the wrong team.
+SPEEDPY_DEFAULT_TEAM_CACHE_SECONDS = env.int("SPEEDPY_DEFAULT_TEAM_CACHE_SECONDS", default=600)
+# Bulk invitations (mainapp/invitations.py): addresses per request, and
+# invitation emails rendered and queued per send_team_invitation_emails task.
+SPEEDPY_TEAM_BULK_INVITATION_MAX = env.int("SPEEDPY_TEAM_BULK_INVITATION_MAX", default=500)
+SPEEDPY_TEAM_INVITATION_EMAIL_CHUNK_SIZE = env.int("SPEEDPY_TEAM_INVITATION_EMAIL_CHUNK_SIZE", default=50)
+
+# Housekeeping sweepers (speedpycom/services/sweeper.py): rows per batch — one
+# DELETE/UPDATE each — and seconds a run may take before it checkpoints and
+# requeues itself behind the rest of the housekeeping queue. The staged teardown
+# of deleted teams (mainapp/models/teams.py) uses the same two numbers.
+SPEEDPY_SWEEPER_BATCH_SIZE = env.int("SPEEDPY_SWEEPER_BATCH_SIZE", default=1000)
+SPEEDPY_SWEEPER_TIME_BUDGET_SECONDS = env.int("SPEEDPY_SWEEPER_TIME_BUDGET_SECONDS", default=120)
 
 # Signups that never confirmed an email address. Verification is mandatory, so
 # such a row can never be used — and if the address is suppressed, no further
@@ -688,6 +774,17 @@ SPEEDPY_BILLING_PROVIDER = env.str("SPEEDPY_BILLING_PROVIDER", default="")  # "s
 # is disabled. New records are blocked during grace; runtime checks fail closed
 # after it.
 SPEEDPY_BILLING_GRACE_PERIOD_DAYS = env.int("SPEEDPY_BILLING_GRACE_PERIOD_DAYS", default=30)
+# Upper bound on how long a billable's billing snapshot (plan, state, limits,
+# features) is cached. Plan and subscription writes invalidate it at once and it
+# never outlives a grace or paid period that is about to end; this only bounds
+# writes that bypass the billing services (e.g. editing a subscription in the admin).
+SPEEDPY_BILLING_SNAPSHOT_SECONDS = env.int("SPEEDPY_BILLING_SNAPSHOT_SECONDS", default=300)
+# Inbound webhook events are applied by a worker (process_billing_webhook_events).
+# An event that fails this many times is marked failed and logged so the rest of
+# its account's events can go ahead; lanes with events pending longer than
+# REQUEUE_AFTER_SECONDS and no retry scheduled are queued again every 5 minutes.
+SPEEDPY_BILLING_WEBHOOK_MAX_ATTEMPTS = env.int("SPEEDPY_BILLING_WEBHOOK_MAX_ATTEMPTS", default=8)
+SPEEDPY_BILLING_WEBHOOK_REQUEUE_AFTER_SECONDS = env.int("SPEEDPY_BILLING_WEBHOOK_REQUEUE_AFTER_SECONDS", default=300)
 
 # Stripe
 STRIPE_SECRET_KEY = env.str("STRIPE_SECRET_KEY", default="")
@@ -5,13 +5,13 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import (
-    SpectacularAPIView,
     SpectacularRedocView,
     SpectacularSwaggerView,
 )
 from mainapp import views
 import speedpycom.views
 from speedpycom.api.dcr import DynamicClientRegistrationView
+from speedpycom.api.documents import PrecomputedSchemaView
 from speedpycom.api.health import RootHealthCheckView
 from speedpycom.api.manifest import WellKnownManifestView
 from usermodel.views import (
@@ -56,12 +56,14 @@ urlpatterns = [
     # line if your ESP is not SES. See docs/email-bounces.md.
     path("", include("speedpycom.urls_email_events")),
     path("og-image.png", speedpycom.views.default_og_image, name="default-og-image"),
+    path("metrics/celery/", speedpycom.views.celery_metrics, name="celery_metrics"),
+    path("metrics/http/", speedpycom.views.http_metrics, name="http_metrics"),
     path("o/register/", DynamicClientRegistrationView.as_view(), name="dcr-register"),
     path("o/", include("oauth2_provider.urls", namespace="oauth2_provider")),
     path("__debug__/", include("debug_toolbar.urls")),
     path("health/", RootHealthCheckView.as_view(), name="root_health_check"),
     path(".well-known/speedpy.json", WellKnownManifestView.as_view(), name="well_known_manifest"),
-    path("api/schema/", api_docs_view(SpectacularAPIView), name="api_schema"),
+    path("api/schema/", api_docs_view(PrecomputedSchemaView), name="api_schema"),
     path(
         "api/docs/",
         api_docs_view(SpectacularSwaggerView, url_name="api_schema"),
@@ -0,0 +1,398 @@
+"""
+Multi-request batch endpoint.
+
+CLIs and MCP servers typically chain several GETs — ``/me/``, ``/teams/``,
+then members for each team — and pay authentication, throttling, middleware
+and a network round trip for every one.  ``POST /api/v1/batch/`` takes a list
+of sub-requests and runs them in-process against the same URLconf::
+
+    POST /api/v1/batch/
+    {"requests": [
+        {"id": "me", "method": "GET", "path": "/api/v1/me/"},
+        {"id": "teams", "method": "GET", "path": "/api/v1/teams/?fields=id,name"}
+    ]}
+
+    200 OK
+    {"responses": [
+        {"id": "me", "status": 200, "headers": {"ETag": "W/\"...\""}, "body": {...}},
+        {"id": "teams", "status": 200, "headers": {...}, "body": {...}}
+    ]}
+
+The batch is authenticated once; each sub-request reuses that user and token,
+so scope checks still apply per sub-request.  Throttling is *not* applied to
+the batch itself: every sub-request is charged by its own view's throttles,
+exactly as if it had been sent on its own.
+
+Consecutive safe (GET/HEAD) sub-requests are independent and run concurrently
+on up to ``SPEEDPY_API_BATCH_MAX_WORKERS`` threads.  An unsafe sub-request is
+a barrier: it runs alone, in its own transaction, after everything before it
+has finished — so a GET listed after a POST sees the POST's effect.
+Responses always come back in request order.
+
+Each sub-request may carry ``headers`` (``If-None-Match``,
+``Idempotency-Key``, ...) and a JSON ``body``.  Nested batches, paths
+outside ``/api/``, async views and streaming responses (event streams, CSV
+exports) are rejected per sub-request with a 400.
+
+Sub-requests are logged under their own request id, ``<batch id>:<item id>``
+(returned as the sub-response's ``X-Request-ID``), and each one that reaches
+a view gets its own ``ApiAccessLog`` row.
+"""
+
+import contextlib
+import contextvars
+import io
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import structlog
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.db import connections, transaction
+from django.http import HttpRequest, QueryDict
+from django.urls import Resolver404, resolve
+from django.utils import translation
+from drf_spectacular.utils import OpenApiExample, extend_schema
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from speedpycom.api import codec, timing
+from speedpycom.api.middleware import record_api_access
+from speedpycom.api.permissions import HasScope
+
+logger = structlog.get_logger(__name__)
+
+_API_PREFIX = "/api/"
+_SAFE_METHODS = ("GET", "HEAD")
+_METHODS = ("GET", "HEAD", "POST", "PUT", "PATCH", "DELETE")
+
+# Inherited from the batch request so sub-requests build the same absolute
+# URLs, negotiate the same language and log the same client.
+_INHERITED_META = (
+    "SERVER_NAME",
+    "SERVER_PORT",
+    "SERVER_PROTOCOL",
+    "REMOTE_ADDR",
+    "HTTP_HOST",
+    "HTTP_X_FORWARDED_FOR",
+    "HTTP_X_FORWARDED_HOST",
+    "HTTP_X_FORWARDED_PORT",
+    "HTTP_X_FORWARDED_PROTO",
+    "HTTP_USER_AGENT",
+    "HTTP_ACCEPT_LANGUAGE",
+    "HTTP_X_REQUEST_ID",
+)
+# Credentials come from the batch request, never from a sub-request.
+_FORBIDDEN_HEADERS = {"authorization", "cookie", "host"}
+# Response headers worth passing back to the client.
+_RETURNED_HEADERS = (
+    "ETag",
+    "Last-Modified",
+    "Location",
+    "Retry-After",
+    "Cache-Control",
+    "Idempotency-Replay",
+)
+
+
+def max_requests():
+    return getattr(settings, "SPEEDPY_API_BATCH_MAX_REQUESTS", 20)
+
+
+def max_workers():
+    return max(1, getattr(settings, "SPEEDPY_API_BATCH_MAX_WORKERS", 4))
+
+
+class BatchSubRequestSerializer(serializers.Serializer):
+    id = serializers.CharField(
+        max_length=64, required=False,
+        help_text="Echoed back on the matching response. Defaults to the index.",
+    )
+    method = serializers.ChoiceField(choices=_METHODS, default="GET")
+    path = serializers.CharField(
+        max_length=2048, help_text="Absolute API path, query string included."
+    )
+    headers = serializers.DictField(
+        child=serializers.CharField(max_length=1024), required=False, default=dict
+    )
+    body = serializers.JSONField(required=False, allow_null=True)
+
+    def validate_headers(self, value):
+        forbidden = sorted(name for name in value if name.lower() in _FORBIDDEN_HEADERS)
+        if forbidden:
+            raise serializers.ValidationError(
+                f"Header(s) not allowed in a sub-request: {', '.join(forbidden)}."
+            )
+        return value
+
+
+class BatchRequestSerializer(serializers.Serializer):
+    requests = BatchSubRequestSerializer(many=True)
+
+    def validate_requests(self, value):
+        if not value:
+            raise serializers.ValidationError("At least one sub-request is required.")
+        if len(value) > max_requests():
+            raise serializers.ValidationError(
+                f"At most {max_requests()} sub-requests per batch."
+            )
+        ids = [item.get("id") for item in value if item.get("id") is not None]
+        if len(ids) != len(set(ids)):
+            raise serializers.ValidationError("Sub-request ids must be unique.")
+        return value
+
+
+class BatchSubResponseSerializer(serializers.Serializer):
+    id = serializers.CharField()
+    status = serializers.IntegerField()
+    headers = serializers.DictField(child=serializers.CharField())
+    body = serializers.JSONField(allow_null=True)
+
+
+class BatchResponseSerializer(serializers.Serializer):
+    responses = BatchSubResponseSerializer(many=True)
+
+
+class _SubRequest(HttpRequest):
+    """An in-process request that reports the batch request's scheme."""
+
+    def __init__(self, scheme):
+        super().__init__()
+        self._scheme = scheme
+
+    def _get_scheme(self):
+        return self._scheme
+
+
+def _build_request(parent, user, auth, item):
+    split = urlsplit(item["path"])
+    request = _SubRequest(parent.scheme)
+    request.method = item["method"]
+    request.path = request.path_info = split.path
+    request.GET = QueryDict(split.query)
+    request.META = {
+        key: parent.META[key] for key in _INHERITED_META if key in parent.META
+    }
+    request.META["REQUEST_METHOD"] = item["method"]
+    request.META["QUERY_STRING"] = split.query
+    for name, value in item["headers"].items():
+        key = name.upper().replace("-", "_")
+        if key not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            key = f"HTTP_{key}"
+        request.META[key] = value
+
+    body = b""
+    if item.get("body") is not None:
+        body = codec.dumps(item["body"])
+        request.META["CONTENT_TYPE"] = "application/json"
+    request.META["CONTENT_LENGTH"] = str(len(body))
+    request._stream = io.BytesIO(body)
+    request._read_started = False
+
+    request.user = user
+    if hasattr(parent, "session"):
+        request.session = parent.session
+    # DRF's Request honours these instead of running the authenticators, so
+    # the batch's credentials are checked once and reused (scopes included).
+    request._force_auth_user = user
+    request._force_auth_token = auth
+    return request
+
+
+def _error(item_id, status, detail):
+    entry = {"id": item_id, "status": status, "headers": {}, "body": {"detail": detail}}
+    return entry, []
+
+
+def _body(response):
+    if hasattr(response, "data"):
+        return response.data
+    content = getattr(response, "content", b"")
+    if not content:
+        return None
+    if "json" in response.get("Content-Type", ""):
+        return codec.loads(content)
+    return content.decode(response.charset or "utf-8", "replace")
+
+
+def _execute(parent, user, auth, item):
+    """Run one sub-request.
+
+    Returns its entry for the batch response and the rate-limit buckets its
+    throttles reported, which the caller merges into the batch response's
+    ``X-RateLimit-*`` headers.
+    """
+    item_id = item["id"]
+    if not item["path"].startswith(_API_PREFIX):
+        return _error(item_id, 400, f"Only {_API_PREFIX} paths can be batched.")
+    request = _build_request(parent, user, auth, item)
+    try:
+        match = resolve(request.path_info)
+    except Resolver404:
+        return _error(item_id, 404, "Not found.")
+    if getattr(match.func, "view_class", None) is BatchView:
+        return _error(item_id, 400, "Batches cannot be nested.")
+    if iscoroutinefunction(match.func):
+        return _error(item_id, 400, "Async endpoints cannot be batched.")
+    request.resolver_match = match
+
+    # Sub-requests skip the middleware stack, so bind their own request id
+    # (the batch's, suffixed with the item id) and write their access-log
+    # rows here.
+    batch_request_id = structlog.contextvars.get_contextvars().get("request_id", "")
+    request_id = f"{batch_request_id}:{item_id}" if batch_request_id else ""
+    with structlog.contextvars.bound_contextvars(
+        request_id=request_id, batch_request_id=batch_request_id
+    ):
+        try:
+            if item["method"] in _SAFE_METHODS:
+                entry = _dispatch(match, request, item)
+            else:
+                with transaction.atomic():
+                    entry = _dispatch(match, request, item)
+        except _Unbatchable as exc:
+            record_api_access(request, 400)
+            return _error(item_id, 400, str(exc))
+        except Exception:
+            logger.exception("api_batch_subrequest_failed", path=item["path"], method=item["method"])
+            record_api_access(request, 500)
+            return _error(item_id, 500, "Internal server error.")
+        record_api_access(request, entry["status"])
+
+    if request_id:
+        entry["headers"]["X-Request-ID"] = request_id
+    return entry, getattr(request, "_rate_limit_headers", [])
+
+
+class _Unbatchable(Exception):
+    """The sub-request's response cannot be carried in a batch response."""
+
+
+def _dispatch(match, request, item):
+    """Call the view and turn its response into a batch entry.
+
+    Raises ``_Unbatchable`` for a streaming response — inside the unsafe
+    method's transaction, so its writes roll back with it.
+    """
+    response = match.func(request, *match.args, **match.kwargs)
+    if response.streaming:
+        response.close()
+        raise _Unbatchable("Streaming endpoints cannot be batched.")
+    return {
+        "id": item["id"],
+        "status": response.status_code,
+        "headers": {
+            name: response[name] for name in _RETURNED_HEADERS if response.has_header(name)
+        },
+        "body": None if item["method"] == "HEAD" else _body(response),
+    }
+
+
+def _in_worker(context, language, func, *args):
+    """Run ``func`` on a pool thread with the caller's log context and language.
+
+    The copied context also carries the batch request's ``RequestTimer`` when
+    it is sampled; it is detached so threads do not update it concurrently.
+    """
+    try:
+        with translation.override(language):
+            context.run(timing.detach_timer)
+            return context.run(func, *args)
+    finally:
+        # Worker threads open their own connections; don't leak them.
+        connections.close_all()
+
+
+def run_batch(parent, user, auth, items):
+    """Execute ``items`` (validated sub-requests) and return their responses in order."""
+    outcomes = [None] * len(items)
+    workers = max_workers()
+    language = translation.get_language()
+    position = 0
+    pool = ThreadPoolExecutor(max_workers=workers) if workers > 1 else contextlib.nullcontext()
+    with pool:
+        while position < len(items):
+            end = position + 1
+            if items[position]["method"] in _SAFE_METHODS:
+                while end < len(items) and items[end]["method"] in _SAFE_METHODS:
+                    end += 1
+            if workers == 1 or end - position == 1:
+                for index in range(position, end):
+                    outcomes[index] = _execute(parent, user, auth, items[index])
+            else:
+                futures = {
+                    index: pool.submit(
+                        _in_worker, contextvars.copy_context(), language,
+                        _execute, parent, user, auth, items[index],
+                    )
+                    for index in range(position, end)
+                }
+                for index, future in futures.items():
+                    outcomes[index] = future.result()
+            position = end
+
+    buckets = getattr(parent, "_rate_limit_headers", [])
+    for _, reported in outcomes:
+        buckets.extend(reported)
+    if buckets:
+        parent._rate_limit_headers = buckets
+    return [entry for entry, _ in outcomes]
+
+
+class BatchView(APIView):
+    """Run several API requests in one round trip."""
+
+    permission_classes = [HasScope]
+    # Each sub-request is charged by the throttles of the view it hits.
+    throttle_classes = []
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # Unsafe sub-requests get their own transaction instead of sharing one
+        # for the whole batch, so each commits (or rolls back) on its own and
+        # later concurrent reads see it.
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    @extend_schema(
+        tags=["integration"],
+        operation_id="runBatch",
+        summary="Run several API requests in one round trip",
+        description=(
+            "Execute up to `SPEEDPY_API_BATCH_MAX_REQUESTS` API sub-requests in-process "
+            "with the caller's credentials. Consecutive GET/HEAD sub-requests run "
+            "concurrently; POST/PUT/PATCH/DELETE sub-requests run one at a time in "
+            "order. Each sub-request is scope-checked and throttled as if sent on "
+            "its own. Responses are returned in request order."
+        ),
+        request=BatchRequestSerializer,
+        responses={200: BatchResponseSerializer},
+        examples=[
+            OpenApiExample(
+                "Profile and teams",
+                value={
+                    "requests": [
+                        {"id": "me", "method": "GET", "path": "/api/v1/me/"},
+                        {"id": "teams", "method": "GET", "path": "/api/v1/teams/?fields=id,name"},
+                    ]
+                },
+                request_only=True,
+            ),
+        ],
+    )
+    def post(self, request):
+        serializer = BatchRequestSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        items = serializer.validated_data["requests"]
+        for index, item in enumerate(items):
+            item.setdefault("id", str(index))
+
+        started = time.perf_counter()
+        responses = run_batch(request._request, request.user, request.auth, items)
+        logger.info(
+            "api_batch_completed",
+            count=len(items),
+            duration_ms=round((time.perf_counter() - started) * 1000, 2),
+        )
+        return Response({"responses": responses})
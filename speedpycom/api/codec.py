@@ -0,0 +1,92 @@
+"""
+JSON codec shared by the API renderer/parser, webhook delivery and the
+idempotency replay path.
+
+``dumps`` and ``loads`` use orjson when it is installed (``uv sync --extra
+fast-json``) and ``SPEEDPY_FAST_JSON`` is on, and the stdlib ``json`` module
+otherwise.  Output matches DRF's ``JSONRenderer`` with the default settings —
+compact separators, UTF-8, ``Z`` for UTC datetimes, Decimals through DRF's
+encoder — so switching backends does not change a single byte on our
+endpoints.  ``manage.py benchmark_json`` proves it against live data.
+
+Known differences, none of which our serializers produce:
+
+* floats that Python prints in exponent form (``1e+16``) come out as ``1e16``;
+* ``NaN`` / ``Infinity`` encode as ``null`` instead of raising.
+
+Anything orjson refuses (integers beyond 64 bits, exotic dict keys) is
+retried on the stdlib path, so the fast path never fails where the stdlib
+one would succeed.
+"""
+
+import json
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ModuleNotFoundError:  # pragma: no cover - depends on extras
+    orjson = None
+
+_SEPARATORS = (",", ":")
+_default = JSONEncoder().default
+
+if orjson is not None:
+    # Datetimes go through DRF's encoder so UTC is written as "Z", exactly
+    # like JSONRenderer; dataclasses are not JSON to DRF either.
+    _ORJSON_OPTIONS = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+
+def use_orjson():
+    return orjson is not None and getattr(settings, "SPEEDPY_FAST_JSON", True)
+
+
+def backend():
+    """Name of the backend ``dumps`` / ``loads`` use right now."""
+    return "orjson" if use_orjson() else "json"
+
+
+def _reject_constant(value):
+    raise ValueError(f"Out of range float values are not JSON compliant: {value}")
+
+
+def dumps(obj, *, ensure_ascii=False):
+    """Serialize ``obj`` to compact JSON bytes.
+
+    ``ensure_ascii=True`` escapes non-ASCII characters like ``json.dumps``
+    does by default; orjson cannot, so such payloads take the stdlib path.
+    """
+    if use_orjson():
+        try:
+            content = orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            if not ensure_ascii or content.isascii():
+                return content
+    return json.dumps(
+        obj,
+        cls=JSONEncoder,
+        ensure_ascii=ensure_ascii,
+        allow_nan=False,
+        separators=_SEPARATORS,
+    ).encode()
+
+
+def loads(data):
+    """Parse UTF-8 JSON ``bytes`` or ``str``; raises ``ValueError`` when invalid."""
+    if use_orjson():
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # The stdlib accepts a few documents orjson does not (integers
+            # beyond 64 bits) and words its errors the way clients expect.
+            pass
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        data = bytes(data).decode("utf-8")
+    return json.loads(data, parse_constant=_reject_constant)
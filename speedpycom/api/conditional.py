@@ -0,0 +1,156 @@
+"""
+Conditional GET (``ETag`` / ``If-None-Match``) for read-heavy API views.
+
+Polling clients re-fetch ``/api/v1/me/``, team detail, members and job status
+far more often than the data changes.  A view that mixes in
+``ConditionalGetMixin`` computes a cheap *validator* — ``updated_at`` values,
+an aggregate over the list queryset, a version counter — right after
+authentication, permissions and throttling.  When the client's
+``If-None-Match`` matches, the view answers 304 without running the handler,
+so the full query and serialization never happen.
+
+Usage::
+
+    class MyDetailView(ConditionalGetMixin, RetrieveAPIView):
+        cache_control = {"private": True, "max_age": 30}
+
+        def get_validator(self, request, *args, **kwargs):
+            obj = self.get_object()
+            return obj.updated_at
+
+    class MyListView(ConditionalGetMixin, ListAPIView):
+        def get_validator(self, request, *args, **kwargs):
+            return aggregate_validator(self.get_queryset(), "updated_at")
+
+The validator is hashed together with the user and the full path (so every
+page and filter gets its own tag) into a weak ETag.  ``get_validator`` is
+responsible for access control: it runs before the handler, so it must raise
+``NotFound`` / ``PermissionDenied`` exactly like the handler would.
+
+Version counters (``get_version`` / ``bump_version``) cover changes that no
+``updated_at`` reflects, such as a member renaming themselves.  They live in
+the cache: with the dummy cache every read returns a fresh token, so tags
+never match and clients always get a 200 — correct, just not faster.  A
+per-process cache (LocMem) with several workers would let a stale tag match,
+so use Redis (``CACHE_URL``) when relying on counters.
+"""
+
+import hashlib
+import uuid
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+_SAFE_METHODS = ("GET", "HEAD")
+
+
+class NotModified(APIException):
+    """Raised from ``initial()`` when the client's copy is still current."""
+
+    status_code = status.HTTP_304_NOT_MODIFIED
+    default_detail = ""
+    default_code = "not_modified"
+
+
+def _version_key(namespace, key):
+    return f"conditional:version:{namespace}:{key}"
+
+
+def get_version(namespace, key):
+    """Current version token for ``(namespace, key)``."""
+    cache_key = _version_key(namespace, key)
+    version = cache.get(cache_key)
+    if version is None:
+        version = uuid.uuid4().hex
+        cache.add(cache_key, version, timeout=None)
+        version = cache.get(cache_key) or version
+    return version
+
+
+def bump_version(namespace, *keys):
+    """Invalidate every ETag that included the version of these keys."""
+    if keys:
+        cache.set_many(
+            {_version_key(namespace, key): uuid.uuid4().hex for key in keys},
+            timeout=None,
+        )
+
+
+def aggregate_validator(queryset, *fields):
+    """One-query validator for a list: row count plus ``Max`` of each field.
+
+    Inserts and deletes change the count; updates move the maximum of an
+    ``auto_now`` field.  Pass every timestamp the serialized rows depend on.
+    """
+    aggregates = {"n": Count("pk")}
+    for i, field in enumerate(fields):
+        aggregates[f"max_{i}"] = Max(field)
+    values = queryset.order_by().aggregate(**aggregates)
+    return tuple(values[name] for name in sorted(values))
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def if_none_match_matches(header, etag):
+    """Weak comparison of an ``If-None-Match`` header against ``etag``."""
+    if not header:
+        return False
+    candidates = parse_etags(header)
+    return "*" in candidates or _strip_weak(etag) in {
+        _strip_weak(tag) for tag in candidates
+    }
+
+
+class ConditionalGetMixin:
+    """Answer matching ``If-None-Match`` GETs with 304 before serializing."""
+
+    #: Passed to ``django.utils.cache.patch_cache_control``. The default lets
+    #: clients store the response but forces revalidation on every use.
+    cache_control = {"private": True, "no_cache": True}
+
+    def get_validator(self, request, *args, **kwargs):
+        """Return a value that changes whenever the response would, or None."""
+        return None
+
+    def compute_etag(self, request, validator):
+        raw = "|".join((
+            str(getattr(request.user, "pk", "")),
+            request.get_full_path(),
+            getattr(request, "accepted_media_type", "") or "",
+            repr(validator),
+        ))
+        return 'W/"%s"' % hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.etag = None
+        if request.method not in _SAFE_METHODS:
+            return
+        validator = self.get_validator(request, *args, **kwargs)
+        if validator is None:
+            return
+        self.etag = self.compute_etag(request, validator)
+        if if_none_match_matches(request.META.get("HTTP_IF_NONE_MATCH"), self.etag):
+            raise NotModified()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return Response(status=status.HTTP_304_NOT_MODIFIED)
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, "etag", None)
+        if etag and response.status_code in (200, 304):
+            response["ETag"] = etag
+            patch_cache_control(response, **self.cache_control)
+            # The tag is per user; a shared cache must not cross credentials.
+            patch_vary_headers(response, ("Authorization",))
+        return response
@@ -0,0 +1,212 @@
+"""
+Precomputed API documents: the OpenAPI schema and the integration manifest.
+
+MCP clients and agents fetch ``/api/schema/`` and ``/.well-known/speedpy.json``
+at the start of every session.  Both are pure functions of the code, the
+settings and the URLconf, so each process renders them once — as bytes, a
+gzip copy and a strong ETag — and serves those until something they depend on
+changes:
+
+* a new deploy is a new process, so the memo starts empty;
+* ``setting_changed`` (``override_settings`` in tests) drops everything;
+* a different URL resolver (``ROOT_URLCONF`` swapped, ``clear_url_caches()``)
+  invalidates the entry on its next read.
+
+Generation happens on first request, at worker start when
+``SPEEDPY_API_DOCUMENTS_WARM_ON_STARTUP`` is set (see ``project/wsgi.py``), or
+ahead of time with ``manage.py build_api_documents``, which also fails the
+release if the schema no longer generates.
+"""
+
+import gzip
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+import structlog
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseNotModified
+from django.urls import get_resolver
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from drf_spectacular.renderers import (
+    OpenApiJsonRenderer,
+    OpenApiJsonRenderer2,
+    OpenApiYamlRenderer,
+    OpenApiYamlRenderer2,
+)
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+from rest_framework.renderers import JSONRenderer
+
+from speedpycom.api.conditional import if_none_match_matches
+
+logger = structlog.get_logger(__name__)
+
+# Same pattern as django.middleware.gzip.
+_ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+SCHEMA_RENDERERS = {
+    renderer.media_type: renderer
+    for renderer in (
+        OpenApiYamlRenderer,
+        OpenApiYamlRenderer2,
+        OpenApiJsonRenderer,
+        OpenApiJsonRenderer2,
+    )
+}
+
+_documents = {}
+
+# Without SITE_URL the manifest's base URL comes from the Host header, so
+# anybody can add keys; only the most recent few hosts keep theirs.
+MAX_HOST_MANIFESTS = 8
+_host_manifests = OrderedDict()
+_host_manifests_lock = threading.Lock()
+
+
+class PrecomputedDocument:
+    """Rendered bytes plus everything needed to serve them cheaply."""
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.gzipped = gzip.compress(content, compresslevel=9, mtime=0)
+        self.content_type = content_type
+        self.etag = '"%s"' % hashlib.sha256(content).hexdigest()[:32]
+
+    def as_response(self, request, cache_control, headers=None):
+        if if_none_match_matches(request.META.get("HTTP_IF_NONE_MATCH"), self.etag):
+            response = HttpResponseNotModified()
+        elif _ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", "")):
+            response = HttpResponse(self.gzipped, content_type=self.content_type)
+            response["Content-Encoding"] = "gzip"
+        else:
+            response = HttpResponse(self.content, content_type=self.content_type)
+        response["ETag"] = self.etag
+        for name, value in (headers or {}).items():
+            response[name] = value
+        patch_cache_control(response, **cache_control)
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return response
+
+
+def get_document(key, build):
+    """Return the memoized document for ``key``, calling ``build()`` on a miss."""
+    resolver = get_resolver()
+    entry = _documents.get(key)
+    if entry is None or entry[0] is not resolver:
+        entry = (resolver, build())
+        _documents[key] = entry
+    return entry[1]
+
+
+def clear_documents():
+    _documents.clear()
+    with _host_manifests_lock:
+        _host_manifests.clear()
+
+
+@receiver(setting_changed)
+def _clear_on_setting_change(**kwargs):
+    clear_documents()
+
+
+def _content_type(renderer):
+    if renderer.charset:
+        return f"{renderer.media_type}; charset={renderer.charset}"
+    return renderer.media_type
+
+
+def schema_document(media_type):
+    """The OpenAPI schema rendered for one of the schema view's media types."""
+
+    def build():
+        generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+        schema = generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+        renderer = SCHEMA_RENDERERS[media_type]()
+        return PrecomputedDocument(renderer.render(schema), _content_type(renderer))
+
+    return get_document(("schema", media_type), build)
+
+
+def manifest_document(base_url):
+    """The integration manifest for one base URL (one per host without SITE_URL).
+
+    The SITE_URL manifest is kept like the schema; the ``MAX_HOST_MANIFESTS``
+    most recently used other hosts are kept as well, the rest are dropped.
+    """
+    from speedpycom.api.manifest import build_manifest
+
+    def build():
+        renderer = JSONRenderer()
+        return PrecomputedDocument(
+            renderer.render(build_manifest(base_url)), _content_type(renderer)
+        )
+
+    key = ("manifest", base_url)
+    document = get_document(key, build)
+    if base_url != (settings.SITE_URL or "").rstrip("/"):
+        with _host_manifests_lock:
+            _host_manifests.pop(key, None)
+            _host_manifests[key] = None
+            while len(_host_manifests) > MAX_HOST_MANIFESTS:
+                oldest, _ = _host_manifests.popitem(last=False)
+                _documents.pop(oldest, None)
+    return document
+
+
+def warm_documents(base_url=None):
+    """Render every document now; returns ``{name: PrecomputedDocument}``."""
+    documents = {
+        f"schema {media_type}": schema_document(media_type)
+        for media_type in SCHEMA_RENDERERS
+    }
+    if base_url:
+        documents["manifest"] = manifest_document(base_url.rstrip("/"))
+    return documents
+
+
+def warm_on_startup():
+    """Called from the WSGI/ASGI entry points, once per worker process."""
+    if not getattr(settings, "SPEEDPY_API_DOCUMENTS_WARM_ON_STARTUP", False):
+        return
+    try:
+        warm_documents(settings.SITE_URL)
+    except Exception:
+        # Never keep a worker from booting over docs; the schema view will
+        # raise the same error on request, where it belongs.
+        logger.exception("api_documents_warm_failed")
+
+
+class PrecomputedSchemaView(SpectacularAPIView):
+    """``SpectacularAPIView`` serving the precomputed schema.
+
+    Anything that makes the schema request-specific — an API version, a
+    ``?lang=``, media-type parameters such as ``indent`` — falls back to live
+    generation.
+    """
+
+    cache_control = {"private": True, "no_cache": True}
+
+    def _get_schema_response(self, request):
+        if (
+            self.urlconf
+            or self.patterns
+            or self.custom_settings
+            or self.api_version
+            or request.version
+            or self._get_version_parameter(request)
+            or request.GET.get("lang")
+            or ";" in (request.accepted_media_type or "")
+            or request.accepted_renderer.media_type not in SCHEMA_RENDERERS
+        ):
+            return super()._get_schema_response(request)
+        document = schema_document(request.accepted_renderer.media_type)
+        filename = self._get_filename(request, None)
+        return document.as_response(
+            request,
+            self.cache_control,
+            {"Content-Disposition": f'inline; filename="{filename}"'},
+        )
@@ -0,0 +1,175 @@
+"""
+Sparse fieldsets (``?fields=``) and expansion (``?expand=``) for API serializers.
+
+Mobile and MCP clients rarely need every field.  A serializer that mixes in
+``SparseFieldsetMixin`` renders only the fields named in ``?fields=`` (a
+comma-separated list, applied to each item of a list endpoint), and leaves out
+its ``expandable_fields`` unless they are named in ``?expand=`` (or in
+``?fields=``)::
+
+    GET /api/v1/teams/?fields=id,name
+    GET /api/v1/teams/?expand=member_count
+
+Both parameters only apply to GET/HEAD; write endpoints always return their
+full representation.  Unknown names are a 400, so typos don't silently return
+an empty object.
+
+Dropping a field from ``self.fields`` already skips its ``get_<field>`` method.
+Views go one step further and plan the query from the same selection:
+``plan_queryset`` loads only the columns the selected fields read and joins a
+related table only when one of its columns is selected, and views add
+annotations (counts) only when the annotated field is selected::
+
+    def get_queryset(self):
+        fields = self.get_serializer_class().selected_fields(self.request)
+        queryset = Team.objects.filter(...)
+        if "member_count" in fields:
+            queryset = queryset.annotate(member_count=...)
+        return plan_queryset(queryset, self.get_serializer_class(), self.request)
+
+Document the parameters on the operation with ``fieldset_parameters()``.
+"""
+
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+FIELDS_PARAM = "fields"
+EXPAND_PARAM = "expand"
+
+_SAFE_METHODS = ("GET", "HEAD")
+
+
+def _requested(request, param):
+    """Names given in ``?param=a,b`` (repeatable), or None when absent."""
+    params = getattr(request, "query_params", request.GET)
+    if param not in params:
+        return None
+    return {
+        name.strip()
+        for value in params.getlist(param)
+        for name in value.split(",")
+        if name.strip()
+    }
+
+
+class SparseFieldsetMixin:
+    """Serializer mixin honouring ``?fields=`` and ``?expand=``."""
+
+    #: Fields left out unless named in ``?expand=`` (usually ones that cost a
+    #: query or a join to produce).
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selected = self.selected_fields(self.context.get("request"))
+        for name in list(self.fields):
+            if name not in selected:
+                self.fields.pop(name)
+
+    @classmethod
+    def selected_fields(cls, request):
+        """Names of the fields this serializer renders for ``request``."""
+        declared = list(cls._declared_fields)
+        default = [name for name in declared if name not in cls.expandable_fields]
+        if request is None or request.method not in _SAFE_METHODS:
+            return default
+
+        fields = _requested(request, FIELDS_PARAM)
+        expand = _requested(request, EXPAND_PARAM) or set()
+        errors = {}
+        if fields is not None and fields - set(declared):
+            errors[FIELDS_PARAM] = _unknown(fields - set(declared), declared)
+        if expand - set(cls.expandable_fields):
+            errors[EXPAND_PARAM] = _unknown(
+                expand - set(cls.expandable_fields), cls.expandable_fields
+            )
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        if fields is None:
+            return [name for name in declared if name in default or name in expand]
+        return [name for name in declared if name in fields or name in expand]
+
+
+def _unknown(names, available):
+    return [
+        f"Unknown field(s): {', '.join(sorted(names))}. "
+        f"Available: {', '.join(available) or 'none'}."
+    ]
+
+
+def plan_queryset(queryset, serializer_class, request):
+    """Restrict ``queryset`` to the columns and joins the selected fields read.
+
+    Handles plain model fields (``source="user_id"`` reads the foreign key column
+without a join) and one level of foreign key (``source="user.email"``).
+    Annotations already on the queryset count as covered.  If any selected field
+    reads something else (a method field, a property), the queryset is returned
+    unchanged apart from the joins — correctness first.
+    """
+    opts = queryset.model._meta
+    declared = serializer_class._declared_fields
+    columns = {opts.pk.name}
+    joins = set()
+    restrict = True
+    for name in serializer_class.selected_fields(request):
+        if name in queryset.query.annotations:
+            continue
+        field = declared[name]
+        path = (field.source or name).split(".")
+        if isinstance(field, serializers.SerializerMethodField) or len(path) > 2:
+            restrict = False
+            continue
+        try:
+            model_field = opts.get_field(path[0])
+        except FieldDoesNotExist:
+            restrict = False
+            continue
+        if not getattr(model_field, "concrete", False):
+            restrict = False
+            continue
+        columns.add(model_field.name)
+        if len(path) == 1:
+            continue
+        if not model_field.many_to_one and not model_field.one_to_one:
+            restrict = False
+        else:
+            joins.add(model_field.name)
+            columns.add(f"{model_field.name}__{path[1]}")
+    if joins:
+        queryset = queryset.select_related(*sorted(joins))
+    if restrict:
+        queryset = queryset.only(*sorted(columns))
+    return queryset
+
+
+def fieldset_parameters(serializer_class):
+    """OpenAPI parameters describing ``?fields=`` / ``?expand=`` for a serializer."""
+    expandable = list(serializer_class.expandable_fields)
+    parameters = [
+        OpenApiParameter(
+            name=FIELDS_PARAM,
+            type=str,
+            location=OpenApiParameter.QUERY,
+            required=False,
+            description=(
+                "Comma-separated subset of fields to return (per item on list endpoints). "
+                f"Available: `{', '.join(serializer_class._declared_fields)}`."
+            ),
+        ),
+    ]
+    if expandable:
+        parameters.append(
+            OpenApiParameter(
+                name=EXPAND_PARAM,
+                type=str,
+                location=OpenApiParameter.QUERY,
+                required=False,
+                description=(
+                    "Comma-separated optional fields to include. "
+                    f"Available: `{', '.join(expandable)}`."
+                ),
+            )
+        )
+    return parameters
@@ -13,24 +13,113 @@ The decorator intercepts requests that carry an ``Idempotency-Key`` header.
 On first sight it stores the response; on replay it returns the stored
 response without re-executing the view.  If the same key is reused with a
 different request body, a 409 Conflict is returned.
+
+Completed responses are served from the cache first; ``IdempotencyRecord``
+is the durable copy and refills the cache on a miss.  Before the view runs,
+an "in progress" lock is taken with ``cache.add`` — atomic ``SET NX`` on the
+Redis backend — so two concurrent requests with the same key never both
+execute the view.  The duplicate waits up to
+``SPEEDPY_IDEMPOTENCY_LOCK_WAIT_SECONDS`` for the first one to finish and
+replays its response, or gets a 409 with ``Retry-After`` if it does not.
+
+The lock is only as good as the cache behind it: with the default dummy
+cache every ``add`` succeeds and concurrent duplicates fall back to the
+database unique constraint.  Point ``CACHE_URL`` at Redis in production.
+Expired records are removed by the ``purge_expired_idempotency_records``
+periodic task.
 """
 
 import functools
+import hashlib
 import re
+import time
+import uuid
 from datetime import timedelta
 
 from django.conf import settings
-from django.db import IntegrityError
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
 from django.utils import timezone
 from rest_framework import status
 from rest_framework.response import Response
 
+from speedpycom.api import codec
 from speedpycom.models.idempotency import IdempotencyRecord
 
 IDEMPOTENCY_TTL = getattr(settings, "SPEEDPY_IDEMPOTENCY_TTL_HOURS", 24)
+# Must comfortably exceed the slowest decorated view: a lock that expires while
+# the view is still running lets a duplicate in.
+LOCK_TIMEOUT = getattr(settings, "SPEEDPY_IDEMPOTENCY_LOCK_TIMEOUT_SECONDS", 60)
+# How long a concurrent duplicate blocks a worker waiting for the first request
+# before giving up with 409. Keep it short; clients retry on Retry-After.
+LOCK_WAIT = getattr(settings, "SPEEDPY_IDEMPOTENCY_LOCK_WAIT_SECONDS", 2)
+_LOCK_POLL_INTERVAL = 0.05
 _KEY_PATTERN = re.compile(r"^[\w\-]{1,128}$")
 
 
+def idempotency_cache_keys(user_id, method, path, key):
+    """Return the ``(done, lock)`` cache keys for one idempotency scope."""
+    digest = hashlib.sha256(
+        f"{user_id}:{method}:{path}:{key}".encode()
+    ).hexdigest()
+    return f"idempotency:{digest}:done", f"idempotency:{digest}:lock"
+
+
+def _replay(stored, body_hash):
+    """Build the response for a completed request, or 409 on a body mismatch."""
+    if stored["request_body_hash"] != body_hash:
+        return Response(
+            {"detail": "Idempotency-Key already used with a different request body."},
+            status=status.HTTP_409_CONFLICT,
+        )
+    response = Response(stored["response_body"], status=stored["response_status"])
+    response["Idempotency-Replay"] = "true"
+    return response
+
+
+def _cache_stored(done_key, stored, expires_at):
+    remaining = int((expires_at - timezone.now()).total_seconds())
+    if remaining > 0:
+        cache.set(done_key, stored, timeout=remaining)
+
+
+def _lookup(done_key, body_hash, record_filter):
+    """Replay response for a completed request — cache first, then the DB."""
+    stored = cache.get(done_key)
+    if stored is not None:
+        return _replay(stored, body_hash)
+
+    existing = IdempotencyRecord.objects.filter(**record_filter).first()
+    if existing is None:
+        return None
+    if existing.expires_at < timezone.now():
+        existing.delete()
+        return None
+    stored = {
+        "request_body_hash": existing.request_body_hash,
+        "response_status": existing.response_status,
+        "response_body": existing.response_body,
+    }
+    _cache_stored(done_key, stored, existing.expires_at)
+    return _replay(stored, body_hash)
+
+
+def _release(lock_key, token):
+    # Only drop a lock we still own: if ours expired mid-view, another request
+    # may hold it now.
+    if cache.get(lock_key) == token:
+        cache.delete(lock_key)
+
+
+def _in_progress():
+    response = Response(
+        {"detail": "A request with this Idempotency-Key is already in progress."},
+        status=status.HTTP_409_CONFLICT,
+    )
+    response["Retry-After"] = "1"
+    return response
+
+
 def idempotent(view_func):
     """Decorator that adds Idempotency-Key support to a DRF view method."""
 
@@ -49,54 +138,82 @@ def idempotent(view_func):
         method = request.method
         path = request.path
         body_hash = IdempotencyRecord.hash_body(request.body)
-
-        existing = IdempotencyRecord.objects.filter(
-            key=key, user=request.user, method=method, path=path,
-        ).first()
-
-        if existing:
-            if existing.expires_at < timezone.now():
-                existing.delete()
-            elif existing.request_body_hash != body_hash:
-                return Response(
-                    {"detail": "Idempotency-Key already used with a different request body."},
-                    status=status.HTTP_409_CONFLICT,
-                )
-            else:
-                response = Response(
-                    existing.response_body,
-                    status=existing.response_status,
-                )
-                response["Idempotency-Replay"] = "true"
+        record_filter = {"key": key, "user": request.user, "method": method, "path": path}
+        done_key, lock_key = idempotency_cache_keys(request.user.pk, method, path, key)
+
+        response = _lookup(done_key, body_hash, record_filter)
+        if response is not None:
+            return response
+
+        token = uuid.uuid4().hex
+        deadline = time.monotonic() + LOCK_WAIT
+        while not cache.add(lock_key, token, timeout=LOCK_TIMEOUT):
+            if time.monotonic() >= deadline:
+                return _in_progress()
+            time.sleep(_LOCK_POLL_INTERVAL)
+            response = _lookup(done_key, body_hash, record_filter)
+            if response is not None:
                 return response
 
-        response = view_func(self, request, *args, **kwargs)
-
-        if 200 <= response.status_code < 500:
-            try:
+        # The holder we waited on may have published between our first lookup
+        # and taking the lock; check again before running the view.
+        response = _lookup(done_key, body_hash, record_filter)
+        if response is not None:
+            _release(lock_key, token)
+            return response
+
+        try:
+            response = view_func(self, request, *args, **kwargs)
+        except BaseException:
+            _release(lock_key, token)
+            raise
+
+        if not 200 <= response.status_code < 500:
+            _release(lock_key, token)
+            return response
+
+        expires_at = timezone.now() + timedelta(hours=IDEMPOTENCY_TTL)
+        # Round-trip through the API codec so the stored body is plain JSON
+        # (Decimals, datetimes and lazy strings rendered exactly as the
+        # renderer did) and the replay renders to the same bytes.
+        response_body = codec.loads(codec.dumps(response.data))
+        stored = {
+            "request_body_hash": body_hash,
+            "response_status": response.status_code,
+            "response_body": response_body,
+        }
+        try:
+            # Savepoint: under ATOMIC_REQUESTS a bare IntegrityError would
+            # poison the request transaction.
+            with transaction.atomic():
                 IdempotencyRecord.objects.create(
-                    key=key,
-                    user=request.user,
-                    method=method,
-                    path=path,
+                    **record_filter,
                     request_body_hash=body_hash,
                     response_status=response.status_code,
-                    response_body=response.data,
-                    expires_at=timezone.now() + timedelta(hours=IDEMPOTENCY_TTL),
+                    response_body=response_body,
+                    expires_at=expires_at,
+                )
+        except IntegrityError:
+            # Concurrent request with same key won the race (possible without a
+            # shared cache) — replay its stored response instead of ours.
+            record = IdempotencyRecord.objects.filter(**record_filter).first()
+            if record:
+                response = Response(
+                    record.response_body,
+                    status=record.response_status,
                 )
-            except IntegrityError:
-                # Concurrent request with same key won the race — replay its
-                # stored response instead of returning our duplicate result.
-                record = IdempotencyRecord.objects.filter(
-                    key=key, user=request.user, method=method, path=path,
-                ).first()
-                if record:
-                    response = Response(
-                        record.response_body,
-                        status=record.response_status,
-                    )
-                    response["Idempotency-Replay"] = "true"
+                response["Idempotency-Replay"] = "true"
+            _release(lock_key, token)
+            return response
+
+        def publish():
+            _cache_stored(done_key, stored, expires_at)
+            _release(lock_key, token)
 
+        # Publishing before commit would let a duplicate replay a response whose
+        # side effects could still roll back. If the request does roll back, the
+        # lock simply expires after LOCK_TIMEOUT.
+        transaction.on_commit(publish)
         return response
 
     return wrapper
@@ -5,17 +5,22 @@ Exposes public, non-sensitive metadata about this SpeedPy installation so
 agents, CLIs, MCP servers, and automation clients can discover capabilities
 without scraping docs or README text.
 
-Served at both ``/.well-known/speedpy.json`` and ``/api/v1/health/manifest/``.
+Served at both ``/.well-known/speedpy.json`` and ``/api/v1/health/manifest/``,
+as precomputed bytes with a strong ETag (see ``speedpycom.api.documents``).
 """
 
 from django.conf import settings
 from drf_spectacular.utils import OpenApiExample, extend_schema
 from rest_framework.permissions import AllowAny
 from rest_framework.renderers import JSONRenderer
-from rest_framework.response import Response
 from rest_framework.views import APIView
 
 from mainapp.webhooks.events import WebhookEvent
+from speedpycom.api import batch
+from speedpycom.api.documents import manifest_document
+
+# Unchanged until the next deploy, but cheap to revalidate: 304 on a match.
+MANIFEST_CACHE_CONTROL = {"public": True, "no_cache": True}
 
 
 def _base_url(request):
@@ -25,8 +30,8 @@ def _base_url(request):
     return request.build_absolute_uri("/").rstrip("/")
 
 
-def _build_manifest(request):
-    base = _base_url(request)
+def build_manifest(base):
+    """The manifest dict for ``base``. Depends on settings only, never the DB."""
     teams_enabled = getattr(settings, "SPEEDPY_TEAMS_ENABLED", True)
     dcr_enabled = getattr(settings, "DCR_ENABLED", False)
     api_docs_public = getattr(settings, "API_DOCS_PUBLIC", False)
@@ -96,6 +101,11 @@ def _build_manifest(request):
                 "user_list_url": f"{base}/api/v1/webhooks/",
                 "team_list_url": f"{base}/api/v1/teams/{{team_id}}/webhooks/",
             },
+            "batch": {
+                "url": f"{base}/api/v1/batch/",
+                "methods": ["POST"],
+                "max_requests": batch.max_requests(),
+            },
         },
         "capabilities": {
             "teams_enabled": teams_enabled,
@@ -165,7 +175,9 @@ class IntegrationManifestView(APIView):
         ],
     )
     def get(self, request):
-        return Response(_build_manifest(request))
+        return manifest_document(_base_url(request)).as_response(
+            request, MANIFEST_CACHE_CONTROL
+        )
 
 
 class WellKnownManifestView(APIView):
@@ -177,4 +189,6 @@ class WellKnownManifestView(APIView):
 
     @extend_schema(exclude=True)
     def get(self, request):
-        return Response(_build_manifest(request))
+        return manifest_document(_base_url(request)).as_response(
+            request, MANIFEST_CACHE_CONTROL
+        )
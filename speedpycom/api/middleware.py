@@ -134,40 +134,50 @@ class ApiAccessLogMiddleware:
 
     def __call__(self, request):
         response = self.get_response(request)
+        record_api_access(request, response.status_code)
+        return response
 
-        if not getattr(settings, "SPEEDPY_API_ACCESS_LOG_ENABLED", False):
-            return response
-
-        if not request.path.startswith(_API_PATH_PREFIX):
-            return response
-
-        try:
-            self._record(request, response)
-        except Exception:
-            _audit_logger.exception("audit_log_write_failed")
 
-        return response
+def record_api_access(request, status_code):
+    """
+    Write one ``ApiAccessLog`` row for ``request`` if access logging is on.
 
-    def _record(self, request, response):
-        from usermodel.models import ApiAccessLog, _truncate_ip
+    Used by ``ApiAccessLogMiddleware`` and by the batch endpoint, whose
+    sub-requests never pass through the middleware stack.  The request_id is
+    whatever is bound in structlog's contextvars when this is called.
+    """
+    if not getattr(settings, "SPEEDPY_API_ACCESS_LOG_ENABLED", False):
+        return
 
-        token_type, token_id, scopes = _resolve_token_meta(request)
-        user = getattr(request, "user", None)
-        if user and not user.is_authenticated:
-            user = None
+    if not request.path.startswith(_API_PATH_PREFIX):
+        return
 
-        ctx = structlog.contextvars.get_contextvars()
-        request_id = ctx.get("request_id", "")
-
-        ApiAccessLog.objects.create(
-            user=user,
-            token_type=token_type,
-            token_id=token_id,
-            scopes=scopes,
-            method=request.method,
-            path=request.path[:2048],
-            status_code=response.status_code,
-            ip_truncated=_truncate_ip(_get_client_ip(request)),
-            request_id=request_id,
-            user_agent=(request.META.get("HTTP_USER_AGENT", "") or "")[:512],
-        )
+    try:
+        _record(request, status_code)
+    except Exception:
+        _audit_logger.exception("audit_log_write_failed")
+
+
+def _record(request, status_code):
+    from usermodel.models import ApiAccessLog, _truncate_ip
+
+    token_type, token_id, scopes = _resolve_token_meta(request)
+    user = getattr(request, "user", None)
+    if user and not user.is_authenticated:
+        user = None
+
+    ctx = structlog.contextvars.get_contextvars()
+    request_id = ctx.get("request_id", "")
+
+    ApiAccessLog.objects.create(
+        user=user,
+        token_type=token_type,
+        token_id=token_id,
+        scopes=scopes,
+        method=request.method,
+        path=request.path[:2048],
+        status_code=status_code,
+        ip_truncated=_truncate_ip(_get_client_ip(request)),
+        request_id=request_id[:128],
+        user_agent=(request.META.get("HTTP_USER_AGENT", "") or "")[:512],
+    )
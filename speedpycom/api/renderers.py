@@ -0,0 +1,65 @@
+"""
+DRF renderer and parser backed by ``speedpycom.api.codec``.
+
+Drop-in replacements for ``JSONRenderer`` / ``JSONParser`` (same media type,
+same output bytes).  Anything the codec does not cover — ``; indent=``
+pretty-printing, non-default ``UNICODE_JSON`` / ``COMPACT_JSON`` /
+``STRICT_JSON``, a custom ``encoder_class``, non-UTF-8 request bodies — is
+handed to the DRF implementation unchanged.
+"""
+
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+from speedpycom.api import codec
+
+
+def _is_utf8(encoding):
+    try:
+        return codecs.lookup(encoding).name == "utf-8"
+    except LookupError:
+        return False
+
+
+class FastJSONRenderer(JSONRenderer):
+
+    def _uses_codec(self, accepted_media_type, renderer_context):
+        return (
+            self.compact
+            and self.strict
+            and not self.ensure_ascii
+            and self.encoder_class is encoders.JSONEncoder
+            and self.get_indent(accepted_media_type, renderer_context) is None
+        )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        renderer_context = renderer_context or {}
+        if not self._uses_codec(accepted_media_type, renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+        ret = codec.dumps(data)
+        # Same escaping as JSONRenderer: U+2028/U+2029 are valid JSON but not
+        # valid inside a JavaScript string literal.
+        if b"\xe2\x80" in ret:
+            ret = ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+        return ret
+
+
+class FastJSONParser(JSONParser):
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if not self.strict or not _is_utf8(encoding):
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return codec.loads(stream.read())
+        except ValueError as exc:
+            raise ParseError("JSON parse error - %s" % str(exc))
@@ -0,0 +1,434 @@
+"""
+Request timing: a ``Server-Timing`` header and per-route aggregates.
+
+``ServerTimingMiddleware`` samples ``SPEEDPY_SERVER_TIMING_SAMPLE_RATE`` of
+requests (all of them in DEBUG).  For a sampled request it measures:
+
+* ``db`` — query count and time, through ``connection.execute_wrapper`` on
+  every database alias;
+* ``cache`` — ``get`` / ``get_many`` hits and misses and their time, on every
+  configured cache;
+* ``auth``, ``throttle``, ``serialize`` and ``render`` — DRF's
+  ``perform_authentication``, ``check_throttles``, ``Serializer.data`` and
+  ``Response.rendered_content``;
+* ``view`` — from URL resolution until the response is back here (the view
+  and its rendering), and ``total`` — the whole middleware stack below this
+  one.
+
+and returns them as ``Server-Timing: db;dur=12.1;desc="7 queries", ...``, which
+browser dev tools and most HTTP clients display.  Unsampled requests run none
+of the hooks and pay one ``random()`` call.
+
+Sampled requests are also added to per-route aggregates (keyed by the URL
+pattern, so ``/api/v1/jobs/<uuid:job_id>/`` rather than one row per job).  Each
+process adds its aggregates to a Redis hash every
+``SPEEDPY_HTTP_METRICS_FLUSH_SECONDS``; ``GET /metrics/http/`` serves them as
+Prometheus text, including the ``request_id`` of the slowest sampled request
+per route so it can be looked up in the logs.  Sampled requests slower than
+``SPEEDPY_SLOW_REQUEST_MS`` are logged as ``slow_request`` with their timings.
+"""
+
+import contextvars
+import random
+import threading
+import time
+from contextlib import ExitStack
+
+import structlog
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections
+
+from speedpycom.metrics import get_client, label, number
+
+logger = structlog.get_logger(__name__)
+
+REDIS_KEY = "speedpy:http:metrics"
+SLOWEST_KEY = "speedpy:http:slowest"
+
+#: Phases reported in the header, in order; ``total`` is always last.
+PHASES = ("db", "cache", "auth", "throttle", "serialize", "render", "view")
+
+_current = contextvars.ContextVar("speedpy_request_timer", default=None)
+_MISSING = object()
+
+
+class RequestTimer:
+    """Timings for one sampled request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.durations = dict.fromkeys(PHASES, 0.0)
+        self.db_queries = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.total = 0.0
+        self.view_started = None
+        self._depth = dict.fromkeys(PHASES, 0)
+
+    def measure(self, phase, func, *args, **kwargs):
+        """Call ``func`` and add its duration to ``phase`` (outermost call only)."""
+        if self._depth[phase]:
+            return func(*args, **kwargs)
+        self._depth[phase] += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.durations[phase] += time.perf_counter() - start
+            self._depth[phase] -= 1
+
+    def measuring(self, phase):
+        return bool(self._depth[phase])
+
+    def header(self):
+        parts = []
+        for phase in PHASES:
+            duration = self.durations[phase] * 1000
+            if phase == "db":
+                parts.append(f'db;dur={duration:.1f};desc="{self.db_queries} queries"')
+            elif phase == "cache":
+                if self.cache_hits or self.cache_misses:
+                    parts.append(
+                        f'cache;dur={duration:.1f};'
+                        f'desc="{self.cache_hits} hits, {self.cache_misses} misses"'
+                    )
+            elif duration:
+                parts.append(f"{phase};dur={duration:.1f}")
+        parts.append(f"total;dur={self.total * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def current_timer():
+    """The active request's ``RequestTimer``, or None when not sampled."""
+    return _current.get()
+
+
+def detach_timer():
+    """Stop timing in the current context.
+
+    For threads started with a copy of a sampled request's context (the batch
+    endpoint's workers): ``RequestTimer`` is not thread-safe, and the threads'
+    time is already inside the request's own ``view`` phase.
+    """
+    _current.set(None)
+
+
+def timed(phase, func, *args, **kwargs):
+    """Call ``func``, adding its duration to ``phase`` of the sampled request."""
+    timer = _current.get()
+    if timer is None:
+        return func(*args, **kwargs)
+    return timer.measure(phase, func, *args, **kwargs)
+
+
+def _db_wrapper(timer):
+    def wrapper(execute, sql, params, many, context):
+        timer.db_queries += 1
+        return timer.measure("db", execute, sql, params, many, context)
+
+    return wrapper
+
+
+def _instrument_cache(stack, cache, timer):
+    """Count hits and misses on ``cache`` until ``stack`` closes.
+
+    Cache handles are per thread, so the patched methods are only ever seen
+    by this request.
+    """
+    get, get_many = cache.get, cache.get_many
+
+    def timed_get(key, default=None, version=None):
+        if timer.measuring("cache"):
+            # Backends whose get_many() loops over get(): counted there.
+            return get(key, default, version)
+        value = timer.measure("cache", get, key, _MISSING, version)
+        if value is _MISSING:
+            timer.cache_misses += 1
+            return default
+        timer.cache_hits += 1
+        return value
+
+    def timed_get_many(keys, version=None):
+        keys = list(keys)
+        found = timer.measure("cache", get_many, keys, version)
+        timer.cache_hits += len(found)
+        timer.cache_misses += len(keys) - len(found)
+        return found
+
+    cache.get, cache.get_many = timed_get, timed_get_many
+
+    def restore():
+        del cache.get, cache.get_many
+
+    stack.callback(restore)
+
+
+# ---------------------------------------------------------------------------
+# DRF hooks
+# ---------------------------------------------------------------------------
+
+_installed = False
+_install_lock = threading.Lock()
+
+
+def install_drf_hooks():
+    """Time DRF's authentication, throttling, serialization and rendering.
+
+    Wraps the four DRF methods once per process.  The wrappers only measure
+    while a sampled request is active and otherwise call straight through.
+    """
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        from rest_framework.response import Response
+        from rest_framework.serializers import BaseSerializer
+        from rest_framework.views import APIView
+
+        def wrap_method(cls, name, phase):
+            original = getattr(cls, name)
+
+            def method(self, *args, **kwargs):
+                return timed(phase, original, self, *args, **kwargs)
+
+            method.__wrapped__ = original
+            setattr(cls, name, method)
+
+        def wrap_property(cls, name, phase):
+            original = getattr(cls, name)
+            setattr(cls, name, property(lambda self: timed(phase, original.fget, self)))
+
+        wrap_method(APIView, "perform_authentication", "auth")
+        wrap_method(APIView, "check_throttles", "throttle")
+        wrap_property(BaseSerializer, "data", "serialize")
+        wrap_property(Response, "rendered_content", "render")
+        _installed = True
+
+
+# ---------------------------------------------------------------------------
+# Per-route aggregates
+# ---------------------------------------------------------------------------
+
+#: Summed per route; durations in seconds.
+FIELDS = (
+    "count", "errors", "total_seconds", "db_queries", "cache_hits", "cache_misses",
+    *(f"{phase}_seconds" for phase in PHASES),
+)
+
+
+class RouteRegistry:
+    """Per-process sums keyed by ``(method, route)``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sums = {}
+        self._slowest = {}
+        self._flushed_at = time.monotonic()
+
+    def record(self, method, route, status, timer, request_id):
+        key = (method, route)
+        with self._lock:
+            sums = self._sums.get(key)
+            if sums is None:
+                sums = self._sums[key] = dict.fromkeys(FIELDS, 0)
+            sums["count"] += 1
+            sums["errors"] += status >= 500
+            sums["total_seconds"] += timer.total
+            sums["db_queries"] += timer.db_queries
+            sums["cache_hits"] += timer.cache_hits
+            sums["cache_misses"] += timer.cache_misses
+            for phase in PHASES:
+                sums[f"{phase}_seconds"] += timer.durations[phase]
+            if request_id and timer.total > self._slowest.get(key, (0.0, ""))[0]:
+                self._slowest[key] = (timer.total, request_id)
+
+    def drain(self):
+        with self._lock:
+            sums, slowest = self._sums, self._slowest
+            self._sums, self._slowest = {}, {}
+            self._flushed_at = time.monotonic()
+        return sums, slowest
+
+    def copy(self):
+        with self._lock:
+            return (
+                {key: dict(sums) for key, sums in self._sums.items()},
+                dict(self._slowest),
+            )
+
+    def flush_due(self):
+        interval = getattr(settings, "SPEEDPY_HTTP_METRICS_FLUSH_SECONDS", 10)
+        return time.monotonic() - self._flushed_at >= interval
+
+
+routes = RouteRegistry()
+
+
+def _field(method, route, name):
+    return f"{method}\t{route}\t{name}"
+
+
+def flush():
+    """Add this process's route sums to Redis. Returns True if sent."""
+    client = get_client()
+    if client is None:
+        return False
+    sums, slowest = routes.drain()
+    if not sums:
+        return True
+    try:
+        current = {}
+        if slowest:
+            fields = [_field(method, route, "slowest") for method, route in slowest]
+            current = dict(zip(slowest, client.hmget(SLOWEST_KEY, fields)))
+        pipe = client.pipeline(transaction=False)
+        for (method, route), values in sums.items():
+            for name, value in values.items():
+                if not value:
+                    continue
+                if isinstance(value, float):
+                    pipe.hincrbyfloat(REDIS_KEY, _field(method, route, name), value)
+                else:
+                    pipe.hincrby(REDIS_KEY, _field(method, route, name), int(value))
+        for key, (seconds, request_id) in slowest.items():
+            # Not atomic across processes; a lost race only picks a close runner-up.
+            stored = current.get(key)
+            if stored is None or seconds > float(stored.decode().split("\t")[0]):
+                pipe.hset(SLOWEST_KEY, _field(*key, "slowest"), f"{seconds}\t{request_id}")
+        pipe.execute()
+    except Exception:
+        logger.warning("http_metrics_flush_failed", exc_info=True)
+        return False
+    return True
+
+
+def snapshot():
+    """``(sums, slowest)`` per ``(method, route)``, across processes via Redis."""
+    sums, slowest = routes.copy()
+    client = get_client()
+    if client is None:
+        return sums, slowest
+    try:
+        raw_sums = client.hgetall(REDIS_KEY)
+        raw_slowest = client.hgetall(SLOWEST_KEY)
+    except Exception:
+        logger.warning("http_metrics_read_failed", exc_info=True)
+        return sums, slowest
+    for field, value in raw_sums.items():
+        method, route, name = field.decode().split("\t")
+        if name not in FIELDS:
+            continue
+        values = sums.setdefault((method, route), dict.fromkeys(FIELDS, 0))
+        values[name] += float(value) if name.endswith("_seconds") else int(float(value))
+    for field, value in raw_slowest.items():
+        method, route, _ = field.decode().split("\t")
+        seconds, request_id = value.decode().split("\t")
+        if float(seconds) > slowest.get((method, route), (0.0, ""))[0]:
+            slowest[(method, route)] = (float(seconds), request_id)
+    return sums, slowest
+
+
+def render_prometheus():
+    sums, slowest = snapshot()
+    lines = []
+
+    def family(metric, kind, help_text, field):
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        for method, route in sorted(sums):
+            value = sums[(method, route)][field]
+            lines.append(
+                f'{metric}{{method="{method}",route="{label(route)}"}} {number(value)}'
+            )
+
+    family("speedpy_http_sampled_requests_total", "counter", "Sampled requests.", "count")
+    family("speedpy_http_sampled_errors_total", "counter", "Sampled requests answered 5xx.", "errors")
+    family("speedpy_http_request_seconds_total", "counter", "Time in the middleware stack.", "total_seconds")
+    family("speedpy_http_db_queries_total", "counter", "Database queries.", "db_queries")
+    family("speedpy_http_cache_hits_total", "counter", "Cache get hits.", "cache_hits")
+    family("speedpy_http_cache_misses_total", "counter", "Cache get misses.", "cache_misses")
+    lines.append("# HELP speedpy_http_phase_seconds_total Time per phase (db, cache, auth, ...).")
+    lines.append("# TYPE speedpy_http_phase_seconds_total counter")
+    for method, route in sorted(sums):
+        for phase in PHASES:
+            value = sums[(method, route)][f"{phase}_seconds"]
+            lines.append(
+                f'speedpy_http_phase_seconds_total{{method="{method}",route="{label(route)}",'
+                f'phase="{phase}"}} {number(float(value))}'
+            )
+    lines.append("# HELP speedpy_http_slowest_request_seconds Slowest sampled request per route.")
+    lines.append("# TYPE speedpy_http_slowest_request_seconds gauge")
+    for (method, route), (seconds, request_id) in sorted(slowest.items()):
+        lines.append(
+            f'speedpy_http_slowest_request_seconds{{method="{method}",route="{label(route)}",'
+            f'request_id="{label(request_id)}"}} {number(float(seconds))}'
+        )
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Middleware
+# ---------------------------------------------------------------------------
+
+def _route(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "unresolved"
+    return "/" + (match.route or match.view_name or "").lstrip("/")
+
+
+class ServerTimingMiddleware:
+    """
+    Add a ``Server-Timing`` header to sampled requests and record their
+    per-route timings.  Place it directly after ``RequestIDMiddleware`` so
+    ``total`` covers everything below it and the request_id is bound.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        install_drf_hooks()
+
+    def __call__(self, request):
+        rate = getattr(settings, "SPEEDPY_SERVER_TIMING_SAMPLE_RATE", 0.0)
+        if rate <= 0 or (rate < 1 and random.random() >= rate):
+            return self.get_response(request)
+
+        timer = RequestTimer()
+        token = _current.set(timer)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(_db_wrapper(timer)))
+                for alias in settings.CACHES:
+                    _instrument_cache(stack, caches[alias], timer)
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        finished = time.perf_counter()
+        timer.total = finished - timer.started
+        if timer.view_started is not None:
+            timer.durations["view"] = finished - timer.view_started
+
+        response["Server-Timing"] = timer.header()
+        request_id = structlog.contextvars.get_contextvars().get("request_id", "")
+        route = _route(request)
+        routes.record(request.method, route, response.status_code, timer, request_id)
+        if timer.total * 1000 >= getattr(settings, "SPEEDPY_SLOW_REQUEST_MS", 1000):
+            logger.warning(
+                "slow_request",
+                route=route,
+                method=request.method,
+                status=response.status_code,
+                total_ms=round(timer.total * 1000, 1),
+                db_queries=timer.db_queries,
+                **{f"{phase}_ms": round(timer.durations[phase] * 1000, 1) for phase in PHASES},
+            )
+        if routes.flush_due():
+            flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        timer = _current.get()
+        if timer is not None:
+            timer.view_started = time.perf_counter()
@@ -0,0 +1,18 @@
+"""
+End-to-end API load benchmarks against a seeded synthetic dataset.
+
+``dataset`` builds (and removes) a tenant population of configurable size —
+users, teams, memberships, webhook endpoints and deliveries, jobs and API
+access logs — plus one credential per auth method (PAT, JWT, OAuth2) for the
+benchmark principal.  ``runner`` drives the hot read endpoints with each of
+those credentials, in-process through the full middleware stack or over HTTP
+against a local gunicorn or uvicorn, and ``report`` turns the timings into a
+JSON document that can be diffed between releases::
+
+    python manage.py api_benchmark --output before.json
+    python manage.py api_benchmark --server gunicorn --workers 4 \\
+        --output after.json --compare before.json
+
+Everything runs against the configured database; no external service is
+needed.  The dataset is removed afterwards unless ``--keep-data`` is given.
+"""
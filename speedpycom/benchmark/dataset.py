@@ -0,0 +1,259 @@
+"""
+Synthetic benchmark dataset.
+
+Every row the benchmark creates is reachable from a user whose email ends in
+``@benchmark.invalid`` or from a team only those users belong to, so
+``clear_dataset`` can remove a previous run without touching real data.
+"""
+
+import random
+import secrets
+from datetime import timedelta
+
+import structlog
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+
+logger = structlog.get_logger(__name__)
+
+EMAIL_DOMAIN = "benchmark.invalid"
+TEAM_SLUG_PREFIX = "bench-"
+SCOPES = ("read:profile", "read:teams", "read:webhooks", "read:jobs")
+AUTH_METHODS = ("pat", "jwt", "oauth2")
+
+DEFAULTS = {
+    "users": 200,
+    "teams": 20,
+    "endpoints": 5,
+    "deliveries": 200,
+    "access_logs": 5000,
+    "jobs": 20,
+}
+
+_ACCESS_LOG_PATHS = (
+    "/api/v1/me/",
+    "/api/v1/teams/",
+    "/api/v1/webhooks/",
+    "/api/v1/products/",
+)
+
+
+class Dataset:
+    """Handles to the seeded rows the scenarios need."""
+
+    def __init__(self, principal, team, endpoint, job, pat_token, oauth2_token, params):
+        self.principal = principal
+        self.team = team
+        self.endpoint = endpoint
+        self.job = job
+        self.params = params
+        self._pat_token = pat_token
+        self._oauth2_token = oauth2_token
+
+    def authorization(self, method):
+        """``Authorization`` header value for ``method`` (one of ``AUTH_METHODS``).
+
+        JWTs are minted on each call, so a long run never outlives the access
+        token lifetime.
+        """
+        if method == "pat":
+            return f"Bearer {self._pat_token}"
+        if method == "oauth2":
+            return f"Bearer {self._oauth2_token}"
+        if method == "jwt":
+            from rest_framework_simplejwt.tokens import AccessToken
+
+            return f"Bearer {AccessToken.for_user(self.principal)}"
+        raise ValueError(f"Unknown auth method {method!r}; expected one of {AUTH_METHODS}.")
+
+    def counts(self):
+        from mainapp.models import AsyncJob, TeamMembership
+        from mainapp.models.webhooks import WebhookDelivery, WebhookEndpoint
+        from usermodel.models import ApiAccessLog
+
+        teams = benchmark_teams()
+        return {
+            "users": get_user_model().objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").count(),
+            "teams": teams.count(),
+            "memberships": TeamMembership.objects.filter(team__in=teams).count(),
+            "team_members": TeamMembership.objects.filter(team=self.team).count(),
+            "webhook_endpoints": WebhookEndpoint.objects.filter(team__in=teams).count(),
+            "webhook_deliveries": WebhookDelivery.objects.filter(endpoint__team__in=teams).count(),
+            "endpoint_deliveries": WebhookDelivery.objects.filter(endpoint=self.endpoint).count(),
+            "jobs": AsyncJob.objects.filter(owner=self.principal).count(),
+            "access_logs": ApiAccessLog.objects.filter(user__email__endswith=f"@{EMAIL_DOMAIN}").count(),
+        }
+
+
+def benchmark_teams():
+    """Teams a ``build_dataset`` run created.
+
+    The ``bench-`` slug alone proves nothing: owners choose their team's slug.
+    A benchmark team also has benchmark members and no one else.
+    """
+    from mainapp.models import Team, TeamMembership
+
+    benchmark_members = TeamMembership.objects.filter(user__email__endswith=f"@{EMAIL_DOMAIN}")
+    other_members = TeamMembership.objects.exclude(user__email__endswith=f"@{EMAIL_DOMAIN}")
+    return Team.objects.filter(
+        slug__startswith=TEAM_SLUG_PREFIX,
+        pk__in=benchmark_members.values("team"),
+    ).exclude(pk__in=other_members.values("team"))
+
+
+def build_dataset(seed=0, **params):
+    """Create the synthetic population and return a ``Dataset``.
+
+    ``params`` override ``DEFAULTS``.  Users after the first are spread
+    round-robin over the teams; the first user (the benchmark principal) owns
+    the first team, belongs to every other one, and holds the credentials.
+    """
+    from oauth2_provider.models import AccessToken, Application
+
+    from mainapp.models import AsyncJob, Team, TeamMembership
+    from mainapp.models.webhooks import WebhookDelivery, WebhookEndpoint
+    from mainapp.webhooks.events import WebhookEvent
+    from usermodel.models import ApiAccessLog, PersonalAccessToken
+
+    params = {**DEFAULTS, **{key: value for key, value in params.items() if value is not None}}
+    if params["users"] < 1 or params["teams"] < 1 or params["endpoints"] < 1:
+        raise ValueError("The dataset needs at least one user, team and webhook endpoint.")
+    rng = random.Random(seed)
+    now = timezone.now()
+    User = get_user_model()
+
+    with transaction.atomic():
+        users = []
+        for index in range(params["users"]):
+            user = User(
+                email=f"bench-{index}@{EMAIL_DOMAIN}",
+                first_name=f"Bench {index}",
+                last_name="User",
+            )
+            user.set_unusable_password()
+            users.append(user)
+        users = User.objects.bulk_create(users, batch_size=1000)
+        principal = users[0]
+
+        teams = Team.objects.bulk_create(
+            [Team(name=f"Bench team {index}", slug=f"{TEAM_SLUG_PREFIX}{index}") for index in range(params["teams"])]
+        )
+        memberships = [
+            TeamMembership(team=team, user=principal, role="owner" if index == 0 else "member")
+            for index, team in enumerate(teams)
+        ]
+        roles = ("admin", "member", "member", "viewer")
+        for index, user in enumerate(users[1:]):
+            memberships.append(
+                TeamMembership(team=teams[index % len(teams)], user=user, role=rng.choice(roles))
+            )
+        TeamMembership.objects.bulk_create(memberships, batch_size=1000)
+
+        events = [WebhookEvent.TEAM_MEMBER_ADDED, WebhookEvent.TEAM_INVITATION_CREATED]
+        endpoints = WebhookEndpoint.objects.bulk_create([
+            WebhookEndpoint(
+                team=team,
+                name=f"Bench hook {index}",
+                url=f"https://hooks{index}.{EMAIL_DOMAIN}/speedpy",
+                events=events,
+                secret=secrets.token_urlsafe(32),
+            )
+            for team in teams
+            for index in range(params["endpoints"])
+        ])
+        statuses = [choice for choice, _ in WebhookDelivery.Status.choices]
+        WebhookDelivery.objects.bulk_create(
+            (
+                WebhookDelivery(
+                    endpoint=endpoint,
+                    event_id=f"evt_{secrets.token_hex(16)}",
+                    event_type=events[index % len(events)],
+                    payload={"event_type": events[index % len(events)], "data": {"n": index}},
+                    status=rng.choice(statuses),
+                    attempts=rng.randint(1, 5),
+                    scheduled_at=now - timedelta(minutes=index),
+                    http_status_code=rng.choice((200, 200, 200, 500, 410)),
+                )
+                for endpoint in endpoints
+                for index in range(params["deliveries"])
+            ),
+            batch_size=1000,
+        )
+
+        AsyncJob.objects.bulk_create([
+            AsyncJob(
+                owner=principal,
+                job_type="demo",
+                status=AsyncJob.Status.SUCCEEDED,
+                progress_current=100,
+                progress_total=100,
+                result={"rows": index},
+            )
+            for index in range(max(params["jobs"] - 1, 0))
+        ])
+        polled_job = AsyncJob.objects.create(
+            owner=principal,
+            job_type="demo",
+            status=AsyncJob.Status.RUNNING,
+            progress_current=42,
+            progress_total=100,
+            message="Processing",
+        )
+
+        ApiAccessLog.objects.bulk_create(
+            (
+                ApiAccessLog(
+                    timestamp=now - timedelta(seconds=rng.randint(0, 30 * 86400)),
+                    user=rng.choice(users),
+                    token_type=rng.choice(AUTH_METHODS),
+                    method="GET",
+                    path=rng.choice(_ACCESS_LOG_PATHS),
+                    status_code=rng.choice((200, 200, 200, 304, 404)),
+                    ip_truncated="203.0.113.0",
+                )
+                for _ in range(params["access_logs"])
+            ),
+            batch_size=1000,
+        )
+
+        pat, pat_token = PersonalAccessToken.create_token(principal, "API benchmark", scopes=list(SCOPES))
+        application = Application.objects.create(
+            name="API benchmark",
+            user=principal,
+            client_type=Application.CLIENT_CONFIDENTIAL,
+            authorization_grant_type=Application.GRANT_AUTHORIZATION_CODE,
+            redirect_uris=f"https://{EMAIL_DOMAIN}/callback",
+        )
+        oauth2_token = AccessToken.objects.create(
+            user=principal,
+            application=application,
+            token=secrets.token_hex(32),
+            expires=now + timedelta(days=1),
+            scope=" ".join(SCOPES),
+        )
+
+    logger.info("benchmark_dataset_built", **params)
+    return Dataset(
+        principal=principal,
+        team=teams[0],
+        endpoint=endpoints[0],
+        job=polled_job,
+        pat_token=pat_token,
+        oauth2_token=oauth2_token.token,
+        params={**params, "seed": seed},
+    )
+
+
+def clear_dataset():
+    """Delete everything a previous ``build_dataset`` created. Returns the number of users removed."""
+    users = get_user_model().objects.filter(email__endswith=f"@{EMAIL_DOMAIN}")
+    with transaction.atomic():
+        # One at a time: Team.delete() enforces the billing guard. Before the
+        # users, whose memberships are what identify the teams.
+        for team in benchmark_teams():
+            team.delete()
+        count = users.count()
+        users.delete()
+    logger.info("benchmark_dataset_cleared", users=count)
+    return count
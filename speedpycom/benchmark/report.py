@@ -0,0 +1,119 @@
+"""
+The benchmark's JSON report and the diff between two of them.
+
+A report records what was measured (``environment`` and ``dataset``) next
+to the numbers (``results``, one entry per endpoint and auth method), so two
+reports are only worth comparing when the first two sections match.
+"""
+
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone as dt_timezone
+
+import django
+from django.conf import settings
+from django.db import connection
+
+FORMAT_VERSION = 1
+
+
+def _git_revision():
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=settings.BASE_DIR,
+            capture_output=True,
+            text=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def build_report(results, dataset_params, dataset_counts, run_options):
+    """Assemble the report dict.
+
+    ``results`` is a list of ``{"endpoint", "auth", "path", **summary}``.
+    """
+    from speedpycom.api import codec
+
+    return {
+        "format": FORMAT_VERSION,
+        "generated_at": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+        "environment": {
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "json_codec": codec.backend(),
+            **run_options,
+        },
+        "dataset": {"params": dataset_params, "counts": dataset_counts},
+        "results": sorted(results, key=lambda row: (row["endpoint"], row["auth"])),
+    }
+
+
+def write_report(report, path):
+    with open(path, "w") as fh:
+        json.dump(report, fh, indent=2, sort_keys=True)
+        fh.write("\n")
+
+
+def load_report(path):
+    with open(path) as fh:
+        report = json.load(fh)
+    if report.get("format") != FORMAT_VERSION:
+        raise ValueError(f"{path}: unsupported report format {report.get('format')!r}.")
+    return report
+
+
+def _change(before, after):
+    if before in (None, 0) or after is None:
+        return None
+    return round((after - before) / before * 100, 1)
+
+
+def compare(baseline, current):
+    """Per endpoint and auth method: requests/s and p95 before, after and % change.
+
+    Rows present in only one report have ``None`` on the other side.
+    """
+    def index(report):
+        return {(row["endpoint"], row["auth"]): row for row in report["results"]}
+
+    before, after = index(baseline), index(current)
+    rows = []
+    for key in sorted(before.keys() | after.keys()):
+        old, new = before.get(key), after.get(key)
+        old_rps = old["rps"] if old else None
+        new_rps = new["rps"] if new else None
+        old_p95 = old["latency_ms"]["p95"] if old else None
+        new_p95 = new["latency_ms"]["p95"] if new else None
+        rows.append({
+            "endpoint": key[0],
+            "auth": key[1],
+            "rps_before": old_rps,
+            "rps_after": new_rps,
+            "rps_change_pct": _change(old_rps, new_rps),
+            "p95_ms_before": old_p95,
+            "p95_ms_after": new_p95,
+            "p95_change_pct": _change(old_p95, new_p95),
+        })
+    return rows
+
+
+def mismatched_context(baseline, current):
+    """Names of the environment and dataset settings that differ between the reports."""
+    differences = []
+    for section in ("environment", "dataset"):
+        old, new = baseline.get(section, {}), current.get(section, {})
+        if section == "dataset":
+            old, new = old.get("params", {}), new.get("params", {})
+        for key in sorted(old.keys() | new.keys()):
+            if key in ("git_revision",):
+                continue
+            if old.get(key) != new.get(key):
+                differences.append(f"{section}.{key}")
+    return differences
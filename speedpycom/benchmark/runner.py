@@ -0,0 +1,246 @@
+"""
+Drive API endpoints and time every request.
+
+Two transports share one interface (``session()`` returning an object with
+``get(path, authorization) -> status``):
+
+* ``InProcessTransport`` sends requests through Django's test ``Client``, so
+  they pass through the full middleware stack without a socket.  Each worker
+  thread gets its own database connection.
+* ``HTTPTransport`` talks HTTP/1.1 keep-alive to a server, either one started
+  by ``local_server`` (gunicorn or uvicorn on 127.0.0.1) or any ``--url``.
+"""
+
+import http.client
+import importlib.util
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.db import connections
+
+SCENARIOS = {
+    "me": "/api/v1/me/",
+    "team_list": "/api/v1/teams/",
+    "team_detail": "/api/v1/teams/{team}/",
+    "team_members": "/api/v1/teams/{team}/members/",
+    "webhook_list": "/api/v1/teams/{team}/webhooks/",
+    "webhook_deliveries": "/api/v1/teams/{team}/webhooks/{endpoint}/deliveries/",
+    "job_status": "/api/v1/jobs/{job}/",
+}
+
+SERVERS = ("gunicorn", "uvicorn")
+PERCENTILES = (50, 90, 95, 99)
+
+
+def site_host():
+    """A ``Host`` header value ``ALLOWED_HOSTS`` accepts."""
+    if settings.SITE_URL:
+        return urlsplit(settings.SITE_URL).netloc
+    return next((h.lstrip(".") for h in settings.ALLOWED_HOSTS if h != "*"), "localhost")
+
+
+def scenario_paths(dataset, names=None):
+    """``[(name, path)]`` for ``names`` (default: all scenarios) against ``dataset``."""
+    ids = {"team": dataset.team.pk, "endpoint": dataset.endpoint.pk, "job": dataset.job.pk}
+    return [(name, SCENARIOS[name].format(**ids)) for name in (names or SCENARIOS)]
+
+
+class _ClientSession:
+
+    def __init__(self, host):
+        from django.test import Client
+
+        self.client = Client(raise_request_exception=False, HTTP_HOST=host)
+
+    def get(self, path, authorization):
+        response = self.client.get(path, HTTP_AUTHORIZATION=authorization, HTTP_ACCEPT="application/json")
+        return response.status_code
+
+    def close(self):
+        pass
+
+
+class InProcessTransport:
+    name = "inprocess"
+
+    def __init__(self, host=None):
+        self.host = host or site_host()
+
+    def session(self):
+        return _ClientSession(self.host)
+
+
+class _HTTPSession:
+
+    def __init__(self, base_url, host):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.host = host or parts.netloc
+        self.connection = connection_class(parts.hostname, parts.port, timeout=30)
+        self.prefix = parts.path.rstrip("/")
+
+    def get(self, path, authorization):
+        headers = {"Host": self.host, "Accept": "application/json"}
+        if authorization:
+            headers["Authorization"] = authorization
+        try:
+            self.connection.request("GET", self.prefix + path, headers=headers)
+            response = self.connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException):
+            # Reconnect on the next request; count this one as an error.
+            self.connection.close()
+            return "error"
+        return response.status
+
+    def close(self):
+        self.connection.close()
+
+
+class HTTPTransport:
+    name = "http"
+
+    def __init__(self, base_url, host=None):
+        self.base_url = base_url
+        self.host = host
+
+    def session(self):
+        return _HTTPSession(self.base_url, self.host)
+
+
+@contextmanager
+def local_server(kind, port, workers):
+    """Run gunicorn or uvicorn on 127.0.0.1:``port`` until the block exits."""
+    if kind not in SERVERS:
+        raise ValueError(f"Unknown server {kind!r}; expected one of {SERVERS}.")
+    if importlib.util.find_spec(kind) is None:
+        raise RuntimeError(f"{kind} is not installed in this environment.")
+    if kind == "gunicorn":
+        command = [
+            sys.executable, "-m", "gunicorn", "project.wsgi",
+            "--bind", f"127.0.0.1:{port}", "--workers", str(workers), "--log-level", "warning",
+        ]
+    else:
+        command = [
+            sys.executable, "-m", "uvicorn", "project.asgi:application",
+            "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers), "--log-level", "warning",
+        ]
+    base_url = f"http://127.0.0.1:{port}"
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(command, env=os.environ.copy(), stderr=stderr)
+        try:
+            _wait_until_ready(process, base_url, stderr)
+            yield base_url
+        finally:
+            process.terminate()
+            try:
+                process.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                process.kill()
+                process.wait()
+
+
+def _wait_until_ready(process, base_url, stderr, timeout=30):
+    session = _HTTPSession(base_url, site_host())
+    deadline = time.monotonic() + timeout
+    try:
+        while time.monotonic() < deadline:
+            if process.poll() is not None:
+                stderr.seek(0)
+                raise RuntimeError(
+                    f"Server exited with code {process.returncode}: "
+                    f"{stderr.read().decode(errors='replace')[-2000:]}"
+                )
+            if session.get("/api/v1/health/", None) != "error":
+                return
+            time.sleep(0.2)
+    finally:
+        session.close()
+    raise RuntimeError(f"Server did not answer on {base_url} within {timeout}s.")
+
+
+def _work(session, path, authorization, count, close_connection=False):
+    latencies = []
+    statuses = Counter()
+    try:
+        for _ in range(count):
+            started = time.perf_counter()
+            status = session.get(path, authorization)
+            latencies.append(time.perf_counter() - started)
+            statuses[str(status)] += 1
+    finally:
+        session.close()
+        if close_connection:
+            # Worker threads opened their own database connection.
+            connections.close_all()
+    return latencies, statuses
+
+
+def run_scenario(transport, path, authorization, requests, concurrency=1, warmup=0):
+    """Send ``requests`` GETs to ``path`` from ``concurrency`` workers; return a summary.
+
+    ``warmup`` requests go first and are not timed.  With one worker the
+    requests run on the calling thread (and its database connection).
+    """
+    if warmup:
+        _work(transport.session(), path, authorization, warmup)
+
+    concurrency = max(1, min(concurrency, requests))
+    started = time.perf_counter()
+    if concurrency == 1:
+        outcomes = [_work(transport.session(), path, authorization, requests)]
+    else:
+        shares = [
+            requests // concurrency + (1 if index < requests % concurrency else 0)
+            for index in range(concurrency)
+        ]
+        sessions = [transport.session() for _ in shares]
+        in_process = isinstance(transport, InProcessTransport)
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            outcomes = list(pool.map(
+                lambda args: _work(*args, close_connection=in_process),
+                [(session, path, authorization, share) for session, share in zip(sessions, shares)],
+            ))
+    wall = time.perf_counter() - started
+
+    latencies = [value for worker_latencies, _ in outcomes for value in worker_latencies]
+    statuses = Counter()
+    for _, worker_statuses in outcomes:
+        statuses.update(worker_statuses)
+    return summarize(latencies, statuses, wall)
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank ``q``-th percentile of an ascending list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(latencies, statuses, wall):
+    ordered = sorted(latencies)
+    milliseconds = {
+        "min": ordered[0] * 1000 if ordered else None,
+        "mean": sum(ordered) / len(ordered) * 1000 if ordered else None,
+        **{f"p{q}": percentile(ordered, q) * 1000 if ordered else None for q in PERCENTILES},
+        "max": ordered[-1] * 1000 if ordered else None,
+    }
+    errors = sum(count for status, count in statuses.items() if not status.startswith("2"))
+    return {
+        "requests": len(ordered),
+        "errors": errors,
+        "status_counts": dict(sorted(statuses.items())),
+        "duration_s": round(wall, 4),
+        "rps": round(len(ordered) / wall, 2) if wall else None,
+        "latency_ms": {key: round(value, 3) if value is not None else None for key, value in milliseconds.items()},
+    }
@@ -0,0 +1,200 @@
+"""Load-benchmark the hot API endpoints under PAT, JWT and OAuth2 auth.
+
+Seeds a synthetic dataset (see ``speedpycom.benchmark.dataset``), sends
+``--requests`` timed GETs per endpoint and auth method, prints requests/s and
+latency percentiles, and removes the dataset again:
+
+    python manage.py api_benchmark --output before.json
+    python manage.py api_benchmark --users 2000 --teams 100 --deliveries 1000
+    python manage.py api_benchmark --server gunicorn --workers 4 --concurrency 8
+    python manage.py api_benchmark --url http://127.0.0.1:8000 --auth pat
+    python manage.py api_benchmark --output after.json --compare before.json
+
+``inprocess`` (the default) calls Django without a socket; ``gunicorn`` and
+``uvicorn`` start a local server on ``--port`` against the same database.
+Reports are only comparable when their environment and dataset match, which
+``--compare`` checks.  Run against a development database: the API rate
+limits apply, so use the default dummy cache (no ``CACHE_URL``) or expect 429s
+in the error column.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from speedpycom.benchmark import dataset as bench_dataset
+from speedpycom.benchmark import report as bench_report
+from speedpycom.benchmark import runner
+
+
+def _format(value, suffix=""):
+    return "-" if value is None else f"{value:g}{suffix}"
+
+
+class Command(BaseCommand):
+    help = "Measure requests/s and latency percentiles of the API against a seeded dataset."
+
+    def add_arguments(self, parser):
+        dataset = parser.add_argument_group("dataset")
+        for name, default in bench_dataset.DEFAULTS.items():
+            dataset.add_argument(
+                f"--{name.replace('_', '-')}",
+                dest=name,
+                type=int,
+                default=default,
+                help=f"Default {default}.",
+            )
+        dataset.add_argument("--seed", type=int, default=0)
+        dataset.add_argument(
+            "--keep-data",
+            action="store_true",
+            help="Leave the dataset in place after the run (the next run replaces it).",
+        )
+
+        run = parser.add_argument_group("run")
+        run.add_argument(
+            "--endpoint",
+            action="append",
+            dest="scenarios",
+            choices=list(runner.SCENARIOS),
+            help="Endpoint to benchmark; repeat for several. Defaults to all.",
+        )
+        run.add_argument(
+            "--auth",
+            action="append",
+            dest="auth_methods",
+            choices=bench_dataset.AUTH_METHODS,
+            help="Auth method to benchmark; repeat for several. Defaults to all.",
+        )
+        run.add_argument("--requests", type=int, default=200, help="Timed requests per endpoint and auth method.")
+        run.add_argument("--warmup", type=int, default=20, help="Untimed requests sent first.")
+        run.add_argument("--concurrency", type=int, default=1, help="Parallel client workers.")
+        run.add_argument("--server", choices=("inprocess", *runner.SERVERS), default="inprocess")
+        run.add_argument("--workers", type=int, default=2, help="Server worker processes (gunicorn/uvicorn).")
+        run.add_argument("--port", type=int, default=8765, help="Port for the local server.")
+        run.add_argument("--url", help="Benchmark an already running server instead.")
+
+        output = parser.add_argument_group("output")
+        output.add_argument("--output", help="Write the JSON report to this file.")
+        output.add_argument("--compare", help="Print the change against this earlier JSON report.")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 1:
+            raise CommandError("--requests must be at least 1.")
+        baseline = None
+        if options["compare"]:
+            try:
+                baseline = bench_report.load_report(options["compare"])
+            except (OSError, ValueError) as exc:
+                raise CommandError(str(exc))
+
+        removed = bench_dataset.clear_dataset()
+        if removed:
+            self.stdout.write(f"Removed a previous benchmark dataset ({removed} users).")
+        params = {name: options[name] for name in bench_dataset.DEFAULTS}
+        try:
+            data = bench_dataset.build_dataset(seed=options["seed"], **params)
+        except ValueError as exc:
+            raise CommandError(str(exc))
+        counts = data.counts()
+        self.stdout.write("Dataset: " + ", ".join(f"{key}={value}" for key, value in counts.items()))
+
+        try:
+            results = self._run(data, options)
+        except RuntimeError as exc:
+            raise CommandError(str(exc))
+        finally:
+            if not options["keep_data"]:
+                bench_dataset.clear_dataset()
+
+        report = bench_report.build_report(
+            results,
+            data.params,
+            counts,
+            {
+                "server": "url" if options["url"] else options["server"],
+                "workers": None if options["server"] == "inprocess" or options["url"] else options["workers"],
+                "concurrency": options["concurrency"],
+                "requests": options["requests"],
+                "warmup": options["warmup"],
+            },
+        )
+        self._table(report["results"])
+        if options["output"]:
+            bench_report.write_report(report, options["output"])
+            self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}."))
+        if baseline is not None:
+            self._comparison(baseline, report)
+
+        failed = [row for row in report["results"] if row["errors"]]
+        if failed:
+            self.stderr.write(self.style.WARNING(
+                f"{len(failed)} run(s) had non-2xx responses; see status_counts in the report."
+            ))
+
+    def _run(self, data, options):
+        scenarios = runner.scenario_paths(data, options["scenarios"])
+        auth_methods = options["auth_methods"] or bench_dataset.AUTH_METHODS
+        if options["url"]:
+            return self._run_all(runner.HTTPTransport(options["url"], runner.site_host()), data, scenarios, auth_methods, options)
+        if options["server"] == "inprocess":
+            return self._run_all(runner.InProcessTransport(), data, scenarios, auth_methods, options)
+        with runner.local_server(options["server"], options["port"], options["workers"]) as base_url:
+            self.stdout.write(f"Started {options['server']} on {base_url} ({options['workers']} workers).")
+            return self._run_all(runner.HTTPTransport(base_url, runner.site_host()), data, scenarios, auth_methods, options)
+
+    def _run_all(self, transport, data, scenarios, auth_methods, options):
+        results = []
+        for name, path in scenarios:
+            for method in auth_methods:
+                summary = runner.run_scenario(
+                    transport,
+                    path,
+                    data.authorization(method),
+                    options["requests"],
+                    concurrency=options["concurrency"],
+                    warmup=options["warmup"],
+                )
+                results.append({"endpoint": name, "auth": method, "path": path, **summary})
+        return results
+
+    def _write_rows(self, header, rows):
+        widths = [max(len(row[i]) for row in (header, *rows)) for i in range(len(header))]
+        for row in (header, *rows):
+            self.stdout.write("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
+
+    def _table(self, results):
+        header = ("endpoint", "auth", "req/s", "p50", "p90", "p95", "p99", "max", "errors")
+        rows = []
+        for row in results:
+            latency = row["latency_ms"]
+            rows.append((
+                row["endpoint"],
+                row["auth"],
+                _format(row["rps"]),
+                *(_format(latency[key], "ms") for key in ("p50", "p90", "p95", "p99", "max")),
+                str(row["errors"]),
+            ))
+        self._write_rows(header, rows)
+
+    def _comparison(self, baseline, report):
+        mismatched = bench_report.mismatched_context(baseline, report)
+        if mismatched:
+            self.stderr.write(self.style.WARNING(
+                "The reports were measured differently (" + ", ".join(mismatched) + "); "
+                "read the comparison with care."
+            ))
+        header = ("endpoint", "auth", "req/s before", "req/s after", "change", "p95 before", "p95 after", "change")
+        rows = [
+            (
+                row["endpoint"],
+                row["auth"],
+                _format(row["rps_before"]),
+                _format(row["rps_after"]),
+                _format(row["rps_change_pct"], "%"),
+                _format(row["p95_ms_before"], "ms"),
+                _format(row["p95_ms_after"], "ms"),
+                _format(row["p95_change_pct"], "%"),
+            )
+            for row in bench_report.compare(baseline, report)
+        ]
+        self.stdout.write("")
+        self._write_rows(header, rows)
@@ -0,0 +1,113 @@
+"""Compare the API JSON codec against DRF's stock renderer on live endpoints.
+
+Calls each GET endpoint in-process as the given user, renders the response
+data with both ``JSONRenderer`` and ``FastJSONRenderer``, fails if the bytes
+differ, and reports render and parse timings for each:
+
+    python manage.py benchmark_json --user owner@example.com
+    python manage.py benchmark_json --user owner@example.com \\
+        --path /api/v1/teams/ --iterations 2000
+
+Without ``--path`` it benchmarks the user's profile, team list, and the first
+team's detail, members and webhook endpoints.
+"""
+
+import io
+import timeit
+from urllib.parse import urlsplit
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.urls import Resolver404, resolve
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from speedpycom.api import codec
+from speedpycom.api.renderers import FastJSONParser, FastJSONRenderer
+from speedpycom.benchmark.runner import site_host
+
+
+class Command(BaseCommand):
+    help = "Prove the fast JSON codec is byte-identical on API endpoints, and time it."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--user", required=True, help="Email of the user to call the API as.")
+        parser.add_argument(
+            "--path",
+            action="append",
+            dest="paths",
+            help="API path to benchmark; repeat for several. Defaults to a standard set.",
+        )
+        parser.add_argument("--iterations", type=int, default=500)
+
+    def handle(self, *args, **options):
+        try:
+            user = get_user_model().objects.get(email__iexact=options["user"])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"No user with email {options['user']!r}.")
+
+        paths = options["paths"] or self._default_paths(user)
+        iterations = options["iterations"]
+        self.stdout.write(f"Codec backend: {codec.backend()}, {iterations} iterations per payload")
+
+        mismatches = []
+        for path in paths:
+            data = self._fetch(user, path)
+            expected = JSONRenderer().render(data)
+            actual = FastJSONRenderer().render(data)
+            if actual != expected:
+                mismatches.append(path)
+                self.stderr.write(self.style.ERROR(f"{path}: output differs"))
+                continue
+
+            timings = [
+                timeit.timeit(lambda r=renderer: r.render(data), number=iterations)
+                for renderer in (JSONRenderer(), FastJSONRenderer())
+            ] + [
+                timeit.timeit(lambda p=parser: p.parse(io.BytesIO(expected)), number=iterations)
+                for parser in (JSONParser(), FastJSONParser())
+            ]
+            stock_render, fast_render, stock_parse, fast_parse = (
+                t / iterations * 1e6 for t in timings
+            )
+            self.stdout.write(
+                f"{path}: {len(expected)} bytes identical; "
+                f"render {stock_render:.1f}us -> {fast_render:.1f}us "
+                f"({stock_render / fast_render:.1f}x), "
+                f"parse {stock_parse:.1f}us -> {fast_parse:.1f}us "
+                f"({stock_parse / fast_parse:.1f}x)"
+            )
+
+        if mismatches:
+            raise CommandError(f"{len(mismatches)} endpoint(s) rendered differently.")
+        self.stdout.write(self.style.SUCCESS(f"{len(paths)} endpoint(s) byte-identical."))
+
+    def _default_paths(self, user):
+        from mainapp.models import TeamMembership
+
+        paths = ["/api/v1/me/", "/api/v1/teams/", "/api/v1/webhooks/"]
+        team_id = (
+            TeamMembership.objects.filter(user=user, team__is_active=True)
+            .values_list("team_id", flat=True)
+            .first()
+        )
+        if team_id:
+            paths += [
+                f"/api/v1/teams/{team_id}/",
+                f"/api/v1/teams/{team_id}/members/",
+                f"/api/v1/teams/{team_id}/webhooks/",
+            ]
+        return paths
+
+    def _fetch(self, user, path):
+        try:
+            match = resolve(urlsplit(path).path)
+        except Resolver404:
+            raise CommandError(f"{path}: no such URL.")
+        request = APIRequestFactory().get(path, HTTP_HOST=site_host())
+        force_authenticate(request, user=user)
+        response = match.func(request, *match.args, **match.kwargs)
+        if response.status_code != 200 or not hasattr(response, "data"):
+            raise CommandError(f"{path}: expected a 200 API response, got {response.status_code}.")
+        return response.data
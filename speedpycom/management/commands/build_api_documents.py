@@ -0,0 +1,61 @@
+"""Render the OpenAPI schema and the integration manifest ahead of time.
+
+Each web process renders these once on first use (or at startup, see
+``SPEEDPY_API_DOCUMENTS_WARM_ON_STARTUP``); this command does the same work up
+front so a broken schema fails the release instead of the first agent that
+asks for it. ``--output-dir`` also writes the bytes and their gzip copies, for
+publishing the documents from a CDN or static host:
+
+    python manage.py build_api_documents
+    python manage.py build_api_documents --output-dir build/api
+"""
+
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from speedpycom.api.documents import warm_documents
+
+_FILENAMES = {
+    "schema application/vnd.oai.openapi": "openapi.yaml",
+    "schema application/vnd.oai.openapi+json": "openapi.json",
+    "manifest": "speedpy.json",
+}
+
+
+class Command(BaseCommand):
+    help = "Precompute the OpenAPI schema and integration manifest."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--output-dir",
+            default=None,
+            help="Also write each document (and a .gz copy) to this directory.",
+        )
+
+    def handle(self, *args, **options):
+        if not settings.SITE_URL:
+            self.stdout.write(
+                self.style.WARNING(
+                    "SITE_URL is not set: the manifest depends on the request "
+                    "host and is rendered per host on first request."
+                )
+            )
+        documents = warm_documents(settings.SITE_URL)
+
+        output_dir = Path(options["output_dir"]) if options["output_dir"] else None
+        if output_dir:
+            output_dir.mkdir(parents=True, exist_ok=True)
+
+        for name, document in documents.items():
+            self.stdout.write(
+                f"{name}: {len(document.content)} bytes, "
+                f"{len(document.gzipped)} gzipped, ETag {document.etag}"
+            )
+            filename = _FILENAMES.get(name)
+            if output_dir and filename:
+                (output_dir / filename).write_bytes(document.content)
+                (output_dir / f"{filename}.gz").write_bytes(document.gzipped)
+
+        self.stdout.write(self.style.SUCCESS(f"Rendered {len(documents)} document(s)."))
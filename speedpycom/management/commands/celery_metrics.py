@@ -0,0 +1,78 @@
+"""Print Celery task telemetry collected by ``speedpycom.task_metrics``.
+
+One row per task and queue: runs by outcome, and p50 / p95 / max-bucket queue
+wait and runtime.  Long waits on a queue with short runtimes mean its worker
+needs more concurrency; long runtimes mean the prefetch should stay at 1:
+
+    python manage.py celery_metrics
+    python manage.py celery_metrics --queue webhooks
+    python manage.py celery_metrics --format prometheus
+    python manage.py celery_metrics --reset   # start a fresh measurement window
+
+Quantiles are bucket upper bounds (see ``BUCKETS``), so read them as "under".
+"""
+
+from django.core.management.base import BaseCommand
+
+from speedpycom import task_metrics
+
+
+def _seconds(value):
+    if value is None:
+        return "-"
+    if value == float("inf"):
+        return f">{task_metrics.BUCKETS[-1]}s"
+    return f"{value:g}s"
+
+
+class Command(BaseCommand):
+    help = "Show Celery queue-wait and runtime telemetry per task and queue."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--queue", help="Only show tasks seen on this queue.")
+        parser.add_argument("--format", choices=("table", "prometheus"), default="table")
+        parser.add_argument(
+            "--reset",
+            action="store_true",
+            help="Clear the collected numbers after printing them.",
+        )
+
+    def handle(self, *args, **options):
+        stats = task_metrics.snapshot()
+        if options["queue"]:
+            stats = {key: value for key, value in stats.items() if key[1] == options["queue"]}
+
+        if options["format"] == "prometheus":
+            self.stdout.write(task_metrics.render_prometheus(stats), ending="")
+        elif not stats:
+            self.stdout.write("No task runs recorded yet.")
+        else:
+            self._table(stats)
+
+        if options["reset"]:
+            task_metrics.reset()
+            self.stdout.write(self.style.WARNING("Task metrics reset."))
+
+    def _table(self, stats):
+        header = (
+            "task", "queue", "ok", "failed", "retried",
+            "wait p50", "wait p95", "run p50", "run p95", "run avg",
+        )
+        rows = []
+        for (task, queue), item in sorted(stats.items(), key=lambda kv: (kv[0][1], kv[0][0])):
+            runtime = item.runtime
+            rows.append((
+                task,
+                queue,
+                str(item.outcomes["succeeded"]),
+                str(item.outcomes["failed"]),
+                str(item.outcomes["retried"]),
+                _seconds(item.wait.quantile(0.5)),
+                _seconds(item.wait.quantile(0.95)),
+                _seconds(runtime.quantile(0.5)),
+                _seconds(runtime.quantile(0.95)),
+                f"{runtime.sum / runtime.count:.3f}s" if runtime.count else "-",
+            ))
+        widths = [max(len(row[i]) for row in (header, *rows)) for i in range(len(header))]
+        for row in (header, *rows):
+            self.stdout.write("  ".join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip())
@@ -0,0 +1,61 @@
+"""
+Shared plumbing for the ``/metrics/`` endpoints.
+
+Each web and worker process keeps its own numbers and adds them into a Redis
+hash now and then (``speedpycom.task_metrics``, ``speedpycom.api.timing``), so
+the endpoints report every process, not just the one that served the scrape.
+Without ``SPEEDPY_METRICS_REDIS_URL`` (defaults to ``REDIS_URL``) each process
+only sees its own numbers.
+
+The endpoints are off (404) unless ``SPEEDPY_METRICS_TOKEN`` is set; scrapers
+send it as ``Authorization: Bearer <token>``.
+"""
+
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_clients = {}
+
+
+def redis_url():
+    return getattr(settings, "SPEEDPY_METRICS_REDIS_URL", None)
+
+
+def get_client():
+    """A process-wide Redis client, or None when not configured."""
+    url = redis_url()
+    if not url:
+        return None
+    if url not in _clients:
+        import redis
+
+        _clients[url] = redis.Redis.from_url(url)
+    return _clients[url]
+
+
+def label(value):
+    """Escape ``value`` for use inside a Prometheus label."""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def number(value):
+    """Format ``value`` as a Prometheus sample value."""
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def metrics_response(request, render):
+    """Check the scrape token, then return ``render()`` as Prometheus text."""
+    token = getattr(settings, "SPEEDPY_METRICS_TOKEN", "")
+    if not token:
+        raise Http404()
+    scheme, _, supplied = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not constant_time_compare(supplied, token):
+        response = HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+        response["WWW-Authenticate"] = 'Bearer realm="metrics"'
+        return response
+    return HttpResponse(render(), content_type=PROMETHEUS_CONTENT_TYPE)
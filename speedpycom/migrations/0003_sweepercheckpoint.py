@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 02:02
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('speedpycom', '0002_suppressedemail_emailevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SweeperCheckpoint',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('position', models.CharField(blank=True, max_length=64)),
+                ('last_report', models.JSONField(blank=True, default=dict)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+    ]
@@ -1,5 +1,6 @@
 from .base import BaseModel
 from .email_events import EmailEvent, SuppressedEmail
 from .idempotency import IdempotencyRecord
+from .sweeper import SweeperCheckpoint
 
-__all__ = ['BaseModel', 'EmailEvent', 'IdempotencyRecord', 'SuppressedEmail']
+__all__ = ['BaseModel', 'EmailEvent', 'IdempotencyRecord', 'SuppressedEmail', 'SweeperCheckpoint']
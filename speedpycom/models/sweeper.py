@@ -0,0 +1,18 @@
+from django.db import models
+
+from .base import BaseModel
+
+
+class SweeperCheckpoint(BaseModel):
+    """Where a housekeeping sweeper stopped, so its next run resumes there."""
+
+    name = models.CharField(max_length=100, unique=True)
+    # Primary key of the last row handled, as a string. Empty between passes.
+    position = models.CharField(max_length=64, blank=True)
+    last_report = models.JSONField(default=dict, blank=True)
+
+    class Meta:
+        ordering = ["name"]
+
+    def __str__(self):
+        return self.name
@@ -0,0 +1,166 @@
+"""Chunked, resumable housekeeping for periodic tasks.
+
+A beat task that loads every due row and deletes them one ``delete()`` at a
+time is fine until the day there is a backlog — after downtime, or the first
+run on a large table — and then it holds the whole result set in memory and
+runs for hours. A :class:`Sweeper` walks the rows in primary-key order
+instead, one batch at a time:
+
+* each batch is selected by ``queryset()`` (the predicate) and handled by
+  ``process_batch(pks)``, by default a single ``DELETE`` that re-applies the
+  predicate, so a row that changed since it was selected is left alone;
+* after each batch the position is written to a :class:`SweeperCheckpoint`
+  row in the same transaction, so a run that is killed or stops early resumes
+  where it left off rather than starting over;
+* a run stops once ``time_budget`` seconds have passed. The task then queues
+  itself again (see :func:`run_sweep`), which puts it behind whatever else is
+  waiting on the housekeeping queue instead of in front of it;
+* every batch logs ``sweeper_batch`` (rows, seconds), and the run returns and
+  stores a report.
+
+A resumed run that reaches the end goes round once more from the start, so
+rows that fell due behind the checkpoint are not left for the next schedule.
+
+Subclass and set ``name`` (the checkpoint key, unique per sweeper)::
+
+    class ExpiredThingSweeper(Sweeper):
+        name = "expired_things"
+
+        def queryset(self):
+            return Thing.objects.filter(expires_at__lt=self.now)
+
+Override ``process_batch`` for an ``UPDATE`` or when the model's invariants
+need more than one statement (``delete()`` overrides, signals that must fire);
+it runs inside the batch's transaction and returns the number of rows handled.
+"""
+
+import time
+
+import structlog
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from speedpycom.models.sweeper import SweeperCheckpoint
+
+logger = structlog.get_logger(__name__)
+
+
+class Sweeper:
+    """Base class; see the module docstring."""
+
+    name = None
+    batch_size = None
+    time_budget = None
+
+    def __init__(self, now=None, batch_size=None, time_budget=None):
+        self.now = now or timezone.now()
+        if batch_size is not None:
+            self.batch_size = batch_size
+        if time_budget is not None:
+            self.time_budget = time_budget
+
+    # -- configuration ------------------------------------------------
+    def get_batch_size(self):
+        if self.batch_size is not None:
+            return self.batch_size
+        return getattr(settings, "SPEEDPY_SWEEPER_BATCH_SIZE", 1000)
+
+    def get_time_budget(self):
+        """Seconds a run may take before it checkpoints and stops."""
+        if self.time_budget is not None:
+            return self.time_budget
+        return getattr(settings, "SPEEDPY_SWEEPER_TIME_BUDGET_SECONDS", 120)
+
+    # -- the work -----------------------------------------------------
+    def queryset(self):
+        """Every row that is due. Must not depend on the batch position."""
+        raise NotImplementedError
+
+    def process_batch(self, pks):
+        """Handle the rows in ``pks``; returns how many were handled."""
+        # With no signals or reverse relations on the model Django fast-deletes:
+        # one DELETE for the batch, nothing loaded into memory.
+        deleted, _ = self.queryset().filter(pk__in=pks).delete()
+        return deleted
+
+    def _next_batch(self, position, size):
+        queryset = self.queryset().order_by("pk")
+        if position:
+            queryset = queryset.filter(pk__gt=position)
+        return list(queryset.values_list("pk", flat=True)[:size])
+
+    def run(self):
+        if not self.name:
+            raise ValueError(f"{type(self).__name__} needs a name")
+        checkpoint, _ = SweeperCheckpoint.objects.get_or_create(name=self.name)
+        size = self.get_batch_size()
+        budget = self.get_time_budget()
+        position = checkpoint.position or None
+        resumed = wrap = position is not None
+
+        started = time.monotonic()
+        processed = batches = 0
+        slowest = 0.0
+        complete = False
+        while True:
+            batch_started = time.monotonic()
+            pks = self._next_batch(position, size)
+            if not pks:
+                if wrap:
+                    position, wrap = None, False
+                    continue
+                complete = True
+                break
+            with transaction.atomic():
+                handled = self.process_batch(pks)
+                position = str(pks[-1])
+                SweeperCheckpoint.objects.filter(pk=checkpoint.pk).update(
+                    position=position, updated_at=timezone.now()
+                )
+            seconds = time.monotonic() - batch_started
+            batches += 1
+            processed += handled
+            slowest = max(slowest, seconds)
+            logger.info(
+                "sweeper_batch",
+                sweeper=self.name,
+                batch=batches,
+                rows=len(pks),
+                processed=handled,
+                seconds=round(seconds, 4),
+            )
+            if len(pks) < size and not wrap:
+                complete = True
+                break
+            if time.monotonic() - started >= budget:
+                break
+
+        report = {
+            "sweeper": self.name,
+            "processed": processed,
+            "batches": batches,
+            "seconds": round(time.monotonic() - started, 4),
+            "slowest_batch_seconds": round(slowest, 4),
+            "resumed": resumed,
+            "complete": complete,
+        }
+        checkpoint.position = "" if complete else position
+        checkpoint.last_report = report
+        checkpoint.save(update_fields=["position", "last_report", "updated_at"])
+        logger.info("sweeper_finished", **report)
+        return report
+
+
+def run_sweep(task, sweeper):
+    """Run ``sweeper`` from inside ``task`` and requeue the task if it stopped early.
+
+    The requeue goes to the back of the task's queue, so a long backlog is
+    worked off in budget-sized runs interleaved with everything else. Direct
+    and eager (in-process) calls are not requeued.
+    """
+    report = sweeper.run()
+    request = task.request
+    if not report["complete"] and report["processed"] and not (request.called_directly or request.is_eager):
+        task.apply_async()
+    return report
@@ -0,0 +1,323 @@
+"""
+Celery task telemetry: queue wait, runtime and outcomes per task and queue.
+
+Receivers on Celery's signals time every task:
+
+* ``before_task_publish`` stamps the message with a ``speedpy_published_at``
+  header;
+* ``task_prerun`` records the wait (publish, or the ETA for delayed tasks, to
+  start) and starts the runtime clock;
+* ``task_postrun`` records the runtime and the outcome (succeeded, failed,
+  retried).
+
+Observations go into a process-local registry (a dict behind a lock; no I/O
+on the task path).  Worker processes add their registry into one Redis hash
+(``speedpy:celery:metrics``) at most every ``SPEEDPY_TASK_METRICS_FLUSH_SECONDS``
+and at shutdown, so the numbers from every worker and every child process
+meet in one place.  ``snapshot()`` merges that hash with the unflushed local
+registry.  ``GET /metrics/celery/`` renders it in the Prometheus text format,
+and ``manage.py celery_metrics`` prints it as a table for sizing worker pools.
+
+Wait times compare the publisher's clock with the worker's; keep hosts on NTP.
+Without ``SPEEDPY_METRICS_REDIS_URL`` (see ``speedpycom.metrics``) only the
+current process's numbers are visible, which is what eager mode needs.
+"""
+
+import threading
+import time
+from datetime import datetime
+
+import structlog
+from celery.signals import before_task_publish, task_postrun, task_prerun, worker_process_shutdown
+from django.conf import settings
+
+from speedpycom.metrics import get_client, label as _label, number as _number
+
+logger = structlog.get_logger(__name__)
+
+REDIS_KEY = "speedpy:celery:metrics"
+PUBLISHED_AT_HEADER = "speedpy_published_at"
+
+#: Histogram upper bounds in seconds, shared by wait and runtime.
+BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600,
+)
+OUTCOMES = ("succeeded", "failed", "retried")
+_STATE_OUTCOMES = {"SUCCESS": "succeeded", "FAILURE": "failed", "RETRY": "retried"}
+
+
+class Histogram:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        index = 0
+        while index < len(BUCKETS) and value > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.sum += other.sum
+        self.count += other.count
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the ``q`` quantile, or None."""
+        if not self.count:
+            return None
+        target = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= target:
+                return BUCKETS[index] if index < len(BUCKETS) else float("inf")
+        return float("inf")
+
+
+class TaskStats:
+    __slots__ = ("wait", "runtime", "outcomes")
+
+    def __init__(self):
+        self.wait = Histogram()
+        self.runtime = Histogram()
+        self.outcomes = dict.fromkeys(OUTCOMES, 0)
+
+    def merge(self, other):
+        self.wait.merge(other.wait)
+        self.runtime.merge(other.runtime)
+        for outcome, count in other.outcomes.items():
+            self.outcomes[outcome] += count
+
+    def fields(self):
+        """Flat ``{name: number}`` of the counters, as stored in Redis."""
+        values = {outcome: count for outcome, count in self.outcomes.items()}
+        for name in ("wait", "runtime"):
+            histogram = getattr(self, name)
+            values[f"{name}_sum"] = histogram.sum
+            values[f"{name}_count"] = histogram.count
+            for index, count in enumerate(histogram.counts):
+                values[f"{name}_b{index}"] = count
+        return values
+
+    def set_field(self, name, value):
+        if name in self.outcomes:
+            self.outcomes[name] = int(float(value))
+            return
+        histogram_name, _, part = name.partition("_")
+        histogram = getattr(self, histogram_name, None)
+        if not isinstance(histogram, Histogram):
+            return
+        if part == "sum":
+            histogram.sum = float(value)
+        elif part == "count":
+            histogram.count = int(float(value))
+        elif part.startswith("b") and part[1:].isdigit() and int(part[1:]) < len(histogram.counts):
+            histogram.counts[int(part[1:])] = int(float(value))
+
+
+class Registry:
+    """Per-process stats keyed by ``(task, queue)``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._running = {}
+        self._flushed_at = time.monotonic()
+
+    def _get(self, task, queue):
+        key = (task, queue)
+        stats = self._stats.get(key)
+        if stats is None:
+            stats = self._stats[key] = TaskStats()
+        return stats
+
+    def started(self, task_id, task, queue, wait):
+        with self._lock:
+            self._running[task_id] = time.perf_counter()
+            if wait is not None:
+                self._get(task, queue).wait.observe(max(wait, 0.0))
+
+    def finished(self, task_id, task, queue, outcome):
+        with self._lock:
+            started = self._running.pop(task_id, None)
+            stats = self._get(task, queue)
+            if started is not None:
+                stats.runtime.observe(time.perf_counter() - started)
+            if outcome:
+                stats.outcomes[outcome] += 1
+
+    def drain(self):
+        """Return and clear the collected stats."""
+        with self._lock:
+            stats, self._stats = self._stats, {}
+            self._flushed_at = time.monotonic()
+        return stats
+
+    def copy(self):
+        with self._lock:
+            copied = {}
+            for key, stats in self._stats.items():
+                copied[key] = TaskStats()
+                copied[key].merge(stats)
+        return copied
+
+    def flush_due(self, interval):
+        return time.monotonic() - self._flushed_at >= interval
+
+
+registry = Registry()
+
+
+def enabled():
+    return getattr(settings, "SPEEDPY_TASK_METRICS_ENABLED", True)
+
+
+def flush():
+    """Add this process's stats to the shared Redis hash. Returns True if sent."""
+    client = get_client()
+    if client is None:
+        return False
+    stats = registry.drain()
+    if not stats:
+        return True
+    try:
+        pipe = client.pipeline(transaction=False)
+        for (task, queue), task_stats in stats.items():
+            for name, value in task_stats.fields().items():
+                if not value:
+                    continue
+                field = f"{task}\t{queue}\t{name}"
+                if isinstance(value, float):
+                    pipe.hincrbyfloat(REDIS_KEY, field, value)
+                else:
+                    pipe.hincrby(REDIS_KEY, field, value)
+        pipe.execute()
+    except Exception:
+        logger.warning("task_metrics_flush_failed", exc_info=True)
+        return False
+    return True
+
+
+def snapshot():
+    """``{(task, queue): TaskStats}`` across all workers (via Redis) and this process."""
+    merged = registry.copy()
+    client = get_client()
+    if client is None:
+        return merged
+    try:
+        raw = client.hgetall(REDIS_KEY)
+    except Exception:
+        logger.warning("task_metrics_read_failed", exc_info=True)
+        return merged
+    shared = {}
+    for field, value in raw.items():
+        task, queue, name = field.decode().split("\t")
+        stats = shared.get((task, queue))
+        if stats is None:
+            stats = shared[(task, queue)] = TaskStats()
+        stats.set_field(name, value.decode())
+    for key, stats in shared.items():
+        merged.setdefault(key, TaskStats()).merge(stats)
+    return merged
+
+
+def reset():
+    """Clear the shared and local stats."""
+    registry.drain()
+    client = get_client()
+    if client is not None:
+        client.delete(REDIS_KEY)
+
+
+def render_prometheus(stats=None):
+    """The stats in the Prometheus text exposition format (version 0.0.4)."""
+    stats = snapshot() if stats is None else stats
+    keys = sorted(stats)
+    lines = [
+        "# HELP speedpy_celery_tasks_total Finished task runs by outcome.",
+        "# TYPE speedpy_celery_tasks_total counter",
+    ]
+    for task, queue in keys:
+        for outcome, count in stats[(task, queue)].outcomes.items():
+            lines.append(
+                f'speedpy_celery_tasks_total{{task="{_label(task)}",queue="{_label(queue)}",'
+                f'outcome="{outcome}"}} {count}'
+            )
+    for name, help_text in (
+        ("wait", "Time from publish (or ETA) until a worker started the task."),
+        ("runtime", "Time the task body ran."),
+    ):
+        metric = f"speedpy_celery_task_{name}_seconds"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} histogram")
+        for task, queue in keys:
+            histogram = getattr(stats[(task, queue)], name)
+            labels = f'task="{_label(task)}",queue="{_label(queue)}"'
+            cumulative = 0
+            for bound, count in zip((*BUCKETS, float("inf")), histogram.counts):
+                cumulative += count
+                lines.append(f'{metric}_bucket{{{labels},le="{_number(bound)}"}} {cumulative}')
+            lines.append(f"{metric}_sum{{{labels}}} {_number(float(histogram.sum))}")
+            lines.append(f"{metric}_count{{{labels}}} {histogram.count}")
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Signal receivers
+# ---------------------------------------------------------------------------
+
+def _queue(task):
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or delivery_info.get("queue") or "eager"
+
+
+def _wait_seconds(task):
+    request = task.request
+    published_at = request.get(PUBLISHED_AT_HEADER)
+    if published_at is None:
+        published_at = (request.get("headers") or {}).get(PUBLISHED_AT_HEADER)
+    if published_at is None:
+        return None
+    start = float(published_at)
+    eta = request.get("eta")
+    if eta:
+        # A delayed task is not waiting before its ETA.
+        try:
+            eta = datetime.fromisoformat(eta) if isinstance(eta, str) else eta
+            start = max(start, eta.timestamp())
+        except (TypeError, ValueError):
+            pass
+    return time.time() - start
+
+
+@before_task_publish.connect(dispatch_uid="speedpy_task_metrics_publish")
+def _stamp_published_at(sender=None, headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault(PUBLISHED_AT_HEADER, time.time())
+
+
+@task_prerun.connect(dispatch_uid="speedpy_task_metrics_prerun")
+def _task_started(sender=None, task_id=None, task=None, **kwargs):
+    if task is None or not enabled():
+        return
+    registry.started(task_id, task.name, _queue(task), _wait_seconds(task))
+
+
+@task_postrun.connect(dispatch_uid="speedpy_task_metrics_postrun")
+def _task_finished(sender=None, task_id=None, task=None, state=None, **kwargs):
+    if task is None or not enabled():
+        return
+    registry.finished(task_id, task.name, _queue(task), _STATE_OUTCOMES.get(state))
+    if registry.flush_due(getattr(settings, "SPEEDPY_TASK_METRICS_FLUSH_SECONDS", 10)):
+        flush()
+
+
+@worker_process_shutdown.connect(dispatch_uid="speedpy_task_metrics_shutdown")
+def _flush_on_shutdown(**kwargs):
+    flush()
@@ -26,3 +26,11 @@ def purge_unconfirmed_accounts():
         if not report["enabled"]
         else f"Purged {report['purged']} account(s), {report['failed']} failed"
     )
+
+
+@shared_task(name="purge_expired_idempotency_records")
+def purge_expired_idempotency_records():
+    """Delete Idempotency-Key records past their ``expires_at``, in batches."""
+    from speedpycom.services.idempotency import purge_expired_records
+
+    return f"Purged {purge_expired_records()} idempotency record(s)"
@@ -0,0 +1,103 @@
+"""Tests for the API benchmark package and ``manage.py api_benchmark``."""
+
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from mainapp.models import Team, TeamMembership
+from speedpycom.benchmark import dataset, report, runner
+from usermodel.models import User
+
+SMALL = {"users": 6, "teams": 2, "endpoints": 2, "deliveries": 5, "access_logs": 10, "jobs": 3}
+
+
+class DatasetTests(TestCase):
+
+    def test_builds_the_requested_population(self):
+        data = dataset.build_dataset(**SMALL)
+        counts = data.counts()
+        self.assertEqual(counts["users"], 6)
+        self.assertEqual(counts["teams"], 2)
+        # The principal is in both teams; the other five are spread over them.
+        self.assertEqual(counts["memberships"], 7)
+        self.assertEqual(counts["webhook_deliveries"], 2 * 2 * 5)
+        self.assertEqual(counts["access_logs"], 10)
+        self.assertEqual(counts["jobs"], 3)
+
+    def test_clear_removes_only_benchmark_rows(self):
+        real = User.objects.create_user(email="real@example.com", password="pass123")
+        # Slugs are the owner's to pick; this one is not the benchmark's.
+        club = Team.objects.create(name="Bench press club", slug="bench-press-club")
+        TeamMembership.objects.create(team=club, user=real, role="owner")
+        data = dataset.build_dataset(**SMALL)
+        self.assertEqual(data.counts()["teams"], 2)
+
+        self.assertEqual(dataset.clear_dataset(), 6)
+        self.assertEqual(
+            list(Team.objects.filter(slug__startswith=dataset.TEAM_SLUG_PREFIX)), [club]
+        )
+        self.assertTrue(User.objects.filter(email="real@example.com").exists())
+
+    def test_rejects_an_empty_dataset(self):
+        with self.assertRaises(ValueError):
+            dataset.build_dataset(teams=0)
+
+
+class RunnerTests(TestCase):
+
+    def test_every_scenario_succeeds_under_every_auth_method(self):
+        data = dataset.build_dataset(**SMALL)
+        transport = runner.InProcessTransport()
+        for name, path in runner.scenario_paths(data):
+            for method in dataset.AUTH_METHODS:
+                with self.subTest(endpoint=name, auth=method):
+                    summary = runner.run_scenario(transport, path, data.authorization(method), 2)
+                    self.assertEqual(summary["status_counts"], {"200": 2})
+                    self.assertEqual(summary["errors"], 0)
+
+    def test_summary_percentiles(self):
+        summary = runner.summarize([i / 1000 for i in range(1, 101)], {"200": 99, "429": 1}, 2.0)
+        self.assertEqual(summary["requests"], 100)
+        self.assertEqual(summary["errors"], 1)
+        self.assertEqual(summary["rps"], 50.0)
+        self.assertEqual(summary["latency_ms"]["p50"], 50.0)
+        self.assertEqual(summary["latency_ms"]["p99"], 99.0)
+        self.assertEqual(summary["latency_ms"]["max"], 100.0)
+
+
+class ReportTests(TestCase):
+
+    def _report(self, rps, p95):
+        row = {"endpoint": "me", "auth": "pat", "path": "/api/v1/me/", "rps": rps, "latency_ms": {"p95": p95}}
+        return report.build_report([row], {"users": 10}, {"users": 10}, {"server": "inprocess"})
+
+    def test_compare(self):
+        row, = report.compare(self._report(100.0, 10.0), self._report(125.0, 8.0))
+        self.assertEqual(row["rps_change_pct"], 25.0)
+        self.assertEqual(row["p95_change_pct"], -20.0)
+        self.assertEqual(report.mismatched_context(self._report(1, 1), self._report(2, 2)), [])
+
+    def test_command_writes_a_diffable_report(self):
+        fd, path = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, path)
+        out = StringIO()
+        call_command(
+            "api_benchmark",
+            *[f"--{name.replace('_', '-')}={value}" for name, value in SMALL.items()],
+            "--requests=2", "--warmup=0", "--endpoint=me", "--endpoint=job_status",
+            f"--output={path}",
+            stdout=out,
+            stderr=StringIO(),
+        )
+        with open(path) as fh:
+            written = json.load(fh)
+        self.assertEqual(written["format"], report.FORMAT_VERSION)
+        self.assertEqual(len(written["results"]), 2 * len(dataset.AUTH_METHODS))
+        self.assertEqual({row["errors"] for row in written["results"]}, {0})
+        self.assertEqual(written["dataset"]["params"]["users"], 6)
+        self.assertFalse(User.objects.filter(email__endswith=f"@{dataset.EMAIL_DOMAIN}").exists())
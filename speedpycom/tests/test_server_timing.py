@@ -0,0 +1,85 @@
+"""Server-Timing header, per-route aggregates and the /metrics/http/ endpoint."""
+
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from speedpycom.api import timing
+from usermodel.models import User
+
+LOCMEM = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def _phases(header):
+    return {part.split(";")[0].strip(): part for part in header.split(",")}
+
+
+@override_settings(
+    SPEEDPY_SERVER_TIMING_SAMPLE_RATE=1.0,
+    SPEEDPY_HTTP_METRICS_FLUSH_SECONDS=3600,
+    SPEEDPY_SLOW_REQUEST_MS=60000,
+)
+class ServerTimingTests(TestCase):
+    def setUp(self):
+        timing.routes.drain()
+        self.addCleanup(timing.routes.drain)
+        patcher = mock.patch.object(timing, "get_client", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(email="alice@example.com", password="pass123")
+        self.client.force_login(self.user)
+
+    def test_header_breaks_down_an_api_request(self):
+        response = self.client.get("/api/v1/teams/")
+        self.assertEqual(response.status_code, 200)
+        phases = _phases(response["Server-Timing"])
+        self.assertRegex(phases["db"], r'^db;dur=[\d.]+;desc="[1-9]\d* queries"$')
+        for phase in ("auth", "serialize", "render", "view", "total"):
+            self.assertIn(phase, phases)
+
+    @override_settings(SPEEDPY_SERVER_TIMING_SAMPLE_RATE=0)
+    def test_unsampled_requests_have_no_header(self):
+        response = self.client.get("/api/v1/teams/")
+        self.assertNotIn("Server-Timing", response)
+        self.assertEqual(timing.snapshot()[0], {})
+
+    @override_settings(CACHES=LOCMEM)
+    def test_counts_cache_hits_and_misses(self):
+        cache.set("known", 1)
+        timer = timing.RequestTimer()
+        with timing.ExitStack() as stack:
+            timing._instrument_cache(stack, timing.caches["default"], timer)
+            self.assertEqual(cache.get("known"), 1)
+            self.assertEqual(cache.get("unknown", "fallback"), "fallback")
+            self.assertEqual(cache.get_many(["known", "other"]), {"known": 1})
+        self.assertEqual((timer.cache_hits, timer.cache_misses), (2, 2))
+        self.assertIn('desc="2 hits, 2 misses"', timer.header())
+        self.assertNotIn("get", vars(timing.caches["default"]))  # restored
+
+    def test_aggregates_per_route_with_slowest_request_id(self):
+        self.client.get("/api/v1/teams/", HTTP_X_REQUEST_ID="first-request")
+        self.client.get("/api/v1/teams/", HTTP_X_REQUEST_ID="second-request")
+        sums, slowest = timing.snapshot()
+        route = sums[("GET", "/api/v1/teams/")]
+        self.assertEqual(route["count"], 2)
+        self.assertGreater(route["db_queries"], 0)
+        self.assertIn(slowest[("GET", "/api/v1/teams/")][1], ("first-request", "second-request"))
+
+    @override_settings(SPEEDPY_SLOW_REQUEST_MS=0)
+    def test_slow_requests_are_logged(self):
+        with mock.patch.object(timing.logger, "warning") as warning:
+            self.client.get("/api/v1/teams/")
+        event, = [call for call in warning.call_args_list if call.args == ("slow_request",)]
+        self.assertEqual(event.kwargs["route"], "/api/v1/teams/")
+
+    @override_settings(SPEEDPY_METRICS_TOKEN="s3cret")
+    def test_metrics_endpoint(self):
+        self.client.get("/api/v1/teams/", HTTP_X_REQUEST_ID="abc-123")
+        response = self.client.get("/metrics/http/", HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('speedpy_http_sampled_requests_total{method="GET",route="/api/v1/teams/"} 1', body)
+        self.assertIn('request_id="abc-123"', body)
+        self.assertIn('phase="db"', body)
+        self.assertEqual(self.client.get("/metrics/http/").status_code, 401)
@@ -0,0 +1,177 @@
+"""Celery task telemetry: recording, sharing through Redis, and exposition."""
+
+import io
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest import mock
+
+from celery import states
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from speedpycom import task_metrics
+
+
+class FakeRedis:
+    def __init__(self):
+        self.hash = {}
+
+    def pipeline(self, transaction=True):
+        return self
+
+    def execute(self):
+        pass
+
+    def hincrby(self, key, field, amount):
+        self.hash[field] = self.hash.get(field, 0) + amount
+
+    def hincrbyfloat(self, key, field, amount):
+        self.hash[field] = self.hash.get(field, 0.0) + amount
+
+    def hgetall(self, key):
+        return {field.encode(): str(value).encode() for field, value in self.hash.items()}
+
+    def delete(self, key):
+        self.hash.clear()
+
+
+def a_task(name="deliver_webhook", queue="webhooks", **request):
+    request.setdefault("delivery_info", {"routing_key": queue})
+    return SimpleNamespace(name=name, request=SimpleNamespace(get=request.get, **request))
+
+
+def run(task, task_id, state=states.SUCCESS):
+    task_metrics._task_started(task_id=task_id, task=task)
+    task_metrics._task_finished(task_id=task_id, task=task, state=state)
+
+
+class TelemetryTestBase(SimpleTestCase):
+    def setUp(self):
+        task_metrics.registry.drain()
+        self.addCleanup(task_metrics.registry.drain)
+        self.redis = FakeRedis()
+        patcher = mock.patch.object(task_metrics, "get_client", return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@override_settings(SPEEDPY_TASK_METRICS_FLUSH_SECONDS=3600)
+class RecordingTests(TelemetryTestBase):
+    def test_publish_stamps_header_once(self):
+        headers = {}
+        task_metrics._stamp_published_at(headers=headers)
+        stamped = headers[task_metrics.PUBLISHED_AT_HEADER]
+        task_metrics._stamp_published_at(headers=headers)
+        self.assertEqual(headers[task_metrics.PUBLISHED_AT_HEADER], stamped)
+
+    def test_wait_runtime_and_outcomes_per_task_and_queue(self):
+        task = a_task(speedpy_published_at=time.time() - 3)
+        run(task, "1")
+        run(task, "2", state=states.FAILURE)
+        run(task, "3", state=states.RETRY)
+        run(a_task("send_role_change_email", "email"), "4")
+
+        stats = task_metrics.snapshot()
+        webhook = stats[("deliver_webhook", "webhooks")]
+        self.assertEqual(webhook.outcomes, {"succeeded": 1, "failed": 1, "retried": 1})
+        self.assertEqual((webhook.wait.count, webhook.runtime.count), (3, 3))
+        self.assertEqual(webhook.wait.quantile(0.5), 5)  # ~3s falls in the (2.5, 5] bucket
+        # Nothing was published through the broker, so no wait is known.
+        self.assertEqual(stats[("send_role_change_email", "email")].wait.count, 0)
+
+    def test_wait_is_measured_from_eta(self):
+        now = time.time()
+        eta = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        run(a_task(speedpy_published_at=now - 600, eta=eta), "1")
+        wait = task_metrics.registry.copy()[("deliver_webhook", "webhooks")].wait
+        self.assertLessEqual(wait.sum, 1)
+
+    @override_settings(SPEEDPY_TASK_METRICS_ENABLED=False)
+    def test_disabled(self):
+        run(a_task(), "1")
+        self.assertEqual(task_metrics.snapshot(), {})
+
+
+class SharingTests(TelemetryTestBase):
+    @override_settings(SPEEDPY_TASK_METRICS_FLUSH_SECONDS=0)
+    def test_workers_add_into_one_hash(self):
+        run(a_task(), "1")  # flushes: interval is 0
+        self.assertEqual(task_metrics.registry.copy(), {})
+        run(a_task(), "2")
+        stats = task_metrics.snapshot()[("deliver_webhook", "webhooks")]
+        self.assertEqual((stats.outcomes["succeeded"], stats.runtime.count), (2, 2))
+
+    def test_reset(self):
+        run(a_task(), "1")
+        task_metrics.flush()
+        task_metrics.reset()
+        self.assertEqual(task_metrics.snapshot(), {})
+
+    @override_settings(SPEEDPY_TASK_METRICS_FLUSH_SECONDS=3600)
+    def test_without_redis_reads_this_process(self):
+        with mock.patch.object(task_metrics, "get_client", return_value=None):
+            run(a_task(), "1")
+            self.assertFalse(task_metrics.flush())
+            self.assertIn(("deliver_webhook", "webhooks"), task_metrics.snapshot())
+
+
+@override_settings(SPEEDPY_TASK_METRICS_FLUSH_SECONDS=3600)
+class ExpositionTests(TelemetryTestBase):
+    def test_prometheus_format(self):
+        run(a_task(speedpy_published_at=time.time()), "1")
+        text = task_metrics.render_prometheus()
+        self.assertIn("# TYPE speedpy_celery_task_wait_seconds histogram", text)
+        self.assertIn(
+            'speedpy_celery_tasks_total{task="deliver_webhook",queue="webhooks",outcome="succeeded"} 1',
+            text,
+        )
+        self.assertIn(
+            'speedpy_celery_task_runtime_seconds_bucket{task="deliver_webhook",queue="webhooks",le="+Inf"} 1',
+            text,
+        )
+        self.assertIn('speedpy_celery_task_runtime_seconds_count{task="deliver_webhook",queue="webhooks"} 1', text)
+
+    def test_command_table(self):
+        run(a_task(), "1")
+        out = io.StringIO()
+        call_command("celery_metrics", stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith("task"))
+        self.assertTrue(lines[1].startswith("deliver_webhook"))
+
+    def test_command_queue_filter_and_reset(self):
+        run(a_task(), "1")
+        out = io.StringIO()
+        call_command("celery_metrics", "--queue", "email", "--reset", stdout=out)
+        self.assertIn("No task runs recorded yet.", out.getvalue())
+        self.assertEqual(task_metrics.snapshot(), {})
+
+
+class EndpointTests(TelemetryTestBase, TestCase):
+    url = "/metrics/celery/"
+
+    def test_disabled_without_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+    @override_settings(SPEEDPY_METRICS_TOKEN="s3cret")
+    def test_requires_bearer_token(self):
+        self.assertEqual(self.client.get(self.url).status_code, 401)
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer wrong")
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SPEEDPY_METRICS_TOKEN="s3cret", SPEEDPY_TASK_METRICS_FLUSH_SECONDS=3600)
+    def test_serves_prometheus_text(self):
+        run(a_task(), "1")
+        response = self.client.get(self.url, HTTP_AUTHORIZATION="Bearer s3cret")
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertIn(b"speedpy_celery_tasks_total", response.content)
+
+    @override_settings(SPEEDPY_TASK_METRICS_FLUSH_SECONDS=3600)
+    def test_real_task_run_is_recorded(self):
+        from speedpycom.tasks import purge_expired_idempotency_records
+
+        purge_expired_idempotency_records.apply()
+        stats = task_metrics.snapshot()[("purge_expired_idempotency_records", "eager")]
+        self.assertEqual(stats.outcomes["succeeded"], 1)
@@ -8,6 +8,7 @@ from django.http import HttpResponse
 from django.utils.crypto import constant_time_compare
 from django.views.decorators.http import require_GET
 
+from speedpycom.metrics import metrics_response
 from speedpycom.og_utils import create_og_image
 
 OG_IMAGE_SALT = "og-image"
@@ -57,3 +58,22 @@ def default_og_image(request):
     response = HttpResponse(png_bytes, content_type="image/png")
     response["Cache-Control"] = f"public, max-age={OG_IMAGE_CACHE_SECONDS}"
     return response
+
+
+@require_GET
+def celery_metrics(request):
+    """Celery task telemetry in the Prometheus text format (speedpycom/task_metrics.py)."""
+    from speedpycom import task_metrics
+
+    return metrics_response(request, task_metrics.render_prometheus)
+
+
+@require_GET
+def http_metrics(request):
+    """Per-route request timings (speedpycom/api/timing.py) and lazy context value counts in the Prometheus text format."""
+    from project.context_processors import render_context_value_metrics
+    from speedpycom.api import timing
+
+    return metrics_response(
+        request, lambda: timing.render_prometheus() + render_context_value_metrics()
+    )
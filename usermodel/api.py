@@ -4,6 +4,9 @@ from rest_framework.exceptions import AuthenticationFailed
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework.views import APIView
+from speedpycom.api.conditional import ConditionalGetMixin
+from speedpycom.api.exports import StreamingExportView, export_parameters, export_responses
+from speedpycom.api.fieldsets import SparseFieldsetMixin, fieldset_parameters, plan_queryset
 from speedpycom.api.permissions import HasScope
 from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
@@ -11,10 +14,11 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 from usermodel.mfa import user_has_totp, verify_totp
+from usermodel.models import ApiAccessLog
 from usermodel.tokens import email_verified
 
 
-class CurrentUserSerializer(serializers.Serializer):
+class CurrentUserSerializer(SparseFieldsetMixin, serializers.Serializer):
     id = serializers.UUIDField(read_only=True)
     email = serializers.EmailField(read_only=True)
     first_name = serializers.CharField(read_only=True)
@@ -69,7 +73,7 @@ class UpdateProfileSerializer(serializers.Serializer):
         return user
 
 
-class CurrentUserAPIView(APIView):
+class CurrentUserAPIView(ConditionalGetMixin, APIView):
     permission_classes = [HasScope]
 
     def get_required_scopes(self):
@@ -81,18 +85,38 @@ class CurrentUserAPIView(APIView):
     def required_scopes(self):
         return self.get_required_scopes()
 
+    def get_validator(self, request, *args, **kwargs):
+        # User has no updated_at; the already-loaded row is the validator, so a
+        # 304 costs no query at all.
+        user = request.user
+        return (
+            user.pk,
+            user.email,
+            user.first_name,
+            user.last_name,
+            user.is_email_confirmed,
+            user.profile_picture.name if user.profile_picture else "",
+            user.profile_picture_thumbnail.name if user.profile_picture_thumbnail else "",
+            user.date_joined,
+        )
+
     @extend_schema(
         tags=["user"],
         responses={
             200: CurrentUserSerializer,
+            304: OpenApiResponse(description="Not modified since the `If-None-Match` ETag."),
             403: OpenApiResponse(description="Authentication credentials were not provided."),
         },
         operation_id="getCurrentUser",
         summary="Get the authenticated user",
         description=(
             "Return the profile of the currently authenticated user. "
+            "Supports conditional requests: send the `ETag` back as "
+            "`If-None-Match` to get 304 Not Modified when nothing changed. "
+            "Use `fields` to pick fields. "
             "Requires the `read:profile` scope."
         ),
+        parameters=fieldset_parameters(CurrentUserSerializer),
         examples=[
             OpenApiExample(
                 "Current user",
@@ -174,6 +198,56 @@ class CurrentUserAPIView(APIView):
         return changed
 
 
+class ApiAccessLogSerializer(SparseFieldsetMixin, serializers.Serializer):
+    id = serializers.IntegerField(read_only=True)
+    timestamp = serializers.DateTimeField(read_only=True)
+    method = serializers.CharField(read_only=True)
+    path = serializers.CharField(read_only=True)
+    status_code = serializers.IntegerField(read_only=True, allow_null=True)
+    token_type = serializers.CharField(read_only=True)
+    token_id = serializers.CharField(read_only=True)
+    scopes = serializers.ListField(child=serializers.CharField(), read_only=True)
+    ip_truncated = serializers.CharField(read_only=True)
+    request_id = serializers.CharField(read_only=True)
+    user_agent = serializers.CharField(read_only=True)
+
+
+class AccessLogExportView(StreamingExportView):
+    """Stream the authenticated user's API access log."""
+
+    serializer_class = ApiAccessLogSerializer
+    permission_classes = [HasScope]
+    required_scopes = ["read:profile"]
+    # Served by the (user, -timestamp) index.
+    keyset = ("timestamp", "id")
+    export_name = "access-logs"
+
+    def get_queryset(self):
+        queryset = ApiAccessLog.objects.filter(user=self.request.user)
+        return plan_queryset(queryset, self.serializer_class, self.request)
+
+    @extend_schema(
+        tags=["user"],
+        operation_id="exportAccessLogs",
+        summary="Export your API access log",
+        description=(
+            "Stream every logged API request made with your credentials, oldest first, "
+            "as NDJSON (default) or CSV. Entries exist only while "
+            "`SPEEDPY_API_ACCESS_LOG_ENABLED` is on. "
+            "Each row ends with a `_cursor`; pass the last one received as `cursor` to resume. "
+            "Requires the `read:profile` scope."
+        ),
+        parameters=[*fieldset_parameters(ApiAccessLogSerializer), *export_parameters()],
+        responses={
+            **export_responses(),
+            400: OpenApiResponse(description="Invalid cursor or fields."),
+            403: OpenApiResponse(description="Authentication credentials were not provided."),
+        },
+    )
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
+
 class RefreshTokenSerializer(serializers.Serializer):
     refresh = serializers.CharField()
 